@@ -6,7 +6,7 @@ These endpoints are used by the content generation pipeline, not by end users.
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import Dict
+from typing import Dict, Literal
 
 from app.core.database import get_db
 from app.schemas.cache import (
@@ -193,10 +193,19 @@ async def store_cache(
     Get cache performance statistics.
 
     Useful for monitoring cache hit rates and optimizing cache strategy.
+
+    **Scope:**
+    - cluster (default): summed over all instances (Redis counters, flushed
+      every CACHE_STATS_FLUSH_SECONDS)
+    - instance: only the instance serving this request
+
+    Includes hit rates per tier and per key family, and per-tier lookup
+    latency histograms.
     """,
     status_code=status.HTTP_200_OK,
 )
 async def get_cache_stats(
+    scope: Literal["cluster", "instance"] = "cluster",
     cache_service: CacheService = Depends(get_cache_service),
     # admin_user: dict = Depends(require_admin)  # Uncomment for admin-only access
 ):
@@ -204,13 +213,17 @@ async def get_cache_stats(
     Get cache statistics.
 
     Args:
+        scope: "cluster" (all instances) or "instance"
         cache_service: Cache service dependency
 
     Returns:
         CacheStatsResponse with cache statistics
     """
     try:
-        stats = cache_service.get_cache_stats()
+        if scope == "cluster":
+            stats = await cache_service.get_cluster_cache_stats()
+        else:
+            stats = cache_service.get_instance_cache_stats()
         return CacheStatsResponse(**stats)
 
     except Exception as e:
@@ -17,18 +17,26 @@ from slowapi.errors import RateLimitExceeded
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# Shared Redis storage so limits hold across instances (RATE_LIMIT_STORAGE_URI,
+# else REDIS_URL); memory:// only when neither is configured (local dev).
+# Redis keys expire with their window, so storage stays bounded.
+RATE_LIMIT_STORAGE_URI = os.getenv(
+    "RATE_LIMIT_STORAGE_URI", os.getenv("REDIS_URL", "memory://")
+)
+
 # Initialize rate limiter
-# Uses in-memory storage by default (suitable for single-instance deployments)
-# Can be upgraded to Redis-backed storage for distributed deployments
 limiter = Limiter(
     key_func=get_remote_address,
     default_limits=["100/minute"],  # Global default
-    storage_uri="memory://",
+    storage_uri=RATE_LIMIT_STORAGE_URI,
     strategy="fixed-window",  # Simple and predictable
     headers_enabled=True,  # Include rate limit headers in responses
+    # Per-instance limits while Redis is unreachable, instead of errors
+    in_memory_fallback_enabled=RATE_LIMIT_STORAGE_URI != "memory://",
 )
 
 
@@ -108,17 +116,3 @@ def get_rate_limit_config(endpoint_type: str) -> str:
     }
 
     return config_map.get(endpoint_type, "100/minute")  # Default fallback
-
-
-# Future Enhancement: Redis-backed rate limiting
-# When scaling to multiple instances, update storage_uri to:
-# storage_uri = "redis://host:port"
-#
-# This will enable distributed rate limiting across all instances
-# while maintaining the same API and behavior.
-#
-# Migration steps:
-# 1. Set up Redis instance (Cloud Memorystore on GCP)
-# 2. Update storage_uri in limiter initialization
-# 3. No code changes needed - drop-in replacement
-# 4. Test thoroughly before deploying to production
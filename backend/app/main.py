@@ -3,18 +3,20 @@ Vividly API - Main FastAPI application.
 
 FastAPI application with CORS, rate limiting, middleware, and error handling.
 """
+import asyncio
+
 from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
 from app.core.config import settings
 from app.core.logging import setup_logging, get_logger
 from app.api.v1.api import api_router
+from app.core.rate_limit import limiter
 from app.middleware.security import (
     SecurityHeadersMiddleware,
     BruteForceProtectionMiddleware,
@@ -28,10 +30,6 @@ setup_logging()
 logger = get_logger(__name__)
 
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
-
-
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
@@ -164,6 +162,23 @@ async def startup_event():
     logger.info(f"CORS origins: {settings.CORS_ORIGINS}")
     logger.info(f"Database: Connected")
 
+    # L1 cache invalidations from other instances (CACHE_L1_ENABLED)
+    from app.services.cache_metrics import run_cache_metrics_flusher
+    from app.services.cache_service import (
+        get_async_redis,
+        get_l1_cache,
+        listen_for_invalidations,
+    )
+
+    if get_l1_cache() is not None:
+        app.state.l1_invalidation_task = asyncio.create_task(listen_for_invalidations())
+
+    # Cluster-wide cache stats: flush this instance's counters to Redis
+    redis_client = get_async_redis(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    app.state.cache_metrics_task = asyncio.create_task(
+        run_cache_metrics_flusher(redis_client)
+    )
+
 
 # Shutdown event
 @app.on_event("shutdown")
@@ -171,6 +186,22 @@ async def shutdown_event():
     """Run on application shutdown."""
     logger.info(f"{settings.APP_NAME} shutting down...")
 
+    # Cancelling the flusher flushes pending cache stats one last time;
+    # wait for both tasks so that happens before the pools close
+    for name in ("l1_invalidation_task", "cache_metrics_task"):
+        task = getattr(app.state, name, None)
+        if task is None:
+            continue
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    from app.services.cache_service import close_async_redis
+
+    await close_async_redis()
+
 
 if __name__ == "__main__":
     import uvicorn
@@ -10,9 +10,9 @@ Following Andrew Ng's "Build it right" principle - production-ready from day one
 """
 import uuid
 import time
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from typing import Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.logging import set_request_context, clear_request_context, get_logger
 from app.core.metrics import get_metrics_client
@@ -21,7 +21,7 @@ logger = get_logger(__name__)
 metrics = get_metrics_client()
 
 
-class LoggingContextMiddleware(BaseHTTPMiddleware):
+class LoggingContextMiddleware:
     """
     Middleware that automatically sets logging context for all requests.
 
@@ -34,27 +34,41 @@ class LoggingContextMiddleware(BaseHTTPMiddleware):
 
     This ensures all logs within a request are automatically enriched with
     contextual metadata, making debugging and monitoring much easier.
+
+    Pure ASGI (no BaseHTTPMiddleware): the endpoint runs in the same task,
+    so it sees the context variables, and response bodies (e.g. SSE
+    streams) pass through unbuffered. Completion is logged when the
+    response starts, so duration is time to first byte.
     """
 
-    async def dispatch(self, request: Request, call_next: Callable):
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """Process request and set up logging context."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # Capture start time for metrics
         start_time = time.time()
+        method = scope["method"]
+        path = scope["path"]
+        headers = Headers(scope=scope)
 
         # Generate unique request ID
         request_id = str(uuid.uuid4())
 
         # Get correlation ID from headers (for distributed tracing)
-        correlation_id = request.headers.get("X-Correlation-ID")
+        correlation_id = headers.get("X-Correlation-ID")
         if not correlation_id:
-            correlation_id = request.headers.get("X-Request-ID", request_id)
+            correlation_id = headers.get("X-Request-ID", request_id)
 
         # Extract user_id from request state (set by authentication middleware)
         user_id = None
-        if hasattr(request.state, "user"):
-            user = request.state.user
-            if hasattr(user, "id"):
-                user_id = str(user.id)
+        user = scope.get("state", {}).get("user")
+        if hasattr(user, "id"):
+            user_id = str(user.id)
 
         # Set logging context for this request
         set_request_context(
@@ -62,67 +76,76 @@ class LoggingContextMiddleware(BaseHTTPMiddleware):
         )
 
         # Log request start
+        client = scope.get("client")
         logger.info(
-            f"{request.method} {request.url.path}",
+            f"{method} {path}",
             extra={
                 "extra_fields": {
-                    "method": request.method,
-                    "path": request.url.path,
-                    "client_ip": request.client.host if request.client else None,
-                    "user_agent": request.headers.get("user-agent"),
+                    "method": method,
+                    "path": path,
+                    "client_ip": client[0] if client else None,
+                    "user_agent": headers.get("user-agent"),
                 }
             },
         )
 
+        response_started = False
+
+        async def send_wrapper(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+
+                # Calculate request duration
+                duration_seconds = time.time() - start_time
+
+                # Log request completion
+                logger.info(
+                    f"{method} {path} - {status_code}",
+                    extra={
+                        "extra_fields": {
+                            "method": method,
+                            "path": path,
+                            "status_code": status_code,
+                            "duration_seconds": duration_seconds,
+                        }
+                    },
+                )
+
+                # Record metrics to GCP Cloud Monitoring
+                metrics.increment_http_request(
+                    method=method, endpoint=path, status_code=status_code
+                )
+                metrics.record_request_duration(
+                    method=method, endpoint=path, duration_seconds=duration_seconds
+                )
+
+                # Add request_id to response headers for client-side tracking
+                MutableHeaders(scope=message)["X-Request-ID"] = request_id
+
+            await send(message)
+
         try:
             # Process request
-            response = await call_next(request)
-
-            # Calculate request duration
-            duration_seconds = time.time() - start_time
-
-            # Log request completion
-            logger.info(
-                f"{request.method} {request.url.path} - {response.status_code}",
-                extra={
-                    "extra_fields": {
-                        "method": request.method,
-                        "path": request.url.path,
-                        "status_code": response.status_code,
-                        "duration_seconds": duration_seconds,
-                    }
-                },
-            )
-
-            # Record metrics to GCP Cloud Monitoring
-            metrics.increment_http_request(
-                method=request.method,
-                endpoint=request.url.path,
-                status_code=response.status_code,
-            )
-            metrics.record_request_duration(
-                method=request.method,
-                endpoint=request.url.path,
-                duration_seconds=duration_seconds,
-            )
-
-            # Add request_id to response headers for client-side tracking
-            response.headers["X-Request-ID"] = request_id
-
-            return response
+            await self.app(scope, receive, send_wrapper)
 
         except Exception as e:
+            if response_started:
+                # Already logged and counted with its real status code
+                raise
+
             # Calculate request duration even for errors
             duration_seconds = time.time() - start_time
 
             # Log request error
             logger.error(
-                f"{request.method} {request.url.path} - ERROR",
+                f"{method} {path} - ERROR",
                 exc_info=True,
                 extra={
                     "extra_fields": {
-                        "method": request.method,
-                        "path": request.url.path,
+                        "method": method,
+                        "path": path,
                         "error_type": type(e).__name__,
                         "error_message": str(e),
                         "duration_seconds": duration_seconds,
@@ -132,12 +155,10 @@ class LoggingContextMiddleware(BaseHTTPMiddleware):
 
             # Record error metrics (status_code 500 for unhandled exceptions)
             metrics.increment_http_request(
-                method=request.method, endpoint=request.url.path, status_code=500
+                method=method, endpoint=path, status_code=500
             )
             metrics.record_request_duration(
-                method=request.method,
-                endpoint=request.url.path,
-                duration_seconds=duration_seconds,
+                method=method, endpoint=path, duration_seconds=duration_seconds
             )
 
             raise
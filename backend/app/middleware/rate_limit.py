@@ -1,16 +1,30 @@
 """
 Rate Limiting Middleware
 
-Implements token bucket algorithm for API rate limiting using Redis.
+Implements sliding window rate limiting using Redis.
 Prevents abuse and ensures fair resource allocation.
 
+Every check is one EVALSHA of SLIDING_WINDOW_SCRIPT, which evaluates all
+windows for an identifier (e.g. per minute and per hour) atomically: a
+request is counted in every window or, if any window is full, in none.
+
+With RATE_LIMIT_MODE=hybrid the global middleware uses HybridRateLimiter,
+which decides most requests from local counts within a small per-instance
+budget and only goes to Redis near the limit and for periodic batched
+reconciliation in a background thread.
+
 Includes metrics tracking for Sprint 2 observability requirements.
 """
 
 import os
+import math
 import time
-from typing import Optional
-from datetime import datetime, timedelta
+import uuid
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+from datetime import datetime
 
 from fastapi import HTTPException, status, Request
 from fastapi.responses import JSONResponse
@@ -19,6 +33,7 @@ from functools import wraps
 
 from app.core.metrics import get_metrics_client
 from app.core.logging import get_logger
+from app.middleware.sliding_window import SLIDING_WINDOW_SCRIPT
 
 logger = get_logger(__name__)
 metrics = get_metrics_client()
@@ -26,13 +41,13 @@ metrics = get_metrics_client()
 
 class RateLimiter:
     """
-    Token bucket rate limiter using Redis.
+    Sliding window rate limiter using Redis.
 
     Features:
     - Per-user rate limiting
     - Per-IP rate limiting (for anonymous endpoints)
     - Per-endpoint custom limits
-    - Sliding window algorithm
+    - Several windows checked atomically in one round trip
     """
 
     def __init__(self, redis_client: redis.Redis):
@@ -43,6 +58,57 @@ class RateLimiter:
             redis_client: Redis client instance
         """
         self.redis = redis_client
+        # EVALSHA, falling back to EVAL once if the script isn't loaded
+        self._script = redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+
+    @staticmethod
+    def _key(identifier: str, window_seconds: int) -> str:
+        # Hash tag keeps all windows of an identifier in one cluster slot
+        return f"rate_limit:{{{identifier}}}:{window_seconds}"
+
+    def check_rate_limits(
+        self, identifier: str, limits: Sequence[Tuple[int, int]]
+    ) -> tuple[bool, List[dict]]:
+        """
+        Check several windows for one request, atomically.
+
+        The request is counted in every window only if all of them have
+        room, so a request rejected by one window doesn't use up another.
+
+        Args:
+            identifier: Unique identifier (user_id or IP)
+            limits: (limit, window_seconds) pairs, e.g. [(60, 60), (1000, 3600)]
+
+        Returns:
+            Tuple of (is_allowed: bool, infos: list of dict, one per window)
+            each info contains: limit, remaining, reset_at, retry_after
+        """
+        now_ms = int(time.time() * 1000)
+        args = [now_ms, f"{now_ms}-{uuid.uuid4().hex[:8]}"]
+        for limit, window_seconds in limits:
+            args += [limit, window_seconds * 1000]
+
+        result = self._script(
+            keys=[self._key(identifier, window) for _, window in limits], args=args
+        )
+        is_allowed = bool(int(result[0]))
+
+        infos = []
+        for i, (limit, _) in enumerate(limits):
+            remaining = int(result[1 + 2 * i])
+            reset_ms = int(result[2 + 2 * i])
+            retry_after = 0
+            if not is_allowed and remaining == 0:
+                retry_after = max(1, math.ceil((reset_ms - now_ms) / 1000))
+            infos.append(
+                {
+                    "limit": limit,
+                    "remaining": remaining,
+                    "reset_at": datetime.utcfromtimestamp(reset_ms / 1000).isoformat(),
+                    "retry_after": retry_after,
+                }
+            )
+        return is_allowed, infos
 
     def check_rate_limit(
         self, identifier: str, limit: int, window_seconds: int
@@ -59,48 +125,10 @@ class RateLimiter:
             Tuple of (is_allowed: bool, info: dict)
             info contains: remaining, reset_at
         """
-        key = f"rate_limit:{identifier}"
-        now = datetime.utcnow()
-        window_start = now - timedelta(seconds=window_seconds)
-
-        # Use Redis sorted set with timestamps as scores
-        # Remove old requests outside the window
-        self.redis.zremrangebyscore(key, 0, window_start.timestamp())
-
-        # Count requests in current window
-        current_count = self.redis.zcard(key)
-
-        if current_count >= limit:
-            # Rate limit exceeded
-            # Get the oldest timestamp to calculate reset time
-            oldest = self.redis.zrange(key, 0, 0, withscores=True)
-            if oldest:
-                reset_at = datetime.fromtimestamp(oldest[0][1]) + timedelta(
-                    seconds=window_seconds
-                )
-            else:
-                reset_at = now + timedelta(seconds=window_seconds)
-
-            return False, {
-                "remaining": 0,
-                "reset_at": reset_at.isoformat(),
-                "retry_after": int((reset_at - now).total_seconds()),
-            }
-
-        # Add current request
-        self.redis.zadd(key, {str(now.timestamp()): now.timestamp()})
-
-        # Set expiration to prevent memory leaks
-        self.redis.expire(key, window_seconds)
-
-        # Calculate remaining requests
-        remaining = limit - (current_count + 1)
-
-        return True, {
-            "remaining": remaining,
-            "reset_at": (now + timedelta(seconds=window_seconds)).isoformat(),
-            "retry_after": 0,
-        }
+        is_allowed, infos = self.check_rate_limits(
+            identifier, [(limit, window_seconds)]
+        )
+        return is_allowed, infos[0]
 
     async def check_request(
         self, request: Request, identifier: str, limit: int, window_seconds: int
@@ -117,11 +145,30 @@ class RateLimiter:
         Raises:
             HTTPException: 429 Too Many Requests if limit exceeded
         """
-        is_allowed, info = self.check_rate_limit(identifier, limit, window_seconds)
+        await self.check_requests(request, identifier, [(limit, window_seconds)])
+
+    async def check_requests(
+        self, request: Request, identifier: str, limits: Sequence[Tuple[int, int]]
+    ):
+        """
+        Check several windows at once and raise if any is exceeded.
+
+        Headers describe the most constrained window (fewest remaining).
+
+        Args:
+            request: FastAPI request
+            identifier: Unique identifier
+            limits: (limit, window_seconds) pairs
+
+        Raises:
+            HTTPException: 429 Too Many Requests if limit exceeded
+        """
+        is_allowed, infos = self.check_rate_limits(identifier, limits)
+        info = min(infos, key=lambda i: (i["remaining"], -i["retry_after"]))
 
         # Add rate limit headers to response
         request.state.rate_limit_headers = {
-            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Limit": str(info["limit"]),
             "X-RateLimit-Remaining": str(info["remaining"]),
             "X-RateLimit-Reset": info["reset_at"],
         }
@@ -153,6 +200,336 @@ API_RATE_LIMIT_PER_HOUR = 1000
 AUTH_RATE_LIMIT = 5
 AUTH_WINDOW = 900  # 15 minutes
 
+# Limiter mode for the global middleware: "exact" (Redis on every request)
+# or "hybrid" (local counts, reconciled with Redis; see HybridRateLimiter)
+RATE_LIMIT_MODE = os.getenv("RATE_LIMIT_MODE", "exact").lower()
+
+# Hybrid mode: seconds between reconciliations with Redis
+RATE_LIMIT_SYNC_INTERVAL = float(os.getenv("RATE_LIMIT_SYNC_INTERVAL", "1.0"))
+
+# Hybrid mode: how far all instances together may overshoot a limit, as a
+# fraction of it (0.1 = at most 10% over). Each instance admits at most
+# limit * error_bound / live instances requests per window locally between
+# syncs; everything else takes the exact check.
+RATE_LIMIT_ERROR_BOUND = float(os.getenv("RATE_LIMIT_ERROR_BOUND", "0.1"))
+
+# Hybrid mode: max (identifier, window) entries kept per instance
+RATE_LIMIT_LOCAL_MAX_KEYS = int(os.getenv("RATE_LIMIT_LOCAL_MAX_KEYS", "10000"))
+
+# Hybrid mode: windows per reconciliation pipeline
+RATE_LIMIT_RECONCILE_BATCH = int(os.getenv("RATE_LIMIT_RECONCILE_BATCH", "500"))
+
+
+# ============================================================================
+# Hybrid (Local + Redis) Limiter
+# ============================================================================
+
+
+@dataclass
+class _LocalWindow:
+    """Local view of one identifier's window."""
+
+    limit: int
+    window_ms: int
+    count: int = 0  # requests in the window, all instances, at last sync
+    pending: List[int] = field(default_factory=list)  # local, not yet synced
+    used_at: float = 0.0
+
+
+class HybridRateLimiter(RateLimiter):
+    """
+    Approximate limiter that keeps Redis off most requests.
+
+    Each instance counts requests locally on top of the cluster-wide count
+    it last read from Redis. A request is decided locally while that
+    estimate stays within the limit and the instance has fewer than
+    limit * error_bound / N unsynced requests in the window, N being the
+    live instances registered in Redis. Requests no instance has synced
+    yet are the only ones others can't see, so all instances together
+    overshoot a limit by less than error_bound * limit. Anything else
+    (including an identifier seen for the first time) takes the exact Lua
+    check.
+
+    A limit with limit * error_bound < N gets no local budget at all (e.g.
+    60/minute with error_bound 0.1 from 7 instances on): every request for
+    it takes the exact check, on top of the reconciliation overhead. A
+    warning is logged once per limit and instance count; raise
+    RATE_LIMIT_ERROR_BOUND or use RATE_LIMIT_MODE=exact in that case.
+
+    Every sync_interval a background thread pushes local requests to the
+    same sorted sets the exact check uses and reads back the counts, in
+    pipelines of batch_size windows.
+
+    Share one instance per process (see get_rate_limiter()).
+    """
+
+    # Sorted set of live instance IDs, scored by last registration (ms)
+    INSTANCES_KEY = "rate_limit:instances"
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        error_bound: float = RATE_LIMIT_ERROR_BOUND,
+        sync_interval: float = RATE_LIMIT_SYNC_INTERVAL,
+        max_keys: int = RATE_LIMIT_LOCAL_MAX_KEYS,
+        batch_size: int = RATE_LIMIT_RECONCILE_BATCH,
+    ):
+        """
+        Initialize hybrid rate limiter.
+
+        Args:
+            redis_client: Redis client instance
+            error_bound: Max overshoot of each limit across instances (0-1)
+            sync_interval: Seconds between reconciliations with Redis
+            max_keys: Max (identifier, window) entries kept locally
+            batch_size: Windows per reconciliation pipeline
+        """
+        super().__init__(redis_client)
+        self.error_bound = min(max(error_bound, 0.0), 1.0)
+        self.sync_interval = sync_interval
+        self.max_keys = max_keys
+        self.batch_size = max(batch_size, 1)
+        self.instance_id = uuid.uuid4().hex
+        self._windows: "OrderedDict[str, _LocalWindow]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Serializes pipelines, so pending requests are pushed once
+        self._sync_lock = threading.Lock()
+        self._reconcile_lock = threading.Lock()
+        self._reconcile_thread: Optional[threading.Thread] = None
+        self._last_sync = time.monotonic()
+        # Live instances sharing the error bound; no local decisions until
+        # this instance has registered itself
+        self._instances = 0
+        self._instance_ttl = max(3 * sync_interval, 1.0)
+        self._registered_until = 0.0
+        # (limit, instances) already warned about having no local budget
+        self._zero_budgets = set()
+
+    def _local_budget(self, limit: int) -> int:
+        """Unsynced requests this instance may admit within one window."""
+        budget = int(limit * self.error_bound / self._instances)
+        if budget == 0 and (limit, self._instances) not in self._zero_budgets:
+            self._zero_budgets.add((limit, self._instances))
+            logger.warning(
+                f"Hybrid rate limiting has no local budget for limit {limit} "
+                f"with {self._instances} instances (error bound "
+                f"{self.error_bound}); every request takes the exact check"
+            )
+        return budget
+
+    def _decide_locally(self, w: Optional[_LocalWindow]) -> bool:
+        return (
+            w is not None
+            and w.count + len(w.pending) + 1 <= w.limit
+            and len(w.pending) < self._local_budget(w.limit)
+        )
+
+    def check_rate_limits(
+        self, identifier: str, limits: Sequence[Tuple[int, int]]
+    ) -> tuple[bool, List[dict]]:
+        """
+        Check several windows for one request (see RateLimiter).
+
+        Returns the same shape as RateLimiter.check_rate_limits(); for
+        local decisions remaining is an estimate and reset_at is now + window.
+        """
+        self._schedule_reconcile()
+
+        keys = [self._key(identifier, window) for _, window in limits]
+        now = time.monotonic()
+        now_ms = int(time.time() * 1000)
+
+        with self._lock:
+            windows = [self._windows.get(key) for key in keys]
+            local = (
+                self._instances > 0
+                and now < self._registered_until
+                and all(self._decide_locally(w) for w in windows)
+            )
+            if local:
+                infos = []
+                for key, w, (limit, window_seconds) in zip(keys, windows, limits):
+                    w.pending.append(now_ms)
+                    w.used_at = now
+                    self._windows.move_to_end(key)
+                    infos.append(
+                        {
+                            "limit": limit,
+                            "remaining": limit - w.count - len(w.pending),
+                            "reset_at": datetime.utcfromtimestamp(
+                                now_ms / 1000 + window_seconds
+                            ).isoformat(),
+                            "retry_after": 0,
+                        }
+                    )
+                return True, infos
+
+        # Near the limit or out of budget: local requests must reach Redis first
+        if any(w is not None and w.pending for w in windows):
+            self.reconcile(keys=keys)
+
+        is_allowed, infos = super().check_rate_limits(identifier, limits)
+
+        with self._lock:
+            for key, info, (limit, window_seconds) in zip(keys, infos, limits):
+                w = self._windows.get(key)
+                if w is None:
+                    w = self._windows[key] = _LocalWindow(limit, window_seconds * 1000)
+                w.count = limit - info["remaining"]
+                w.used_at = now
+                self._windows.move_to_end(key)
+            self._evict()
+
+        return is_allowed, infos
+
+    def _evict(self):
+        """
+        Drop least recently used windows beyond max_keys (call under _lock).
+
+        Windows with unsynced requests are skipped, or those requests
+        would never reach Redis; they become evictable once reconciled.
+        """
+        excess = len(self._windows) - self.max_keys
+        if excess <= 0:
+            return
+        victims = []
+        for key, w in self._windows.items():
+            if len(victims) == excess:
+                break
+            if not w.pending:
+                victims.append(key)
+        for key in victims:
+            del self._windows[key]
+
+    def _schedule_reconcile(self):
+        """Start a background reconciliation once sync_interval has passed."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sync < self.sync_interval:
+                return
+            self._last_sync = now
+        self._reconcile_thread = threading.Thread(
+            target=self.reconcile, name="rate-limit-reconcile", daemon=True
+        )
+        self._reconcile_thread.start()
+
+    def reconcile(self, keys: Optional[Sequence[str]] = None) -> int:
+        """
+        Push local requests to Redis and refresh counts.
+
+        Args:
+            keys: Only these window keys, in one pipeline (default: register
+                this instance, drop idle windows and sync every tracked one
+                in pipelines of batch_size)
+
+        Returns:
+            Number of windows reconciled (0 if a full reconciliation is
+            already running or Redis failed; local requests are then kept
+            for the next try)
+        """
+        if keys is not None:
+            return self._sync_windows(keys)
+
+        if not self._reconcile_lock.acquire(blocking=False):
+            return 0
+        try:
+            if not self._register_instance():
+                return 0
+
+            now = time.monotonic()
+            with self._lock:
+                # Idle for a whole window: Redis has forgotten it too
+                for key, w in list(self._windows.items()):
+                    if not w.pending and now - w.used_at > w.window_ms / 1000:
+                        del self._windows[key]
+                tracked = list(self._windows)
+
+            synced = 0
+            for start in range(0, len(tracked), self.batch_size):
+                synced += self._sync_windows(tracked[start : start + self.batch_size])
+            return synced
+        finally:
+            self._reconcile_lock.release()
+
+    def _register_instance(self) -> bool:
+        """Refresh this instance in INSTANCES_KEY and read the live count."""
+        now = time.monotonic()
+        now_ms = int(time.time() * 1000)
+        ttl_ms = int(self._instance_ttl * 1000)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.zremrangebyscore(self.INSTANCES_KEY, "-inf", now_ms - ttl_ms)
+            pipe.zadd(self.INSTANCES_KEY, {self.instance_id: now_ms})
+            pipe.pexpire(self.INSTANCES_KEY, ttl_ms)
+            pipe.zcard(self.INSTANCES_KEY)
+            results = pipe.execute()
+        except Exception as e:
+            logger.warning(f"Rate limit instance registration failed: {e}")
+            return False
+
+        with self._lock:
+            self._instances = max(int(results[-1]), 1)
+            self._registered_until = now + self._instance_ttl
+        return True
+
+    def _sync_windows(self, keys: Sequence[str]) -> int:
+        """Push local requests for keys and refresh their counts, in one pipeline."""
+        with self._sync_lock:
+            now_ms = int(time.time() * 1000)
+            with self._lock:
+                batch = [(k, self._windows[k]) for k in keys if k in self._windows]
+                # Stay pending (and count towards the budget) until acknowledged
+                pushed = {key: list(w.pending) for key, w in batch}
+            if not batch:
+                return 0
+
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for key, w in batch:
+                    pipe.zremrangebyscore(key, "-inf", now_ms - w.window_ms)
+                    if pushed[key]:
+                        pipe.zadd(
+                            key,
+                            {f"{ts}-{uuid.uuid4().hex[:8]}": ts for ts in pushed[key]},
+                        )
+                    pipe.pexpire(key, w.window_ms)
+                    pipe.zcard(key)
+                results = pipe.execute()
+            except Exception as e:
+                logger.warning(f"Rate limit reconciliation failed: {e}")
+                return 0
+
+            position = 0
+            with self._lock:
+                for key, w in batch:
+                    position += 4 if pushed[key] else 3
+                    # Requests admitted locally since the snapshot stay pending
+                    w.pending = w.pending[len(pushed[key]) :]
+                    w.count = int(results[position - 1])
+            return len(batch)
+
+
+# One hybrid limiter per Redis client, so local counts outlive requests
+_hybrid_limiters: dict = {}
+
+
+def get_rate_limiter(redis_client: redis.Redis) -> RateLimiter:
+    """
+    Limiter for the global middleware, per RATE_LIMIT_MODE.
+
+    Args:
+        redis_client: Redis client instance
+
+    Returns:
+        Shared HybridRateLimiter in hybrid mode, else a RateLimiter
+    """
+    if RATE_LIMIT_MODE != "hybrid":
+        return RateLimiter(redis_client)
+    limiter = _hybrid_limiters.get(id(redis_client))
+    if limiter is None or limiter.redis is not redis_client:
+        limiter = _hybrid_limiters[id(redis_client)] = HybridRateLimiter(redis_client)
+    return limiter
+
 
 # ============================================================================
 # Rate Limiting Decorators
@@ -261,8 +638,7 @@ async def rate_limit_middleware(request: Request, call_next):
 
     ip_address = get_client_ip(request)
 
-    # Apply per-minute limit
-    limiter = RateLimiter(redis_client)
+    limiter = get_rate_limiter(redis_client)
 
     try:
         # Record rate limit hit metric
@@ -270,13 +646,11 @@ async def rate_limit_middleware(request: Request, call_next):
             endpoint=request.url.path, ip_address=ip_address
         )
 
-        await limiter.check_request(
-            request, f"{identifier}:minute", API_RATE_LIMIT_PER_MINUTE, 60
-        )
-
-        # Apply per-hour limit
-        await limiter.check_request(
-            request, f"{identifier}:hour", API_RATE_LIMIT_PER_HOUR, 3600
+        # Per-minute and per-hour limits in one round trip
+        await limiter.check_requests(
+            request,
+            identifier,
+            [(API_RATE_LIMIT_PER_MINUTE, 60), (API_RATE_LIMIT_PER_HOUR, 3600)],
         )
 
     except HTTPException as e:
@@ -2,19 +2,67 @@
 Security Middleware
 
 Implements security headers, brute force protection, and other security measures.
+
+These are pure ASGI middleware rather than BaseHTTPMiddleware: each layer
+wraps `send` (or answers directly) instead of running the rest of the
+stack in a separate task and re-wrapping the response, which keeps
+per-request overhead low and lets streamed responses through unbuffered.
 """
-from fastapi import Request, status
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import status
 from starlette.responses import Response
-from typing import Dict, Tuple
-from datetime import datetime, timedelta
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import logging
 import json as json_lib
 
+from app.middleware.security_store import get_security_store, security_key
+
 logger = logging.getLogger(__name__)
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "X-XSS-Protection": "1; mode=block",
+    "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+    "Content-Security-Policy": "default-src 'self'",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    "Permissions-Policy": "geolocation=(), microphone=(), camera=()",
+}
+
+
+def _client_ip(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+async def _read_body(receive: Receive) -> bytes:
+    """Read the full request body from receive."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replay_body(body: bytes, receive: Receive) -> Receive:
+    """Receive that returns an already read body, then defers to receive."""
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if sent:
+            return await receive()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return replay
+
+
+class SecurityHeadersMiddleware:
     """
     Adds security headers to all responses.
 
@@ -25,140 +73,158 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     - Strict-Transport-Security: max-age=31536000; includeSubDomains
     - Content-Security-Policy: default-src 'self'
     - Referrer-Policy: strict-origin-when-cross-origin
+    - Permissions-Policy: geolocation=(), microphone=(), camera=()
     """
 
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.raw_headers = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in SECURITY_HEADERS.items()
+        ]
+        self.header_names = {name for name, _ in self.raw_headers}
 
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers[
-            "Strict-Transport-Security"
-        ] = "max-age=31536000; includeSubDomains"
-        response.headers["Content-Security-Policy"] = "default-src 'self'"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers[
-            "Permissions-Policy"
-        ] = "geolocation=(), microphone=(), camera=()"
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        return response
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                # Replace any values set by the endpoint
+                message["headers"] = [
+                    (name, value)
+                    for name, value in message.get("headers", [])
+                    if name.lower() not in self.header_names
+                ] + self.raw_headers
+            await send(message)
 
+        await self.app(scope, receive, send_with_headers)
 
-class BruteForceProtectionMiddleware(BaseHTTPMiddleware):
+
+class BruteForceProtectionMiddleware:
     """
     Protects against brute force attacks on login endpoints.
 
-    Tracks failed login attempts per IP and email combination.
-    Implements exponential backoff and temporary lockouts.
+    Tracks failed login attempts per IP and email combination and locks
+    the combination out temporarily after max_attempts failures within
+    FAILED_ATTEMPT_WINDOW. State lives in a shared security store (see
+    app.middleware.security_store), so lockouts apply across instances.
     """
 
-    def __init__(self, app, max_attempts: int = 5, lockout_duration: int = 300):
-        super().__init__(app)
+    # Failures older than this no longer count towards a lockout
+    FAILED_ATTEMPT_WINDOW = 3600
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_attempts: int = 5,
+        lockout_duration: int = 300,
+        store=None,
+    ):
+        self.app = app
         self.max_attempts = max_attempts
         self.lockout_duration = lockout_duration  # seconds
+        self.store = store if store is not None else get_security_store()
 
-        # Store failed attempts: {(ip, email): [(timestamp, count)]}
-        self.failed_attempts: Dict[Tuple[str, str], list] = {}
-        self.locked_accounts: Dict[Tuple[str, str], datetime] = {}
-
-    async def dispatch(self, request: Request, call_next):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         # Only check login endpoints
-        if request.url.path == "/api/v1/auth/login" and request.method == "POST":
-            client_ip = request.client.host if request.client else "unknown"
-
-            # Get email from request body (if available)
-            try:
-                body = await request.body()
-
-                # Re-create request with body for downstream processing
-                async def receive():
-                    return {"type": "http.request", "body": body}
-
-                request._receive = receive
-
-                if body:
-                    data = json_lib.loads(body)
-                    email = data.get("email", "")
-
-                    key = (client_ip, email)
-
-                    # Check if account is locked
-                    if key in self.locked_accounts:
-                        lockout_time = self.locked_accounts[key]
-                        if datetime.utcnow() < lockout_time:
-                            remaining = (lockout_time - datetime.utcnow()).seconds
-                            logger.warning(
-                                f"Blocked login attempt for locked account: {email} from {client_ip}"
-                            )
-                            return Response(
-                                content=f'{{"detail":"Account temporarily locked. Try again in {remaining} seconds."}}',
-                                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                                media_type="application/json",
-                            )
-                        else:
-                            # Lockout expired
-                            del self.locked_accounts[key]
-                            self.failed_attempts[key] = []
-
-                    # Process request
-                    response = await call_next(request)
-
-                    # Track failed attempts
-                    if response.status_code == 401:
-                        self._record_failed_attempt(key)
-                    elif response.status_code == 200:
-                        # Successful login - clear failed attempts
-                        if key in self.failed_attempts:
-                            del self.failed_attempts[key]
-
-                    return response
-            except json_lib.JSONDecodeError:
-                pass
-            except Exception as e:
-                logger.error(f"Error in brute force protection: {e}")
-
-        return await call_next(request)
-
-    def _record_failed_attempt(self, key: Tuple[str, str]):
-        """Record a failed login attempt."""
-        now = datetime.utcnow()
-
-        if key not in self.failed_attempts:
-            self.failed_attempts[key] = []
-
-        # Clean old attempts (older than 1 hour)
-        self.failed_attempts[key] = [
-            (ts, count)
-            for ts, count in self.failed_attempts[key]
-            if now - ts < timedelta(hours=1)
-        ]
-
-        # Add new attempt
-        self.failed_attempts[key].append((now, 1))
+        if not (
+            scope["type"] == "http"
+            and scope["path"] == "/api/v1/auth/login"
+            and scope["method"] == "POST"
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        client_ip = _client_ip(scope)
+
+        # Get email from request body (if available), replaying it downstream
+        body = await _read_body(receive)
+        receive = _replay_body(body, receive)
+        try:
+            email = json_lib.loads(body).get("email", "") if body else None
+        except (ValueError, AttributeError):
+            email = None
+        # Malformed emails are left for the endpoint's validation to reject
+        if not isinstance(email, str):
+            await self.app(scope, receive, send)
+            return
+
+        failures_key = security_key("login_failures", client_ip, email)
+        lock_key = security_key("login_lock", client_ip, email)
+
+        # Check if account is locked
+        try:
+            remaining = await self.store.ttl(lock_key)
+        except Exception as e:
+            logger.error(f"Error in brute force protection: {e}")
+            remaining = 0
+        if remaining > 0:
+            logger.warning(
+                f"Blocked login attempt for locked account: {email} from {client_ip}"
+            )
+            response = Response(
+                content=f'{{"detail":"Account temporarily locked. Try again in {remaining} seconds."}}',
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                media_type="application/json",
+            )
+            await response(scope, receive, send)
+            return
+
+        status_code = None
+
+        async def send_capturing_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        # Process request
+        await self.app(scope, receive, send_capturing_status)
+
+        # Track failed attempts
+        try:
+            if status_code == 401:
+                await self._record_failed_attempt(
+                    failures_key, lock_key, client_ip, email
+                )
+            elif status_code == 200:
+                # Successful login - clear failed attempts
+                await self.store.delete(failures_key)
+        except Exception as e:
+            logger.error(f"Error in brute force protection: {e}")
+
+    async def _record_failed_attempt(
+        self, failures_key: str, lock_key: str, client_ip: str, email: str
+    ):
+        """Record a failed login attempt, locking out at max_attempts."""
+        _, recent_attempts = await self.store.hit(
+            failures_key, self.max_attempts, self.FAILED_ATTEMPT_WINDOW
+        )
 
         # Check if we should lock the account
-        recent_attempts = len(self.failed_attempts[key])
         if recent_attempts >= self.max_attempts:
-            lockout_time = now + timedelta(seconds=self.lockout_duration)
-            self.locked_accounts[key] = lockout_time
+            await self.store.lock(lock_key, self.lockout_duration)
+            # Start counting afresh once the lockout expires
+            await self.store.delete(failures_key)
             logger.warning(
-                f"Account locked due to {recent_attempts} failed attempts: {key[1]} from {key[0]}"
+                f"Account locked due to {recent_attempts} failed attempts: {email} from {client_ip}"
             )
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+class RateLimitMiddleware:
     """
     Additional rate limiting for sensitive endpoints.
 
-    This complements SlowAPI with more granular controls.
+    This complements SlowAPI with more granular controls. Counts are
+    sliding windows per (IP, endpoint) in the shared security store, so
+    limits hold across instances.
     """
 
-    def __init__(self, app):
-        super().__init__(app)
-        # Store request counts: {(ip, path): [(timestamp, count)]}
-        self.request_counts: Dict[Tuple[str, str], list] = {}
+    def __init__(self, app: ASGIApp, store=None):
+        self.app = app
+        self.store = store if store is not None else get_security_store()
 
         # Rate limits per endpoint pattern (higher limits to allow for test environments)
         self.rate_limits = {
@@ -167,50 +233,24 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             "/api/v1/auth/logout": (20, 60),  # 20 requests per 60 seconds
         }
 
-    async def dispatch(self, request: Request, call_next):
-        client_ip = request.client.host if request.client else "unknown"
-        path = request.url.path
-
-        # Check if this path has rate limits
-        for pattern, (max_requests, window_seconds) in self.rate_limits.items():
-            if path == pattern:  # Exact match instead of startswith
-                key = (client_ip, pattern)
-
-                if self._is_rate_limited(key, max_requests, window_seconds):
-                    logger.warning(f"Rate limit exceeded: {client_ip} on {path}")
-                    return Response(
-                        content='{"detail":"Rate limit exceeded. Please try again later."}',
-                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                        media_type="application/json",
-                    )
-
-                self._record_request(key)
-                break
-
-        return await call_next(request)
-
-    def _is_rate_limited(
-        self, key: Tuple[str, str], max_requests: int, window_seconds: int
-    ) -> bool:
-        """Check if the request should be rate limited."""
-        now = datetime.utcnow()
-        window_start = now - timedelta(seconds=window_seconds)
-
-        if key not in self.request_counts:
-            return False
-
-        # Clean old requests
-        self.request_counts[key] = [
-            ts for ts in self.request_counts[key] if ts > window_start
-        ]
-
-        return len(self.request_counts[key]) >= max_requests
-
-    def _record_request(self, key: Tuple[str, str]):
-        """Record a request."""
-        now = datetime.utcnow()
-
-        if key not in self.request_counts:
-            self.request_counts[key] = []
-
-        self.request_counts[key].append(now)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Check if this path has rate limits (exact match)
+        limit = self.rate_limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is not None:
+            client_ip = _client_ip(scope)
+            path = scope["path"]
+            max_requests, window_seconds = limit
+            key = security_key("rate_limit", client_ip, path)
+
+            allowed, _ = await self.store.hit(key, max_requests, window_seconds)
+            if not allowed:
+                logger.warning(f"Rate limit exceeded: {client_ip} on {path}")
+                response = Response(
+                    content='{"detail":"Rate limit exceeded. Please try again later."}',
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    media_type="application/json",
+                )
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
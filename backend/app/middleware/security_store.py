@@ -0,0 +1,227 @@
+"""
+Security Middleware Storage
+
+Counters and lockouts for BruteForceProtectionMiddleware and
+RateLimitMiddleware. With Redis they are shared by every instance, so
+limits hold at any instance count; every key has a TTL, so memory stays
+flat under scanning traffic.
+
+Without Redis (or while it is unreachable) the same operations run on a
+bounded in-process LRU: least recently used entries are evicted past
+SECURITY_STORE_MAX_KEYS, so a flood of distinct IPs/emails can't grow
+memory without bound.
+
+Counters are sliding windows, as in RateLimiter: each admitted event is
+a timestamp (in Redis, a sorted set member via SLIDING_WINDOW_SCRIPT),
+and an event counts until window_seconds after it happened. Events over
+the limit aren't recorded, so a limit can't be exceeded across a window
+boundary, and a client is blocked only while its admitted events are in
+the window.
+
+Environment:
+- SECURITY_STORE_REDIS_URL: Redis for the shared store (default: REDIS_URL;
+  "" forces the local store)
+- SECURITY_STORE_MAX_KEYS: Max entries in the local store (default 10000)
+"""
+
+import os
+import time
+import uuid
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from app.middleware.sliding_window import SLIDING_WINDOW_SCRIPT
+
+logger = logging.getLogger(__name__)
+
+SECURITY_KEY_PREFIX = "security:"
+
+SECURITY_STORE_MAX_KEYS = int(os.getenv("SECURITY_STORE_MAX_KEYS", "10000"))
+
+# After a Redis error, go straight to the local store for this long
+REDIS_RETRY_SECONDS = 5.0
+
+
+def security_key(kind: str, *parts: str) -> str:
+    """
+    Build a storage key with bounded length.
+
+    Parts are client-controlled (emails, paths), so they are hashed.
+
+    Args:
+        kind: Key kind, e.g. "login_failures"
+        parts: Identifying values (IP, email, path)
+
+    Returns:
+        "security:<kind>:<hash>"
+    """
+    digest = hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:32]
+    return f"{SECURITY_KEY_PREFIX}{kind}:{digest}"
+
+
+class LocalSecurityStore:
+    """Bounded in-process store: LRU eviction plus per-entry expiry."""
+
+    def __init__(self, max_keys: int = SECURITY_STORE_MAX_KEYS):
+        """
+        Args:
+            max_keys: Entries kept before least recently used are evicted
+        """
+        self.max_keys = max_keys
+        # key -> (expires_at monotonic, value); value is 1 for a lockout,
+        # or the event timestamps of a sliding window
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, key: str, now: float) -> Optional[Tuple[float, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key: str, expires_at: float, value: Any):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+    async def hit(self, key: str, limit: int, window_seconds: int) -> Tuple[bool, int]:
+        """
+        Record an event in a sliding window unless limit are already in it.
+
+        Returns:
+            (allowed, events now in the window)
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._get(key, now)
+            events = [t for t in entry[1] if t > now - window_seconds] if entry else []
+            allowed = len(events) < limit
+            if allowed:
+                events.append(now)
+            if events:
+                self._put(key, events[-1] + window_seconds, events)
+            return allowed, len(events)
+
+    async def lock(self, key: str, seconds: int):
+        """Set a lockout that expires after seconds."""
+        with self._lock:
+            self._put(key, time.monotonic() + seconds, 1)
+
+    async def ttl(self, key: str) -> int:
+        """Seconds until key expires (0 if missing)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._get(key, now)
+            return max(1, int(entry[0] - now)) if entry else 0
+
+    async def delete(self, *keys: str):
+        """Delete keys."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class RedisSecurityStore:
+    """
+    Shared store on Redis TTL keys, falling back to a LocalSecurityStore
+    for any operation Redis fails (fail-open to per-instance limits, not
+    to no limits).
+    """
+
+    def __init__(self, redis_url: str, fallback: Optional[LocalSecurityStore] = None):
+        """
+        Args:
+            redis_url: Redis connection URL
+            fallback: Local store used while Redis is failing
+        """
+        self.redis_url = redis_url
+        self.fallback = fallback or LocalSecurityStore()
+        self._retry_at = 0.0
+
+    @property
+    def client(self):
+        """Shared redis.asyncio client for the running loop."""
+        from app.services.cache_service import get_async_redis
+
+        if time.monotonic() < self._retry_at:
+            raise ConnectionError("Redis recently failed")
+        return get_async_redis(self.redis_url)
+
+    def _failed(self, operation: str, error: Exception):
+        if time.monotonic() >= self._retry_at:
+            logger.warning(
+                f"Security store {operation} failed, using local store: {error}"
+            )
+            self._retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+
+    async def hit(self, key: str, limit: int, window_seconds: int) -> Tuple[bool, int]:
+        """
+        Record an event in a sliding window unless limit are already in it.
+
+        Returns:
+            (allowed, events now in the window)
+        """
+        try:
+            now_ms = int(time.time() * 1000)
+            script = self.client.register_script(SLIDING_WINDOW_SCRIPT)
+            result = await script(
+                keys=[key],
+                args=[
+                    now_ms,
+                    f"{now_ms}-{uuid.uuid4().hex[:8]}",
+                    limit,
+                    window_seconds * 1000,
+                ],
+            )
+            return bool(int(result[0])), limit - int(result[1])
+        except Exception as e:
+            self._failed("hit", e)
+            return await self.fallback.hit(key, limit, window_seconds)
+
+    async def lock(self, key: str, seconds: int):
+        """Set a lockout that expires after seconds."""
+        try:
+            await self.client.set(key, 1, ex=seconds)
+        except Exception as e:
+            self._failed("lock", e)
+            await self.fallback.lock(key, seconds)
+
+    async def ttl(self, key: str) -> int:
+        """Seconds until key expires (0 if missing)."""
+        try:
+            return max(0, int(await self.client.ttl(key)))
+        except Exception as e:
+            self._failed("ttl", e)
+            return await self.fallback.ttl(key)
+
+    async def delete(self, *keys: str):
+        """Delete keys (locally too, in case they were set during an outage)."""
+        await self.fallback.delete(*keys)
+        try:
+            await self.client.delete(*keys)
+        except Exception as e:
+            self._failed("delete", e)
+
+
+def get_security_store():
+    """
+    Store for the security middlewares (one per middleware instance).
+
+    Returns:
+        RedisSecurityStore if a Redis URL is configured, else LocalSecurityStore
+    """
+    redis_url = os.getenv("SECURITY_STORE_REDIS_URL", os.getenv("REDIS_URL", ""))
+    if redis_url:
+        return RedisSecurityStore(redis_url)
+    return LocalSecurityStore()
@@ -0,0 +1,53 @@
+"""
+Sliding Window Script
+
+Lua script behind the Redis rate limits: RateLimiter (app.middleware.rate_limit)
+and the security middleware store (app.middleware.security_store) both
+count requests as timestamps in sorted sets, trimmed to the window on
+every check. Requests that are rejected aren't recorded, so a client is
+limited only while its admitted requests are still in the window.
+"""
+
+# Sliding window check over several windows in one round trip.
+#
+# KEYS[i]: sorted set of request timestamps for window i
+# ARGV[1]: now (ms), ARGV[2]: unique member for this request
+# ARGV[1 + 2i], ARGV[2 + 2i]: limit and window length (ms) of window i
+#
+# Returns {allowed, remaining_1, reset_ms_1, remaining_2, reset_ms_2, ...}
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local allowed = 1
+local counts = {}
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[1 + 2 * i])
+    local window = tonumber(ARGV[2 + 2 * i])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    counts[i] = redis.call('ZCARD', key)
+    if counts[i] >= limit then
+        allowed = 0
+    end
+end
+
+local result = {allowed}
+for i, key in ipairs(KEYS) do
+    local limit = tonumber(ARGV[1 + 2 * i])
+    local window = tonumber(ARGV[2 + 2 * i])
+    local count = counts[i]
+    if allowed == 1 then
+        redis.call('ZADD', key, now, ARGV[2])
+        redis.call('PEXPIRE', key, window)
+        count = count + 1
+    end
+    local reset = now + window
+    if count >= limit then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        if oldest[2] then
+            reset = tonumber(oldest[2]) + window
+        end
+    end
+    result[#result + 1] = math.max(limit - count, 0)
+    result[#result + 1] = reset
+end
+return result
+"""
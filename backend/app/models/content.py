@@ -4,10 +4,14 @@ Content Library Database Models
 Stores OER content chunks with metadata for RAG retrieval.
 """
 from sqlalchemy import Column, String, Integer, Float, Text, DateTime, JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 
 from app.core.database import Base
 
+# JSONB on PostgreSQL (GIN-indexable, supports @> containment), JSON elsewhere
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+
 
 class ContentChunk(Base):
     """
@@ -37,7 +41,7 @@ class ContentChunk(Base):
     subsection = Column(String(255), nullable=True)
 
     # Topic mapping (links to topics table)
-    topic_ids = Column(JSON, nullable=False)  # ["topic_phys_mech_newton_3"]
+    topic_ids = Column(JSONDocument, nullable=False)  # ["topic_phys_mech_newton_3"]
 
     # Content
     text = Column(Text, nullable=False)  # The actual content text
@@ -52,7 +56,7 @@ class ContentChunk(Base):
     equations = Column(JSON, nullable=True)  # LaTeX equations in chunk
 
     # Keywords and concepts
-    keywords = Column(JSON, nullable=False)
+    keywords = Column(JSONDocument, nullable=False)
     concepts = Column(JSON, nullable=False)  # Main concepts covered
 
     # Quality metrics
@@ -72,13 +76,23 @@ class ContentChunk(Base):
     )
 
     # Indexes for efficient querying
-    # Note: JSON columns (topic_ids, keywords) use GIN indexes for better performance
+    # Note: JSONB columns (topic_ids, keywords) use GIN indexes for containment
+    # queries; see migrations/add_content_chunks_gin_indexes.sql
     __table_args__ = (
         Index("idx_content_subject", "subject"),
         Index("idx_content_quality", "quality_score"),
-        # GIN indexes for JSON columns - created via migration or raw SQL
-        # Index('idx_content_topic_ids', 'topic_ids', postgresql_using='gin'),
-        # Index('idx_content_keywords', 'keywords', postgresql_using='gin'),
+        Index(
+            "idx_content_topic_ids",
+            "topic_ids",
+            postgresql_using="gin",
+            postgresql_ops={"topic_ids": "jsonb_path_ops"},
+        ),
+        Index(
+            "idx_content_keywords",
+            "keywords",
+            postgresql_using="gin",
+            postgresql_ops={"keywords": "jsonb_path_ops"},
+        ),
     )
 
     def __repr__(self):
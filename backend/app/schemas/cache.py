@@ -4,7 +4,7 @@ Cache API Schemas
 Pydantic models for cache check and storage endpoints (Story 3.1.1).
 """
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Any, Dict, Optional
 from datetime import datetime
 
 
@@ -123,12 +123,31 @@ class CacheStoreResponse(BaseModel):
 class CacheStatsResponse(BaseModel):
     """Cache statistics response."""
 
-    cache_hits: int = Field(..., description="Total cache hits")
-    cache_misses: int = Field(..., description="Total cache misses")
-    hit_rate: float = Field(..., description="Cache hit rate (0.0-1.0)")
+    cache_hits: int = Field(..., description="Content cache hits")
+    cache_misses: int = Field(..., description="Content cache misses")
+    hit_rate: float = Field(..., description="Content cache hit rate (0.0-1.0)")
+    l1_hits: int = Field(0, description="In-process L1 cache hits")
     redis_hits: int = Field(..., description="Redis hot cache hits")
     gcs_hits: int = Field(..., description="GCS cold cache hits")
+    negative_hits: int = Field(
+        0, description="Misses answered by the negative cache (GCS skipped)"
+    )
     total_requests: int = Field(..., description="Total requests processed")
+    tiers: Dict[str, Dict[str, float]] = Field(
+        default_factory=dict,
+        description="Per tier (l1/redis/gcs): content lookups reaching it, hits, hit_rate",
+    )
+    families: Dict[str, Dict[str, float]] = Field(
+        default_factory=dict,
+        description="Per key family (content_metadata, content, user, ...): lookups, hits, hit_rate",
+    )
+    latency: Dict[str, Dict[str, Any]] = Field(
+        default_factory=dict,
+        description="Per tier, all families: count, avg/p50/p95/p99 ms and buckets",
+    )
+    scope: str = Field(
+        "instance", description="cluster (all instances) or instance (this one)"
+    )
 
     class Config:
         json_schema_extra = {
@@ -136,8 +155,32 @@ class CacheStatsResponse(BaseModel):
                 "cache_hits": 150,
                 "cache_misses": 50,
                 "hit_rate": 0.75,
+                "l1_hits": 0,
                 "redis_hits": 120,
                 "gcs_hits": 30,
+                "negative_hits": 0,
                 "total_requests": 200,
+                "tiers": {
+                    "redis": {"lookups": 200, "hits": 120, "hit_rate": 0.6},
+                    "gcs": {"lookups": 80, "hits": 30, "hit_rate": 0.375},
+                },
+                "families": {
+                    "content_metadata": {
+                        "lookups": 200,
+                        "hits": 150,
+                        "hit_rate": 0.75,
+                    },
+                },
+                "latency": {
+                    "redis": {
+                        "count": 200,
+                        "avg_ms": 1.8,
+                        "p50_ms": 2.0,
+                        "p95_ms": 5.0,
+                        "p99_ms": 10.0,
+                        "buckets": {"le_1": 60, "le_2": 110, "le_5": 26, "le_10": 4},
+                    },
+                },
+                "scope": "cluster",
             }
         }
@@ -0,0 +1,178 @@
+"""
+Cache Value Codec
+
+Binary encoding for cached values (Redis and the GCS cold tier).
+
+Encoded values are a 2-byte header followed by the payload:
+- byte 0: CODEC_MARKER (0xC1, never valid in UTF-8, so it can't be the
+  first byte of a legacy JSON entry)
+- byte 1: format byte, serializer ID in the high nibble and compression
+  ID in the low nibble
+
+Payloads are JSON (orjson when installed, else the stdlib encoder; the
+bytes are interchangeable), compressed with zstd (or zlib when zstandard
+is not installed) once they reach CACHE_COMPRESSION_MIN_BYTES. Values
+without the marker are legacy JSON text and decode as before, so entries
+written by older instances stay readable.
+
+Environment:
+- CACHE_COMPRESSION: zstd | zlib | none (default: zstd if installed)
+- CACHE_COMPRESSION_MIN_BYTES: payload size at which to compress (1024)
+"""
+
+import os
+import json
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # stdlib json writes the same format, just slower
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+CODEC_MARKER = 0xC1
+
+# Serializer IDs (high nibble of the format byte)
+SERIALIZER_JSON = 1
+
+# Compression IDs (low nibble of the format byte)
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+COMPRESSION_MIN_BYTES = int(os.getenv("CACHE_COMPRESSION_MIN_BYTES", "1024"))
+
+_COMPRESSION_NAMES = {
+    "none": COMPRESSION_NONE,
+    "zlib": COMPRESSION_ZLIB,
+    "zstd": COMPRESSION_ZSTD,
+}
+
+
+def _json_dumps(value: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass  # e.g. ints beyond 64 bits; the stdlib encoder handles them
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+SERIALIZERS: Dict[int, Tuple[Callable[[Any], bytes], Callable[[bytes], Any]]] = {
+    SERIALIZER_JSON: (_json_dumps, _json_loads),
+}
+
+COMPRESSORS: Dict[int, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    COMPRESSION_ZLIB: (lambda data: zlib.compress(data, 6), zlib.decompress),
+}
+
+if zstandard is not None:
+    COMPRESSORS[COMPRESSION_ZSTD] = (
+        lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+
+
+def _default_compression() -> int:
+    name = os.getenv("CACHE_COMPRESSION")
+    if name is None:
+        return COMPRESSION_ZSTD if zstandard is not None else COMPRESSION_ZLIB
+    compression = _COMPRESSION_NAMES.get(name.lower())
+    if compression is None:
+        raise ValueError(f"Unknown CACHE_COMPRESSION: {name}")
+    if compression != COMPRESSION_NONE and compression not in COMPRESSORS:
+        # zstd requested but not installed
+        return COMPRESSION_ZLIB
+    return compression
+
+
+COMPRESSION = _default_compression()
+
+
+def encode_value(
+    value: Any,
+    compression: Optional[int] = None,
+    min_compress_bytes: Optional[int] = None,
+) -> bytes:
+    """
+    Encode a value for the cache.
+
+    Args:
+        value: JSON-serializable value
+        compression: Compression ID (default: CACHE_COMPRESSION)
+        min_compress_bytes: Compress payloads at least this large
+            (default: CACHE_COMPRESSION_MIN_BYTES)
+
+    Returns:
+        Header + (possibly compressed) payload
+    """
+    compression = COMPRESSION if compression is None else compression
+    if min_compress_bytes is None:
+        min_compress_bytes = COMPRESSION_MIN_BYTES
+
+    dumps, _ = SERIALIZERS[SERIALIZER_JSON]
+    payload = dumps(value)
+
+    if compression == COMPRESSION_NONE or len(payload) < min_compress_bytes:
+        compression = COMPRESSION_NONE
+    else:
+        compressed = COMPRESSORS[compression][0](payload)
+        if len(compressed) < len(payload):
+            payload = compressed
+        else:
+            compression = COMPRESSION_NONE
+
+    header = bytes((CODEC_MARKER, SERIALIZER_JSON << 4 | compression))
+    return header + payload
+
+
+def is_encoded(data: Union[bytes, str]) -> bool:
+    """Check whether raw cache data carries the codec header."""
+    return isinstance(data, (bytes, bytearray)) and data[:1] == bytes((CODEC_MARKER,))
+
+
+def decode_value(data: Union[bytes, str]) -> Any:
+    """
+    Decode a cached value written by encode_value() or a legacy writer.
+
+    Legacy entries are JSON text; text that isn't JSON is returned as a
+    string (plain string values written with CacheService.set).
+
+    Args:
+        data: Raw bytes (or str from a decode_responses client)
+
+    Returns:
+        Decoded value
+
+    Raises:
+        ValueError: Unknown serializer or compression ID
+    """
+    if is_encoded(data):
+        serializer, compression = data[1] >> 4, data[1] & 0x0F
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"Unknown cache serializer ID: {serializer}")
+        payload = bytes(data[2:])
+        if compression != COMPRESSION_NONE:
+            if compression not in COMPRESSORS:
+                raise ValueError(f"Unsupported cache compression ID: {compression}")
+            payload = COMPRESSORS[compression][1](payload)
+        return SERIALIZERS[serializer][1](payload)
+
+    if isinstance(data, (bytes, bytearray)):
+        data = bytes(data).decode("utf-8")
+    try:
+        return json.loads(data)
+    except json.JSONDecodeError:
+        return data
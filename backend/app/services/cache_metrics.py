@@ -0,0 +1,274 @@
+"""
+Cluster-Wide Cache Metrics
+
+CacheService.stats is per instance (and the /cache endpoints build a new
+service per request), so it can't answer "what is our hit rate?". Every
+lookup is also recorded here, in process-wide counters that a background
+task flushes into one Redis hash (HINCRBY) every CACHE_STATS_FLUSH_SECONDS.
+Reading that hash gives totals across all instances.
+
+Counters (fields of CACHE_STATS_KEY):
+- "<family>:<tier>:hit" / "<family>:<tier>:miss" per tier consulted
+  (l1, redis, negative, gcs) and for the lookup as a whole (tier "all")
+- "latency:<tier>:le_<ms>" histogram buckets, plus "latency:<tier>:sum_us"
+
+The key family is the cache key prefix ("content", "user", "session",
+...), so hit rates can be compared per kind of data. Content cache checks
+(CacheService.check_content_cache) are recorded as their own family,
+"content_metadata", apart from the "content" keys of ContentCache and
+@cached; the summary's top-level hit/miss fields and tiers cover those
+checks only, as they did before other families were counted. Latency
+covers all families.
+"""
+
+import os
+import asyncio
+import logging
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_STATS_KEY = "cache:stats"
+
+CACHE_STATS_FLUSH_SECONDS = float(os.getenv("CACHE_STATS_FLUSH_SECONDS", "10"))
+
+# "negative" = known-missing markers, read with the Redis lookup
+TIERS = ("l1", "redis", "negative", "gcs")
+
+# Histogram bucket upper bounds in milliseconds (last bucket is +inf)
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Family of check_content_cache lookups, reported by the top-level
+# /cache/stats fields
+CONTENT_FAMILY = "content_metadata"
+
+# Families beyond this many are counted as "other" (bounded hash size)
+MAX_FAMILIES = 50
+
+
+def key_family(key: str) -> str:
+    """Key family of a cache key: its prefix before the first ':'."""
+    family, sep, _ = key.partition(":")
+    return family if sep and family else "other"
+
+
+def _bucket(seconds: float) -> str:
+    ms = seconds * 1000
+    for bound in LATENCY_BUCKETS_MS:
+        if ms <= bound:
+            return f"le_{bound}"
+    return "le_inf"
+
+
+class CacheMetrics:
+    """
+    Process-wide cache counters, pending until flushed to Redis.
+
+    Thread-safe: the sync CacheService helpers run in threadpool workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Counter = Counter()
+        self._totals: Counter = Counter()
+        self._families = set()
+
+    def _family(self, family: str) -> str:
+        if family in self._families:
+            return family
+        if len(self._families) >= MAX_FAMILIES:
+            return "other"
+        self._families.add(family)
+        return family
+
+    def record(
+        self, family: str, tier: str, hit: bool, seconds: Optional[float] = None
+    ):
+        """
+        Record one tier lookup.
+
+        Args:
+            family: Key family (see key_family())
+            tier: l1, redis, negative, gcs, or "all" for the lookup as a whole
+            hit: Whether the tier returned a value
+            seconds: Lookup latency, added to the tier's histogram
+        """
+        outcome = "hit" if hit else "miss"
+        with self._lock:
+            fields = [f"{self._family(family)}:{tier}:{outcome}"]
+            if seconds is not None:
+                fields.append(f"latency:{tier}:{_bucket(seconds)}")
+            for field in fields:
+                self._pending[field] += 1
+                self._totals[field] += 1
+            if seconds is not None:
+                micros = int(seconds * 1_000_000)
+                self._pending[f"latency:{tier}:sum_us"] += micros
+                self._totals[f"latency:{tier}:sum_us"] += micros
+
+    def drain(self) -> Counter:
+        """Take the counters recorded since the last flush."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        return pending
+
+    def restore(self, counters: Counter):
+        """Put back counters whose flush failed."""
+        with self._lock:
+            self._pending.update(counters)
+
+    def snapshot(self) -> Counter:
+        """This instance's counters since startup."""
+        with self._lock:
+            return Counter(self._totals)
+
+    def reset(self):
+        """Clear all counters (for testing)."""
+        with self._lock:
+            self._pending = Counter()
+            self._totals = Counter()
+            self._families = set()
+
+
+cache_metrics = CacheMetrics()
+
+
+async def flush_cache_metrics(client) -> int:
+    """
+    Add pending counters to the shared Redis hash in one pipeline.
+
+    Args:
+        client: redis.asyncio client
+
+    Returns:
+        Number of fields flushed (0 if nothing was pending or on error;
+        failed counters are kept for the next flush)
+    """
+    pending = cache_metrics.drain()
+    if not pending:
+        return 0
+    try:
+        pipe = client.pipeline(transaction=False)
+        for field, amount in pending.items():
+            pipe.hincrby(CACHE_STATS_KEY, field, amount)
+        await pipe.execute()
+        return len(pending)
+    except Exception as e:
+        logger.warning(f"Cache stats flush failed: {e}")
+        cache_metrics.restore(pending)
+        return 0
+
+
+async def run_cache_metrics_flusher(
+    client, interval: float = CACHE_STATS_FLUSH_SECONDS
+):
+    """
+    Flush counters every interval seconds (run as a task).
+
+    Flushes once more when cancelled, so counters survive shutdown.
+
+    Args:
+        client: redis.asyncio client
+        interval: Seconds between flushes
+    """
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            await flush_cache_metrics(client)
+    except asyncio.CancelledError:
+        await flush_cache_metrics(client)
+        raise
+
+
+async def read_cluster_counters(client) -> Counter:
+    """Counters summed over all instances (the Redis hash)."""
+    raw = await client.hgetall(CACHE_STATS_KEY)
+    return Counter({field: int(value) for field, value in raw.items()})
+
+
+def _rate(hits: int, lookups: int) -> float:
+    return round(hits / lookups, 3) if lookups > 0 else 0.0
+
+
+def _percentile_ms(buckets: Dict[str, int], count: int, quantile: float) -> float:
+    """Upper bound of the bucket holding the quantile (inf -> largest bound)."""
+    target = quantile * count
+    seen = 0
+    for bound in LATENCY_BUCKETS_MS:
+        seen += buckets.get(f"le_{bound}", 0)
+        if seen >= target:
+            return float(bound)
+    return float(LATENCY_BUCKETS_MS[-1])
+
+
+def summarize_counters(counters: Counter) -> Dict[str, Any]:
+    """
+    Turn raw counters into the /cache/stats shape.
+
+    Args:
+        counters: Fields as described in the module docstring
+
+    Returns:
+        Dict with cache_hits, cache_misses, hit_rate, per-tier hits,
+        total_requests and tiers for content cache checks, plus families (every
+        key family) and latency (all families)
+    """
+    tiers = {tier: Counter() for tier in TIERS}
+    families: Dict[str, Counter] = {}
+    latency: Dict[str, Counter] = {}
+
+    for field, value in counters.items():
+        parts = field.split(":")
+        if len(parts) != 3:
+            continue
+        if parts[0] == "latency":
+            latency.setdefault(parts[1], Counter())[parts[2]] += value
+            continue
+        family, tier, outcome = parts
+        if tier == "all":
+            families.setdefault(family, Counter())[outcome] += value
+        elif tier in tiers and family == CONTENT_FAMILY:
+            tiers[tier][outcome] += value
+
+    content = families.get(CONTENT_FAMILY, Counter())
+    cache_hits = content["hit"]
+    cache_misses = content["miss"]
+    total_requests = cache_hits + cache_misses
+
+    latency_summary = {}
+    for tier, buckets in latency.items():
+        count = sum(v for k, v in buckets.items() if k.startswith("le_"))
+        if not count:
+            continue
+        latency_summary[tier] = {
+            "count": count,
+            "avg_ms": round(buckets["sum_us"] / count / 1000, 3),
+            "p50_ms": _percentile_ms(buckets, count, 0.50),
+            "p95_ms": _percentile_ms(buckets, count, 0.95),
+            "p99_ms": _percentile_ms(buckets, count, 0.99),
+            "buckets": {k: v for k, v in buckets.items() if k.startswith("le_")},
+        }
+
+    def rates(counter: Counter) -> Dict[str, float]:
+        lookups = counter["hit"] + counter["miss"]
+        return {
+            "lookups": lookups,
+            "hits": counter["hit"],
+            "hit_rate": _rate(counter["hit"], lookups),
+        }
+
+    return {
+        "cache_hits": cache_hits,
+        "cache_misses": cache_misses,
+        "hit_rate": _rate(cache_hits, total_requests),
+        "l1_hits": tiers["l1"]["hit"],
+        "redis_hits": tiers["redis"]["hit"],
+        "gcs_hits": tiers["gcs"]["hit"],
+        "negative_hits": tiers["negative"]["hit"],
+        "total_requests": total_requests,
+        "tiers": {t: rates(c) for t, c in tiers.items() if c},
+        "families": {f: rates(c) for f, c in sorted(families.items())},
+        "latency": latency_summary,
+    }
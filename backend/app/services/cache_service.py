@@ -9,19 +9,304 @@ Sprint 3.1.1: Cache Key Generation & Lookup
 - Redis hot cache (TTL 1 hour, <100ms p95)
 - GCS cold cache fallback (permanent storage)
 - Cache statistics tracking
+
+Every lookup is also counted (by tier and key family, with per-tier
+latency histograms) in process-wide counters flushed to a shared Redis
+hash, so get_cluster_cache_stats() covers all instances (cache_metrics).
+
+Optional L1: a bounded in-process LRU/TTL cache in front of Redis for
+content metadata (CACHE_L1_ENABLED=true). Invalidations are broadcast
+over Redis pub/sub so every instance drops its L1 copy.
+
+GCS I/O (blocking client) runs on a dedicated thread pool: reads are a
+single download with NotFound as the miss, and prefetch_content_cache()
+warms many keys at once.
+
+Values are stored with a compact binary codec (cache_codec: orjson +
+zstd/zlib above a size threshold, with a format header); legacy JSON
+entries remain readable.
+
+Async content-cache methods use redis.asyncio clients that share one
+connection pool per Redis URL (per event loop); the general-purpose sync
+helpers (get/set/delete/...) keep a sync client.
+
+The `cached` decorator (sync or async functions) guards recomputation
+with a Redis lease per key, refreshes hot keys early (XFetch) and can
+serve stale values while refreshing (stale-while-revalidate).
 """
 
 import os
-import json
+import copy
+import math
+import time
+import uuid
+import asyncio
+import random
 import hashlib
 import logging
-from typing import Optional, Any, Dict, Tuple
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Any, Dict, Iterable, List, Tuple
 from datetime import timedelta, datetime
 import redis
-from functools import wraps
+import redis.asyncio as aioredis
+from functools import partial, wraps
+from redis.exceptions import NoScriptError
+from google.api_core.exceptions import NotFound
+
+from app.services.cache_codec import decode_value, encode_value
+from app.services.cache_metrics import (
+    CONTENT_FAMILY,
+    cache_metrics,
+    flush_cache_metrics,
+    key_family,
+    read_cluster_counters,
+    summarize_counters,
+)
 
 logger = logging.getLogger(__name__)
 
+# Max connections in each shared async pool
+ASYNC_POOL_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+
+# event loop -> {redis_url: redis.asyncio client}. asyncio connections are
+# bound to the loop that opened them, so pools are shared per loop.
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_redis(redis_url: str, decode_responses: bool = True) -> aioredis.Redis:
+    """
+    Get the shared redis.asyncio client for a URL on the running loop.
+
+    Every CacheService on the same loop and URL reuses one connection
+    pool, so per-request CacheService instances don't open new
+    connections.
+
+    Args:
+        redis_url: Redis connection URL
+        decode_responses: False for the bytes client used to read
+            codec-encoded values
+
+    Returns:
+        redis.asyncio client
+    """
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get((redis_url, decode_responses))
+    if client is None:
+        client = aioredis.from_url(
+            redis_url,
+            decode_responses=decode_responses,
+            max_connections=ASYNC_POOL_MAX_CONNECTIONS,
+        )
+        clients[(redis_url, decode_responses)] = client
+    return client
+
+
+async def close_async_redis():
+    """Close the running loop's shared async clients (app shutdown)."""
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+
+# Threads for blocking GCS calls (google-cloud-storage is sync-only)
+GCS_IO_MAX_WORKERS = int(os.getenv("GCS_IO_MAX_WORKERS", "16"))
+
+_gcs_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_gcs_executor() -> ThreadPoolExecutor:
+    """
+    Get the shared executor for GCS I/O.
+
+    Kept separate from the loop's default executor so a slow bucket
+    can't starve other to_thread() work.
+    """
+    global _gcs_executor
+    if _gcs_executor is None:
+        _gcs_executor = ThreadPoolExecutor(
+            max_workers=GCS_IO_MAX_WORKERS, thread_name_prefix="gcs-cache"
+        )
+    return _gcs_executor
+
+
+# Tag sets: "tag:<tag>" holds the keys written with that tag
+TAG_KEY_PREFIX = "tag:"
+
+# Add members to a tag set. The set must outlive every member, or
+# invalidate_tag() can't find them, so its TTL is only ever extended (and
+# dropped for a member that never expires). Works on any Redis version;
+# EXPIRE GT alone would never set a TTL on a newly created set.
+# KEYS[1]: tag set; ARGV[1]: member TTL in seconds (0 = none);
+# ARGV[2..]: members
+TAG_ADD_SCRIPT = """
+local ttl = tonumber(ARGV[1])
+local current = redis.call("ttl", KEYS[1])
+for i = 2, #ARGV, 1000 do
+    redis.call("sadd", KEYS[1], unpack(ARGV, i, math.min(i + 999, #ARGV)))
+end
+if ttl <= 0 then
+    redis.call("persist", KEYS[1])
+elseif current == -2 or (current >= 0 and current < ttl) then
+    redis.call("expire", KEYS[1], ttl)
+end
+return #ARGV - 1
+"""
+# Queued as EVALSHA; loaded on NOSCRIPT (see CacheService._execute_tagged)
+TAG_ADD_SHA = hashlib.sha1(TAG_ADD_SCRIPT.encode("utf-8")).hexdigest()
+
+# Keys per UNLINK / SCAN page when invalidating, UNLINKs per pipeline
+INVALIDATION_BATCH_SIZE = 500
+INVALIDATION_PIPELINE_DEPTH = 10
+
+# Pub/sub channel carrying "<origin instance>|<cache key>" invalidations
+L1_INVALIDATION_CHANNEL = "cache:invalidate:content"
+
+# Negative cache: "content:missing:<cache key>" marks content known to be
+# absent from every tier, so repeated misses skip GCS. Cleared when the
+# key is stored; the short TTL bounds staleness for content written
+# without going through store_content_cache. 0 disables.
+NEGATIVE_CACHE_PREFIX = "content:missing:"
+NEGATIVE_CACHE_TTL_SECONDS = int(os.getenv("CACHE_NEGATIVE_TTL_SECONDS", "60"))
+
+# Identifies this process's own invalidation messages
+INSTANCE_ID = uuid.uuid4().hex
+
+# @cached: "lease:<cache key>" is held by the one caller recomputing a key
+LEASE_KEY_PREFIX = "lease:"
+
+# Compare-and-delete, so a caller never releases a lease it no longer holds
+RELEASE_LEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+# Marks values written by @cached (value + recompute time + logical expiry)
+CACHED_ENVELOPE_MARKER = "__cached__"
+
+# Strong references to in-flight async stale-while-revalidate refreshes
+_background_refreshes = set()
+
+
+# ============================================================================
+# L1 In-Process Cache
+# ============================================================================
+
+
+class L1Cache:
+    """
+    Bounded in-process LRU cache with a short per-entry TTL.
+
+    The TTL bounds staleness if an invalidation message is missed.
+    Values are deep-copied in and out so callers can't mutate entries.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 30.0):
+        """
+        Args:
+            max_entries: Max entries before least recently used are evicted
+            ttl_seconds: Seconds an entry stays valid
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a copy of the cached value, or None if missing/expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any):
+        """Store a copy of value, evicting the least recently used entry."""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        """Drop one entry."""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop all entries."""
+        self._entries.clear()
+
+
+_l1_cache: Optional[L1Cache] = None
+
+
+def get_l1_cache() -> Optional[L1Cache]:
+    """
+    Process-wide L1 cache, or None unless CACHE_L1_ENABLED is true.
+
+    Sized by CACHE_L1_MAX_ENTRIES (default 1024) and CACHE_L1_TTL_SECONDS
+    (default 30).
+    """
+    global _l1_cache
+    if os.getenv("CACHE_L1_ENABLED", "false").lower() != "true":
+        return None
+    if _l1_cache is None:
+        _l1_cache = L1Cache(
+            max_entries=int(os.getenv("CACHE_L1_MAX_ENTRIES", "1024")),
+            ttl_seconds=float(os.getenv("CACHE_L1_TTL_SECONDS", "30")),
+        )
+    return _l1_cache
+
+
+async def listen_for_invalidations(redis_url: Optional[str] = None):
+    """
+    Evict L1 entries invalidated by other instances (run as a task).
+
+    Subscribes to L1_INVALIDATION_CHANNEL and reconnects with backoff.
+    The L1 is cleared on every (re)subscribe, since messages published
+    while disconnected are lost.
+
+    Args:
+        redis_url: Redis connection URL (default: from environment)
+    """
+    l1 = get_l1_cache()
+    if l1 is None:
+        return
+
+    client = get_async_redis(
+        redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    )
+    backoff = 1.0
+    while True:
+        try:
+            async with client.pubsub() as pubsub:
+                await pubsub.subscribe(L1_INVALIDATION_CHANNEL)
+                l1.clear()
+                backoff = 1.0
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    origin, _, cache_key = message["data"].partition("|")
+                    if origin != INSTANCE_ID:
+                        l1.delete(cache_key)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"L1 invalidation listener disconnected: {e}")
+            l1.clear()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
 
 class CacheService:
     """
@@ -34,26 +319,60 @@ class CacheService:
     - Session storage
     """
 
-    def __init__(self, redis_url: Optional[str] = None, gcs_client=None):
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        gcs_client=None,
+        l1_cache: Optional[L1Cache] = None,
+    ):
         """
         Initialize cache service.
 
         Args:
             redis_url: Redis connection URL (default: from environment)
             gcs_client: Google Cloud Storage client for cold cache (optional)
+            l1_cache: In-process L1 for content metadata (default: the
+                process-wide cache if CACHE_L1_ENABLED, else none)
         """
         self.redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
         self.client = redis.from_url(self.redis_url, decode_responses=True)
         self.gcs = gcs_client
+        self._raw_client: Optional[redis.Redis] = None
+        self.l1 = l1_cache if l1_cache is not None else get_l1_cache()
 
         # Cache statistics (Story 3.1.1 requirement)
         self.stats = {
             "cache_hits": 0,
             "cache_misses": 0,
+            "l1_hits": 0,
             "redis_hits": 0,
             "gcs_hits": 0,
+            "negative_hits": 0,
         }
 
+    @property
+    def async_client(self) -> aioredis.Redis:
+        """
+        Shared redis.asyncio client for the running loop.
+
+        Resolved on every use, not stored: long-lived instances (e.g. the
+        one held by @cached) can outlive a loop, and a client opened on a
+        closed loop fails on every call.
+        """
+        return get_async_redis(self.redis_url)
+
+    @property
+    def raw_client(self) -> redis.Redis:
+        """Sync client returning bytes, for reading codec-encoded values."""
+        if self._raw_client is None:
+            self._raw_client = redis.from_url(self.redis_url)
+        return self._raw_client
+
+    @property
+    def async_raw_client(self) -> aioredis.Redis:
+        """Shared redis.asyncio client returning bytes, for the running loop."""
+        return get_async_redis(self.redis_url, decode_responses=False)
+
     # ========================================================================
     # Story 3.1.1: Cache Key Generation & Two-Tier Lookup
     # ========================================================================
@@ -98,12 +417,16 @@ class CacheService:
         self, topic_id: str, interest: str, style: str = "standard"
     ) -> Tuple[bool, Optional[Dict]]:
         """
-        Check if content exists in cache (Redis hot cache → GCS cold cache).
+        Check if content exists in cache (L1 → Redis hot cache → GCS cold cache).
 
-        Two-tier cache strategy:
-        1. Check Redis hot cache (fast, <100ms p95)
+        Tiered cache strategy:
+        0. Check in-process L1, if enabled (microseconds, no network)
+        1. Check Redis hot cache (fast, <100ms p95), together with the
+           negative-cache marker; a known-missing key skips GCS
         2. If miss, check GCS cold cache (slower, permanent storage)
-        3. If GCS hit, warm up Redis for next time
+        3. If GCS hit, warm up Redis for next time; if GCS also misses,
+           mark the key missing for NEGATIVE_CACHE_TTL_SECONDS
+        Redis and GCS hits are copied into L1.
 
         Args:
             topic_id: Canonical topic ID
@@ -123,62 +446,128 @@ class CacheService:
         # Generate cache key
         cache_key = self.generate_cache_key(topic_id, interest, style)
 
+        # 0. Check in-process L1 (hot keys, no network round trip)
+        if self.l1 is not None:
+            started = time.perf_counter()
+            l1_data = self.l1.get(cache_key)
+            cache_metrics.record(
+                CONTENT_FAMILY, "l1", l1_data is not None, time.perf_counter() - started
+            )
+            if l1_data is not None:
+                self.stats["cache_hits"] += 1
+                self.stats["l1_hits"] += 1
+                cache_metrics.record(CONTENT_FAMILY, "all", True)
+                logger.debug(f"Cache HIT (L1): {cache_key}")
+                return True, l1_data
+
         # 1. Check Redis hot cache (fast path <100ms)
+        known_missing = False
         try:
-            redis_data = await self._check_redis_content(cache_key)
+            started = time.perf_counter()
+            redis_data, known_missing = await self._check_redis_content(cache_key)
+            cache_metrics.record(
+                CONTENT_FAMILY, "redis", bool(redis_data), time.perf_counter() - started
+            )
             if redis_data:
+                if self.l1 is not None:
+                    self.l1.set(cache_key, redis_data)
                 self.stats["cache_hits"] += 1
                 self.stats["redis_hits"] += 1
+                cache_metrics.record(CONTENT_FAMILY, "all", True)
                 logger.info(f"Cache HIT (Redis): {cache_key}")
                 return True, redis_data
         except Exception as e:
             logger.error(f"Redis check failed: {e}")
             # Fall through to GCS check
 
+        # Known miss: skip GCS
+        if known_missing:
+            self.stats["cache_misses"] += 1
+            self.stats["negative_hits"] += 1
+            cache_metrics.record(CONTENT_FAMILY, "negative", True)
+            cache_metrics.record(CONTENT_FAMILY, "all", False)
+            logger.info(f"Cache MISS (negative cache): {cache_key}")
+            return False, None
+        cache_metrics.record(CONTENT_FAMILY, "negative", False)
+
         # 2. Check GCS cold cache (slow path, but permanent)
+        lookup_failed = False
         if self.gcs:
             try:
-                gcs_data = await self._check_gcs_content(cache_key)
+                started = time.perf_counter()
+                # Errors propagate here (unlike _check_gcs_content), so an
+                # unreachable bucket isn't remembered as a miss
+                gcs_data = await self._run_gcs(self._download_gcs_content, cache_key)
+                cache_metrics.record(
+                    CONTENT_FAMILY, "gcs", bool(gcs_data), time.perf_counter() - started
+                )
                 if gcs_data:
                     # Warm up Redis cache for next time
                     await self._store_redis_content(cache_key, gcs_data)
+                    if self.l1 is not None:
+                        self.l1.set(cache_key, gcs_data)
 
                     self.stats["cache_hits"] += 1
                     self.stats["gcs_hits"] += 1
+                    cache_metrics.record(CONTENT_FAMILY, "all", True)
                     logger.info(f"Cache HIT (GCS): {cache_key}")
                     return True, gcs_data
             except Exception as e:
                 logger.error(f"GCS check failed: {e}")
+                lookup_failed = True
 
-        # 3. Cache miss
+        # 3. Cache miss (a failed GCS lookup doesn't prove absence)
         self.stats["cache_misses"] += 1
+        cache_metrics.record(CONTENT_FAMILY, "all", False)
+        if not lookup_failed:
+            await self._mark_content_missing(cache_key)
         logger.info(f"Cache MISS: {cache_key}")
         return False, None
 
-    async def _check_redis_content(self, cache_key: str) -> Optional[Dict]:
+    async def _check_redis_content(self, cache_key: str) -> Tuple[Optional[Dict], bool]:
         """
-        Check Redis for cached content metadata.
+        Check Redis for cached content metadata and the negative marker.
+
+        One MGET answers both, so a known miss costs a single round trip.
 
         Args:
             cache_key: Cache key to lookup
 
         Returns:
-            Metadata dict if found, None otherwise
+            (metadata dict or None, True if the key is marked missing)
         """
         try:
             # Get from Redis with namespace prefix
-            data = self.client.get(f"content:metadata:{cache_key}")
+            data, missing = await self.async_raw_client.mget(
+                [f"content:metadata:{cache_key}", f"{NEGATIVE_CACHE_PREFIX}{cache_key}"]
+            )
 
             if data:
-                # Parse JSON
-                metadata = json.loads(data)
-                return metadata
+                return decode_value(data), False
 
-            return None
+            return None, missing is not None
 
         except Exception as e:
             logger.error(f"Redis get failed for {cache_key}: {e}")
-            return None
+            return None, False
+
+    async def _mark_content_missing(self, cache_key: str):
+        """Set the negative-cache marker for a key absent from every tier."""
+        if NEGATIVE_CACHE_TTL_SECONDS <= 0:
+            return
+        try:
+            await self.async_client.setex(
+                f"{NEGATIVE_CACHE_PREFIX}{cache_key}", NEGATIVE_CACHE_TTL_SECONDS, 1
+            )
+        except Exception as e:
+            logger.error(f"Negative cache store failed for {cache_key}: {e}")
+
+    async def _clear_content_missing(self, cache_key: str):
+        """Drop the negative-cache marker of a stored key."""
+        try:
+            await self.async_client.delete(f"{NEGATIVE_CACHE_PREFIX}{cache_key}")
+        except Exception as e:
+            logger.error(f"Negative cache clear failed for {cache_key}: {e}")
 
     async def _check_gcs_content(self, cache_key: str) -> Optional[Dict]:
         """
@@ -194,26 +583,110 @@ class CacheService:
             return None
 
         try:
-            bucket_name = os.getenv("GCS_CACHE_BUCKET", "vividly-content-cache-dev")
-            blob_path = f"metadata/{cache_key}.json"
+            return await self._run_gcs(self._download_gcs_content, cache_key)
+        except Exception as e:
+            logger.error(f"GCS get failed for {cache_key}: {e}")
+            return None
 
-            # Get bucket
-            bucket = self.gcs.bucket(bucket_name)
-            blob = bucket.blob(blob_path)
+    def _gcs_blob(self, cache_key: str):
+        """Blob holding a key's cold-cache metadata."""
+        bucket_name = os.getenv("GCS_CACHE_BUCKET", "vividly-content-cache-dev")
+        return self.gcs.bucket(bucket_name).blob(f"metadata/{cache_key}.json")
 
-            # Check if exists
-            if not blob.exists():
-                return None
+    async def _run_gcs(self, func, *args):
+        """Run a blocking GCS call on the GCS executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_gcs_executor(), partial(func, *args))
 
-            # Download and parse JSON
-            data = blob.download_as_text()
-            metadata = json.loads(data)
+    def _download_gcs_content(self, cache_key: str) -> Optional[Dict]:
+        """
+        Download a key's metadata in one request (blocking).
 
-            return metadata
+        No exists() pre-check: a missing object is a NotFound from the
+        download itself, which is a cache miss.
+        """
+        try:
+            data = self._gcs_blob(cache_key).download_as_bytes()
+        except NotFound:
+            return None
+        # Codec-encoded, or JSON text for entries from older instances
+        return decode_value(data)
+
+    async def prefetch_content_cache(
+        self,
+        cache_keys: Iterable[str],
+        concurrency: int = GCS_IO_MAX_WORKERS,
+        refresh_ttl: bool = False,
+    ) -> Dict[str, Dict]:
+        """
+        Warm Redis (and L1) for many keys at once.
+
+        Keys are checked in Redis with one MGET; misses are downloaded
+        from GCS concurrently and written back to Redis in one pipeline.
+        Stats are not touched (these aren't user lookups).
+
+        Args:
+            cache_keys: Cache keys from generate_cache_key()
+            concurrency: Max GCS downloads in flight
+            refresh_ttl: Also reset the 1-hour TTL of keys already in Redis
+                (in the same pipeline), so they don't lapse before next use
+
+        Returns:
+            {cache_key: metadata} for every key found in Redis or GCS
+        """
+        cache_keys = list(dict.fromkeys(cache_keys))
+        if not cache_keys:
+            return {}
 
+        found: Dict[str, Dict] = {}
+        try:
+            values = await self.async_raw_client.mget(
+                [f"content:metadata:{key}" for key in cache_keys]
+            )
+            for key, value in zip(cache_keys, values):
+                if value is not None:
+                    found[key] = decode_value(value)
         except Exception as e:
-            logger.error(f"GCS get failed for {cache_key}: {e}")
-            return None
+            logger.error(f"Redis prefetch failed: {e}")
+
+        in_redis = list(found) if refresh_ttl else []
+        from_gcs: Dict[str, Dict] = {}
+        missing = [key for key in cache_keys if key not in found]
+        if missing and self.gcs:
+            semaphore = asyncio.Semaphore(max(1, concurrency))
+
+            async def fetch(key: str):
+                async with semaphore:
+                    return key, await self._check_gcs_content(key)
+
+            from_gcs = {
+                key: metadata
+                for key, metadata in await asyncio.gather(*map(fetch, missing))
+                if metadata
+            }
+
+        if from_gcs or in_redis:
+            try:
+                pipe = self.async_client.pipeline(transaction=False)
+                for key, metadata in from_gcs.items():
+                    pipe.setex(
+                        f"content:metadata:{key}",
+                        timedelta(hours=1),
+                        encode_value(metadata),
+                    )
+                for key in in_redis:
+                    pipe.expire(f"content:metadata:{key}", timedelta(hours=1))
+                await pipe.execute()
+            except Exception as e:
+                logger.error(f"Redis warm-up failed during prefetch: {e}")
+            found.update(from_gcs)
+
+        if self.l1 is not None:
+            for key, metadata in found.items():
+                self.l1.set(key, metadata)
+
+        logger.info(f"Prefetched {len(found)}/{len(cache_keys)} content cache keys")
+        return found
 
     async def _store_redis_content(self, cache_key: str, metadata: Dict) -> bool:
         """
@@ -227,11 +700,12 @@ class CacheService:
             True if successful, False otherwise
         """
         try:
-            # Serialize to JSON
-            data = json.dumps(metadata)
+            data = encode_value(metadata)
 
             # Store in Redis with 1 hour TTL (Story 3.1.1 requirement)
-            self.client.setex(f"content:metadata:{cache_key}", timedelta(hours=1), data)
+            await self.async_client.setex(
+                f"content:metadata:{cache_key}", timedelta(hours=1), data
+            )
 
             logger.debug(f"Stored in Redis: {cache_key} (TTL: 1 hour)")
             return True
@@ -259,13 +733,7 @@ class CacheService:
         Returns:
             True if successful, False otherwise
         """
-        # Add timestamp if not present
-        if "cached_at" not in metadata:
-            metadata["cached_at"] = datetime.utcnow().isoformat()
-
-        # Store in both caches
-        redis_success = await self._store_redis_content(cache_key, metadata)
-        gcs_success = await self._store_gcs_content(cache_key, metadata)
+        redis_success, gcs_success = await self.store_content_tiers(cache_key, metadata)
 
         if redis_success and gcs_success:
             logger.info(f"Cached content: {cache_key}")
@@ -277,6 +745,42 @@ class CacheService:
             logger.error(f"Cache storage failed: {cache_key}")
             return False
 
+    async def store_content_tiers(
+        self, cache_key: str, metadata: Dict
+    ) -> Tuple[bool, bool]:
+        """
+        Store content metadata in Redis and GCS, reporting each tier.
+
+        store_content_cache() only reports overall success (GCS is the
+        permanent copy); the cache warmer needs to know whether the Redis
+        write went through.
+
+        Args:
+            cache_key: Cache key
+            metadata: Content metadata (see store_content_cache())
+
+        Returns:
+            Tuple of (stored in Redis, stored in GCS)
+        """
+        # Add timestamp if not present
+        if "cached_at" not in metadata:
+            metadata["cached_at"] = datetime.utcnow().isoformat()
+
+        # Store in both caches (the GCS upload runs on its executor while
+        # the Redis write is in flight) and drop any "known missing" marker
+        redis_success, gcs_success, _ = await asyncio.gather(
+            self._store_redis_content(cache_key, metadata),
+            self._store_gcs_content(cache_key, metadata),
+            self._clear_content_missing(cache_key),
+        )
+
+        # Other instances may hold an older version in L1
+        if self.l1 is not None:
+            self.l1.set(cache_key, metadata)
+            await self._publish_invalidation(cache_key)
+
+        return redis_success, gcs_success
+
     async def _store_gcs_content(self, cache_key: str, metadata: Dict) -> bool:
         """
         Store metadata in GCS (permanent cold cache).
@@ -293,23 +797,7 @@ class CacheService:
             return False
 
         try:
-            bucket_name = os.getenv("GCS_CACHE_BUCKET", "vividly-content-cache-dev")
-            blob_path = f"metadata/{cache_key}.json"
-
-            # Get bucket
-            bucket = self.gcs.bucket(bucket_name)
-            blob = bucket.blob(blob_path)
-
-            # Set metadata
-            blob.metadata = {
-                "content-type": "application/json",
-                "cache-control": "public, max-age=3600",
-            }
-
-            # Upload JSON
-            data = json.dumps(metadata, indent=2)
-            blob.upload_from_string(data, content_type="application/json")
-
+            await self._run_gcs(self._upload_gcs_content, cache_key, metadata)
             logger.debug(f"Stored in GCS: {cache_key}")
             return True
 
@@ -317,6 +805,22 @@ class CacheService:
             logger.error(f"GCS store failed for {cache_key}: {e}")
             return False
 
+    def _upload_gcs_content(self, cache_key: str, metadata: Dict):
+        """Upload a key's metadata (blocking)."""
+        blob = self._gcs_blob(cache_key)
+
+        # Set metadata
+        blob.metadata = {
+            "content-type": "application/octet-stream",
+            "cache-control": "public, max-age=3600",
+        }
+
+        # Codec-encoded (the .json path is kept so older entries still
+        # resolve; decode_value reads both formats)
+        blob.upload_from_string(
+            encode_value(metadata), content_type="application/octet-stream"
+        )
+
     async def invalidate_content_cache(
         self,
         cache_key: str,
@@ -327,7 +831,8 @@ class CacheService:
         Invalidate cached content.
 
         Typically only invalidates Redis (hot cache). GCS is preserved
-        for audit and recovery purposes.
+        for audit and recovery purposes. The key is also dropped from L1
+        here and, via pub/sub, on every other instance.
 
         Args:
             cache_key: Cache key to invalidate
@@ -339,10 +844,16 @@ class CacheService:
         """
         success = True
 
+        # Published even if this instance has no L1 (e.g. a worker), so
+        # API instances that do drop their copy
+        if self.l1 is not None:
+            self.l1.delete(cache_key)
+        await self._publish_invalidation(cache_key)
+
         # Invalidate Redis
         if invalidate_redis:
             try:
-                self.client.delete(f"content:metadata:{cache_key}")
+                await self.async_client.delete(f"content:metadata:{cache_key}")
                 logger.info(f"Invalidated Redis cache: {cache_key}")
             except Exception as e:
                 logger.error(f"Redis invalidation failed: {e}")
@@ -351,21 +862,30 @@ class CacheService:
         # Invalidate GCS (rare - only for content removal)
         if invalidate_gcs and self.gcs:
             try:
-                bucket_name = os.getenv("GCS_CACHE_BUCKET", "vividly-content-cache-dev")
-                blob_path = f"metadata/{cache_key}.json"
-
-                bucket = self.gcs.bucket(bucket_name)
-                blob = bucket.blob(blob_path)
-
-                if blob.exists():
-                    blob.delete()
-                    logger.info(f"Invalidated GCS cache: {cache_key}")
+                await self._run_gcs(self._delete_gcs_content, cache_key)
+                logger.info(f"Invalidated GCS cache: {cache_key}")
             except Exception as e:
                 logger.error(f"GCS invalidation failed: {e}")
                 success = False
 
         return success
 
+    def _delete_gcs_content(self, cache_key: str):
+        """Delete a key's metadata (blocking); already gone is fine."""
+        try:
+            self._gcs_blob(cache_key).delete()
+        except NotFound:
+            pass
+
+    async def _publish_invalidation(self, cache_key: str):
+        """Tell other instances to drop cache_key from their L1."""
+        try:
+            await self.async_client.publish(
+                L1_INVALIDATION_CHANNEL, f"{INSTANCE_ID}|{cache_key}"
+            )
+        except Exception as e:
+            logger.warning(f"L1 invalidation publish failed for {cache_key}: {e}")
+
     def get_cache_stats(self) -> Dict:
         """
         Get cache statistics (Story 3.1.1 requirement).
@@ -375,9 +895,12 @@ class CacheService:
                 - cache_hits: Total cache hits
                 - cache_misses: Total cache misses
                 - hit_rate: Cache hit rate (0.0 - 1.0)
+                - l1_hits: In-process L1 hits
                 - redis_hits: Redis hot cache hits
                 - gcs_hits: GCS cold cache hits
+                - negative_hits: Lookups answered by a "known missing" marker
                 - total_requests: Total requests processed
+                - tiers: Per tier, lookups that reached it, hits and hit rate
         """
         total_requests = self.stats["cache_hits"] + self.stats["cache_misses"]
 
@@ -385,22 +908,80 @@ class CacheService:
             self.stats["cache_hits"] / total_requests if total_requests > 0 else 0.0
         )
 
+        # Each tier only sees lookups the tiers above it missed
+        l1_hits = self.stats.get("l1_hits", 0)
+        tier_hits = [
+            ("l1", l1_hits if self.l1 is not None else None),
+            ("redis", self.stats["redis_hits"]),
+            (
+                "negative",
+                self.stats.get("negative_hits", 0)
+                if NEGATIVE_CACHE_TTL_SECONDS > 0
+                else None,
+            ),
+            ("gcs", self.stats["gcs_hits"] if self.gcs else None),
+        ]
+        tiers = {}
+        lookups = total_requests
+        for tier, hits in tier_hits:
+            if hits is None:
+                continue
+            tiers[tier] = {
+                "lookups": lookups,
+                "hits": hits,
+                "hit_rate": round(hits / lookups, 3) if lookups > 0 else 0.0,
+            }
+            lookups -= hits
+
         return {
             "cache_hits": self.stats["cache_hits"],
             "cache_misses": self.stats["cache_misses"],
             "hit_rate": round(hit_rate, 3),
+            "l1_hits": l1_hits,
             "redis_hits": self.stats["redis_hits"],
             "gcs_hits": self.stats["gcs_hits"],
+            "negative_hits": self.stats.get("negative_hits", 0),
             "total_requests": total_requests,
+            "tiers": tiers,
         }
 
+    async def get_cluster_cache_stats(self) -> Dict:
+        """
+        Cache statistics summed over all instances.
+
+        Flushes this instance's pending counters first, then reads the
+        shared Redis hash (see cache_metrics). Falls back to this
+        instance's counters if Redis is unreachable.
+
+        Returns:
+            Dict with the get_cache_stats() fields plus:
+                - families: Per key family, lookups, hits and hit rate
+                - latency: Per tier, count, avg/p50/p95/p99 ms and buckets
+                - scope: "cluster", or "instance" on fallback
+        """
+        try:
+            await flush_cache_metrics(self.async_client)
+            counters = await read_cluster_counters(self.async_client)
+            scope = "cluster"
+        except Exception as e:
+            logger.error(f"Cluster cache stats unavailable: {e}")
+            counters = cache_metrics.snapshot()
+            scope = "instance"
+        return {**summarize_counters(counters), "scope": scope}
+
+    def get_instance_cache_stats(self) -> Dict:
+        """Like get_cluster_cache_stats(), for this process only."""
+        return {**summarize_counters(cache_metrics.snapshot()), "scope": "instance"}
+
     def reset_cache_stats(self):
         """Reset cache statistics (for testing)."""
         self.stats = {
             "cache_hits": 0,
             "cache_misses": 0,
+            "l1_hits": 0,
             "redis_hits": 0,
             "gcs_hits": 0,
+            "negative_hits": 0,
         }
 
     # ========================================================================
@@ -417,29 +998,44 @@ class CacheService:
         Returns:
             Cached value or None if not found
         """
+        started = time.perf_counter()
         try:
-            value = self.client.get(key)
+            value = self.raw_client.get(key)
+            self._record_get(key, value is not None, started)
             if value is None:
                 return None
 
-            # Try to deserialize JSON
-            try:
-                return json.loads(value)
-            except json.JSONDecodeError:
-                return value
+            # Codec-encoded, JSON text, or a plain string
+            return decode_value(value)
 
         except Exception as e:
             print(f"Cache get error for key {key}: {e}")
             return None
 
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+    @staticmethod
+    def _record_get(key: str, hit: bool, started: float):
+        """Record a single-tier (Redis) lookup in the cluster-wide metrics."""
+        family = key_family(key)
+        cache_metrics.record(family, "redis", hit, time.perf_counter() - started)
+        cache_metrics.record(family, "all", hit)
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+    ) -> bool:
         """
         Set value in cache with optional TTL.
 
         Args:
             key: Cache key
-            value: Value to cache (will be JSON-serialized if dict/list)
+            value: Value to cache (dict/list are codec-encoded; strings
+                and numbers are stored as-is so INCRBY etc. still work)
             ttl: Time-to-live in seconds (None = no expiration)
+            tags: Tags to register the key under, for invalidate_tag()
+                (e.g. "student:123"); written in the same round trip
 
         Returns:
             True if successful
@@ -447,7 +1043,18 @@ class CacheService:
         try:
             # Serialize value if needed
             if isinstance(value, (dict, list)):
-                value = json.dumps(value)
+                value = encode_value(value)
+
+            if tags:
+
+                def queue(pipe):
+                    if ttl:
+                        pipe.setex(key, ttl, value)
+                    else:
+                        pipe.set(key, value)
+                    self._queue_tag_add(pipe, tags, [key], ttl)
+
+                return bool(self._execute_tagged(queue)[0])
 
             if ttl:
                 return self.client.setex(key, ttl, value)
@@ -458,6 +1065,125 @@ class CacheService:
             print(f"Cache set error for key {key}: {e}")
             return False
 
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Get many values in one round trip (MGET).
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            {key: value} for the keys found (misses are left out)
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        try:
+            values = self.raw_client.mget(keys)
+        except Exception as e:
+            logger.warning(f"Cache get_many error for {len(keys)} keys: {e}")
+            return {}
+        return self._decode_many(keys, values)
+
+    @staticmethod
+    def _decode_many(keys: List[str], values: List[Any]) -> Dict[str, Any]:
+        """Decode MGET results, recording a lookup per key."""
+        found = {}
+        for key, value in zip(keys, values):
+            family = key_family(key)
+            cache_metrics.record(family, "redis", value is not None)
+            cache_metrics.record(family, "all", value is not None)
+            if value is not None:
+                try:
+                    found[key] = decode_value(value)
+                except Exception as e:
+                    logger.warning(f"Cache decode error for key {key}: {e}")
+        return found
+
+    @staticmethod
+    def _queue_tag_add(pipe, tags: Iterable[str], keys: List[str], ttl: Optional[int]):
+        """Queue registering keys under each tag (see TAG_ADD_SCRIPT)."""
+        for tag in tags:
+            pipe.evalsha(TAG_ADD_SHA, 1, f"{TAG_KEY_PREFIX}{tag}", ttl or 0, *keys)
+
+    def _execute_tagged(self, queue) -> List[Any]:
+        """
+        Run a pipeline queued by queue(pipe) that may use TAG_ADD_SHA.
+
+        The script is sent only when Redis doesn't have it (first use,
+        restart, failover): it is loaded and the pipeline replayed once,
+        which is safe as every queued write is idempotent. (A registered
+        Script on a pipeline would cost a SCRIPT EXISTS round trip on
+        every execute instead.)
+        """
+        try:
+            pipe = self.client.pipeline(transaction=False)
+            queue(pipe)
+            return pipe.execute()
+        except NoScriptError:
+            self.client.script_load(TAG_ADD_SCRIPT)
+            pipe = self.client.pipeline(transaction=False)
+            queue(pipe)
+            return pipe.execute()
+
+    async def _execute_tagged_async(self, queue) -> List[Any]:
+        """Async _execute_tagged(), on the shared redis.asyncio pool."""
+        try:
+            pipe = self.async_client.pipeline(transaction=False)
+            queue(pipe)
+            return await pipe.execute()
+        except NoScriptError:
+            await self.async_client.script_load(TAG_ADD_SCRIPT)
+            pipe = self.async_client.pipeline(transaction=False)
+            queue(pipe)
+            return await pipe.execute()
+
+    @classmethod
+    def _queue_set_many(
+        cls,
+        pipe,
+        mapping: Dict[str, Any],
+        ttl: Optional[int],
+        tags: Optional[Iterable[str]],
+    ):
+        """Queue the writes of set_many() on a pipeline."""
+        for key, value in mapping.items():
+            if isinstance(value, (dict, list)):
+                value = encode_value(value)
+            if ttl:
+                pipe.setex(key, ttl, value)
+            else:
+                pipe.set(key, value)
+        cls._queue_tag_add(pipe, tags or (), list(mapping), ttl)
+
+    def set_many(
+        self,
+        mapping: Dict[str, Any],
+        ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+    ) -> bool:
+        """
+        Set many values in one round trip (pipelined SET/SETEX).
+
+        Args:
+            mapping: {key: value}, values encoded as in set()
+            ttl: Time-to-live in seconds for every key (None = no expiration)
+            tags: Tags to register every key under, for invalidate_tag()
+
+        Returns:
+            True if every write succeeded
+        """
+        if not mapping:
+            return True
+        try:
+            results = self._execute_tagged(
+                partial(self._queue_set_many, mapping=mapping, ttl=ttl, tags=tags)
+            )
+            return all(results[: len(mapping)])
+        except Exception as e:
+            logger.warning(f"Cache set_many error for {len(mapping)} keys: {e}")
+            return False
+
     def delete(self, key: str) -> bool:
         """
         Delete key from cache.
@@ -474,10 +1200,76 @@ class CacheService:
             print(f"Cache delete error for key {key}: {e}")
             return False
 
+    def _unlink_batches(self, keys: Iterable[str]) -> int:
+        """
+        UNLINK keys in batches of INVALIDATION_BATCH_SIZE, several batches
+        per pipeline round trip.
+
+        UNLINK frees memory in a background thread, so large values don't
+        stall Redis the way DEL can.
+
+        Returns:
+            Number of keys that existed
+        """
+        deleted = 0
+        batch: List[str] = []
+        pipe = self.client.pipeline(transaction=False)
+        queued = 0
+        for key in keys:
+            batch.append(key)
+            if len(batch) >= INVALIDATION_BATCH_SIZE:
+                pipe.unlink(*batch)
+                batch = []
+                queued += 1
+                if queued >= INVALIDATION_PIPELINE_DEPTH:
+                    deleted += sum(pipe.execute())
+                    queued = 0
+        if batch:
+            pipe.unlink(*batch)
+            queued += 1
+        if queued:
+            deleted += sum(pipe.execute())
+        return deleted
+
+    def invalidate_tag(self, tag: str) -> int:
+        """
+        Delete every key registered under a tag, then the tag set itself.
+
+        The tag set is renamed first, so keys tagged while invalidation is
+        running land in a fresh set instead of being lost. Cost is
+        proportional to the tag's members, not the keyspace.
+
+        Args:
+            tag: Tag passed to set(..., tags=[...]) (e.g. "student:123")
+
+        Returns:
+            Number of keys deleted
+        """
+        tag_key = f"{TAG_KEY_PREFIX}{tag}"
+        snapshot_key = f"{tag_key}:invalidating:{uuid.uuid4().hex}"
+        try:
+            try:
+                self.client.rename(tag_key, snapshot_key)
+            except redis.ResponseError:
+                return 0  # no such tag
+
+            deleted = self._unlink_batches(
+                self.client.sscan_iter(snapshot_key, count=INVALIDATION_BATCH_SIZE)
+            )
+            self.client.unlink(snapshot_key)
+            return deleted
+        except Exception as e:
+            logger.warning(f"Cache invalidate tag error for {tag}: {e}")
+            return 0
+
     def delete_pattern(self, pattern: str) -> int:
         """
         Delete all keys matching pattern.
 
+        Walks the keyspace with incremental SCAN (never KEYS, which blocks
+        Redis for the whole scan). Still O(keyspace), so prefer tags via
+        invalidate_tag() for anything on a hot path.
+
         Args:
             pattern: Pattern with wildcards (e.g., "user:123:*")
 
@@ -485,10 +1277,9 @@ class CacheService:
             Number of keys deleted
         """
         try:
-            keys = self.client.keys(pattern)
-            if keys:
-                return self.client.delete(*keys)
-            return 0
+            return self._unlink_batches(
+                self.client.scan_iter(match=pattern, count=INVALIDATION_BATCH_SIZE)
+            )
         except Exception as e:
             print(f"Cache delete pattern error for {pattern}: {e}")
             return 0
@@ -542,54 +1333,330 @@ class CacheService:
             print(f"Cache TTL error for key {key}: {e}")
             return None
 
+    # ========================================================================
+    # Leases & Async Helpers (used by @cached)
+    # ========================================================================
+
+    def acquire_lease(self, key: str, ttl_seconds: float) -> Optional[str]:
+        """
+        Try to take a short-lived lease (SET NX PX) on a key.
+
+        Args:
+            key: Lease key
+            ttl_seconds: Lease lifetime; bounds how long a crashed holder
+                blocks others
+
+        Returns:
+            Lease token if acquired, None if another caller holds it. Redis
+            errors return a token so callers fall through to computing.
+        """
+        token = uuid.uuid4().hex
+        try:
+            acquired = self.client.set(
+                key, token, nx=True, px=max(1, int(ttl_seconds * 1000))
+            )
+        except Exception as e:
+            logger.warning(f"Cache lease error for key {key}: {e}")
+            return token
+        return token if acquired else None
+
+    def release_lease(self, key: str, token: str) -> bool:
+        """Release a lease if token still holds it (compare-and-delete)."""
+        try:
+            return bool(self.client.eval(RELEASE_LEASE_SCRIPT, 1, key, token))
+        except Exception as e:
+            logger.warning(f"Cache lease release error for key {key}: {e}")
+            return False
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        """Async get(), on the shared redis.asyncio pool."""
+        started = time.perf_counter()
+        try:
+            value = await self.async_raw_client.get(key)
+            self._record_get(key, value is not None, started)
+            if value is None:
+                return None
+            return decode_value(value)
+        except Exception as e:
+            logger.warning(f"Cache get error for key {key}: {e}")
+            return None
+
+    async def set_async(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """Async set(), on the shared redis.asyncio pool."""
+        try:
+            if isinstance(value, (dict, list)):
+                value = encode_value(value)
+            if ttl:
+                return bool(await self.async_client.setex(key, ttl, value))
+            return bool(await self.async_client.set(key, value))
+        except Exception as e:
+            logger.warning(f"Cache set error for key {key}: {e}")
+            return False
+
+    async def get_many_async(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Async get_many(), on the shared redis.asyncio pool."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        try:
+            values = await self.async_raw_client.mget(keys)
+        except Exception as e:
+            logger.warning(f"Cache get_many error for {len(keys)} keys: {e}")
+            return {}
+        return self._decode_many(keys, values)
+
+    async def set_many_async(
+        self,
+        mapping: Dict[str, Any],
+        ttl: Optional[int] = None,
+        tags: Optional[Iterable[str]] = None,
+    ) -> bool:
+        """Async set_many(), on the shared redis.asyncio pool."""
+        if not mapping:
+            return True
+        try:
+            results = await self._execute_tagged_async(
+                partial(self._queue_set_many, mapping=mapping, ttl=ttl, tags=tags)
+            )
+            return all(results[: len(mapping)])
+        except Exception as e:
+            logger.warning(f"Cache set_many error for {len(mapping)} keys: {e}")
+            return False
+
+    async def acquire_lease_async(self, key: str, ttl_seconds: float) -> Optional[str]:
+        """Async acquire_lease()."""
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self.async_client.set(
+                key, token, nx=True, px=max(1, int(ttl_seconds * 1000))
+            )
+        except Exception as e:
+            logger.warning(f"Cache lease error for key {key}: {e}")
+            return token
+        return token if acquired else None
+
+    async def release_lease_async(self, key: str, token: str) -> bool:
+        """Async release_lease()."""
+        try:
+            return bool(
+                await self.async_client.eval(RELEASE_LEASE_SCRIPT, 1, key, token)
+            )
+        except Exception as e:
+            logger.warning(f"Cache lease release error for key {key}: {e}")
+            return False
+
 
 # ============================================================================
 # Caching Decorators
 # ============================================================================
 
 
+def _cache_envelope(value: Any, delta: float, ttl: int) -> Dict:
+    """Wrap a computed value with its recompute time and logical expiry."""
+    return {
+        CACHED_ENVELOPE_MARKER: 1,
+        "value": value,
+        "delta": delta,
+        "expires_at": time.time() + ttl,
+    }
+
+
+def _unwrap_cached(raw: Any) -> Optional[Dict]:
+    """
+    Envelope for a raw cached value, or None on a miss.
+
+    Values written by the old decorator (no envelope) are served as-is
+    and never refreshed early; Redis expires them as before.
+    """
+    if raw is None:
+        return None
+    if isinstance(raw, dict) and raw.get(CACHED_ENVELOPE_MARKER):
+        return raw
+    return {"value": raw, "delta": 0.0, "expires_at": float("inf")}
+
+
+def _cached_state(entry: Optional[Dict], beta: float, now: float) -> str:
+    """
+    Classify a cache entry for @cached.
+
+    Returns:
+        "miss", "stale" (past logical expiry, inside the grace period),
+        "refresh" (XFetch picked this call to recompute early) or "fresh"
+    """
+    if entry is None:
+        return "miss"
+    if now >= entry["expires_at"]:
+        return "stale"
+    # XFetch (Vattani et al.): recompute early with a probability that
+    # rises as expiry nears, scaled by how long the value takes to compute
+    if beta > 0 and entry["delta"] > 0:
+        gap = -entry["delta"] * beta * math.log(1.0 - random.random())
+        if now + gap >= entry["expires_at"]:
+            return "refresh"
+    return "fresh"
+
+
 def cached(
-    ttl: int = 300, key_prefix: str = "cache", key_fn: Optional[callable] = None
+    ttl: int = 300,
+    key_prefix: str = "cache",
+    key_fn: Optional[callable] = None,
+    stale_ttl: int = 0,
+    beta: float = 1.0,
+    lock_timeout: float = 10.0,
+    wait_interval: float = 0.05,
 ):
     """
-    Decorator to cache function results.
+    Decorator to cache function results, with stampede protection.
+
+    On a miss only one caller (the holder of a Redis SET NX lease on the
+    key) runs the function; the others poll for its result for up to
+    lock_timeout, then compute themselves. Before expiry, XFetch lets a
+    single caller refresh the value early, so hot keys rarely expire at
+    all. With stale_ttl > 0 the entry outlives its TTL by that grace
+    period and expired values are served while one caller refreshes in
+    the background (stale-while-revalidate).
+
+    Works on both sync and async functions. Results must be
+    JSON-serializable; None results are cached too.
 
     Args:
         ttl: Cache TTL in seconds (default: 5 minutes)
         key_prefix: Prefix for cache keys
         key_fn: Optional function to generate cache key from args
+        stale_ttl: Seconds an expired value may be served while it is
+            refreshed (0 = off; expired values are recomputed inline)
+        beta: XFetch eagerness (0 = no early refresh; >1 refreshes earlier)
+        lock_timeout: Lease lifetime and max time waiters block, in seconds
+        wait_interval: Seconds between waiter polls
 
     Usage:
         @cached(ttl=600, key_prefix="user")
         def get_user(user_id: str):
             return db.query(User).filter(User.id == user_id).first()
+
+        @cached(ttl=60, key_prefix="dashboard", stale_ttl=300)
+        async def get_class_dashboard(class_id: str):
+            ...
     """
 
     def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            # Get cache service from app state or create new
-            cache = CacheService()
-
-            # Generate cache key
-            if key_fn:
-                cache_key = f"{key_prefix}:{key_fn(*args, **kwargs)}"
-            else:
-                # Default: use function name and args
-                args_str = "_".join(str(arg) for arg in args)
-                kwargs_str = "_".join(f"{k}={v}" for k, v in sorted(kwargs.items()))
-                cache_key = f"{key_prefix}:{func.__name__}:{args_str}:{kwargs_str}"
+        service: List[CacheService] = []
 
-            # Try to get from cache
-            cached_value = cache.get(cache_key)
-            if cached_value is not None:
-                return cached_value
+        def get_cache() -> CacheService:
+            # One service (and connection pool) per decorated function
+            if not service:
+                service.append(CacheService())
+            return service[0]
 
-            # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache.set(cache_key, result, ttl=ttl)
+        def make_key(args, kwargs) -> str:
+            if key_fn:
+                return f"{key_prefix}:{key_fn(*args, **kwargs)}"
+            # Default: use function name and args
+            args_str = "_".join(str(arg) for arg in args)
+            kwargs_str = "_".join(f"{k}={v}" for k, v in sorted(kwargs.items()))
+            return f"{key_prefix}:{func.__name__}:{args_str}:{kwargs_str}"
+
+        if asyncio.iscoroutinefunction(func):
+
+            async def recompute(cache, cache_key, token, args, kwargs):
+                try:
+                    start = time.monotonic()
+                    result = await func(*args, **kwargs)
+                    envelope = _cache_envelope(result, time.monotonic() - start, ttl)
+                    await cache.set_async(cache_key, envelope, ttl=ttl + stale_ttl)
+                    return result
+                finally:
+                    if token:
+                        await cache.release_lease_async(
+                            f"{LEASE_KEY_PREFIX}{cache_key}", token
+                        )
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                cache = get_cache()
+                cache_key = make_key(args, kwargs)
+                lease_key = f"{LEASE_KEY_PREFIX}{cache_key}"
+
+                entry = _unwrap_cached(await cache.get_async(cache_key))
+                state = _cached_state(entry, beta, time.time())
+                if state == "fresh":
+                    return entry["value"]
+
+                token = await cache.acquire_lease_async(lease_key, lock_timeout)
+                if state == "refresh" or (state == "stale" and stale_ttl):
+                    if token is None:
+                        # Another caller is refreshing; serve what we have
+                        return entry["value"]
+                    if stale_ttl:
+                        task = asyncio.create_task(
+                            recompute(cache, cache_key, token, args, kwargs)
+                        )
+                        _background_refreshes.add(task)
+                        task.add_done_callback(_background_refreshes.discard)
+                        return entry["value"]
+                    return await recompute(cache, cache_key, token, args, kwargs)
+
+                # Miss: wait for the lease holder's result
+                deadline = time.monotonic() + lock_timeout
+                while token is None and time.monotonic() < deadline:
+                    await asyncio.sleep(wait_interval)
+                    entry = _unwrap_cached(await cache.get_async(cache_key))
+                    if entry is not None:
+                        return entry["value"]
+                    # Holder may have failed without writing; take over
+                    token = await cache.acquire_lease_async(lease_key, lock_timeout)
+
+                return await recompute(cache, cache_key, token, args, kwargs)
+
+            return async_wrapper
+
+        def recompute(cache, cache_key, token, args, kwargs):
+            try:
+                start = time.monotonic()
+                result = func(*args, **kwargs)
+                envelope = _cache_envelope(result, time.monotonic() - start, ttl)
+                cache.set(cache_key, envelope, ttl=ttl + stale_ttl)
+                return result
+            finally:
+                if token:
+                    cache.release_lease(f"{LEASE_KEY_PREFIX}{cache_key}", token)
 
-            return result
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_cache()
+            cache_key = make_key(args, kwargs)
+            lease_key = f"{LEASE_KEY_PREFIX}{cache_key}"
+
+            entry = _unwrap_cached(cache.get(cache_key))
+            state = _cached_state(entry, beta, time.time())
+            if state == "fresh":
+                return entry["value"]
+
+            token = cache.acquire_lease(lease_key, lock_timeout)
+            if state == "refresh" or (state == "stale" and stale_ttl):
+                if token is None:
+                    # Another caller is refreshing; serve what we have
+                    return entry["value"]
+                if stale_ttl:
+                    threading.Thread(
+                        target=recompute,
+                        args=(cache, cache_key, token, args, kwargs),
+                        daemon=True,
+                    ).start()
+                    return entry["value"]
+                return recompute(cache, cache_key, token, args, kwargs)
+
+            # Miss: wait for the lease holder's result
+            deadline = time.monotonic() + lock_timeout
+            while token is None and time.monotonic() < deadline:
+                time.sleep(wait_interval)
+                entry = _unwrap_cached(cache.get(cache_key))
+                if entry is not None:
+                    return entry["value"]
+                # Holder may have failed without writing; take over
+                token = cache.acquire_lease(lease_key, lock_timeout)
+
+            return recompute(cache, cache_key, token, args, kwargs)
 
         return wrapper
 
@@ -601,6 +1668,11 @@ def cached(
 # ============================================================================
 
 
+def _strip_prefix(found: Dict[str, Any], prefix: str) -> Dict[str, Any]:
+    """Re-key get_many() results by ID."""
+    return {key[len(prefix) :]: value for key, value in found.items()}
+
+
 class UserCache:
     """Cache for user data."""
 
@@ -616,6 +1688,19 @@ class UserCache:
         """Cache user data."""
         return self.cache.set(f"user:{user_id}", user_data, ttl=self.ttl)
 
+    def get_users(self, user_ids: Iterable[str]) -> Dict[str, dict]:
+        """Get many users in one round trip ({user_id: data} for hits)."""
+        return _strip_prefix(
+            self.cache.get_many(f"user:{u}" for u in user_ids), "user:"
+        )
+
+    def set_users(self, users: Dict[str, dict]) -> bool:
+        """Cache many users ({user_id: data}) in one round trip."""
+        return self.cache.set_many(
+            {f"user:{user_id}": data for user_id, data in users.items()},
+            ttl=self.ttl,
+        )
+
     def invalidate_user(self, user_id: str) -> bool:
         """Invalidate user cache."""
         return self.cache.delete(f"user:{user_id}")
@@ -636,13 +1721,61 @@ class ContentCache:
         """Cache content metadata."""
         return self.cache.set(f"content:{content_id}", content_data, ttl=self.ttl)
 
+    def get_contents(self, content_ids: Iterable[str]) -> Dict[str, dict]:
+        """Get many content entries in one round trip ({content_id: data} for hits)."""
+        return _strip_prefix(
+            self.cache.get_many(f"content:{c}" for c in content_ids), "content:"
+        )
+
+    def set_contents(self, contents: Dict[str, dict]) -> bool:
+        """Cache many content entries ({content_id: data}) in one round trip."""
+        return self.cache.set_many(
+            {f"content:{content_id}": data for content_id, data in contents.items()},
+            ttl=self.ttl,
+        )
+
     def invalidate_content(self, content_id: str) -> bool:
         """Invalidate content cache."""
         return self.cache.delete(f"content:{content_id}")
 
+    def get_student_content(self, student_id: str, content_id: str) -> Optional[dict]:
+        """Get a student's content metadata from cache."""
+        return self.cache.get(f"content:student:{student_id}:{content_id}")
+
+    def set_student_content(
+        self, student_id: str, content_id: str, content_data: dict
+    ) -> bool:
+        """Cache a student's content metadata, tagged with the student."""
+        return self.cache.set(
+            f"content:student:{student_id}:{content_id}",
+            content_data,
+            ttl=self.ttl,
+            tags=[f"student:{student_id}"],
+        )
+
+    def get_student_contents(
+        self, student_id: str, content_ids: Iterable[str]
+    ) -> Dict[str, dict]:
+        """Get many of a student's content entries in one round trip."""
+        prefix = f"content:student:{student_id}:"
+        return _strip_prefix(
+            self.cache.get_many(f"{prefix}{c}" for c in content_ids), prefix
+        )
+
+    def set_student_contents(self, student_id: str, contents: Dict[str, dict]) -> bool:
+        """Cache many of a student's content entries, tagged with the student."""
+        return self.cache.set_many(
+            {
+                f"content:student:{student_id}:{content_id}": data
+                for content_id, data in contents.items()
+            },
+            ttl=self.ttl,
+            tags=[f"student:{student_id}"],
+        )
+
     def invalidate_student_content(self, student_id: str) -> int:
         """Invalidate all content for a student."""
-        return self.cache.delete_pattern(f"content:student:{student_id}:*")
+        return self.cache.invalidate_tag(f"student:{student_id}")
 
 
 class SessionCache:
@@ -656,9 +1789,17 @@ class SessionCache:
         """Get session data."""
         return self.cache.get(f"session:{session_id}")
 
-    def set_session(self, session_id: str, session_data: dict) -> bool:
-        """Store session data."""
-        return self.cache.set(f"session:{session_id}", session_data, ttl=self.ttl)
+    def set_session(
+        self, session_id: str, session_data: dict, user_id: Optional[str] = None
+    ) -> bool:
+        """Store session data, tagged with its user (default: session_data["user_id"])."""
+        user_id = user_id or session_data.get("user_id")
+        return self.cache.set(
+            f"session:{session_id}",
+            session_data,
+            ttl=self.ttl,
+            tags=[f"user:{user_id}:sessions"] if user_id else None,
+        )
 
     def delete_session(self, session_id: str) -> bool:
         """Delete session."""
@@ -666,7 +1807,7 @@ class SessionCache:
 
     def delete_user_sessions(self, user_id: str) -> int:
         """Delete all sessions for a user."""
-        return self.cache.delete_pattern(f"session:*:user:{user_id}")
+        return self.cache.invalidate_tag(f"user:{user_id}:sessions")
 
 
 # ============================================================================
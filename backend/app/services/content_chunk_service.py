@@ -0,0 +1,95 @@
+"""
+Content chunk queries (Phase 4.3).
+
+Exact-topic lookups over content_chunks without a vector search. On
+PostgreSQL these are JSONB containment queries (topic_ids @> '["..."]')
+served by the GIN indexes from migrations/add_content_chunks_gin_indexes.sql.
+"""
+import json
+from itertools import islice
+from typing import List, Optional
+
+from sqlalchemy import String, cast, nullslast, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+from app.models.content import ContentChunk
+
+
+def _is_postgresql(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _contains(db: Session, column, value: str):
+    """
+    Filter clause: JSON array column contains value.
+
+    Uses @> on PostgreSQL (GIN index scan). Other dialects (SQLite in
+    tests/dev) get a LIKE prefilter for the value as serialized in the
+    array, with LIKE wildcards escaped (topic IDs contain "_"); callers
+    re-check membership in Python.
+    """
+    if _is_postgresql(db):
+        return type_coerce(column, JSONB).contains([value])
+    pattern = (
+        json.dumps(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    )
+    return cast(column, String).like(f"%{pattern}%", escape="\\")
+
+
+def _chunks_containing(
+    db: Session, column, value: str, limit: int, subject: Optional[str]
+) -> List[ContentChunk]:
+    """Chunks whose JSON array column contains value, best quality first."""
+    query = db.query(ContentChunk).filter(_contains(db, column, value))
+    if subject:
+        query = query.filter(ContentChunk.subject == subject)
+    query = query.order_by(
+        nullslast(ContentChunk.quality_score.desc()), ContentChunk.chunk_id
+    )
+
+    if _is_postgresql(db):
+        return query.limit(limit).all()
+
+    # Re-check the LIKE prefilter before limiting, so false positives
+    # don't take the place of real matches
+    matches = (chunk for chunk in query if value in (getattr(chunk, column.key) or []))
+    return list(islice(matches, limit))
+
+
+def get_chunks_for_topic(
+    db: Session, topic_id: str, limit: int = 20, subject: Optional[str] = None
+) -> List[ContentChunk]:
+    """
+    Get content chunks tagged with a topic.
+
+    Args:
+        db: Database session
+        topic_id: Canonical topic ID, e.g. "topic_phys_mech_newton_3"
+        limit: Max chunks to return
+        subject: Optional subject filter (physics, chemistry, ...)
+
+    Returns:
+        Chunks whose topic_ids contain topic_id, best quality first
+    """
+    return _chunks_containing(db, ContentChunk.topic_ids, topic_id, limit, subject)
+
+
+def get_chunks_for_keyword(
+    db: Session, keyword: str, limit: int = 20, subject: Optional[str] = None
+) -> List[ContentChunk]:
+    """
+    Get content chunks tagged with a keyword.
+
+    Args:
+        db: Database session
+        keyword: Extracted keyword, e.g. "momentum" (keywords are lowercase)
+        limit: Max chunks to return
+        subject: Optional subject filter
+
+    Returns:
+        Chunks whose keywords contain keyword, best quality first
+    """
+    return _chunks_containing(
+        db, ContentChunk.keywords, keyword.lower(), limit, subject
+    )
@@ -9,15 +9,30 @@ import logging
 import hashlib
 import json
 import re
-from typing import List, Dict, Optional, Any, Tuple
+import time
+from typing import List, Dict, Optional, Any, Tuple, Callable
 from datetime import datetime
 import asyncio
 
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.database import SessionLocal
 from app.services.embeddings_service import get_embeddings_service
 from app.models.content import ContentChunk, ContentSource
 
 logger = logging.getLogger(__name__)
 
+# Rows per multi-row INSERT. ~20 bind params per row keeps a batch well
+# under both PostgreSQL's 65535 and SQLite's 32766 parameter limits.
+STORE_BATCH_SIZE = 500
+
+# Dialects with INSERT ... ON CONFLICT (chunk_id) DO UPDATE support
+_UPSERT_DIALECTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
 
 class ContentIngestionService:
     """
@@ -32,9 +47,21 @@ class ContentIngestionService:
     6. Index for fast retrieval
     """
 
-    def __init__(self):
-        """Initialize content ingestion service."""
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        store_batch_size: int = STORE_BATCH_SIZE,
+    ):
+        """
+        Initialize content ingestion service.
+
+        Args:
+            session_factory: Creates database sessions for chunk storage
+            store_batch_size: Rows per INSERT statement / transaction
+        """
         self.embeddings_service = get_embeddings_service()
+        self.session_factory = session_factory
+        self.store_batch_size = store_batch_size
 
         # Chunking configuration
         self.chunk_config = {
@@ -98,7 +125,8 @@ class ContentIngestionService:
 
             # Store chunks in database
             logger.info(f"[{ingestion_id}] Storing chunks in database")
-            stored_chunks = await self._store_chunks(chunks)
+            storage = await self._store_chunks(chunks)
+            stored_chunks = storage["chunk_ids"]
 
             # Update source status
             await self._update_source_status(
@@ -117,6 +145,9 @@ class ContentIngestionService:
                 "chunks_created": len(stored_chunks),
                 "total_words": sum(chunk["word_count"] for chunk in chunks),
                 "subjects": [subject],
+                "storage": {
+                    key: value for key, value in storage.items() if key != "chunk_ids"
+                },
                 "completed_at": datetime.utcnow().isoformat(),
             }
 
@@ -428,19 +459,115 @@ class ContentIngestionService:
 
         return list(concepts)[:15]  # Limit to 15 concepts
 
-    async def _store_chunks(self, chunks: List[Dict]) -> List[str]:
+    async def _store_chunks(self, chunks: List[Dict]) -> Dict[str, Any]:
+        """
+        Upsert chunks into content_chunks.
+
+        Rows are written with multi-row INSERT ... ON CONFLICT (chunk_id)
+        DO UPDATE statements, one transaction per batch, so re-ingesting a
+        book updates existing rows instead of failing or duplicating them.
+        The blocking database work runs in a worker thread.
+
+        Args:
+            chunks: Chunk dicts from _create_chunk_dict (with embedding_id)
+
+        Returns:
+            Dict with chunk_ids, rows, batches, seconds and rows_per_second
+        """
+        rows = self._chunk_rows(chunks)
+
+        start = time.perf_counter()
+        batches = await asyncio.to_thread(self._upsert_chunk_rows, rows)
+        elapsed = time.perf_counter() - start
+
+        rows_per_second = round(len(rows) / elapsed, 1) if elapsed > 0 else 0.0
+        logger.info(
+            f"Stored {len(rows)} chunks in {batches} batches "
+            f"({elapsed:.2f}s, {rows_per_second} rows/s)"
+        )
+
+        return {
+            "chunk_ids": [row["chunk_id"] for row in rows],
+            "rows": len(rows),
+            "batches": batches,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": rows_per_second,
+        }
+
+    def _chunk_rows(self, chunks: List[Dict]) -> List[Dict]:
+        """
+        Map chunk dicts to content_chunks column values.
+
+        Chunk IDs are content hashes, so identical text within one book
+        yields the same ID; only the last occurrence is kept (PostgreSQL
+        rejects an upsert that touches the same row twice).
         """
-        Store chunks in database.
+        columns = {column.name for column in ContentChunk.__table__.columns}
+        now = datetime.utcnow()
+
+        rows: Dict[str, Dict] = {}
+        for chunk in chunks:
+            row = {key: value for key, value in chunk.items() if key in columns}
+            if chunk.get("embedding_id"):
+                row["embedding_model"] = getattr(
+                    self.embeddings_service, "model_name", None
+                )
+            row.setdefault("created_at", now)
+            row["updated_at"] = now
+            rows[row["chunk_id"]] = row
+
+        return list(rows.values())
 
-        In production, would use SQLAlchemy bulk insert.
-        For now, returns chunk IDs.
+    def _upsert_chunk_rows(self, rows: List[Dict]) -> int:
         """
-        # Mock storage - in production would insert to PostgreSQL
-        chunk_ids = [chunk["chunk_id"] for chunk in chunks]
+        Write rows in batches, committing once per batch.
+
+        Args:
+            rows: Column dicts from _chunk_rows
 
-        logger.info(f"Stored {len(chunk_ids)} chunks (mock)")
+        Returns:
+            Number of batches written
+        """
+        if not rows:
+            return 0
 
-        return chunk_ids
+        session = self.session_factory()
+        try:
+            insert = _UPSERT_DIALECTS.get(session.get_bind().dialect.name)
+            batches = 0
+            for start in range(0, len(rows), self.store_batch_size):
+                batch = rows[start : start + self.store_batch_size]
+                if insert is None:
+                    # No native upsert: fall back to per-row merge
+                    for row in batch:
+                        session.merge(ContentChunk(**row))
+                else:
+                    session.execute(self._upsert_statement(insert, batch))
+                session.commit()
+                batches += 1
+            return batches
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def _upsert_statement(insert, batch: List[Dict]):
+        """Multi-row INSERT ... ON CONFLICT (chunk_id) DO UPDATE for a batch."""
+        # All rows in a VALUES list must share the same keys
+        keys = sorted(set().union(*batch))
+        stmt = insert(ContentChunk).values(
+            [{key: row.get(key) for key in keys} for row in batch]
+        )
+        return stmt.on_conflict_do_update(
+            index_elements=["chunk_id"],
+            set_={
+                key: stmt.excluded[key]
+                for key in keys
+                if key not in ("chunk_id", "created_at")
+            },
+        )
 
     async def _update_source_status(
         self, source_id: str, status: str, chunks_count: int
@@ -42,6 +42,10 @@ def check_content_exists(db: Session, topic_id: str, interest: str) -> Dict:
     """
     Check if content exists for a topic-interest combination.
 
+    Not negative-cached: ContentMetadata rows are created and updated in
+    many places, so a remembered "needs to be generated" could hide a
+    generation that has just started and invite duplicate requests.
+
     Args:
         db: Database session
         topic_id: Topic ID
@@ -7,13 +7,103 @@ Retrieval-Augmented Generation service that:
 3. Provides context for script generation
 """
 import os
+import copy
+import time
+import asyncio
 import logging
-from typing import List, Dict, Optional, Any
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any, Tuple, Hashable
 
 from app.services.embeddings_service import get_embeddings_service
 
 logger = logging.getLogger(__name__)
 
+# Topic ID subject segment ("topic_<segment>_...") -> OER chunk subject
+# (metadata.subject / index shard)
+TOPIC_SUBJECT_SEGMENTS = {
+    "phys": "physics",
+    "chem": "chemistry",
+    "bio": "biology",
+    "math": "mathematics",
+    "calc": "mathematics",
+    "algebra": "mathematics",
+}
+
+# Retrieval cache defaults (overridable via environment)
+DEFAULT_CACHE_MAX_ENTRIES = 2048
+DEFAULT_CACHE_TTL_SECONDS = 900
+# How often the active VectorIndex version is re-read from the database
+INDEX_VERSION_REFRESH_SECONDS = 60
+
+
+class RetrievalCache:
+    """
+    Bounded in-process LRU cache with per-entry TTL.
+
+    Keys include the active vector index version, so entries written
+    against an old index are never served after a reindex; they simply
+    age out or get evicted.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        """
+        Initialize cache.
+
+        Args:
+            max_entries: Maximum number of cached retrievals (LRU eviction)
+            ttl_seconds: Entry lifetime in seconds
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        """Store value, evicting the least recently used entry when full."""
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries."""
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
 
 class RAGService:
     """
@@ -59,12 +149,37 @@ class RAGService:
             logger.warning(f"Vertex AI not available: {e}. Running in mock mode.")
             self.vertex_available = False
 
+        # Retrieval cache, keyed by active index version + query parameters
+        self.retrieval_cache = RetrievalCache(
+            max_entries=int(
+                os.getenv("RAG_CACHE_MAX_ENTRIES", DEFAULT_CACHE_MAX_ENTRIES)
+            ),
+            ttl_seconds=float(
+                os.getenv("RAG_CACHE_TTL_SECONDS", DEFAULT_CACHE_TTL_SECONDS)
+            ),
+        )
+        self._index_version: Optional[str] = None
+        self._index_version_checked_at = 0.0
+        self._index_version_refresh: Optional[asyncio.Task] = None
+
+        # Subject/grade restricts only match datapoints upserted with them;
+        # enable once the deployed index has been rebuilt by
+        # oer_ingestion/05_create_vector_index.py, or filtered queries
+        # return nothing.
+        self.search_filters_enabled = (
+            os.getenv("RAG_SEARCH_FILTERS_ENABLED", "false").lower() == "true"
+        )
+
     async def retrieve_content(
         self, topic_id: str, interest: str, grade_level: int, limit: int = 5
     ) -> List[Dict[str, Any]]:
         """
         Retrieve relevant OER content for topic and interest.
 
+        Results are served from the retrieval cache when the same
+        (topic, interest, grade, limit) was retrieved against the currently
+        active vector index within the cache TTL.
+
         Args:
             topic_id: Canonical topic ID
             interest: Student interest for personalization
@@ -87,13 +202,117 @@ class RAGService:
             ...     limit=5
             ... )
         """
-        # Use Matching Engine if available, otherwise mock
+        cache_key = (
+            await self.get_index_version(),
+            topic_id.strip().lower(),
+            interest.strip().lower(),
+            grade_level,
+            limit,
+        )
+        cached = self.retrieval_cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f"Retrieval cache HIT: {topic_id}/{interest}/{grade_level}")
+            return copy.deepcopy(cached)
+
+        # Use Matching Engine if available, otherwise exact-topic chunks,
+        # then mock
         if self.matching_engine_available and self.index_endpoint:
-            return await self._retrieve_with_matching_engine(
+            try:
+                results = await self._retrieve_with_matching_engine(
+                    topic_id, interest, grade_level, limit
+                )
+            except Exception as e:
+                logger.error(f"Matching Engine retrieval failed: {e}", exc_info=True)
+                # Fallback (not cached, so the next call retries the vector search)
+                return await self._retrieve_without_vectors(
+                    topic_id, interest, grade_level, limit
+                )
+        else:
+            results = await self._retrieve_without_vectors(
                 topic_id, interest, grade_level, limit
             )
-        else:
-            return self._mock_retrieve_content(topic_id, interest, grade_level, limit)
+
+        self.retrieval_cache.set(cache_key, copy.deepcopy(results))
+        return results
+
+    async def get_index_version(self) -> str:
+        """
+        Identify the active vector index for cache keying.
+
+        Re-read from the database at most every INDEX_VERSION_REFRESH_SECONDS,
+        so a reindex (new VectorIndex row or bumped last_updated_at) stops
+        old cache entries from matching within that window. The query runs
+        in a worker thread, off the event loop, and one lookup is shared by
+        every concurrent caller; while it runs, callers keep using the
+        previous version, or wait on the shared lookup on a cold start.
+
+        Returns:
+            Version string, e.g. "oer-index-v3@2024-05-01T12:00:00"
+        """
+        now = time.monotonic()
+        if (
+            self._index_version is not None
+            and now - self._index_version_checked_at <= INDEX_VERSION_REFRESH_SECONDS
+        ):
+            return self._index_version
+
+        refresh = self._index_version_refresh
+        if (
+            refresh is None
+            or refresh.done()
+            or refresh.get_loop() is not asyncio.get_running_loop()
+        ):
+            self._index_version_checked_at = now
+            refresh = asyncio.create_task(self._refresh_index_version())
+            self._index_version_refresh = refresh
+
+        if self._index_version is not None:
+            return self._index_version
+        # Shielded so a cancelled caller doesn't cancel the lookup for the rest
+        return await asyncio.shield(refresh)
+
+    async def _refresh_index_version(self) -> str:
+        """Run one index version lookup and publish it if still current."""
+        version = await asyncio.to_thread(self._lookup_index_version)
+        # invalidate_cache() may have dropped this lookup while it ran
+        if self._index_version_refresh is asyncio.current_task():
+            self._index_version = version
+        return version
+
+    def _lookup_index_version(self) -> str:
+        """Latest ready VectorIndex, falling back to the deployed index ID."""
+        deployed_index_id = os.getenv("VERTEX_DEPLOYED_INDEX_ID")
+        if not self.matching_engine_available:
+            return "mock"
+
+        try:
+            from app.core.database import SessionLocal
+            from app.models.content import VectorIndex
+
+            db = SessionLocal()
+            try:
+                index = (
+                    db.query(VectorIndex)
+                    .filter(VectorIndex.status == "ready")
+                    .order_by(VectorIndex.updated_at.desc())
+                    .first()
+                )
+            finally:
+                db.close()
+
+            if index:
+                updated = index.last_updated_at or index.updated_at
+                return f"{index.index_id}@{updated.isoformat() if updated else ''}"
+        except Exception as e:
+            logger.warning(f"Could not read active vector index version: {e}")
+
+        return deployed_index_id or "unknown"
+
+    def invalidate_cache(self):
+        """Drop all cached retrievals (e.g. right after a reindex)."""
+        self.retrieval_cache.clear()
+        self._index_version = None
+        self._index_version_refresh = None
 
     async def _retrieve_with_matching_engine(
         self, topic_id: str, interest: str, grade_level: int, limit: int
@@ -104,58 +323,166 @@ class RAGService:
         Process:
         1. Build search query from topic_id + interest
         2. Generate query embedding
-        3. Search vector index
-        4. Filter and rank results
+        3. Search vector index; with RAG_SEARCH_FILTERS_ENABLED, restricted
+           to the topic's subject and chunks whose grade range contains
+           grade_level
+        4. Rank results
         5. Return top matches
-        """
-        try:
-            # Build search query
-            query_text = f"{topic_id} {interest}"
 
-            # Generate query embedding
-            query_embedding = await self.embeddings_service.generate_query_embedding(
-                query_text
+        Raises on search failure; retrieve_content() handles the fallback.
+        """
+        # Build search query
+        query_text = f"{topic_id} {interest}"
+
+        # Generate query embedding
+        query_embedding = await self.embeddings_service.generate_query_embedding(
+            query_text
+        )
+
+        # Search vector index
+        # Note: Requires deployed index endpoint. Filtering happens
+        # server-side, so only `limit` neighbours are requested.
+        subject_filter, grade_filter = None, None
+        if self.search_filters_enabled:
+            subject_filter, grade_filter = self._build_search_filters(
+                topic_id, grade_level
             )
-
-            # Search vector index
-            # Note: Requires deployed index endpoint
-            matches = self.index_endpoint.find_neighbors(
-                deployed_index_id=os.getenv("VERTEX_DEPLOYED_INDEX_ID"),
-                queries=[query_embedding],
-                num_neighbors=limit * 2,  # Get extra for filtering
+        matches = self.index_endpoint.find_neighbors(
+            deployed_index_id=os.getenv("VERTEX_DEPLOYED_INDEX_ID"),
+            queries=[query_embedding],
+            num_neighbors=limit,
+            filter=subject_filter,
+            numeric_filter=grade_filter,
+        )
+
+        # Process results
+        content_results = []
+
+        for match in matches[0]:  # First query results
+            chunk_id = match.id
+            distance = match.distance
+
+            # Fetch chunk metadata from database
+            # In production, would query PostgreSQL here
+            # For now, create mock result
+            relevance_score = 1.0 - distance  # Convert distance to similarity
+
+            content_results.append(
+                {
+                    "content_id": chunk_id,
+                    "title": f"Content for {topic_id}",
+                    "text": "Educational content retrieved from vector database...",
+                    "source": "OpenStax",
+                    "relevance_score": relevance_score,
+                }
             )
 
-            # Process results
-            content_results = []
-
-            for match in matches[0]:  # First query results
-                chunk_id = match.id
-                distance = match.distance
-
-                # Fetch chunk metadata from database
-                # In production, would query PostgreSQL here
-                # For now, create mock result
-                relevance_score = 1.0 - distance  # Convert distance to similarity
-
-                content_results.append(
-                    {
-                        "content_id": chunk_id,
-                        "title": f"Content for {topic_id}",
-                        "text": "Educational content retrieved from vector database...",
-                        "source": "OpenStax",
-                        "relevance_score": relevance_score,
-                    }
-                )
+        # Sort by relevance
+        content_results.sort(key=lambda x: x["relevance_score"], reverse=True)
+
+        return content_results[:limit]
 
-            # Sort by relevance
-            content_results.sort(key=lambda x: x["relevance_score"], reverse=True)
+    async def _retrieve_without_vectors(
+        self, topic_id: str, interest: str, grade_level: int, limit: int
+    ) -> List[Dict]:
+        """
+        Exact-topic chunks from the database, else mock content.
+
+        The chunk query is synchronous, so it runs in a worker thread.
+        """
+        chunks = await asyncio.to_thread(self._retrieve_topic_chunks, topic_id, limit)
+        return chunks or self._mock_retrieve_content(
+            topic_id, interest, grade_level, limit
+        )
+
+    def _retrieve_topic_chunks(self, topic_id: str, limit: int) -> List[Dict]:
+        """
+        Retrieve chunks tagged with the topic, without a vector search.
 
-            return content_results[:limit]
+        A JSONB containment lookup on content_chunks.topic_ids (GIN index
+        scan), used when Matching Engine is unavailable or fails.
 
+        Returns:
+            Content dicts (same shape as vector results); empty if the
+            topic has no tagged chunks or the database is unavailable
+        """
+        try:
+            from app.core.database import SessionLocal
+            from app.services.content_chunk_service import get_chunks_for_topic
+
+            db = SessionLocal()
+            try:
+                chunks = get_chunks_for_topic(db, topic_id, limit=limit)
+            finally:
+                db.close()
         except Exception as e:
-            logger.error(f"Matching Engine retrieval failed: {e}", exc_info=True)
-            # Fallback to mock
-            return self._mock_retrieve_content(topic_id, interest, grade_level, limit)
+            logger.warning(f"Topic chunk lookup failed for {topic_id}: {e}")
+            return []
+
+        return [
+            {
+                "content_id": chunk.chunk_id,
+                "title": chunk.section,
+                "text": chunk.text,
+                "source": chunk.source_title,
+                # Exact topic match; quality_score orders within the topic
+                "relevance_score": (
+                    chunk.quality_score if chunk.quality_score is not None else 1.0
+                ),
+                "keywords": chunk.keywords or [],
+            }
+            for chunk in chunks
+        ]
+
+    @staticmethod
+    def infer_subject(topic_id: str) -> Optional[str]:
+        """
+        Infer OER subject (index shard) from a canonical topic ID.
+
+        Only the subject segment right after "topic_" is considered, so
+        IDs like "topic_newton_phys" or "topic_biophysics_x" don't match.
+
+        Args:
+            topic_id: e.g. "topic_phys_mech_newton_3"
+
+        Returns:
+            Subject name matching chunk metadata, or None if unknown
+        """
+        segments = topic_id.lower().split("_")
+        if len(segments) < 2 or segments[0] != "topic":
+            return None
+        return TOPIC_SUBJECT_SEGMENTS.get(segments[1])
+
+    def _build_search_filters(
+        self, topic_id: str, grade_level: Optional[int]
+    ) -> Tuple[Optional[List[Any]], Optional[List[Any]]]:
+        """
+        Build Matching Engine restricts for subject and grade.
+
+        Datapoints carry a "subject" token restrict and "grade_min" /
+        "grade_max" numeric restricts (see oer_ingestion upload_embeddings).
+
+        Returns:
+            (token filter, numeric filter); either may be None
+        """
+        from google.cloud.aiplatform.matching_engine.matching_engine_index_endpoint import (
+            Namespace,
+            NumericNamespace,
+        )
+
+        subject = self.infer_subject(topic_id)
+        subject_filter = [Namespace("subject", [subject])] if subject else None
+
+        grade_filter = None
+        if grade_level is not None:
+            grade_filter = [
+                NumericNamespace("grade_min", value_int=grade_level, op="LESS_EQUAL"),
+                NumericNamespace(
+                    "grade_max", value_int=grade_level, op="GREATER_EQUAL"
+                ),
+            ]
+
+        return subject_filter, grade_filter
 
     def _mock_retrieve_content(
         self, topic_id: str, interest: str, grade_level: int, limit: int
@@ -0,0 +1,518 @@
+"""
+Content Cache Warmer for Cloud Run Jobs
+
+Keeps the most popular (topic, interest) combinations resident in the
+Redis hot tier. Content metadata lives in Redis for 1 hour, so without
+warming the first students of every morning class all miss to GCS (or
+trigger generation) at once.
+
+Run on a schedule shortly before classes start, e.g. every 30 minutes
+between 06:00 and 15:00 local time.
+
+How it works:
+- Rank combinations by popularity of their completed content
+  (view_count + COMPLETION_WEIGHT * completion_count), boosted for topics
+  currently scheduled in classes
+- Warm the top N with CacheService.prefetch_content_cache(): Redis hits get
+  their TTL refreshed, misses are copied back from GCS, all in one pipeline
+- Rebuild combinations missing from every tier from their ContentMetadata
+  rows (one query; written to Redis and GCS)
+- Optionally (--pregenerate), during off-peak hours only, request
+  generation for up to --budget scheduled combinations that have no
+  content yet
+
+"Scheduled in classes" is derived from StudentProgress: topics that
+enrolled students are working on in a class (in progress, updated within
+SCHEDULE_LOOKBACK_DAYS).
+
+Environment:
+- CACHE_WARM_TOP_N: Combinations to keep warm (default 500)
+- CACHE_WARM_SCHEDULED_BOOST: Score multiplier for scheduled topics (2.0)
+- CACHE_WARM_OFFPEAK_HOURS: Local hours allowed for pre-generation,
+  "start-end" with end exclusive, may wrap midnight (default "0-5")
+- CACHE_WARM_TIMEZONE: Time zone of those hours (default "America/Chicago")
+- CACHE_WARM_PREGENERATE_BUDGET: Max generation requests per run (20)
+
+Usage:
+    python -m app.workers.cache_warmer [--top-n 500] [--pregenerate] [--budget 20]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_, func, or_, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.class_student import ClassStudent
+from app.models.content_metadata import ContentMetadata, GenerationStatus
+from app.models.interest import StudentInterest
+from app.models.progress import ProgressStatus, StudentProgress, Topic
+from app.models.user import User
+from app.services.cache_service import CacheService
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+WARM_TOP_N = int(os.getenv("CACHE_WARM_TOP_N", "500"))
+SCHEDULED_TOPIC_BOOST = float(os.getenv("CACHE_WARM_SCHEDULED_BOOST", "2.0"))
+OFFPEAK_HOURS = os.getenv("CACHE_WARM_OFFPEAK_HOURS", "0-5")
+WARM_TIMEZONE = os.getenv("CACHE_WARM_TIMEZONE", "America/Chicago")
+PREGENERATE_BUDGET = int(os.getenv("CACHE_WARM_PREGENERATE_BUDGET", "20"))
+
+# A completion says more about demand than a view
+COMPLETION_WEIGHT = 2
+SCHEDULE_LOOKBACK_DAYS = 7
+DEFAULT_GRADE_LEVEL = 10
+
+
+@dataclass
+class HotCombination:
+    """A (topic, interest) combination ranked for warming."""
+
+    topic_id: str
+    interest_id: str
+    score: float
+    scheduled: bool = False
+
+    @property
+    def interest(self) -> str:
+        """Interest name as used in cache keys ("int_basketball" -> "basketball")."""
+        return self.interest_id.replace("int_", "")
+
+
+def _live_content():
+    """Filter: completed, non-archived content."""
+    return and_(
+        ContentMetadata.status == GenerationStatus.COMPLETED.value,
+        or_(ContentMetadata.archived.is_(False), ContentMetadata.archived.is_(None)),
+    )
+
+
+def scheduled_topic_ids(db: Session, now: Optional[datetime] = None) -> Set[str]:
+    """
+    Topics currently scheduled in classes.
+
+    Args:
+        db: Database session
+        now: Current UTC time (default: utcnow)
+
+    Returns:
+        Topic IDs with class-linked, in-progress progress updated within
+        SCHEDULE_LOOKBACK_DAYS
+    """
+    since = (now or datetime.utcnow()) - timedelta(days=SCHEDULE_LOOKBACK_DAYS)
+    rows = (
+        db.query(StudentProgress.topic_id)
+        .filter(
+            StudentProgress.class_id.isnot(None),
+            StudentProgress.status == ProgressStatus.IN_PROGRESS,
+            StudentProgress.updated_at >= since,
+        )
+        .distinct()
+        .all()
+    )
+    return {topic_id for (topic_id,) in rows}
+
+
+def rank_hot_combinations(
+    db: Session,
+    top_n: int = WARM_TOP_N,
+    scheduled: Optional[Set[str]] = None,
+) -> List[HotCombination]:
+    """
+    Rank (topic, interest) combinations by popularity.
+
+    Args:
+        db: Database session
+        top_n: Number of combinations to return
+        scheduled: Topic IDs to boost (default: scheduled_topic_ids())
+
+    Returns:
+        Up to top_n combinations, highest score first
+    """
+    if scheduled is None:
+        scheduled = scheduled_topic_ids(db)
+
+    popularity = func.sum(func.coalesce(ContentMetadata.view_count, 0)) + (
+        COMPLETION_WEIGHT * func.sum(func.coalesce(ContentMetadata.completion_count, 0))
+    )
+    rows = (
+        db.query(ContentMetadata.topic_id, ContentMetadata.interest_id, popularity)
+        .filter(_live_content(), ContentMetadata.interest_id.isnot(None))
+        .group_by(ContentMetadata.topic_id, ContentMetadata.interest_id)
+        .all()
+    )
+
+    combinations = []
+    for topic_id, interest_id, score in rows:
+        is_scheduled = topic_id in scheduled
+        # +1 so never-viewed content on a scheduled topic still ranks
+        score = float(score or 0)
+        if is_scheduled:
+            score = (score + 1) * SCHEDULED_TOPIC_BOOST
+        combinations.append(
+            HotCombination(topic_id, interest_id, score, scheduled=is_scheduled)
+        )
+
+    combinations.sort(key=lambda c: (-c.score, c.topic_id, c.interest_id))
+    return combinations[:top_n]
+
+
+def content_cache_metadata(content: ContentMetadata, cache_key: str) -> Dict:
+    """
+    Cache metadata for a ContentMetadata row (the store_content_cache shape).
+
+    Args:
+        content: Completed content row
+        cache_key: Cache key for its (topic, interest)
+
+    Returns:
+        Metadata dict
+    """
+    return {
+        "cache_key": cache_key,
+        "content_id": content.content_id,
+        "status": "completed",
+        "topic_id": content.topic_id,
+        "interest_id": content.interest_id,
+        "video_url": content.video_url,
+        "thumbnail_url": content.thumbnail_url,
+        "duration_seconds": content.duration_seconds,
+        "generated_at": (
+            content.created_at.isoformat() if content.created_at else None
+        ),
+    }
+
+
+async def warm_hot_set(
+    db: Session, cache: CacheService, combinations: List[HotCombination]
+) -> Dict[str, int]:
+    """
+    Make sure every combination is resident in Redis.
+
+    Args:
+        db: Database session
+        cache: Cache service (with GCS client for the cold tier)
+        combinations: Combinations to warm
+
+    Returns:
+        Counts: hot, resident (Redis or GCS), rebuilt (from the database
+        into Redis) and missing (no completed content found)
+    """
+    keys = {cache.generate_cache_key(c.topic_id, c.interest): c for c in combinations}
+    found = await cache.prefetch_content_cache(keys, refresh_ttl=True)
+
+    # Newest live content for every combination not found, in one query
+    absent = {
+        (c.topic_id, c.interest_id): cache_key
+        for cache_key, c in keys.items()
+        if cache_key not in found
+    }
+    latest: Dict[Tuple[str, str], ContentMetadata] = {}
+    if absent:
+        rows = (
+            db.query(ContentMetadata)
+            .filter(
+                _live_content(),
+                tuple_(ContentMetadata.topic_id, ContentMetadata.interest_id).in_(
+                    list(absent)
+                ),
+            )
+            .order_by(ContentMetadata.created_at.desc())
+            .all()
+        )
+        for content in rows:
+            latest.setdefault((content.topic_id, content.interest_id), content)
+
+    rebuilt = missing = 0
+    for pair, cache_key in absent.items():
+        content = latest.get(pair)
+        if content is None:
+            missing += 1
+            continue
+        # Warming is about the hot tier: a failed GCS copy doesn't matter
+        in_redis, _ = await cache.store_content_tiers(
+            cache_key, content_cache_metadata(content, cache_key)
+        )
+        if in_redis:
+            rebuilt += 1
+
+    stats = {
+        "hot": len(keys),
+        "resident": len(found),
+        "rebuilt": rebuilt,
+        "missing": missing,
+    }
+    logger.info(f"Cache warm-up: {stats}")
+    return stats
+
+
+def parse_hours(spec: str) -> Tuple[int, int]:
+    """Parse "start-end" hours (end exclusive), e.g. "22-5"."""
+    start, _, end = spec.partition("-")
+    start, end = int(start), int(end)
+    if not (0 <= start <= 23 and 0 <= end <= 24):
+        raise ValueError(f"Invalid hour range: {spec}")
+    return start, end
+
+
+def is_offpeak(
+    now: Optional[datetime] = None,
+    hours: str = OFFPEAK_HOURS,
+    tz: str = WARM_TIMEZONE,
+) -> bool:
+    """
+    Check whether now falls in the off-peak hours.
+
+    Args:
+        now: Aware current time (default: now)
+        hours: "start-end" local hours, end exclusive, may wrap midnight
+        tz: IANA time zone of the hours
+
+    Returns:
+        True if pre-generation may run
+    """
+    start, end = parse_hours(hours)
+    hour = (now or datetime.now(timezone.utc)).astimezone(ZoneInfo(tz)).hour
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+def pregeneration_candidates(
+    db: Session, budget: int, scheduled: Optional[Set[str]] = None
+) -> List[Dict]:
+    """
+    Scheduled combinations with no content yet, most-demanded first.
+
+    Demand is the number of enrolled students working on the topic who
+    have the interest.
+
+    Args:
+        db: Database session
+        budget: Max candidates
+        scheduled: Scheduled topic IDs (default: scheduled_topic_ids())
+
+    Returns:
+        Dicts with topic_id, topic_name, interest_id, student_id (a
+        representative student, who owns the request), grade_level, demand
+    """
+    if scheduled is None:
+        scheduled = scheduled_topic_ids(db)
+    if not scheduled or budget <= 0:
+        return []
+
+    # Anything not archived counts as existing (including in-flight generation)
+    existing = {
+        (topic_id, interest_id)
+        for topic_id, interest_id in db.query(
+            ContentMetadata.topic_id, ContentMetadata.interest_id
+        )
+        .filter(
+            ContentMetadata.topic_id.in_(scheduled),
+            or_(
+                ContentMetadata.archived.is_(False),
+                ContentMetadata.archived.is_(None),
+            ),
+            ContentMetadata.status != GenerationStatus.FAILED.value,
+        )
+        .all()
+    }
+
+    demand = func.count(func.distinct(StudentProgress.student_id))
+    rows = (
+        db.query(
+            StudentProgress.topic_id,
+            Topic.name,
+            StudentInterest.interest_id,
+            func.min(StudentProgress.student_id),
+            demand,
+        )
+        .join(Topic, Topic.topic_id == StudentProgress.topic_id)
+        .join(
+            ClassStudent,
+            and_(
+                ClassStudent.class_id == StudentProgress.class_id,
+                ClassStudent.student_id == StudentProgress.student_id,
+            ),
+        )
+        .join(StudentInterest, StudentInterest.student_id == StudentProgress.student_id)
+        .filter(
+            StudentProgress.topic_id.in_(scheduled),
+            StudentProgress.status == ProgressStatus.IN_PROGRESS,
+        )
+        .group_by(StudentProgress.topic_id, Topic.name, StudentInterest.interest_id)
+        .order_by(demand.desc(), StudentProgress.topic_id, StudentInterest.interest_id)
+        .all()
+    )
+
+    candidates = []
+    for topic_id, topic_name, interest_id, student_id, count in rows:
+        if (topic_id, interest_id) in existing:
+            continue
+        grade_level = (
+            db.query(User.grade_level).filter(User.user_id == student_id).scalar()
+        )
+        candidates.append(
+            {
+                "topic_id": topic_id,
+                "topic_name": topic_name,
+                "interest_id": interest_id,
+                "student_id": student_id,
+                "grade_level": grade_level or DEFAULT_GRADE_LEVEL,
+                "demand": count,
+            }
+        )
+        if len(candidates) >= budget:
+            break
+    return candidates
+
+
+async def pregenerate_missing(
+    db: Session, candidates: List[Dict], pubsub_service=None
+) -> int:
+    """
+    Request generation for candidates through the normal async pipeline.
+
+    Args:
+        db: Database session
+        candidates: From pregeneration_candidates()
+        pubsub_service: PubSubService (default: get_pubsub_service())
+
+    Returns:
+        Number of requests published
+    """
+    from app.services.content_request_service import ContentRequestService
+
+    if pubsub_service is None:
+        from app.services.pubsub_service import get_pubsub_service
+
+        pubsub_service = get_pubsub_service()
+
+    request_service = ContentRequestService()
+    published = 0
+    for candidate in candidates:
+        correlation_id = f"cache-warm-{uuid.uuid4()}"
+        try:
+            content_request = request_service.create_request(
+                db=db,
+                student_id=candidate["student_id"],
+                topic=candidate["topic_name"],
+                learning_objective=None,
+                grade_level=str(candidate["grade_level"]),
+                correlation_id=correlation_id,
+            )
+            await pubsub_service.publish_content_request(
+                request_id=str(content_request.id),
+                correlation_id=correlation_id,
+                student_id=candidate["student_id"],
+                student_query=candidate["topic_name"],
+                grade_level=candidate["grade_level"],
+                interest=candidate["interest_id"].replace("int_", ""),
+            )
+            published += 1
+        except Exception as e:
+            logger.error(
+                f"Pre-generation request failed for "
+                f"{candidate['topic_id']}/{candidate['interest_id']}: {e}"
+            )
+    logger.info(
+        f"Requested pre-generation of {published}/{len(candidates)} combinations"
+    )
+    return published
+
+
+async def run(
+    db: Session,
+    cache: CacheService,
+    top_n: int = WARM_TOP_N,
+    pregenerate: bool = False,
+    budget: int = PREGENERATE_BUDGET,
+    force: bool = False,
+) -> Dict[str, int]:
+    """
+    One warmer run.
+
+    Args:
+        db: Database session
+        cache: Cache service
+        top_n: Combinations to keep warm
+        pregenerate: Also request generation of missing scheduled combinations
+        budget: Max generation requests
+        force: Pre-generate even outside off-peak hours
+
+    Returns:
+        warm_hot_set() counts plus "pregenerated"
+    """
+    scheduled = scheduled_topic_ids(db)
+    stats = await warm_hot_set(db, cache, rank_hot_combinations(db, top_n, scheduled))
+
+    stats["pregenerated"] = 0
+    if pregenerate:
+        if force or is_offpeak():
+            candidates = pregeneration_candidates(db, budget, scheduled)
+            stats["pregenerated"] = await pregenerate_missing(db, candidates)
+        else:
+            logger.info(
+                f"Skipping pre-generation outside off-peak hours ({OFFPEAK_HOURS})"
+            )
+    return stats
+
+
+def main():
+    """
+    Main entry point for the Cache Warmer (Cloud Run Job).
+
+    Exits non-zero if the run fails, so the job execution is marked failed.
+    """
+    parser = argparse.ArgumentParser(description="Warm the content cache hot set")
+    parser.add_argument("--top-n", type=int, default=WARM_TOP_N)
+    parser.add_argument("--pregenerate", action="store_true")
+    parser.add_argument("--budget", type=int, default=PREGENERATE_BUDGET)
+    parser.add_argument(
+        "--force", action="store_true", help="Pre-generate outside off-peak hours"
+    )
+    args = parser.parse_args()
+
+    from app.core.database import SessionLocal
+
+    try:
+        from google.cloud import storage
+
+        gcs_client = storage.Client()
+    except Exception as e:
+        logger.warning(f"GCS unavailable, warming from Redis and database only: {e}")
+        gcs_client = None
+
+    db = SessionLocal()
+    try:
+        stats = asyncio.run(
+            run(
+                db,
+                CacheService(gcs_client=gcs_client),
+                top_n=args.top_n,
+                pregenerate=args.pregenerate,
+                budget=args.budget,
+                force=args.force,
+            )
+        )
+    except Exception as e:
+        logger.error(f"Cache warmer failed: {e}", exc_info=True)
+        sys.exit(1)
+    finally:
+        db.close()
+
+    logger.info(f"Cache warmer finished: {stats}")
+
+
+if __name__ == "__main__":
+    main()
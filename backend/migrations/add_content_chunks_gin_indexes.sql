@@ -0,0 +1,86 @@
+-- Add JSONB GIN Indexes for Content Chunks
+-- Makes topic- and keyword-scoped chunk lookups index scans
+--
+-- Context:
+-- content_chunks.topic_ids and content_chunks.keywords were created as JSON
+-- columns. JSON cannot be GIN-indexed, so every topic lookup was a
+-- sequential scan over the whole chunk table. This migration converts both
+-- columns to JSONB and adds GIN indexes for containment (@>) queries.
+--
+-- Query Patterns Optimized:
+-- 1. Topic Lookup: topic_ids @> '["topic_phys_mech_newton_3"]'
+--    (content_chunk_service.get_chunks_for_topic, RAG exact-topic fallback)
+-- 2. Keyword Lookup: keywords @> '["momentum"]'
+--
+-- Run: psql -h HOST -U USER -d DATABASE -f add_content_chunks_gin_indexes.sql
+
+-- ============================================================================
+-- Column Types (JSON -> JSONB)
+-- ============================================================================
+
+-- ALTER COLUMN TYPE rewrites the table and holds an ACCESS EXCLUSIVE lock
+-- for the duration (seconds for ~100k chunks). Run outside ingestion runs.
+-- Already-JSONB columns are left untouched, so the migration is re-runnable.
+DO $$
+BEGIN
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'content_chunks' AND column_name = 'topic_ids') = 'json' THEN
+        ALTER TABLE content_chunks
+            ALTER COLUMN topic_ids TYPE JSONB USING topic_ids::jsonb;
+    END IF;
+
+    IF (SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'content_chunks' AND column_name = 'keywords') = 'json' THEN
+        ALTER TABLE content_chunks
+            ALTER COLUMN keywords TYPE JSONB USING keywords::jsonb;
+    END IF;
+END $$;
+
+-- ============================================================================
+-- GIN Indexes
+-- ============================================================================
+
+-- jsonb_path_ops: supports only @>, but is smaller and faster than the
+-- default jsonb_ops for containment, which is the only operator we use.
+
+-- Used by: get_chunks_for_topic(), RAGService topic fallback
+-- Query Pattern: WHERE topic_ids @> '["<topic_id>"]' ORDER BY quality_score DESC LIMIT ?
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_content_topic_ids
+ON content_chunks USING GIN (topic_ids jsonb_path_ops);
+
+COMMENT ON INDEX idx_content_topic_ids IS
+'GIN containment index for topic-scoped chunk lookup';
+
+-- Used by: keyword-scoped chunk lookup
+-- Query Pattern: WHERE keywords @> '["<keyword>"]'
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_content_keywords
+ON content_chunks USING GIN (keywords jsonb_path_ops);
+
+COMMENT ON INDEX idx_content_keywords IS
+'GIN containment index for keyword-scoped chunk lookup';
+
+ANALYZE content_chunks;
+
+-- ============================================================================
+-- Verification
+-- ============================================================================
+
+-- Should show "Bitmap Index Scan on idx_content_topic_ids":
+-- EXPLAIN ANALYZE
+-- SELECT chunk_id FROM content_chunks
+-- WHERE topic_ids @> '["topic_phys_mech_newton_3"]'::jsonb
+-- LIMIT 20;
+
+-- ============================================================================
+-- Migration Notes
+-- ============================================================================
+
+-- CONCURRENTLY: Indexes are built without blocking writes. CONCURRENTLY
+-- cannot run inside a transaction block, so do not wrap this file in
+-- BEGIN/COMMIT (psql -1 / --single-transaction).
+--
+-- Rollback:
+-- DROP INDEX CONCURRENTLY IF EXISTS idx_content_topic_ids;
+-- DROP INDEX CONCURRENTLY IF EXISTS idx_content_keywords;
+-- ALTER TABLE content_chunks ALTER COLUMN topic_ids TYPE JSON USING topic_ids::json;
+-- ALTER TABLE content_chunks ALTER COLUMN keywords TYPE JSON USING keywords::json;
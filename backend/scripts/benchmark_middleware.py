@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Benchmark the HTTP middleware stack.
+
+Compares throughput (requests/second) and latency percentiles of:
+1. none: the bare application
+2. basehttp: the previous stack of BaseHTTPMiddleware layers
+3. asgi: the current pure ASGI middleware (app.middleware)
+
+Requests go in-process through httpx's ASGITransport, so the numbers
+measure middleware and framework overhead only (no sockets, no server).
+The BaseHTTPMiddleware layers below reproduce the previous dispatch()
+implementations on the benchmarked path (a GET outside /api/v1/auth, so
+the brute force and rate limit layers only check the path).
+
+Usage:
+    python scripts/benchmark_middleware.py --requests 5000 --concurrency 50
+"""
+import sys
+import os
+import time
+import uuid
+import asyncio
+import argparse
+import logging
+import statistics
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.logging import set_request_context, clear_request_context
+from app.middleware.logging_middleware import LoggingContextMiddleware, logger, metrics
+from app.middleware.security import (
+    SECURITY_HEADERS,
+    BruteForceProtectionMiddleware,
+    RateLimitMiddleware,
+    SecurityHeadersMiddleware,
+)
+from app.middleware.security_store import LocalSecurityStore
+
+
+class LegacyLoggingContextMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        request_id = str(uuid.uuid4())
+        correlation_id = request.headers.get("X-Correlation-ID")
+        if not correlation_id:
+            correlation_id = request.headers.get("X-Request-ID", request_id)
+        user_id = None
+        if hasattr(request.state, "user") and hasattr(request.state.user, "id"):
+            user_id = str(request.state.user.id)
+        set_request_context(
+            request_id=request_id, user_id=user_id, correlation_id=correlation_id
+        )
+        method, path = request.method, request.url.path
+        logger.info(
+            f"{method} {path}",
+            extra={
+                "extra_fields": {
+                    "method": method,
+                    "path": path,
+                    "client_ip": request.client.host if request.client else None,
+                    "user_agent": request.headers.get("user-agent"),
+                }
+            },
+        )
+        try:
+            response = await call_next(request)
+            duration_seconds = time.time() - start_time
+            logger.info(
+                f"{method} {path} - {response.status_code}",
+                extra={
+                    "extra_fields": {
+                        "method": method,
+                        "path": path,
+                        "status_code": response.status_code,
+                        "duration_seconds": duration_seconds,
+                    }
+                },
+            )
+            metrics.increment_http_request(
+                method=method, endpoint=path, status_code=response.status_code
+            )
+            metrics.record_request_duration(
+                method=method, endpoint=path, duration_seconds=duration_seconds
+            )
+            response.headers["X-Request-ID"] = request_id
+            return response
+        finally:
+            clear_request_context()
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        for name, value in SECURITY_HEADERS.items():
+            response.headers[name] = value
+        return response
+
+
+class LegacyBruteForceProtectionMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path == "/api/v1/auth/login" and request.method == "POST":
+            raise NotImplementedError("Only the pass-through path is benchmarked")
+        return await call_next(request)
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    rate_limits = {
+        "/api/v1/auth/login": (10, 60),
+        "/api/v1/auth/register": (10, 60),
+        "/api/v1/auth/logout": (20, 60),
+    }
+
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path in self.rate_limits:
+            raise NotImplementedError("Only the pass-through path is benchmarked")
+        return await call_next(request)
+
+
+def build_app(stack: str) -> FastAPI:
+    """Application with the given middleware stack, in main.py's order."""
+    app = FastAPI()
+
+    @app.get("/api/v1/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    if stack == "basehttp":
+        app.add_middleware(LegacyLoggingContextMiddleware)
+        app.add_middleware(LegacySecurityHeadersMiddleware)
+        app.add_middleware(LegacyBruteForceProtectionMiddleware)
+        app.add_middleware(LegacyRateLimitMiddleware)
+    elif stack == "asgi":
+        app.add_middleware(LoggingContextMiddleware)
+        app.add_middleware(SecurityHeadersMiddleware)
+        app.add_middleware(BruteForceProtectionMiddleware, store=LocalSecurityStore())
+        app.add_middleware(RateLimitMiddleware, store=LocalSecurityStore())
+    return app
+
+
+async def run_stack(stack: str, requests: int, concurrency: int) -> dict:
+    """Send requests through one stack; returns rps and latency percentiles."""
+    transport = httpx.ASGITransport(app=build_app(stack))
+    latencies = []
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def worker(count: int, record: bool):
+            for _ in range(count):
+                started = time.perf_counter()
+                response = await client.get("/api/v1/ping")
+                if record:
+                    latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200
+
+        # Warm up
+        await asyncio.gather(*(worker(10, False) for _ in range(concurrency)))
+
+        per_worker = requests // concurrency
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(per_worker, True) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "stack": stack,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": quantiles[49] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--stacks", nargs="+", default=["none", "basehttp", "asgi"])
+    args = parser.parse_args()
+
+    # Measure middleware overhead, not log output
+    logging.disable(logging.INFO)
+
+    print(f"{'stack':<10} {'rps':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    for stack in args.stacks:
+        result = asyncio.run(run_stack(stack, args.requests, args.concurrency))
+        print(
+            f"{result['stack']:<10} {result['rps']:>10.0f} "
+            f"{result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
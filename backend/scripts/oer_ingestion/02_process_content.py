@@ -7,7 +7,12 @@ Parses CNXML files and extracts structured content to JSON.
 
 import os
 import json
+import argparse
+import resource
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional
 import sys
 
 # Add parent directory to path for imports
@@ -24,35 +29,55 @@ BOOKS = {
 }
 
 
-def process_book(book_id: str, raw_dir: Path, output_dir: Path) -> dict:
+def parse_book(
+    book_id: str, raw_dir: Path, executor: Optional[Executor] = None
+) -> Dict:
     """
-    Process a single book.
+    Parse a single book's CNXML.
 
     Args:
         book_id: Book identifier (e.g., 'physics-2e')
         raw_dir: Directory containing raw CNXML files
-        output_dir: Directory for processed JSON output
+        executor: Process pool for module parsing (optional)
 
     Returns:
-        Processing statistics
+        {"book_data": {...}, "seconds": float} or {"error": str}
     """
-    print(f"Processing: {book_id}")
-    print("=" * 60)
-
     book_config = BOOKS[book_id]
     book_dir = raw_dir / book_id
 
     if not book_dir.exists():
-        print(f"  ✗ Error: Directory not found: {book_dir}")
-        return {"error": "Directory not found"}
+        return {"error": f"Directory not found: {book_dir}"}
 
-    # Parse book
+    started = time.perf_counter()
     parser = CNXMLParser()
     try:
-        book_data = parser.parse_book(str(book_dir), book_config["subject"])
+        book_data = parser.parse_book(
+            str(book_dir), book_config["subject"], executor=executor
+        )
     except Exception as e:
-        print(f"  ✗ Error parsing book: {e}")
-        return {"error": str(e)}
+        return {"error": f"Error parsing book: {e}"}
+
+    return {"book_data": book_data, "seconds": time.perf_counter() - started}
+
+
+def save_book(book_id: str, parsed: Dict, output_dir: Path) -> dict:
+    """
+    Print statistics for a parsed book and save it as JSON.
+
+    Args:
+        book_id: Book identifier
+        parsed: Result of parse_book()
+        output_dir: Directory for processed JSON output
+
+    Returns:
+        Processing statistics
+    """
+    if "error" in parsed:
+        print(f"  ✗ Error: {parsed['error']}")
+        return {"book_id": book_id, "error": parsed["error"]}
+
+    book_data = parsed["book_data"]
 
     # Count content
     total_chapters = len(book_data["chapters"])
@@ -62,6 +87,7 @@ def process_book(book_id: str, raw_dir: Path, output_dir: Path) -> dict:
     print(f"  Subject: {book_data['subject']}")
     print(f"  Chapters: {total_chapters}")
     print(f"  Content blocks: {total_blocks}")
+    print(f"  Parse time: {parsed['seconds']:.1f}s")
 
     # Save to JSON
     output_file = output_dir / f"{book_id}.json"
@@ -79,11 +105,87 @@ def process_book(book_id: str, raw_dir: Path, output_dir: Path) -> dict:
         "content_blocks": total_blocks,
         "output_file": str(output_file),
         "size_mb": file_size_mb,
+        "seconds": parsed["seconds"],
     }
 
 
+def process_book(
+    book_id: str, raw_dir: Path, output_dir: Path, executor: Optional[Executor] = None
+) -> dict:
+    """
+    Process a single book.
+
+    Args:
+        book_id: Book identifier (e.g., 'physics-2e')
+        raw_dir: Directory containing raw CNXML files
+        output_dir: Directory for processed JSON output
+        executor: Process pool for module parsing (optional)
+
+    Returns:
+        Processing statistics
+    """
+    print(f"Processing: {book_id}")
+    print("=" * 60)
+
+    return save_book(book_id, parse_book(book_id, raw_dir, executor), output_dir)
+
+
+def process_books_parallel(
+    book_ids: List[str], raw_dir: Path, output_dir: Path, workers: int
+) -> List[dict]:
+    """
+    Process books concurrently on a shared process pool.
+
+    Module batches of every book are queued on one pool (fan-out across
+    books and modules); books are then reported and saved in order.
+
+    Args:
+        book_ids: Books to process
+        raw_dir: Directory containing raw CNXML files
+        output_dir: Directory for processed JSON output
+        workers: Worker processes
+
+    Returns:
+        Processing statistics per book, in book_ids order
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool, ThreadPoolExecutor(
+        max_workers=max(1, len(book_ids))
+    ) as books:
+        futures = [
+            books.submit(parse_book, book_id, raw_dir, pool) for book_id in book_ids
+        ]
+
+        results = []
+        for book_id, future in zip(book_ids, futures):
+            parsed = future.result()
+            print(f"Processing: {book_id}")
+            print("=" * 60)
+            results.append(save_book(book_id, parsed, output_dir))
+
+    return results
+
+
+def _cpu_seconds() -> float:
+    """User + system CPU time of this process and its finished workers."""
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
 def main():
     """Main processing function."""
+    parser = argparse.ArgumentParser(description="Process OpenStax CNXML content")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=f"Worker processes (default: 1 = serial, 0 = all {os.cpu_count()} CPUs)",
+    )
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count() or 1
+
     script_dir = Path(__file__).parent
     data_dir = script_dir / "data"
     raw_dir = data_dir / "raw"
@@ -96,12 +198,22 @@ def main():
     print("OpenStax Content Processing")
     print("=" * 60)
     print("")
+    print(f"Workers: {workers}")
+    print("")
 
     # Process all books
-    results = []
-    for book_id in BOOKS.keys():
-        result = process_book(book_id, raw_dir, processed_dir)
-        results.append(result)
+    started = time.perf_counter()
+    cpu_started = _cpu_seconds()
+    if workers > 1:
+        results = process_books_parallel(
+            list(BOOKS.keys()), raw_dir, processed_dir, workers
+        )
+    else:
+        results = [
+            process_book(book_id, raw_dir, processed_dir) for book_id in BOOKS.keys()
+        ]
+    wall_seconds = time.perf_counter() - started
+    cpu_seconds = _cpu_seconds() - cpu_started
 
     # Summary
     print("=" * 60)
@@ -142,6 +254,16 @@ def main():
             print(f"  ✗ {result.get('book_id', 'unknown')}: {result['error']}")
         print("")
 
+    # Timing report
+    print("Timing:")
+    print(f"  Workers: {workers}")
+    print(f"  Wall time: {wall_seconds:.1f}s")
+    print(f"  Sum of per-book parse time: {sum(r['seconds'] for r in successful):.1f}s")
+    print(f"  CPU time (incl. workers): {cpu_seconds:.1f}s")
+    if wall_seconds > 0:
+        print(f"  Effective parallelism: {cpu_seconds / wall_seconds:.1f} cores")
+    print("")
+
     print("Next step: python 03_chunk_content.py")
 
 
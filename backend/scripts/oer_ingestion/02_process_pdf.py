@@ -13,10 +13,15 @@ Architecture: Designed to be robust and maintainable
 """
 
 import pymupdf  # PyMuPDF
+import argparse
 import json
+import os
 import re
+import resource
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import sys
 
 # Add parent directory to path for imports
@@ -47,6 +52,46 @@ BOOKS = {
     },
 }
 
+# Pages handed to a worker per task in --workers mode
+PAGES_PER_TASK = 25
+
+# Per-page result: (page_number, detected chapter or None, content blocks)
+PageResult = Tuple[int, Optional[Tuple[int, str]], List[Dict]]
+
+
+def _process_page_range(
+    pdf_path: str, start: int, end: int, min_paragraph_length: int
+) -> Tuple[List[PageResult], float]:
+    """
+    Extract and classify pages [start, end) of a PDF (process-pool task).
+
+    Args:
+        pdf_path: Path to PDF file
+        start: First page index (0-based)
+        end: End page index (exclusive)
+        min_paragraph_length: Passed to PDFProcessor
+
+    Returns:
+        (per-page results in page order, seconds spent)
+    """
+    started = time.perf_counter()
+    processor = PDFProcessor(min_paragraph_length=min_paragraph_length)
+
+    results = []
+    with pymupdf.open(pdf_path) as doc:
+        for page_index in range(start, end):
+            page_num = page_index + 1
+            text = doc[page_index].get_text()
+            results.append(
+                (
+                    page_num,
+                    processor._detect_chapter(text),
+                    processor._extract_content_blocks(text, page_num),
+                )
+            )
+
+    return results, time.perf_counter() - started
+
 
 class PDFProcessor:
     """
@@ -75,38 +120,78 @@ class PDFProcessor:
             r"^(\d{1,2})\.\s+([A-Z][a-zA-Z\s]{10,})$",  # "1. Introduction to Physics" (at least 10 chars)
         ]
 
-    def extract_text_from_pdf(self, pdf_path: Path) -> Dict:
+    def extract_text_from_pdf(
+        self,
+        pdf_path: Path,
+        executor: Optional[Executor] = None,
+        pages_per_task: int = PAGES_PER_TASK,
+        verbose: bool = True,
+    ) -> Dict:
         """
         Extract structured content from PDF.
 
+        With an executor, page ranges are extracted in parallel and merged
+        back in page order; output is identical to the serial path.
+
         Args:
             pdf_path: Path to PDF file
+            executor: Process pool for page-range tasks (optional)
+            pages_per_task: Pages per task when an executor is given
+            verbose: Print progress (disabled when books run concurrently)
 
         Returns:
             Structured book data with chapters and content blocks
         """
-        print(f"  Opening PDF: {pdf_path.name}")
-        doc = pymupdf.open(str(pdf_path))
+        if verbose:
+            print(f"  Opening PDF: {pdf_path.name}")
+        with pymupdf.open(str(pdf_path)) as doc:
+            page_count = len(doc)
+        if verbose:
+            print(f"  Total pages: {page_count}")
+
+        # First pass: extract and classify every page (parallelisable)
+        if executor is None:
+            page_results, _ = _process_page_range(
+                str(pdf_path), 0, page_count, self.min_paragraph_length
+            )
+        else:
+            futures = [
+                executor.submit(
+                    _process_page_range,
+                    str(pdf_path),
+                    start,
+                    min(start + pages_per_task, page_count),
+                    self.min_paragraph_length,
+                )
+                for start in range(0, page_count, pages_per_task)
+            ]
+            page_results = []
+            for future in futures:  # submission order == page order
+                page_results.extend(future.result()[0])
+
+        # Second pass: stitch pages into chapters (sequential, cheap)
+        return self._assemble_chapters(page_results, verbose=verbose)
+
+    def _assemble_chapters(
+        self, page_results: List[PageResult], verbose: bool = True
+    ) -> List[Dict]:
+        """
+        Group per-page content blocks into chapters.
 
-        print(f"  Total pages: {len(doc)}")
+        Args:
+            page_results: (page_number, chapter_info, blocks) in page order
+            verbose: Print detected chapters
 
+        Returns:
+            List of chapters with content blocks
+        """
         chapters = []
         current_chapter = None
-        page_texts = []
-
-        # First pass: Extract all page texts
-        for page_num, page in enumerate(doc):
-            text = page.get_text()
-            page_texts.append((page_num + 1, text))
 
         # Track seen chapters to avoid duplicates (TOC vs actual content)
         seen_chapters = set()
 
-        # Second pass: Detect chapters and extract content
-        for page_num, text in page_texts:
-            # Try to detect chapter start
-            chapter_info = self._detect_chapter(text)
-
+        for page_num, chapter_info, content_blocks in page_results:
             if chapter_info:
                 chapter_num, chapter_title = chapter_info
 
@@ -127,19 +212,17 @@ class PDFProcessor:
                     "number": chapter_num,
                     "content_blocks": [],
                 }
-                print(f"    Found: Chapter {chapter_num}")
+                if verbose:
+                    print(f"    Found: Chapter {chapter_num}")
 
-            # Extract content blocks from this page
+            # Content blocks from this page
             if current_chapter:
-                content_blocks = self._extract_content_blocks(text, page_num)
                 current_chapter["content_blocks"].extend(content_blocks)
 
         # Save final chapter
         if current_chapter and current_chapter["content_blocks"]:
             chapters.append(current_chapter)
 
-        doc.close()
-
         return chapters
 
     def _detect_chapter(self, text: str) -> Tuple[int, str] | None:
@@ -261,41 +344,62 @@ class PDFProcessor:
         return ("paragraph", {})
 
 
-def process_book(
-    book_id: str, raw_dir: Path, output_dir: Path, processor: PDFProcessor
+def extract_book(
+    book_id: str,
+    raw_dir: Path,
+    processor: PDFProcessor,
+    executor: Optional[Executor] = None,
+    verbose: bool = True,
 ) -> Dict:
     """
-    Process a single book PDF.
+    Extract chapters from a book PDF.
 
     Args:
         book_id: Book identifier
         raw_dir: Directory containing raw PDFs
-        output_dir: Directory for processed JSON output
         processor: PDFProcessor instance
+        executor: Process pool for page-range tasks (optional)
+        verbose: Print extraction progress
 
     Returns:
-        Processing statistics
+        {"chapters": [...], "seconds": float} or {"error": str}
     """
-    print(f"Processing: {book_id}")
-    print("=" * 60)
-
     if book_id not in BOOKS:
-        print(f"  ✗ Error: Unknown book_id: {book_id}")
         return {"error": "Unknown book_id"}
 
-    book_config = BOOKS[book_id]
     pdf_file = raw_dir / f"{book_id}.pdf"
-
     if not pdf_file.exists():
-        print(f"  ✗ Error: PDF not found: {pdf_file}")
-        return {"error": "PDF not found"}
+        return {"error": f"PDF not found: {pdf_file}"}
 
-    # Extract content
+    started = time.perf_counter()
     try:
-        chapters = processor.extract_text_from_pdf(pdf_file)
+        chapters = processor.extract_text_from_pdf(
+            pdf_file, executor=executor, verbose=verbose
+        )
     except Exception as e:
-        print(f"  ✗ Error processing PDF: {e}")
-        return {"error": str(e)}
+        return {"error": f"Error processing PDF: {e}"}
+
+    return {"chapters": chapters, "seconds": time.perf_counter() - started}
+
+
+def save_book(book_id: str, extracted: Dict, output_dir: Path) -> Dict:
+    """
+    Print statistics for an extracted book and save it as JSON.
+
+    Args:
+        book_id: Book identifier
+        extracted: Result of extract_book()
+        output_dir: Directory for processed JSON output
+
+    Returns:
+        Processing statistics
+    """
+    if "error" in extracted:
+        print(f"  ✗ Error: {extracted['error']}")
+        return {"book_id": book_id, "error": extracted["error"]}
+
+    book_config = BOOKS[book_id]
+    chapters = extracted["chapters"]
 
     # Count content
     total_chapters = len(chapters)
@@ -305,6 +409,7 @@ def process_book(
     print(f"  Subject: {book_config['subject']}")
     print(f"  Chapters: {total_chapters}")
     print(f"  Content blocks: {total_blocks}")
+    print(f"  Extraction time: {extracted['seconds']:.1f}s")
 
     # Build book data structure
     book_data = {
@@ -330,11 +435,100 @@ def process_book(
         "content_blocks": total_blocks,
         "output_file": str(output_file),
         "size_mb": file_size_mb,
+        "seconds": extracted["seconds"],
     }
 
 
+def process_book(
+    book_id: str,
+    raw_dir: Path,
+    output_dir: Path,
+    processor: PDFProcessor,
+    executor: Optional[Executor] = None,
+) -> Dict:
+    """
+    Process a single book PDF.
+
+    Args:
+        book_id: Book identifier
+        raw_dir: Directory containing raw PDFs
+        output_dir: Directory for processed JSON output
+        processor: PDFProcessor instance
+        executor: Process pool for page-range tasks (optional)
+
+    Returns:
+        Processing statistics
+    """
+    print(f"Processing: {book_id}")
+    print("=" * 60)
+
+    return save_book(
+        book_id, extract_book(book_id, raw_dir, processor, executor), output_dir
+    )
+
+
+def process_books_parallel(
+    book_ids: List[str],
+    raw_dir: Path,
+    output_dir: Path,
+    processor: PDFProcessor,
+    workers: int,
+) -> List[Dict]:
+    """
+    Process books concurrently on a shared process pool.
+
+    Every book's page ranges are queued on one pool (fan-out across books
+    and pages); books are then reported and saved in order.
+
+    Args:
+        book_ids: Books to process
+        raw_dir: Directory containing raw PDFs
+        output_dir: Directory for processed JSON output
+        processor: PDFProcessor instance
+        workers: Worker processes
+
+    Returns:
+        Processing statistics per book, in book_ids order
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool, ThreadPoolExecutor(
+        max_workers=max(1, len(book_ids))
+    ) as books:
+        futures = [
+            books.submit(extract_book, book_id, raw_dir, processor, pool, False)
+            for book_id in book_ids
+        ]
+
+        results = []
+        for book_id, future in zip(book_ids, futures):
+            extracted = future.result()
+            print(f"Processing: {book_id}")
+            print("=" * 60)
+            results.append(save_book(book_id, extracted, output_dir))
+
+    return results
+
+
+def _cpu_seconds() -> float:
+    """User + system CPU time of this process and its finished workers."""
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
 def main():
     """Main processing function."""
+    parser = argparse.ArgumentParser(description="Process OpenStax PDFs")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=f"Worker processes (default: 1 = serial, 0 = all {os.cpu_count()} CPUs)",
+    )
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count() or 1
+
     script_dir = Path(__file__).parent
     data_dir = script_dir / "data"
     raw_dir = data_dir / "raw_pdf"
@@ -347,15 +541,26 @@ def main():
     print("OpenStax PDF Content Processing")
     print("=" * 60)
     print("")
+    print(f"Workers: {workers}")
+    print("")
 
     # Initialize processor
     processor = PDFProcessor()
 
     # Process all books
-    results = []
-    for book_id in BOOKS.keys():
-        result = process_book(book_id, raw_dir, processed_dir, processor)
-        results.append(result)
+    started = time.perf_counter()
+    cpu_started = _cpu_seconds()
+    if workers > 1:
+        results = process_books_parallel(
+            list(BOOKS.keys()), raw_dir, processed_dir, processor, workers
+        )
+    else:
+        results = [
+            process_book(book_id, raw_dir, processed_dir, processor)
+            for book_id in BOOKS.keys()
+        ]
+    wall_seconds = time.perf_counter() - started
+    cpu_seconds = _cpu_seconds() - cpu_started
 
     # Summary
     print("=" * 60)
@@ -385,6 +590,17 @@ def main():
                 f"  ✗ {result.get('book_id', 'unknown')}: {result.get('error', 'Unknown error')}"
             )
 
+    # Timing report
+    book_seconds = sum(r.get("seconds", 0.0) for r in successful)
+    print("")
+    print("Timing:")
+    print(f"  Workers: {workers}")
+    print(f"  Wall time: {wall_seconds:.1f}s")
+    print(f"  Sum of per-book extraction time: {book_seconds:.1f}s")
+    print(f"  CPU time (incl. workers): {cpu_seconds:.1f}s")
+    if wall_seconds > 0:
+        print(f"  Effective parallelism: {cpu_seconds / wall_seconds:.1f} cores")
+
     print("")
     print("Next step: python 03_chunk_content.py")
 
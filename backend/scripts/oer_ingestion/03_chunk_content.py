@@ -2,9 +2,11 @@
 """
 Chunk OpenStax Content
 
-Splits processed content into 500-word chunks with overlap.
+Splits processed content into 500-word chunks with overlap, then drops
+near-duplicate chunks (MinHash + LSH) before they reach embedding.
 """
 
+import argparse
 import os
 import json
 from pathlib import Path
@@ -14,9 +16,15 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent))
 
 from utils.chunker import TextChunker
+from utils.dedup import DEFAULT_THRESHOLD, ChunkDeduplicator
 
 
-def chunk_book(book_file: Path, output_dir: Path, chunker: TextChunker) -> dict:
+def chunk_book(
+    book_file: Path,
+    output_dir: Path,
+    chunker: TextChunker,
+    deduplicator: ChunkDeduplicator = None,
+) -> dict:
     """
     Chunk a single processed book.
 
@@ -24,6 +32,7 @@ def chunk_book(book_file: Path, output_dir: Path, chunker: TextChunker) -> dict:
         book_file: Path to processed JSON file
         output_dir: Directory for chunked output
         chunker: TextChunker instance
+        deduplicator: Drops near-duplicates of chunks seen so far (optional)
 
     Returns:
         Chunking statistics
@@ -42,6 +51,14 @@ def chunk_book(book_file: Path, output_dir: Path, chunker: TextChunker) -> dict:
     # Chunk content
     chunks = chunker.chunk_book(book_data)
 
+    # Drop near-duplicates (boilerplate repeated across chapters/books)
+    duplicates = 0
+    if deduplicator is not None:
+        total = len(chunks)
+        chunks = deduplicator.filter(chunks)
+        duplicates = total - len(chunks)
+        print(f"  Near-duplicates dropped: {duplicates}")
+
     # Get statistics
     stats = chunker.get_chunk_statistics(chunks)
 
@@ -63,6 +80,7 @@ def chunk_book(book_file: Path, output_dir: Path, chunker: TextChunker) -> dict:
         "book_id": book_id,
         "title": book_data["title"],
         "chunks": stats["total_chunks"],
+        "duplicates": duplicates,
         "avg_word_count": stats["avg_word_count"],
         "avg_token_count": stats["avg_token_count"],
         "total_words": stats["total_words"],
@@ -74,6 +92,18 @@ def chunk_book(book_file: Path, output_dir: Path, chunker: TextChunker) -> dict:
 
 def main():
     """Main chunking function."""
+    parser = argparse.ArgumentParser(description="Chunk processed OpenStax books")
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Jaccard similarity for near-duplicates (default: {DEFAULT_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--no-dedup", action="store_true", help="Keep near-duplicate chunks"
+    )
+    args = parser.parse_args()
+
     script_dir = Path(__file__).parent
     data_dir = script_dir / "data"
     processed_dir = data_dir / "processed"
@@ -94,10 +124,19 @@ def main():
     print(f"  Min size: {chunker.min_size} words")
     print(f"  Max size: {chunker.max_size} words")
     print(f"  Overlap: {chunker.overlap} words")
+    if args.no_dedup:
+        print("  Deduplication: off")
+    else:
+        print(f"  Deduplication threshold: {args.dedup_threshold}")
     print("")
 
+    deduplicator = (
+        None if args.no_dedup else ChunkDeduplicator(threshold=args.dedup_threshold)
+    )
+
     # Find all processed books
-    book_files = list(processed_dir.glob("*.json"))
+    # Sorted so the kept copy of a cross-book duplicate is deterministic
+    book_files = sorted(processed_dir.glob("*.json"))
 
     if not book_files:
         print("✗ Error: No processed books found in:", processed_dir)
@@ -108,7 +147,7 @@ def main():
     results = []
     for book_file in book_files:
         try:
-            result = chunk_book(book_file, chunks_dir, chunker)
+            result = chunk_book(book_file, chunks_dir, chunker, deduplicator)
             results.append(result)
         except Exception as e:
             print(f"✗ Error chunking {book_file.stem}: {e}")
@@ -128,6 +167,8 @@ def main():
         for result in results:
             print(f"✓ {result['book_id']}")
             print(f"    Chunks: {result['chunks']}")
+            if deduplicator is not None:
+                print(f"    Duplicates dropped: {result['duplicates']}")
             print(f"    Avg words/chunk: {result['avg_word_count']:.1f}")
             print(f"    Avg tokens/chunk: {result['avg_token_count']:.1f}")
             print(f"    Size: {result['size_mb']:.2f} MB")
@@ -140,6 +181,14 @@ def main():
         print(f"Totals:")
         print(f"  Books: {len(results)}")
         print(f"  Total chunks: {total_chunks:,}")
+        if deduplicator is not None:
+            dedup_stats = deduplicator.get_statistics()
+            mapping_file = deduplicator.save_mapping(chunks_dir / "dedup_map.json")
+            print(
+                f"  Near-duplicates dropped: {dedup_stats['dropped']:,} "
+                f"({dedup_stats['drop_rate']:.1%})"
+            )
+            print(f"  Duplicate mapping: {mapping_file}")
         print(f"  Total words: {total_words:,}")
         print(f"  Total tokens: {total_tokens:,}")
         print(f"  Avg words/chunk: {total_words / total_chunks:.1f}")
@@ -2,18 +2,26 @@
 """
 Create Vector Search Index
 
-Creates Vertex AI Vector Search index and uploads embeddings.
+Builds the local subject-sharded IVF-Flat ANN and BM25 indexes (persisted to data/index/) and, unless
+--local-only is given, creates a Vertex AI Vector Search index and uploads
+embeddings.
 """
 
 import os
 import json
+import argparse
 from pathlib import Path
 import sys
 from datetime import datetime
 
+import numpy as np
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
+from utils.ann_index import evaluate_recall
+from utils.bm25_index import BM25Index
+from utils.sharded_index import ShardedIndex
 from utils.vertex_ai_client import VertexVectorSearch
 
 
@@ -48,13 +56,139 @@ def load_all_embeddings(embeddings_dir: Path) -> tuple[list, dict]:
     return all_embeddings, stats
 
 
+def build_local_index(
+    all_embeddings: list, index_dir: Path, n_lists: int = None, nprobe: int = 8
+) -> dict:
+    """
+    Build and persist the local IVF-Flat index, sharded by subject.
+
+    Args:
+        all_embeddings: Chunks with embeddings
+        index_dir: Output directory (data/index)
+        n_lists: Inverted lists per shard (default: sqrt(shard size))
+        nprobe: Default lists scanned per shard per query
+
+    Returns:
+        Local index info (parameters, shards, build time, recall sweep)
+    """
+    print("Building local IVF-Flat index (sharded by subject)...")
+
+    matrix = np.array([c["embedding"] for c in all_embeddings], dtype=np.float32)
+
+    start_time = datetime.now()
+    index = ShardedIndex(n_lists=n_lists, nprobe=nprobe).build(
+        matrix,
+        chunk_ids=[c["chunk_id"] for c in all_embeddings],
+        subjects=[c["metadata"]["subject"] for c in all_embeddings],
+        grade_levels=[c["metadata"].get("grade_level") for c in all_embeddings],
+    )
+    build_seconds = (datetime.now() - start_time).total_seconds()
+
+    shards_dir = index.save(index_dir)
+    size_mb = sum(f.stat().st_size for f in shards_dir.rglob("*.npz")) / (1024 * 1024)
+    shards = index.describe()
+
+    for subject, shard in shards.items():
+        print(
+            f"  Shard {subject}: {shard['vectors']:,} vectors, "
+            f"{shard['n_lists']} lists, grades {shard['grade_min']}-{shard['grade_max']}"
+        )
+    print(f"  Default nprobe: {index.nprobe}")
+    print(f"  Build time: {build_seconds:.1f}s")
+    print(f"  ✓ Saved to: {shards_dir} ({size_mb:.2f} MB)")
+    print("")
+
+    # Recall@10 vs brute force across nprobe settings
+    print("Recall vs brute force (recall@10):")
+    recall_report = evaluate_recall(index, matrix, k=10)
+    for row in recall_report:
+        print(
+            f"  nprobe={row['nprobe']:>3}  recall@10={row['recall@10']:.3f}  "
+            f"ann={row['ann_latency_ms']:.2f}ms  "
+            f"brute={row['brute_force_latency_ms']:.2f}ms"
+        )
+    print("")
+
+    return {
+        "type": "ivf_flat_sharded",
+        "path": str(shards_dir),
+        "size_mb": size_mb,
+        "nprobe": index.nprobe,
+        "vectors": index.size,
+        "dimensions": index.dimensions,
+        "shards": shards,
+        "build_seconds": build_seconds,
+        "recall": recall_report,
+    }
+
+
+def build_bm25_index(all_embeddings: list, index_dir: Path) -> dict:
+    """
+    Build and persist the BM25 postings index over chunk text.
+
+    Args:
+        all_embeddings: Chunks (text + chunk_id)
+        index_dir: Output directory (data/index)
+
+    Returns:
+        BM25 index info
+    """
+    print("Building BM25 index...")
+
+    start_time = datetime.now()
+    index = BM25Index().build(
+        [c["text"] for c in all_embeddings], [c["chunk_id"] for c in all_embeddings]
+    )
+    build_seconds = (datetime.now() - start_time).total_seconds()
+
+    index_file = index.save(index_dir)
+    size_mb = index_file.stat().st_size / (1024 * 1024)
+
+    print(f"  Terms: {len(index.vocab):,}")
+    print(f"  Postings: {len(index.doc_ids):,}")
+    print(f"  Build time: {build_seconds:.1f}s")
+    print(f"  ✓ Saved to: {index_file} ({size_mb:.2f} MB)")
+    print("")
+
+    return {
+        "type": "bm25",
+        "file": str(index_file),
+        "size_mb": size_mb,
+        "terms": len(index.vocab),
+        "postings": int(len(index.doc_ids)),
+        "k1": index.k1,
+        "b": index.b,
+        "build_seconds": build_seconds,
+    }
+
+
 def main():
     """Main vector index creation function."""
+    parser = argparse.ArgumentParser(description="Create OER vector index")
+    parser.add_argument(
+        "--local-only",
+        action="store_true",
+        help="Only build the local ANN index (skip Vertex AI Vector Search)",
+    )
+    parser.add_argument(
+        "--nlist",
+        type=int,
+        default=None,
+        help="IVF lists per subject shard of the local index (default: sqrt(N))",
+    )
+    parser.add_argument(
+        "--nprobe",
+        type=int,
+        default=8,
+        help="Default lists scanned per query (recall/latency knob)",
+    )
+    args = parser.parse_args()
+
     # Get configuration from environment
     project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
     gcs_bucket = os.getenv("OER_CONTENT_BUCKET", f"{project_id}-oer-content")
 
-    if not project_id:
+    if not project_id and not args.local_only:
         print("✗ Error: GOOGLE_CLOUD_PROJECT environment variable not set")
         print("")
         print("Set it with:")
@@ -64,6 +198,8 @@ def main():
     script_dir = Path(__file__).parent
     data_dir = script_dir / "data"
     embeddings_dir = data_dir / "embeddings"
+    index_dir = data_dir / "index"
+    index_info_file = index_dir / "index_info.json"
 
     print("=" * 60)
     print("Vertex AI Vector Search Index Creation")
@@ -99,6 +235,30 @@ def main():
     print(f"Embedding dimensions: {sample_dim}")
     print("")
 
+    # Local ANN index (used by file-based retrieval)
+    local_index_info = build_local_index(
+        all_embeddings, index_dir, n_lists=args.nlist, nprobe=args.nprobe
+    )
+    bm25_index_info = build_bm25_index(all_embeddings, index_dir)
+
+    if args.local_only:
+        index_info = {
+            "created_at": datetime.now().isoformat(),
+            "dimensions": sample_dim,
+            "data_points": len(all_embeddings),
+            "books": stats["books"],
+            "subjects": sorted(stats["subjects"]),
+            "local_index": local_index_info,
+            "bm25_index": bm25_index_info,
+        }
+        index_dir.mkdir(parents=True, exist_ok=True)
+        with open(index_info_file, "w", encoding="utf-8") as f:
+            json.dump(index_info, f, indent=2)
+
+        print(f"✓ Index info saved: {index_info_file}")
+        print("Skipping Vertex AI Vector Search (--local-only)")
+        return
+
     # Initialize vector search client
     vector_search = VertexVectorSearch(
         project_id=project_id,
@@ -130,9 +290,10 @@ def main():
             "data_points": len(all_embeddings),
             "books": stats["books"],
             "subjects": list(stats["subjects"]),
+            "local_index": local_index_info,
+            "bm25_index": bm25_index_info,
         }
 
-        index_info_file = data_dir / "index" / "index_info.json"
         index_info_file.parent.mkdir(parents=True, exist_ok=True)
 
         with open(index_info_file, "w", encoding="utf-8") as f:
@@ -13,14 +13,23 @@ Architecture: File-based for MVP, can upgrade to Vertex AI Matching Engine later
 
 import os
 import json
+import argparse
 import numpy as np
 from pathlib import Path
 import sys
-from typing import List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
+from utils.ann_index import (
+    brute_force_search,
+    brute_force_search_batch,
+    normalize_rows,
+)
+from utils.bm25_index import BM25Index, reciprocal_rank_fusion
+from utils.sharded_index import ShardedIndex, parse_grade_range
 from utils.vertex_ai_client import VertexAIEmbeddings
 
 
@@ -29,19 +38,41 @@ class SimpleVectorRetriever:
     Simple vector retrieval system for MVP.
 
     Loads embeddings into memory and uses numpy for similarity search.
-    Fast enough for 3,783 chunks, can upgrade to Vertex AI later.
+    When a local IVF-Flat index (built by 05_create_vector_index.py) is
+    present, queries are answered approximately by scanning only `nprobe`
+    inverted lists; otherwise falls back to exact brute-force search.
+    The index is sharded by subject, so subject-filtered queries only
+    touch the matching shard(s). A BM25 index, when present, enables
+    hybrid lexical + vector search.
     """
 
-    def __init__(self, embeddings_dir: Path):
+    def __init__(
+        self,
+        embeddings_dir: Path,
+        index_dir: Optional[Path] = None,
+        nprobe: Optional[int] = None,
+    ):
         """
         Initialize retriever.
 
         Args:
             embeddings_dir: Directory containing embedding JSON files
+            index_dir: Directory containing shards/ and bm25_index.npz (optional)
+            nprobe: Lists scanned per ANN query (defaults to index setting)
         """
         self.embeddings_dir = embeddings_dir
+        self.index_dir = index_dir
+        self.nprobe = nprobe
         self.chunks = []
         self.embeddings_matrix = None
+        self.ann_index = None
+        self._ann_positions = None
+        self.bm25_index = None
+        self._bm25_positions = None
+        self._chunk_subjects = None
+        self._grade_min = None
+        self._grade_max = None
+        self._executor = ThreadPoolExecutor(max_workers=2)
 
     def load_embeddings(self):
         """Load all embeddings from JSON files into memory."""
@@ -58,53 +89,331 @@ class SimpleVectorRetriever:
 
         self.chunks = all_chunks
 
-        # Convert to numpy matrix for fast similarity search
+        # Convert to numpy matrix, normalized once (cosine == dot product)
         embeddings_list = [chunk["embedding"] for chunk in self.chunks]
-        self.embeddings_matrix = np.array(embeddings_list, dtype=np.float32)
+        self.embeddings_matrix = normalize_rows(
+            np.array(embeddings_list, dtype=np.float32)
+        )
 
         print(f"\n✓ Loaded {len(self.chunks):,} chunks")
         print(f"  Embedding dimensions: {self.embeddings_matrix.shape[1]}")
         print(f"  Memory usage: {self.embeddings_matrix.nbytes / (1024**2):.1f} MB")
+
+        # Per-chunk filter attributes (subject, grade range)
+        self._chunk_subjects = np.array(
+            [chunk["metadata"]["subject"] for chunk in self.chunks], dtype=np.str_
+        )
+        grade_ranges = [
+            parse_grade_range(chunk["metadata"].get("grade_level"))
+            for chunk in self.chunks
+        ]
+        self._grade_min = np.array([g[0] for g in grade_ranges], dtype=np.int16)
+        self._grade_max = np.array([g[1] for g in grade_ranges], dtype=np.int16)
+
+        if self.index_dir and ShardedIndex.exists(self.index_dir):
+            self._load_ann_index()
+        if self.index_dir and BM25Index.exists(self.index_dir):
+            self._load_bm25_index()
+
         print("")
 
-    def search(self, query_embedding: List[float], top_k: int = 5) -> List[Dict]:
+    def _map_positions(self, chunk_ids: List[str], name: str) -> Optional[np.ndarray]:
+        """Map an index's chunk IDs onto positions in self.chunks."""
+        positions = {chunk["chunk_id"]: i for i, chunk in enumerate(self.chunks)}
+        missing = [cid for cid in chunk_ids if cid not in positions]
+        if missing:
+            print(
+                f"  ⚠️  {name} index is stale ({len(missing)} unknown chunks), "
+                "skipping. Re-run 05_create_vector_index.py"
+            )
+            return None
+
+        return np.array([positions[cid] for cid in chunk_ids], dtype=np.int64)
+
+    def _load_ann_index(self):
+        """Load local sharded ANN index and re-map its rows onto loaded chunks."""
+        index = ShardedIndex.load(self.index_dir)
+
+        # Index row -> position in self.chunks
+        self._ann_positions = self._map_positions(index.chunk_ids, "ANN")
+        if self._ann_positions is None:
+            return
+        self.ann_index = index
+
+        shards = ", ".join(
+            f"{subject} ({shard['vectors']:,})"
+            for subject, shard in index.describe().items()
+        )
+        print(f"  ANN index: IVF-Flat, nprobe={self.nprobe or index.nprobe}")
+        print(f"    Shards: {shards}")
+
+    def _load_bm25_index(self):
+        """Load BM25 postings and re-map its documents onto loaded chunks."""
+        index = BM25Index.load(self.index_dir)
+
+        self._bm25_positions = self._map_positions(index.chunk_ids, "BM25")
+        if self._bm25_positions is None:
+            return
+        self.bm25_index = index
+
+        print(f"  BM25 index: {len(index.vocab):,} terms")
+
+    def _filter_mask(
+        self, subjects: Optional[List[str]] = None, grade_level: Optional[int] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Boolean mask over self.chunks for subject/grade filters.
+
+        Unknown subjects are ignored (same rule as ShardedIndex), so a filter
+        that matches nothing falls back to all subjects.
+        """
+        mask = None
+
+        known = [s for s in subjects or [] if s in set(self._chunk_subjects.tolist())]
+        if known:
+            mask = np.isin(self._chunk_subjects, known)
+
+        if grade_level is not None:
+            grade_mask = (self._grade_min <= grade_level) & (
+                self._grade_max >= grade_level
+            )
+            mask = grade_mask if mask is None else mask & grade_mask
+
+        return mask
+
+    def _vector_search(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        exact: bool = False,
+        subjects: Optional[List[str]] = None,
+        grade_level: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """Top-K (chunk position, cosine score) pairs."""
+        if self.ann_index is not None and not exact:
+            return [
+                (int(self._ann_positions[row]), score)
+                for row, score in self.ann_index.search(
+                    query_embedding,
+                    top_k=top_k,
+                    nprobe=self.nprobe,
+                    subjects=subjects,
+                    grade_level=grade_level,
+                )
+            ]
+
+        mask = self._filter_mask(subjects, grade_level)
+        if mask is None:
+            return brute_force_search(
+                self.embeddings_matrix, np.array(query_embedding), top_k
+            )
+
+        rows = np.flatnonzero(mask)
+        return [
+            (int(rows[i]), score)
+            for i, score in brute_force_search(
+                self.embeddings_matrix[rows], np.array(query_embedding), top_k
+            )
+        ]
+
+    def vector_search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int,
+        exact: bool = False,
+        subjects: Optional[List[str]] = None,
+        grade_level: Optional[int] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Batched _vector_search(): one matrix-matrix product per probed list
+        (ANN) or per batch (brute force). Filters apply to every query.
+
+        Returns:
+            One list of (chunk position, cosine score) pairs per query
+        """
+        if self.ann_index is not None and not exact:
+            return [
+                [(int(self._ann_positions[row]), score) for row, score in matches]
+                for matches in self.ann_index.search_batch(
+                    query_embeddings,
+                    top_k=top_k,
+                    nprobe=self.nprobe,
+                    subjects=subjects,
+                    grade_level=grade_level,
+                )
+            ]
+
+        return brute_force_search_batch(
+            self.embeddings_matrix,
+            query_embeddings,
+            top_k,
+            allowed=self._filter_mask(subjects, grade_level),
+        )
+
+    def hybrid_search_batch(
+        self,
+        query_texts: List[str],
+        query_embeddings: np.ndarray,
+        top_k: int,
+        candidate_k: Optional[int] = None,
+        exact: bool = False,
+        subjects: Optional[List[str]] = None,
+        grade_level: Optional[int] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Batched search_hybrid(): vector candidates for the whole batch,
+        BM25 per query, fused with RRF.
+
+        Returns:
+            One list of (chunk position, fusion score) pairs per query
+        """
+        filters = {"subjects": subjects, "grade_level": grade_level}
+        if self.bm25_index is None:
+            return self.vector_search_batch(
+                query_embeddings, top_k, exact=exact, **filters
+            )
+
+        candidate_k = candidate_k or max(top_k * 4, 20)
+        vector_matches = self.vector_search_batch(
+            query_embeddings, candidate_k, exact=exact, **filters
+        )
+
+        results = []
+        for query_text, matches in zip(query_texts, vector_matches):
+            bm25_matches = self._bm25_search(query_text, candidate_k, **filters)
+            fused = reciprocal_rank_fusion(
+                [[idx for idx, _ in matches], [idx for idx, _ in bm25_matches]]
+            )
+            results.append(fused[:top_k])
+        return results
+
+    def _bm25_search(
+        self,
+        query_text: str,
+        top_k: int,
+        subjects: Optional[List[str]] = None,
+        grade_level: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """Top-K (chunk position, BM25 score) pairs."""
+        mask = self._filter_mask(subjects, grade_level)
+        allowed = mask[self._bm25_positions] if mask is not None else None
+
+        return [
+            (int(self._bm25_positions[doc]), score)
+            for doc, score in self.bm25_index.search(
+                query_text, top_k=top_k, allowed=allowed
+            )
+        ]
+
+    def search(
+        self,
+        query_embedding: List[float],
+        top_k: int = 5,
+        exact: bool = False,
+        subjects: Optional[List[str]] = None,
+        grade_level: Optional[int] = None,
+    ) -> List[Dict]:
         """
         Find top-K most similar chunks to query.
 
         Args:
             query_embedding: Query embedding vector (768-dim)
             top_k: Number of results to return
+            exact: Force brute-force search even if an ANN index is loaded
+            subjects: Only search these subjects (shards)
+            grade_level: Only return chunks suitable for this grade
 
         Returns:
             List of top-K chunks with similarity scores
         """
-        # Convert query to numpy array
-        query_vec = np.array(query_embedding, dtype=np.float32)
-
-        # Normalize vectors (for cosine similarity)
-        query_norm = query_vec / np.linalg.norm(query_vec)
-        embeddings_norm = self.embeddings_matrix / np.linalg.norm(
-            self.embeddings_matrix, axis=1, keepdims=True
+        matches = self._vector_search(
+            query_embedding,
+            top_k,
+            exact=exact,
+            subjects=subjects,
+            grade_level=grade_level,
         )
 
-        # Compute cosine similarity (dot product of normalized vectors)
-        similarities = np.dot(embeddings_norm, query_norm)
+        # Build results
+        results = []
+        for idx, score in matches:
+            chunk = self.chunks[idx].copy()
+            chunk["similarity_score"] = score
+            results.append(chunk)
 
-        # Get top-K indices
-        top_indices = np.argsort(similarities)[::-1][:top_k]
+        return results
+
+    def search_hybrid(
+        self,
+        query_text: str,
+        query_embedding: List[float],
+        top_k: int = 5,
+        candidate_k: Optional[int] = None,
+        exact: bool = False,
+        subjects: Optional[List[str]] = None,
+        grade_level: Optional[int] = None,
+    ) -> List[Dict]:
+        """
+        Hybrid BM25 + vector search fused with Reciprocal Rank Fusion.
+
+        Both indexes are queried concurrently; each contributes its top
+        `candidate_k` chunks to the fusion.
+
+        Args:
+            query_text: Raw query text (for BM25)
+            query_embedding: Query embedding vector (768-dim)
+            top_k: Number of results to return
+            candidate_k: Candidates per retriever (default: 4 * top_k, min 20)
+            exact: Force brute-force vector search
+            subjects: Only search these subjects (shards)
+            grade_level: Only return chunks suitable for this grade
+
+        Returns:
+            List of top-K chunks with fusion, similarity and BM25 scores
+        """
+        filters = {"subjects": subjects, "grade_level": grade_level}
+
+        if self.bm25_index is None:
+            return self.search(query_embedding, top_k=top_k, exact=exact, **filters)
+
+        candidate_k = candidate_k or max(top_k * 4, 20)
+
+        vector_future = self._executor.submit(
+            self._vector_search, query_embedding, candidate_k, exact, **filters
+        )
+        bm25_future = self._executor.submit(
+            self._bm25_search, query_text, candidate_k, **filters
+        )
+        vector_matches = vector_future.result()
+        bm25_matches = bm25_future.result()
+
+        vector_scores = dict(vector_matches)
+        bm25_scores = dict(bm25_matches)
+        fused = reciprocal_rank_fusion(
+            [[idx for idx, _ in vector_matches], [idx for idx, _ in bm25_matches]]
+        )
 
-        # Build results
         results = []
-        for idx in top_indices:
+        for idx, fusion_score in fused[:top_k]:
             chunk = self.chunks[idx].copy()
-            chunk["similarity_score"] = float(similarities[idx])
+            chunk["fusion_score"] = fusion_score
+            chunk["similarity_score"] = vector_scores.get(idx)
+            chunk["bm25_score"] = bm25_scores.get(idx)
             results.append(chunk)
 
         return results
 
 
 def test_retrieval_system(
-    embeddings_dir: Path, project_id: str, test_queries: List[str]
+    embeddings_dir: Path,
+    project_id: str,
+    test_queries: List[str],
+    index_dir: Optional[Path] = None,
+    nprobe: Optional[int] = None,
+    exact: bool = False,
+    hybrid: bool = False,
+    subjects: Optional[List[str]] = None,
+    grade_level: Optional[int] = None,
 ):
     """
     Test the retrieval system with sample queries.
@@ -113,6 +422,12 @@ def test_retrieval_system(
         embeddings_dir: Directory containing embeddings
         project_id: GCP project ID for embedding generation
         test_queries: List of test queries
+        index_dir: Directory containing local ANN index (optional)
+        nprobe: Lists scanned per ANN query
+        exact: Force brute-force search
+        hybrid: Fuse BM25 and vector results
+        subjects: Restrict search to these subjects
+        grade_level: Restrict search to chunks suitable for this grade
     """
     print("=" * 60)
     print("OER Content Retrieval Test")
@@ -120,7 +435,9 @@ def test_retrieval_system(
     print("")
 
     # Initialize retriever
-    retriever = SimpleVectorRetriever(embeddings_dir)
+    retriever = SimpleVectorRetriever(
+        embeddings_dir, index_dir=index_dir, nprobe=nprobe
+    )
     retriever.load_embeddings()
 
     # Initialize embeddings client (for query embedding)
@@ -146,7 +463,13 @@ def test_retrieval_system(
         query_embedding = query_embedded[0]["embedding"]
 
         # Search for similar chunks
-        results = retriever.search(query_embedding, top_k=3)
+        filters = {"subjects": subjects, "grade_level": grade_level}
+        if hybrid:
+            results = retriever.search_hybrid(
+                query, query_embedding, top_k=3, exact=exact, **filters
+            )
+        else:
+            results = retriever.search(query_embedding, top_k=3, exact=exact, **filters)
 
         # Display results
         print(f"Top 3 results:")
@@ -160,7 +483,16 @@ def test_retrieval_system(
             # Truncate text for display
             text_preview = text[:200] + "..." if len(text) > 200 else text
 
-            print(f"{j}. Similarity: {score:.4f}")
+            if "fusion_score" in result:
+                similarity = f"{score:.4f}" if score is not None else "-"
+                bm25 = result["bm25_score"]
+                print(
+                    f"{j}. Fusion: {result['fusion_score']:.4f} "
+                    f"(similarity {similarity}, "
+                    f"bm25 {f'{bm25:.2f}' if bm25 is not None else '-'})"
+                )
+            else:
+                print(f"{j}. Similarity: {score:.4f}")
             print(f"   Subject: {metadata.get('subject', 'unknown')}")
             print(f"   Source: {metadata.get('source_title', 'unknown')}")
             print(f"   Text: {text_preview}")
@@ -171,6 +503,34 @@ def test_retrieval_system(
 
 def main():
     """Main test function."""
+    parser = argparse.ArgumentParser(description="Test OER content retrieval")
+    parser.add_argument(
+        "--nprobe",
+        type=int,
+        default=None,
+        help="Lists scanned per ANN query (default: value stored in index)",
+    )
+    parser.add_argument(
+        "--exact",
+        action="store_true",
+        help="Use brute-force search even if a local ANN index exists",
+    )
+    parser.add_argument(
+        "--hybrid",
+        action="store_true",
+        help="Fuse BM25 keyword matches with vector results (RRF)",
+    )
+    parser.add_argument(
+        "--subject",
+        action="append",
+        dest="subjects",
+        help="Only search this subject shard (repeatable)",
+    )
+    parser.add_argument(
+        "--grade", type=int, default=None, help="Only return content for this grade"
+    )
+    args = parser.parse_args()
+
     # Get project ID from environment
     project_id = os.getenv("GOOGLE_CLOUD_PROJECT")
     if not project_id:
@@ -182,6 +542,7 @@ def main():
 
     script_dir = Path(__file__).parent
     embeddings_dir = script_dir / "data" / "embeddings"
+    index_dir = script_dir / "data" / "index"
 
     # Check for embeddings
     if not embeddings_dir.exists():
@@ -197,7 +558,17 @@ def main():
     ]
 
     # Run tests
-    test_retrieval_system(embeddings_dir, project_id, test_queries)
+    test_retrieval_system(
+        embeddings_dir,
+        project_id,
+        test_queries,
+        index_dir=index_dir,
+        nprobe=args.nprobe,
+        exact=args.exact,
+        hybrid=args.hybrid,
+        subjects=args.subjects,
+        grade_level=args.grade,
+    )
 
     print("=" * 60)
     print("✓ Retrieval Test Complete")
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Benchmark OER Retrieval
+
+Repeatable quality + speed benchmark for the local retrieval backends:
+1. Loads embeddings and local indexes (same as 06_test_retrieval.py)
+2. Loads a labelled query set (or samples synthetic queries from chunks)
+3. Runs batched searches against each backend: brute, ann, hybrid
+4. Reports recall@k, MRR, p50/p95 latency, QPS and index memory
+5. Writes a machine-readable JSON report
+
+Use this before and after any index tuning change (nlist, nprobe,
+sharding, BM25 parameters) and compare the reports.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import resource
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.retrieval_eval import load_query_set, relevant_positions, run_backend
+
+SimpleVectorRetriever = importlib.import_module(
+    "06_test_retrieval"
+).SimpleVectorRetriever
+
+BACKENDS = ("brute", "ann", "hybrid")
+
+
+def synthetic_queries(
+    retriever, n_queries: int, seed: int = 0
+) -> Tuple[List[Dict], np.ndarray]:
+    """
+    Sample queries from indexed chunks (no embedding API needed).
+
+    Each query is a lightly perturbed chunk embedding plus the chunk's
+    first sentence as text; the source chunk is the expected result.
+
+    Args:
+        retriever: Loaded SimpleVectorRetriever
+        n_queries: Number of queries to sample
+        seed: Random seed
+
+    Returns:
+        (query dicts, (Q, D) query matrix)
+    """
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(
+        len(retriever.chunks), min(n_queries, len(retriever.chunks)), replace=False
+    )
+
+    queries = []
+    for position in sample:
+        chunk = retriever.chunks[position]
+        queries.append(
+            {
+                "query": chunk["text"].split(". ")[0][:200],
+                "expected_chunk_ids": [chunk["chunk_id"]],
+            }
+        )
+
+    vectors = retriever.embeddings_matrix[sample]
+    embeddings = vectors + rng.normal(scale=0.01, size=vectors.shape)
+    return queries, embeddings.astype(np.float32)
+
+
+def embed_queries(queries: List[Dict], project_id: Optional[str]) -> np.ndarray:
+    """
+    Query matrix from precomputed "embedding" fields, embedding the rest.
+
+    Args:
+        queries: Query dicts
+        project_id: GCP project for queries without an embedding
+
+    Returns:
+        (Q, D) query matrix
+    """
+    missing = [query for query in queries if "embedding" not in query]
+    if missing:
+        if not project_id:
+            print("✗ Error: GOOGLE_CLOUD_PROJECT not set and queries lack embeddings")
+            print("  Add 'embedding' to each query or use --synthetic")
+            sys.exit(1)
+
+        from utils.vertex_ai_client import VertexAIEmbeddings
+
+        client = VertexAIEmbeddings(project_id=project_id)
+        embedded = client.generate_embeddings(
+            [
+                {"chunk_id": f"query-{i}", "text": query["query"], "metadata": {}}
+                for i, query in enumerate(missing)
+            ]
+        )
+        if len(embedded) != len(missing):
+            print("✗ Error: Failed to embed all queries")
+            sys.exit(1)
+        for query, result in zip(missing, embedded):
+            query["embedding"] = result["embedding"]
+
+    return np.array([query["embedding"] for query in queries], dtype=np.float32)
+
+
+def backend_memory(retriever, backend: str) -> int:
+    """Bytes of index arrays a backend searches over."""
+    vector_bytes = (
+        retriever.ann_index.nbytes
+        if backend != "brute" and retriever.ann_index is not None
+        else retriever.embeddings_matrix.nbytes
+    )
+    if backend == "hybrid" and retriever.bm25_index is not None:
+        return vector_bytes + retriever.bm25_index.nbytes
+    return vector_bytes
+
+
+def benchmark(
+    retriever,
+    queries: List[Dict],
+    query_embeddings: np.ndarray,
+    backends: List[str],
+    k: int,
+    batch_size: int,
+) -> Dict[str, Dict]:
+    """
+    Run each backend over the query set.
+
+    Args:
+        retriever: Loaded SimpleVectorRetriever
+        queries: Query dicts
+        query_embeddings: (Q, D) query matrix
+        backends: Backends to run (subset of BACKENDS)
+        k: recall/MRR cutoff
+        batch_size: Queries per batched search
+
+    Returns:
+        Metrics per backend
+    """
+    relevant = [relevant_positions(query, retriever.chunks) for query in queries]
+    unlabelled = sum(1 for r in relevant if not r)
+    if unlabelled:
+        print(f"⚠️  {unlabelled} queries match no loaded chunk (scored as misses)")
+
+    def ranked(matches_per_query):
+        return [[idx for idx, _ in matches] for matches in matches_per_query]
+
+    search_fns = {
+        "brute": lambda idx, q, subjects, grade: ranked(
+            retriever.vector_search_batch(
+                q, k, exact=True, subjects=subjects, grade_level=grade
+            )
+        ),
+        "ann": lambda idx, q, subjects, grade: ranked(
+            retriever.vector_search_batch(q, k, subjects=subjects, grade_level=grade)
+        ),
+        "hybrid": lambda idx, q, subjects, grade: ranked(
+            retriever.hybrid_search_batch(
+                [queries[i]["query"] for i in idx],
+                q,
+                k,
+                subjects=subjects,
+                grade_level=grade,
+            )
+        ),
+    }
+
+    results = {}
+    for backend in backends:
+        if backend == "ann" and retriever.ann_index is None:
+            print("⚠️  Skipping ann: no local index (run 05_create_vector_index.py)")
+            continue
+        if backend == "hybrid" and retriever.bm25_index is None:
+            print("⚠️  Skipping hybrid: no BM25 index (run 05_create_vector_index.py)")
+            continue
+
+        metrics = run_backend(
+            search_fns[backend],
+            queries,
+            query_embeddings,
+            relevant,
+            k=k,
+            batch_size=batch_size,
+        )
+        metrics["index_memory_mb"] = round(
+            backend_memory(retriever, backend) / (1024**2), 2
+        )
+        results[backend] = metrics
+
+    return results
+
+
+def print_report(results: Dict[str, Dict], k: int):
+    """Print a summary table."""
+    print("")
+    print(
+        f"{'backend':<8} {f'recall@{k}':>10} {'MRR':>7} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'QPS':>9} {'mem MB':>8}"
+    )
+    print("-" * 64)
+    for backend, m in results.items():
+        print(
+            f"{backend:<8} {m[f'recall@{k}']:>10.4f} {m['mrr']:>7.4f} "
+            f"{m['latency_ms']['p50']:>8.3f} {m['latency_ms']['p95']:>8.3f} "
+            f"{m['qps']:>9.1f} {m['index_memory_mb']:>8.2f}"
+        )
+    print("")
+
+
+def main():
+    """Main benchmark function."""
+    parser = argparse.ArgumentParser(description="Benchmark OER retrieval backends")
+    parser.add_argument(
+        "--queries",
+        type=Path,
+        default=None,
+        help="Labelled query set JSON (see utils/retrieval_eval.py)",
+    )
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Sample N queries from indexed chunks instead of a query set",
+    )
+    parser.add_argument(
+        "--backend",
+        action="append",
+        dest="backends",
+        choices=BACKENDS,
+        help="Backend to run (repeatable, default: all)",
+    )
+    parser.add_argument("--k", type=int, default=10, help="recall@k / MRR cutoff")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=32,
+        help="Queries per batched search (1 = single-query latency)",
+    )
+    parser.add_argument(
+        "--nprobe",
+        type=int,
+        default=None,
+        help="Lists scanned per ANN query (default: value stored in index)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic query seed")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Report path (default: data/eval/retrieval_benchmark.json)",
+    )
+    args = parser.parse_args()
+
+    script_dir = Path(__file__).parent
+    embeddings_dir = script_dir / "data" / "embeddings"
+    index_dir = script_dir / "data" / "index"
+    output_path = (
+        args.output or script_dir / "data" / "eval" / "retrieval_benchmark.json"
+    )
+
+    if not embeddings_dir.exists():
+        print("✗ Error: Embeddings directory not found:", embeddings_dir)
+        print("Run 04_generate_embeddings.py first")
+        sys.exit(1)
+
+    query_path = args.queries or script_dir / "benchmark_queries.json"
+    if args.synthetic is None and not query_path.exists():
+        print("✗ Error: Query set not found:", query_path)
+        print("Pass --queries or use --synthetic N")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("OER Retrieval Benchmark")
+    print("=" * 60)
+    print("")
+
+    retriever = SimpleVectorRetriever(
+        embeddings_dir, index_dir=index_dir, nprobe=args.nprobe
+    )
+    retriever.load_embeddings()
+
+    if args.synthetic is not None:
+        queries, query_embeddings = synthetic_queries(
+            retriever, args.synthetic, seed=args.seed
+        )
+        query_source = f"synthetic:{args.synthetic}"
+    else:
+        queries = load_query_set(query_path)
+        query_embeddings = embed_queries(queries, os.getenv("GOOGLE_CLOUD_PROJECT"))
+        query_source = str(query_path)
+
+    print(f"Queries: {len(queries)} ({query_source})")
+    print(f"k={args.k}, batch size={args.batch_size}")
+
+    backends = args.backends or list(BACKENDS)
+    results = benchmark(
+        retriever, queries, query_embeddings, backends, args.k, args.batch_size
+    )
+    print_report(results, args.k)
+
+    report = {
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "config": {
+            "queries": query_source,
+            "k": args.k,
+            "batch_size": args.batch_size,
+            "nprobe": args.nprobe
+            or (retriever.ann_index.nprobe if retriever.ann_index else None),
+        },
+        "dataset": {
+            "chunks": len(retriever.chunks),
+            "dimensions": int(retriever.embeddings_matrix.shape[1]),
+            "shards": (retriever.ann_index.describe() if retriever.ann_index else None),
+        },
+        "backends": results,
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1
+        ),
+    }
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print("=" * 60)
+    print("✓ Benchmark Complete")
+    print("=" * 60)
+    print(f"Report: {output_path}")
+    print("")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,10 +8,16 @@ Runs the complete 5-stage pipeline:
 3. Chunk content (500 words with overlap)
 4. Generate embeddings (Vertex AI)
 5. Create vector index (Vertex AI Vector Search)
+
+With --stream, stages 2-5 run in-process as a streaming pipeline
+(parse → chunk → embed → local index write) connected by bounded queues;
+intermediate JSON files are only written with --checkpoint.
 """
 
 import os
 import sys
+import importlib
+import json
 import subprocess
 from pathlib import Path
 from datetime import datetime
@@ -150,6 +156,179 @@ class PipelineRunner:
 
         return True
 
+    def run_streaming_pipeline(
+        self,
+        batch_size: int = 5,
+        queue_size: int = 8,
+        checkpoint: bool = False,
+        n_lists: int = None,
+        nprobe: int = 8,
+        dedup_threshold: float = None,
+    ) -> bool:
+        """
+        Run stages 2-5 in-process, streaming records between stages.
+
+        Parsing and chunking run in one background thread and embedding in
+        another, each behind a bounded queue, so embedding requests start
+        while later chapters are still being parsed. The index sink keeps
+        only float32 vectors and BM25 term counts.
+
+        Args:
+            batch_size: Chunks per embedding request
+            queue_size: Max items buffered between stages
+            checkpoint: Also write processed/chunks/embeddings JSON files
+            n_lists: IVF lists per subject shard (default: sqrt(N))
+            nprobe: Default lists scanned per query
+            dedup_threshold: Jaccard similarity for dropping near-duplicate
+                chunks before embedding (None disables deduplication)
+
+        Returns:
+            True if successful, False otherwise
+        """
+        sys.path.insert(0, str(self.script_dir))
+        from utils.chunker import TextChunker
+        from utils.dedup import ChunkDeduplicator
+        from utils.streaming import (
+            CheckpointWriters,
+            StreamingIndexSink,
+            bounded,
+            stream_chunks,
+            stream_embeddings,
+        )
+        from utils.vertex_ai_client import VertexAIEmbeddings
+        from utils.xml_parser import CNXMLParser
+
+        books_config = importlib.import_module("02_process_content").BOOKS
+        data_dir = self.script_dir / "data"
+        raw_dir = data_dir / "raw"
+        index_dir = data_dir / "index"
+
+        print("")
+        print("=" * 70)
+        print("OER Content Ingestion Pipeline (streaming)")
+        print("=" * 70)
+        print("")
+        print(f"Batch size: {batch_size}, queue size: {queue_size}")
+        print(f"Checkpoints: {'on' if checkpoint else 'off'}")
+        print(
+            "Deduplication: "
+            + (f"threshold {dedup_threshold}" if dedup_threshold else "off")
+        )
+        print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        print("")
+
+        start_time = datetime.now()
+
+        def parse_books():
+            parser = CNXMLParser()
+            for book_id, config in books_config.items():
+                book_dir = raw_dir / book_id
+                if not book_dir.exists():
+                    print(f"  ⚠️  Skipping {book_id}: {book_dir} not found")
+                    continue
+                print(f"  Parsing: {book_id}")
+                yield book_id, parser.parse_book(str(book_dir), config["subject"])
+
+        chunker = TextChunker(target_size=500, min_size=300, max_size=800, overlap=50)
+        embeddings_client = VertexAIEmbeddings(
+            project_id=os.getenv("GOOGLE_CLOUD_PROJECT"), location="us-central1"
+        )
+
+        deduplicator = (
+            ChunkDeduplicator(threshold=dedup_threshold) if dedup_threshold else None
+        )
+
+        chunk_checkpoints = CheckpointWriters(
+            data_dir / "chunks" if checkpoint else None, "-chunks.json"
+        )
+        embedding_checkpoints = CheckpointWriters(
+            data_dir / "embeddings" if checkpoint else None, "-embeddings.json"
+        )
+
+        def checkpointed_chunks(chunks):
+            if deduplicator is not None:
+                chunks = deduplicator.stream(chunks)
+            for book_id, chunk in chunks:
+                chunk_checkpoints.write(book_id, chunk)
+                yield book_id, chunk
+
+        chunks = bounded(
+            checkpointed_chunks(
+                stream_chunks(
+                    parse_books(),
+                    chunker,
+                    processed_checkpoint=data_dir / "processed" if checkpoint else None,
+                )
+            ),
+            maxsize=queue_size * batch_size,
+        )
+        embedded = bounded(
+            stream_embeddings(chunks, embeddings_client.embed_batch, batch_size),
+            maxsize=queue_size * batch_size,
+        )
+
+        sink = StreamingIndexSink()
+        try:
+            for book_id, chunk in embedded:
+                embedding_checkpoints.write(book_id, chunk)
+                sink.add(chunk)
+                if sink.size % 500 == 0:
+                    print(f"  Indexed {sink.size:,} chunks")
+        except Exception as e:
+            print(f"\n✗ Streaming pipeline failed: {e}")
+            return False
+        finally:
+            chunk_checkpoints.close()
+            embedding_checkpoints.close()
+
+        if not sink.size:
+            print("✗ No chunks were embedded")
+            return False
+
+        print(f"  Building local index over {sink.size:,} chunks...")
+        ann_index, bm25_index = sink.finalize(index_dir, n_lists=n_lists, nprobe=nprobe)
+
+        index_info = {
+            "created_at": datetime.now().isoformat(),
+            "dimensions": ann_index.dimensions,
+            "data_points": ann_index.size,
+            "subjects": sorted(ann_index.shards),
+            "local_index": {
+                "type": "ivf_flat_sharded",
+                "nprobe": ann_index.nprobe,
+                "shards": ann_index.describe(),
+            },
+            "bm25_index": {"type": "bm25", "terms": len(bm25_index.vocab)},
+            "streaming": True,
+        }
+        if deduplicator is not None:
+            deduplicator.save_mapping(index_dir / "dedup_map.json")
+            index_info["deduplication"] = deduplicator.get_statistics()
+        with open(index_dir / "index_info.json", "w", encoding="utf-8") as f:
+            json.dump(index_info, f, indent=2)
+
+        duration = datetime.now() - start_time
+
+        print("")
+        print("=" * 70)
+        print("✓ Streaming Pipeline Complete")
+        print("=" * 70)
+        print(f"Chunks indexed: {sink.size:,}")
+        if deduplicator is not None:
+            print(
+                f"Near-duplicates dropped: {len(deduplicator.mapping):,} "
+                f"(mapping: {index_dir / 'dedup_map.json'})"
+            )
+        print(f"Duration: {duration.total_seconds() / 60:.1f} minutes")
+        print(f"Index: {index_dir}")
+        if not checkpoint:
+            print(
+                "Note: Vertex AI upload needs --checkpoint (then 05_create_vector_index.py)"
+            )
+        print("")
+
+        return True
+
     def print_pipeline_info(self):
         """Print pipeline stages and descriptions."""
         print("")
@@ -219,6 +398,12 @@ Examples:
 
   # Skip prerequisites check (not recommended)
   python run_pipeline.py --skip-prereqs
+
+  # Stream stages 2-5 in-process (no intermediate files)
+  python run_pipeline.py --stream
+
+  # Stream and keep intermediate JSON files as checkpoints
+  python run_pipeline.py --stream --checkpoint
         """,
     )
 
@@ -244,6 +429,59 @@ Examples:
         help="Skip prerequisites check (not recommended)",
     )
 
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Run stages 2-5 in-process, streaming records between stages",
+    )
+
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="With --stream: also write processed/chunks/embeddings JSON files",
+    )
+
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=5,
+        help="With --stream: chunks per embedding request",
+    )
+
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=8,
+        help="With --stream: batches buffered between stages",
+    )
+
+    parser.add_argument(
+        "--nlist",
+        type=int,
+        default=None,
+        help="With --stream: IVF lists per subject shard (default: sqrt(N))",
+    )
+
+    parser.add_argument(
+        "--nprobe",
+        type=int,
+        default=8,
+        help="With --stream: default lists scanned per query",
+    )
+
+    parser.add_argument(
+        "--dedup-threshold",
+        type=float,
+        default=0.85,
+        help="With --stream: Jaccard similarity for near-duplicate chunks",
+    )
+
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="With --stream: keep near-duplicate chunks",
+    )
+
     args = parser.parse_args()
 
     # Get script directory
@@ -262,6 +500,17 @@ Examples:
         if not check_prerequisites():
             sys.exit(1)
 
+    if args.stream:
+        success = runner.run_streaming_pipeline(
+            batch_size=args.batch_size,
+            queue_size=args.queue_size,
+            checkpoint=args.checkpoint,
+            n_lists=args.nlist,
+            nprobe=args.nprobe,
+            dedup_threshold=None if args.no_dedup else args.dedup_threshold,
+        )
+        sys.exit(0 if success else 1)
+
     # Validate stage range
     if args.start > args.end:
         print("✗ Error: Start stage must be <= end stage")
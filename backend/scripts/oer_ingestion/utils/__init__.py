@@ -7,5 +7,18 @@ Helper modules for processing OpenStax content.
 from .xml_parser import CNXMLParser
 from .chunker import TextChunker
 from .vertex_ai_client import VertexAIEmbeddings, VertexVectorSearch
+from .ann_index import IVFFlatIndex
+from .bm25_index import BM25Index
+from .sharded_index import ShardedIndex
+from .dedup import ChunkDeduplicator
 
-__all__ = ["CNXMLParser", "TextChunker", "VertexAIEmbeddings", "VertexVectorSearch"]
+__all__ = [
+    "CNXMLParser",
+    "TextChunker",
+    "VertexAIEmbeddings",
+    "VertexVectorSearch",
+    "IVFFlatIndex",
+    "BM25Index",
+    "ShardedIndex",
+    "ChunkDeduplicator",
+]
@@ -0,0 +1,482 @@
+"""
+Approximate Nearest-Neighbour Index (IVF-Flat)
+
+Local vector index for OER retrieval without Vertex AI Matching Engine.
+
+Vectors are L2-normalized (cosine similarity == dot product) and clustered
+with spherical k-means into `n_lists` inverted lists. A query scores the
+centroids, then scans only the `nprobe` closest lists, so per-query cost is
+O(n_lists + nprobe * N / n_lists) instead of O(N).
+
+Tuning knob:
+- nprobe: number of lists scanned per query. Higher = better recall, slower.
+  nprobe == n_lists degenerates to exact brute-force search.
+"""
+
+import json
+import math
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+INDEX_FILENAME = "ivf_index.npz"
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize each row of a matrix (zero rows are left as zeros).
+
+    Args:
+        matrix: 2-D float array
+
+    Returns:
+        float32 array with unit-length rows
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, sorted descending.
+
+    Uses argpartition (O(N)) and only sorts the k winners.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def brute_force_search(
+    vectors: np.ndarray, query: np.ndarray, top_k: int
+) -> List[Tuple[int, float]]:
+    """
+    Exact cosine search over pre-normalized vectors.
+
+    Args:
+        vectors: (N, D) normalized matrix
+        query: (D,) query vector (normalized here)
+        top_k: Number of results
+
+    Returns:
+        List of (row_index, score) pairs, best first
+    """
+    query = normalize_rows(query)
+    scores = vectors @ query
+    return [(int(i), float(scores[i])) for i in top_k_indices(scores, top_k)]
+
+
+def brute_force_search_batch(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    top_k: int,
+    allowed: Optional[np.ndarray] = None,
+) -> List[List[Tuple[int, float]]]:
+    """
+    Exact cosine search for a batch of queries (one matrix-matrix product).
+
+    Args:
+        vectors: (N, D) normalized matrix
+        queries: (Q, D) query matrix (normalized here)
+        top_k: Number of results per query
+        allowed: Optional boolean mask over rows; False rows are excluded
+
+    Returns:
+        One list of (row_index, score) pairs per query, best first
+    """
+    queries = normalize_rows(np.atleast_2d(queries))
+    scores = queries @ vectors.T
+    if allowed is not None:
+        scores[:, ~allowed] = -np.inf
+
+    results = []
+    for row in scores:
+        results.append(
+            [
+                (int(i), float(row[i]))
+                for i in top_k_indices(row, top_k)
+                if np.isfinite(row[i])
+            ]
+        )
+    return results
+
+
+class IVFFlatIndex:
+    """
+    Inverted-file index with flat (uncompressed) vectors.
+
+    Vectors are stored contiguously grouped by list, so probing a list is a
+    single slice + matrix-vector product.
+    """
+
+    def __init__(self, n_lists: Optional[int] = None, nprobe: int = 8, seed: int = 42):
+        """
+        Initialize index.
+
+        Args:
+            n_lists: Number of k-means clusters (default: sqrt(N) at build time)
+            nprobe: Default number of lists scanned per query
+            seed: Random seed for k-means initialisation
+        """
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.seed = seed
+
+        self.centroids: Optional[np.ndarray] = None
+        self.vectors: Optional[np.ndarray] = None
+        self.list_offsets: Optional[np.ndarray] = None
+        self.row_ids: Optional[np.ndarray] = None
+        self.chunk_ids: List[str] = []
+
+    @property
+    def size(self) -> int:
+        """Number of indexed vectors."""
+        return 0 if self.vectors is None else int(self.vectors.shape[0])
+
+    @property
+    def dimensions(self) -> int:
+        """Vector dimensionality."""
+        return 0 if self.vectors is None else int(self.vectors.shape[1])
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the index arrays."""
+        arrays = (self.centroids, self.vectors, self.list_offsets, self.row_ids)
+        return sum(a.nbytes for a in arrays if a is not None)
+
+    def build(
+        self,
+        embeddings: np.ndarray,
+        chunk_ids: Sequence[str],
+        n_iter: int = 20,
+        train_sample_size: int = 50_000,
+    ) -> "IVFFlatIndex":
+        """
+        Cluster embeddings and build inverted lists.
+
+        Args:
+            embeddings: (N, D) embedding matrix (any scale)
+            chunk_ids: Chunk ID for each row, in the same order
+            n_iter: k-means iterations
+            train_sample_size: Max vectors used to train centroids
+
+        Returns:
+            self (for chaining)
+        """
+        vectors = normalize_rows(embeddings)
+        n = vectors.shape[0]
+        if n == 0:
+            raise ValueError("Cannot build index from zero embeddings")
+        if len(chunk_ids) != n:
+            raise ValueError(
+                f"chunk_ids length ({len(chunk_ids)}) != embeddings rows ({n})"
+            )
+
+        n_lists = self.n_lists or max(1, int(round(math.sqrt(n))))
+        n_lists = min(n_lists, n)
+
+        centroids = self._train_centroids(vectors, n_lists, n_iter, train_sample_size)
+        assignments = self._assign(vectors, centroids)
+
+        # Group vectors by list so each list is a contiguous slice
+        order = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_lists)
+
+        self.n_lists = n_lists
+        self.centroids = centroids
+        self.vectors = np.ascontiguousarray(vectors[order])
+        self.row_ids = order.astype(np.int64)
+        self.list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.chunk_ids = list(chunk_ids)
+        return self
+
+    def _train_centroids(
+        self, vectors: np.ndarray, n_lists: int, n_iter: int, sample_size: int
+    ) -> np.ndarray:
+        """Spherical k-means (Lloyd iterations on the unit sphere)."""
+        rng = np.random.default_rng(self.seed)
+
+        train = vectors
+        if len(vectors) > sample_size:
+            train = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+
+        centroids = train[rng.choice(len(train), n_lists, replace=False)].copy()
+
+        for _ in range(n_iter):
+            assignments = self._assign(train, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, train)
+
+            # Re-seed empty clusters from random training points
+            empty = np.bincount(assignments, minlength=n_lists) == 0
+            if empty.any():
+                sums[empty] = train[rng.choice(len(train), int(empty.sum()))]
+
+            centroids = normalize_rows(sums)
+
+        return centroids
+
+    @staticmethod
+    def _assign(
+        vectors: np.ndarray, centroids: np.ndarray, batch_size: int = 8192
+    ) -> np.ndarray:
+        """Nearest centroid for each vector (batched to bound memory)."""
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), batch_size):
+            block = vectors[start : start + batch_size] @ centroids.T
+            assignments[start : start + batch_size] = np.argmax(block, axis=1)
+        return assignments
+
+    def search(
+        self,
+        query: Sequence[float],
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        allowed: Optional[np.ndarray] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Approximate top-K search.
+
+        Args:
+            query: Query embedding (any scale)
+            top_k: Number of results
+            nprobe: Lists to scan (defaults to index setting)
+            allowed: Optional boolean mask over rows (build order); rows
+                where it is False are excluded from results
+
+        Returns:
+            List of (row_index, score) pairs, best first. row_index refers to
+            the original order of `chunk_ids` passed to build().
+        """
+        if self.vectors is None:
+            raise RuntimeError("Index is empty; call build() or load() first")
+
+        q = normalize_rows(np.asarray(query, dtype=np.float32))
+        nprobe = max(1, min(nprobe or self.nprobe, self.n_lists))
+
+        centroid_scores = self.centroids @ q
+        probe_lists = top_k_indices(centroid_scores, nprobe)
+
+        slices = [
+            (int(self.list_offsets[cluster]), int(self.list_offsets[cluster + 1]))
+            for cluster in probe_lists
+        ]
+        positions = np.concatenate(
+            [np.arange(start, end) for start, end in slices if end > start]
+            or [np.empty(0, dtype=np.int64)]
+        )
+        if positions.size == 0:
+            return []
+
+        scores = np.concatenate(
+            [self.vectors[start:end] @ q for start, end in slices if end > start]
+        )
+        if allowed is not None:
+            keep = allowed[self.row_ids[positions]]
+            positions, scores = positions[keep], scores[keep]
+
+        best = top_k_indices(scores, top_k)
+
+        return [(int(self.row_ids[positions[i]]), float(scores[i])) for i in best]
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        allowed: Optional[np.ndarray] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Approximate top-K search for a batch of queries.
+
+        Centroids are scored for all queries at once; each probed list is
+        then scanned with one matrix-matrix product against every query
+        that probes it. Results match calling search() per query.
+
+        Args:
+            queries: (Q, D) query matrix (any scale)
+            top_k: Number of results per query
+            nprobe: Lists to scan per query (defaults to index setting)
+            allowed: Optional boolean mask over rows (build order)
+
+        Returns:
+            One list of (row_index, score) pairs per query, best first
+        """
+        if self.vectors is None:
+            raise RuntimeError("Index is empty; call build() or load() first")
+
+        q = normalize_rows(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        nprobe = max(1, min(nprobe or self.nprobe, self.n_lists))
+
+        centroid_scores = q @ self.centroids.T
+        if nprobe < self.n_lists:
+            probes = np.argpartition(-centroid_scores, nprobe - 1, axis=1)[:, :nprobe]
+        else:
+            probes = np.tile(np.arange(self.n_lists), (len(q), 1))
+
+        positions: List[List[np.ndarray]] = [[] for _ in range(len(q))]
+        scores: List[List[np.ndarray]] = [[] for _ in range(len(q))]
+
+        for cluster in np.unique(probes):
+            start = int(self.list_offsets[cluster])
+            end = int(self.list_offsets[cluster + 1])
+            if end == start:
+                continue
+
+            list_positions = np.arange(start, end)
+            list_vectors = self.vectors[start:end]
+            if allowed is not None:
+                keep = allowed[self.row_ids[list_positions]]
+                list_positions, list_vectors = list_positions[keep], list_vectors[keep]
+                if not len(list_positions):
+                    continue
+
+            probing = np.flatnonzero((probes == cluster).any(axis=1))
+            block = list_vectors @ q[probing].T
+            for column, query_row in enumerate(probing):
+                positions[query_row].append(list_positions)
+                scores[query_row].append(block[:, column])
+
+        results = []
+        for query_positions, query_scores in zip(positions, scores):
+            if not query_positions:
+                results.append([])
+                continue
+            query_positions = np.concatenate(query_positions)
+            query_scores = np.concatenate(query_scores)
+            best = top_k_indices(query_scores, top_k)
+            results.append(
+                [
+                    (int(self.row_ids[query_positions[i]]), float(query_scores[i]))
+                    for i in best
+                ]
+            )
+        return results
+
+    def save(self, index_dir: Path) -> Path:
+        """
+        Persist index as a single .npz file.
+
+        Args:
+            index_dir: Directory to write into
+
+        Returns:
+            Path to written file
+        """
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        path = index_dir / INDEX_FILENAME
+
+        np.savez(
+            path,
+            centroids=self.centroids,
+            vectors=self.vectors,
+            list_offsets=self.list_offsets,
+            row_ids=self.row_ids,
+            chunk_ids=np.array(self.chunk_ids, dtype=np.str_),
+            params=np.array(
+                json.dumps(
+                    {"n_lists": self.n_lists, "nprobe": self.nprobe, "seed": self.seed}
+                )
+            ),
+        )
+        return path
+
+    @classmethod
+    def load(cls, index_dir: Path) -> "IVFFlatIndex":
+        """
+        Load index persisted by save().
+
+        Args:
+            index_dir: Directory containing ivf_index.npz
+
+        Returns:
+            Loaded index
+        """
+        path = Path(index_dir) / INDEX_FILENAME
+        with np.load(path, allow_pickle=False) as data:
+            params = json.loads(str(data["params"]))
+            index = cls(
+                n_lists=params["n_lists"], nprobe=params["nprobe"], seed=params["seed"]
+            )
+            index.centroids = data["centroids"]
+            index.vectors = data["vectors"]
+            index.list_offsets = data["list_offsets"]
+            index.row_ids = data["row_ids"]
+            index.chunk_ids = data["chunk_ids"].tolist()
+        return index
+
+    @staticmethod
+    def exists(index_dir: Path) -> bool:
+        """Check whether a persisted index exists in directory."""
+        return (Path(index_dir) / INDEX_FILENAME).exists()
+
+
+def evaluate_recall(
+    index: IVFFlatIndex,
+    embeddings: np.ndarray,
+    k: int = 10,
+    nprobe_values: Sequence[int] = (1, 2, 4, 8, 16, 32),
+    n_queries: int = 200,
+    seed: int = 0,
+) -> List[Dict]:
+    """
+    Compare ANN results against exact brute-force search.
+
+    Queries are sampled from the indexed embeddings themselves (lightly
+    perturbed so the query is not trivially its own nearest neighbour).
+
+    Args:
+        index: Built IVFFlatIndex
+        embeddings: Original (N, D) embeddings in build order
+        k: Neighbours compared per query
+        nprobe_values: nprobe settings to sweep
+        n_queries: Number of sampled queries
+        seed: Random seed
+
+    Returns:
+        One dict per nprobe with recall@k and mean latency (ms)
+    """
+    vectors = normalize_rows(embeddings)
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(vectors), min(n_queries, len(vectors)), replace=False)
+    queries = normalize_rows(
+        vectors[sample] + rng.normal(scale=0.01, size=vectors[sample].shape)
+    )
+
+    exact_start = time.perf_counter()
+    truth = [{i for i, _ in brute_force_search(vectors, q, k)} for q in queries]
+    exact_ms = (time.perf_counter() - exact_start) * 1000 / len(queries)
+
+    report = []
+    for nprobe in nprobe_values:
+        if nprobe > index.n_lists:
+            continue
+
+        hits = 0
+        start = time.perf_counter()
+        for q, expected in zip(queries, truth):
+            found = {i for i, _ in index.search(q, top_k=k, nprobe=nprobe)}
+            hits += len(found & expected)
+        ann_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        report.append(
+            {
+                "nprobe": nprobe,
+                f"recall@{k}": hits / (k * len(queries)),
+                "ann_latency_ms": ann_ms,
+                "brute_force_latency_ms": exact_ms,
+            }
+        )
+
+    return report
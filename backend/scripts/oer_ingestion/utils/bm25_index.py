@@ -0,0 +1,326 @@
+"""
+BM25 Inverted Index
+
+Lexical retrieval over chunk text to complement embedding search.
+
+Embeddings blur exact terms that students type literally ("F=ma",
+"H2O", "Hooke's law"). The tokenizer keeps formula-like tokens intact
+and also emits their alphanumeric parts, so both "F=ma" and "ma" match.
+
+Postings are stored as flat NumPy arrays (term offsets + doc ids + term
+frequencies) in a compressed .npz file next to the vector index.
+"""
+
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ann_index import top_k_indices
+
+
+INDEX_FILENAME = "bm25_index.npz"
+
+# Alphanumeric runs, optionally joined by formula operators (F=ma, x^2, H2O, 6.02e23)
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[=+\-^/*.][a-z0-9]+)*")
+_PART_RE = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset(
+    {
+        "a",
+        "an",
+        "and",
+        "are",
+        "as",
+        "at",
+        "be",
+        "by",
+        "for",
+        "from",
+        "in",
+        "is",
+        "it",
+        "of",
+        "on",
+        "or",
+        "that",
+        "the",
+        "this",
+        "to",
+        "was",
+        "were",
+        "with",
+    }
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into BM25 terms.
+
+    Args:
+        text: Input text
+
+    Returns:
+        List of lowercase terms (formula tokens plus their parts)
+    """
+    tokens = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        token = match.group()
+        if token not in STOP_WORDS:
+            tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(
+                part for part in _PART_RE.findall(token) if part not in STOP_WORDS
+            )
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an in-memory postings list.
+
+    Parameters:
+    - k1: Term frequency saturation (default 1.2)
+    - b: Document length normalisation (default 0.75)
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize index.
+
+        Args:
+            k1: Term frequency saturation
+            b: Length normalisation strength
+        """
+        self.k1 = k1
+        self.b = b
+
+        self.vocab: Dict[str, int] = {}
+        self.term_offsets = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.empty(0, dtype=np.int32)
+        self.term_freqs = np.empty(0, dtype=np.uint16)
+        self.doc_lengths = np.empty(0, dtype=np.int32)
+        self.chunk_ids: List[str] = []
+        self._length_norm = np.empty(0, dtype=np.float32)
+
+        # Documents added with add_document() but not yet finalized
+        self._pending: Dict[str, List[Tuple[int, int]]] = {}
+        self._pending_lengths: List[int] = []
+        self._pending_ids: List[str] = []
+
+    @property
+    def size(self) -> int:
+        """Number of indexed documents."""
+        return len(self.doc_lengths)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by postings and per-document arrays (excludes vocab)."""
+        arrays = (
+            self.term_offsets,
+            self.doc_ids,
+            self.term_freqs,
+            self.doc_lengths,
+            self._length_norm,
+        )
+        return sum(a.nbytes for a in arrays)
+
+    def build(self, texts: Sequence[str], chunk_ids: Sequence[str]) -> "BM25Index":
+        """
+        Build postings from chunk texts.
+
+        Args:
+            texts: Chunk text for each document
+            chunk_ids: Chunk ID for each document, same order
+
+        Returns:
+            self (for chaining)
+        """
+        if len(texts) != len(chunk_ids):
+            raise ValueError(
+                f"texts length ({len(texts)}) != chunk_ids length ({len(chunk_ids)})"
+            )
+
+        for text, chunk_id in zip(texts, chunk_ids):
+            self.add_document(text, chunk_id)
+        return self.finalize()
+
+    def add_document(self, text: str, chunk_id: str):
+        """
+        Add one document incrementally (streaming builds).
+
+        Only term counts are kept, not the text. Call finalize() once all
+        documents have been added.
+
+        Args:
+            text: Chunk text
+            chunk_id: Chunk ID
+        """
+        doc_id = len(self._pending_ids)
+        terms = tokenize(text)
+        self._pending_lengths.append(len(terms))
+        self._pending_ids.append(chunk_id)
+        for term, tf in Counter(terms).items():
+            self._pending.setdefault(term, []).append((doc_id, tf))
+
+    def finalize(self) -> "BM25Index":
+        """
+        Pack documents added with add_document() into flat postings arrays.
+
+        Returns:
+            self (for chaining)
+        """
+        postings = self._pending
+        vocab = sorted(postings)
+        offsets = [0]
+        doc_ids: List[int] = []
+        term_freqs: List[int] = []
+        for term in vocab:
+            for doc_id, tf in postings[term]:
+                doc_ids.append(doc_id)
+                term_freqs.append(min(tf, np.iinfo(np.uint16).max))
+            offsets.append(len(doc_ids))
+
+        self.vocab = {term: i for i, term in enumerate(vocab)}
+        self.term_offsets = np.array(offsets, dtype=np.int64)
+        self.doc_ids = np.array(doc_ids, dtype=np.int32)
+        self.term_freqs = np.array(term_freqs, dtype=np.uint16)
+        self.doc_lengths = np.array(self._pending_lengths, dtype=np.int32)
+        self.chunk_ids = self._pending_ids
+
+        self._pending, self._pending_lengths, self._pending_ids = {}, [], []
+
+        self._prepare()
+        return self
+
+    def _prepare(self):
+        """Precompute per-document length normalisation."""
+        avg_length = float(self.doc_lengths.mean()) if self.size else 0.0
+        if avg_length == 0:
+            avg_length = 1.0
+        self._length_norm = (
+            self.k1 * (1 - self.b + self.b * self.doc_lengths / avg_length)
+        ).astype(np.float32)
+
+    def search(
+        self, query_text: str, top_k: int = 5, allowed: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Score documents against query terms.
+
+        Args:
+            query_text: Raw query text
+            top_k: Number of results
+            allowed: Optional boolean mask over documents; documents where it
+                is False are excluded from results
+
+        Returns:
+            List of (doc_index, score) pairs, best first. Documents with no
+            matching term are never returned.
+        """
+        scores = np.zeros(self.size, dtype=np.float32)
+        n_docs = self.size
+
+        for term in set(tokenize(query_text)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.term_freqs[start:end].astype(np.float32)
+
+            df = end - start
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + self._length_norm[docs])
+
+        if allowed is not None:
+            scores[~allowed] = 0.0
+
+        matched = np.flatnonzero(scores)
+        best = top_k_indices(scores[matched], top_k)
+        return [(int(matched[i]), float(scores[matched[i]])) for i in best]
+
+    def save(self, index_dir: Path) -> Path:
+        """
+        Persist postings as a compressed .npz file.
+
+        Args:
+            index_dir: Directory to write into
+
+        Returns:
+            Path to written file
+        """
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        path = index_dir / INDEX_FILENAME
+
+        vocab = sorted(self.vocab, key=self.vocab.get)
+        np.savez_compressed(
+            path,
+            vocab=np.array(vocab, dtype=np.str_),
+            term_offsets=self.term_offsets,
+            doc_ids=self.doc_ids,
+            term_freqs=self.term_freqs,
+            doc_lengths=self.doc_lengths,
+            chunk_ids=np.array(self.chunk_ids, dtype=np.str_),
+            params=np.array(json.dumps({"k1": self.k1, "b": self.b})),
+        )
+        return path
+
+    @classmethod
+    def load(cls, index_dir: Path) -> "BM25Index":
+        """
+        Load index persisted by save().
+
+        Args:
+            index_dir: Directory containing bm25_index.npz
+
+        Returns:
+            Loaded index
+        """
+        path = Path(index_dir) / INDEX_FILENAME
+        with np.load(path, allow_pickle=False) as data:
+            params = json.loads(str(data["params"]))
+            index = cls(k1=params["k1"], b=params["b"])
+            index.vocab = {term: i for i, term in enumerate(data["vocab"].tolist())}
+            index.term_offsets = data["term_offsets"]
+            index.doc_ids = data["doc_ids"]
+            index.term_freqs = data["term_freqs"]
+            index.doc_lengths = data["doc_lengths"]
+            index.chunk_ids = data["chunk_ids"].tolist()
+        index._prepare()
+        return index
+
+    @staticmethod
+    def exists(index_dir: Path) -> bool:
+        """Check whether a persisted index exists in directory."""
+        return (Path(index_dir) / INDEX_FILENAME).exists()
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[int]], k: int = 60
+) -> List[Tuple[int, float]]:
+    """
+    Fuse several ranked lists with Reciprocal Rank Fusion.
+
+    score(d) = sum over lists of 1 / (k + rank(d)), rank starting at 1.
+    Rank-based, so BM25 and cosine scores need no calibration.
+
+    Args:
+        rankings: Ranked lists of document indices, best first
+        k: Damping constant (60 per Cormack et al.)
+
+    Returns:
+        List of (doc_index, fused_score) pairs, best first
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            fused[doc] = fused.get(doc, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
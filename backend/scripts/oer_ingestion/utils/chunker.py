@@ -4,10 +4,14 @@ Text Chunking Utility
 Splits content into 500-word chunks with overlap for embedding generation.
 """
 
+import bisect
 import re
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional
 import tiktoken
 
+# Words ending with these close a sentence (chunk boundary candidates)
+SENTENCE_ENDERS = (".", "!", "?")
+
 
 class TextChunker:
     """
@@ -57,84 +61,116 @@ class TextChunker:
         Returns:
             List of chunks with metadata
         """
-        chunks = []
+        return list(self.iter_chunks(book_data))
+
+    def iter_chunks(self, book_data: Dict) -> Iterator[Dict]:
+        """
+        Yield a book's chunks chapter by chapter (streaming pipeline).
+
+        Args:
+            book_data: Parsed book data from CNXMLParser
+
+        Yields:
+            Chunks with metadata, in the same order as chunk_book()
+        """
         chunk_counter = 0
 
         for chapter in book_data["chapters"]:
             chapter_chunks = self._chunk_chapter(
-                chapter, book_data["title"], book_data["subject"], chunk_counter
+                chapter,
+                book_data["title"],
+                book_data["subject"],
+                chunk_counter,
+                grade_level=book_data.get("grade_level"),
             )
-            chunks.extend(chapter_chunks)
+            yield from chapter_chunks
             chunk_counter += len(chapter_chunks)
 
-        return chunks
-
     def _chunk_chapter(
-        self, chapter: Dict, book_title: str, subject: str, start_index: int
+        self,
+        chapter: Dict,
+        book_title: str,
+        subject: str,
+        start_index: int,
+        grade_level: Optional[str] = None,
     ) -> List[Dict]:
-        """Chunk a single chapter."""
-        chunks = []
+        """
+        Chunk a single chapter.
 
-        # Combine all content blocks into sequential text
-        text_segments = []
+        The chapter is split into words once, sentence-ending words are
+        indexed once, and each chunk end is snapped to a sentence boundary
+        with a bisect. Token counts for all chunks come from one batched
+        encode call.
+        """
+        # Split content blocks into one sequential word list
+        words = []
         for block in chapter["content_blocks"]:
             if block["type"] == "paragraph":
-                text_segments.append(block["text"])
+                segment = block["text"]
             elif block["type"] == "example":
-                text_segments.append(f"{block['title']}: {block['text']}")
+                segment = f"{block['title']}: {block['text']}"
             elif block["type"] == "learning_objective":
-                text_segments.append(f"Learning Objective: {block['text']}")
+                segment = f"Learning Objective: {block['text']}"
             elif block["type"] == "figure":
-                text_segments.append(f"Figure: {block['caption']}")
-
-        # Join into full chapter text
-        full_text = " ".join(text_segments)
+                segment = f"Figure: {block['caption']}"
+            else:
+                continue
+            words.extend(self._tokenize_words(segment))
 
-        # Split into words
-        words = self._tokenize_words(full_text)
+        # Positions of words that end a sentence
+        sentence_ends = [
+            j for j, word in enumerate(words) if word.endswith(SENTENCE_ENDERS)
+        ]
 
-        # Create chunks
+        # Chunk spans [start, end) over words
+        spans = []
         i = 0
-        chunk_num = 0
         while i < len(words):
-            # Extract chunk
             end_idx = min(i + self.target_size, len(words))
-            chunk_words = words[i:end_idx]
-
-            # Extend to sentence boundary if possible
-            chunk_words = self._extend_to_sentence_boundary(chunk_words, words, end_idx)
-
-            chunk_text = " ".join(chunk_words)
-            word_count = len(chunk_words)
+            end = self._snap_to_sentence_boundary(sentence_ends, i, end_idx, len(words))
 
             # Skip chunks that are too small (unless it's the last chunk)
-            if word_count < self.min_size and end_idx < len(words):
+            if end - i < self.min_size and end_idx < len(words):
                 i += self.target_size
                 continue
 
+            spans.append((i, end))
+
+            # Move to next chunk with overlap
+            i += self.target_size - self.overlap
+
+        texts = [" ".join(words[start:end]) for start, end in spans]
+        token_counts = self._count_tokens_batch(
+            texts, [end - start for start, end in spans]
+        )
+
+        chunks = []
+        for chunk_num, ((start, end), chunk_text, token_count) in enumerate(
+            zip(spans, texts, token_counts)
+        ):
             # Create chunk metadata
             chunk_id = f"{subject}-{chapter['id']}-{chunk_num:03d}"
+            metadata = {
+                "source_title": book_title,
+                "chapter_id": chapter["id"],
+                "chapter_title": chapter["title"],
+                "subject": subject,
+                "chunk_index": start_index + chunk_num,
+            }
+            if grade_level:
+                # Used for grade-restricted search ("9-12")
+                metadata["grade_level"] = grade_level
+
             chunks.append(
                 {
                     "chunk_id": chunk_id,
                     "text": chunk_text,
-                    "word_count": word_count,
-                    "token_count": self._count_tokens(chunk_text),
-                    "metadata": {
-                        "source_title": book_title,
-                        "chapter_id": chapter["id"],
-                        "chapter_title": chapter["title"],
-                        "subject": subject,
-                        "chunk_index": start_index + chunk_num,
-                    },
+                    "word_count": end - start,
+                    "token_count": token_count,
+                    "metadata": metadata,
                 }
             )
 
-            chunk_num += 1
-
-            # Move to next chunk with overlap
-            i += self.target_size - self.overlap
-
         return chunks
 
     def _tokenize_words(self, text: str) -> List[str]:
@@ -151,45 +187,59 @@ class TextChunker:
         words = re.findall(r"\S+", text)
         return words
 
-    def _extend_to_sentence_boundary(
-        self, chunk_words: List[str], all_words: List[str], end_idx: int
-    ) -> List[str]:
+    def _snap_to_sentence_boundary(
+        self, sentence_ends: List[int], start: int, end_idx: int, n_words: int
+    ) -> int:
         """
-        Extend chunk to nearest sentence boundary.
+        End a chunk at a sentence boundary.
 
-        Looks for sentence-ending punctuation (.!?) within next 50 words.
+        Prefers the last sentence end inside [start, end_idx); otherwise
+        extends to the first sentence end within the next 50 words;
+        otherwise takes the 50-word lookahead, capped at max_size.
 
         Args:
-            chunk_words: Current chunk words
-            all_words: All words in text
-            end_idx: Current end index
+            sentence_ends: Sorted word positions that end a sentence
+            start: Chunk start word
+            end_idx: Target end word (exclusive)
+            n_words: Words in chapter
 
         Returns:
-            Extended chunk words
+            Chunk end word (exclusive)
         """
-        # Sentence ending punctuation
-        sentence_enders = {".", "!", "?"}
-
-        # Look ahead up to 50 words for sentence boundary
         lookahead = 50
-        for i in range(len(chunk_words) - 1, -1, -1):
-            word = chunk_words[i]
-            if any(word.endswith(ender) for ender in sentence_enders):
-                # Found sentence boundary, truncate here
-                return chunk_words[: i + 1]
-
-        # No boundary found in current chunk, look ahead
-        for i in range(end_idx, min(end_idx + lookahead, len(all_words))):
-            word = all_words[i]
-            chunk_words.append(word)
-            if any(word.endswith(ender) for ender in sentence_enders):
-                return chunk_words
-
-        # No boundary found, return as is (but cap at max_size)
-        if len(chunk_words) > self.max_size:
-            return chunk_words[: self.max_size]
-
-        return chunk_words
+        k = bisect.bisect_left(sentence_ends, end_idx)
+
+        # Last boundary inside the chunk
+        if k > 0 and sentence_ends[k - 1] >= start:
+            return sentence_ends[k - 1] + 1
+
+        # First boundary in the lookahead window
+        lookahead_end = min(end_idx + lookahead, n_words)
+        if k < len(sentence_ends) and sentence_ends[k] < lookahead_end:
+            return sentence_ends[k] + 1
+
+        # No boundary found: keep the lookahead (but cap at max_size)
+        return min(lookahead_end, start + self.max_size)
+
+    def _count_tokens_batch(
+        self, texts: List[str], word_counts: List[int]
+    ) -> List[int]:
+        """
+        Count tokens for many texts with one batched tiktoken call.
+
+        Args:
+            texts: Chunk texts
+            word_counts: Word count of each text (for the fallback estimate)
+
+        Returns:
+            Token count per text
+        """
+        if not texts:
+            return []
+        if self.tokenizer:
+            return [len(tokens) for tokens in self.tokenizer.encode_batch(texts)]
+        # Fallback: estimate 1.3 tokens per word
+        return [int(count * 1.3) for count in word_counts]
 
     def _count_tokens(self, text: str) -> int:
         """
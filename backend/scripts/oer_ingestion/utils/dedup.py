@@ -0,0 +1,266 @@
+"""
+Near-Duplicate Chunk Detection
+
+MinHash + LSH deduplication stage between chunking and embedding.
+
+OpenStax books repeat boilerplate (learning objectives, figure captions,
+review sections) across chapters and books. Near-duplicate chunks cost
+embedding calls, grow the index and put redundant context into RAG
+prompts, so they are dropped before embedding.
+
+How it works:
+- Each chunk is reduced to a set of word 5-gram shingles
+- A MinHash signature (num_perm hash minimums) estimates Jaccard similarity
+- Signatures are split into LSH bands; chunks sharing any band bucket are
+  candidates, so only a handful of pairs are ever compared
+- Candidates are verified with exact shingle Jaccard against the threshold
+
+The first occurrence of a chunk is kept. Dropped chunk IDs are recorded
+in a mapping file (duplicate -> kept chunk ID + similarity), so labels or
+links that point at a dropped chunk can be resolved.
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+DEFAULT_THRESHOLD = 0.85
+DEFAULT_NUM_PERM = 128
+SHINGLE_SIZE = 5
+
+# Universal hashing modulo a Mersenne prime, as in Broder's MinHash
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """
+    Hash the word n-gram shingles of a text.
+
+    Args:
+        text: Chunk text
+        size: Words per shingle (shorter texts yield one shingle)
+
+    Returns:
+        Sorted unique uint32 shingle hashes (as uint64)
+    """
+    words = _WORD_RE.findall(text.lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+
+    shingles = {
+        " ".join(words[i : i + size]) for i in range(max(1, len(words) - size + 1))
+    }
+    hashes = [
+        int.from_bytes(
+            hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little"
+        )
+        for shingle in shingles
+    ]
+    return np.unique(np.array(hashes, dtype=np.uint64))
+
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    """Exact Jaccard similarity of two sorted unique hash arrays."""
+    if not len(a) and not len(b):
+        return 1.0
+    intersection = len(np.intersect1d(a, b, assume_unique=True))
+    return intersection / (len(a) + len(b) - intersection)
+
+
+def lsh_params(
+    threshold: float, num_perm: int, min_recall: float = 0.95
+) -> Tuple[int, int]:
+    """
+    Choose (bands, rows) with bands * rows <= num_perm for a threshold.
+
+    Two signatures with Jaccard similarity s become candidates with
+    probability 1 - (1 - s^r)^b. Candidates are verified exactly, so false
+    positives only cost a comparison; pick the most selective split (most
+    rows per band) that still catches pairs at the threshold with
+    probability min_recall.
+
+    Args:
+        threshold: Jaccard similarity threshold
+        num_perm: Signature length
+        min_recall: Required candidate probability at the threshold
+
+    Returns:
+        (bands, rows)
+    """
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold**rows) ** bands >= min_recall:
+            return bands, rows
+    return num_perm, 1
+
+
+class MinHasher:
+    """MinHash signatures over shingle hashes."""
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1):
+        """
+        Args:
+            num_perm: Number of hash permutations (signature length)
+            seed: Seed for the permutation parameters
+        """
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        MinHash signature of a shingle hash set.
+
+        Args:
+            hashes: Shingle hashes from shingle_hashes()
+
+        Returns:
+            (num_perm,) uint64 signature
+        """
+        if not len(hashes):
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        # (shingles, num_perm) permuted hashes; uint64 products wrap by design
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+
+class ChunkDeduplicator:
+    """
+    Streaming near-duplicate filter for chunks.
+
+    Chunks are checked in arrival order against every chunk kept so far
+    (across books), so the first occurrence wins.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        shingle_size: int = SHINGLE_SIZE,
+        seed: int = 1,
+    ):
+        """
+        Initialize deduplicator.
+
+        Args:
+            threshold: Jaccard similarity at or above which a chunk is a
+                duplicate (0-1)
+            num_perm: MinHash signature length
+            shingle_size: Words per shingle
+            seed: MinHash seed
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm=num_perm, seed=seed)
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        # Per kept chunk: (chunk_id, shingle hashes); text is not retained
+        self._kept: List[Tuple[str, np.ndarray]] = []
+
+        # duplicate chunk_id -> (kept chunk_id, similarity)
+        self.mapping: Dict[str, Tuple[str, float]] = {}
+        self.checked = 0
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        """One bucket key per LSH band."""
+        return [
+            signature[band * self.rows : (band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def add(self, chunk: Dict) -> Optional[str]:
+        """
+        Check one chunk and index it if it is not a duplicate.
+
+        Args:
+            chunk: Chunk dict with chunk_id and text
+
+        Returns:
+            chunk_id of the kept chunk it duplicates, or None if kept
+        """
+        self.checked += 1
+        hashes = shingle_hashes(chunk["text"], self.shingle_size)
+        keys = self._band_keys(self.hasher.signature(hashes))
+
+        candidates = set()
+        for band, key in enumerate(keys):
+            candidates.update(self._buckets[band].get(key, ()))
+
+        best, best_similarity = None, 0.0
+        for position in sorted(candidates):
+            similarity = jaccard(hashes, self._kept[position][1])
+            if similarity > best_similarity:
+                best, best_similarity = position, similarity
+
+        if best is not None and best_similarity >= self.threshold:
+            kept_id = self._kept[best][0]
+            self.mapping[chunk["chunk_id"]] = (kept_id, round(best_similarity, 4))
+            return kept_id
+
+        position = len(self._kept)
+        self._kept.append((chunk["chunk_id"], hashes))
+        for band, key in enumerate(keys):
+            self._buckets[band].setdefault(key, []).append(position)
+        return None
+
+    def filter(self, chunks: Iterable[Dict]) -> List[Dict]:
+        """Keep only chunks that are not near-duplicates of earlier ones."""
+        return [chunk for chunk in chunks if self.add(chunk) is None]
+
+    def stream(self, chunks: Iterable[Tuple[str, Dict]]) -> Iterator[Tuple[str, Dict]]:
+        """Streaming-pipeline stage: drop duplicate (book_id, chunk) pairs."""
+        for book_id, chunk in chunks:
+            if self.add(chunk) is None:
+                yield book_id, chunk
+
+    def get_statistics(self) -> Dict:
+        """Counts of checked, kept and dropped chunks."""
+        dropped = len(self.mapping)
+        return {
+            "checked": self.checked,
+            "kept": self.checked - dropped,
+            "dropped": dropped,
+            "drop_rate": round(dropped / self.checked, 4) if self.checked else 0.0,
+            "threshold": self.threshold,
+            "bands": self.bands,
+            "rows": self.rows,
+        }
+
+    def save_mapping(self, path: Path) -> Path:
+        """
+        Write the duplicate -> kept mapping as JSON.
+
+        Args:
+            path: Output file (e.g. data/chunks/dedup_map.json)
+
+        Returns:
+            Path written
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "statistics": self.get_statistics(),
+                    "duplicates": {
+                        duplicate: {"kept": kept, "similarity": similarity}
+                        for duplicate, (kept, similarity) in self.mapping.items()
+                    },
+                },
+                f,
+                indent=2,
+            )
+        return path
@@ -0,0 +1,210 @@
+"""
+Retrieval Evaluation
+
+Metrics and a batched runner for benchmarking retrieval backends
+against a labelled query set.
+
+Query set format (JSON list):
+    [
+      {
+        "query": "What is Newton's third law of motion?",
+        "expected_chunk_ids": ["physics-ch04-003"],     # and/or
+        "expected_labels": ["physics/ch04"],            # subject[/chapter_id]
+        "subjects": ["physics"],                        # optional filter
+        "grade_level": 10,                              # optional filter
+        "embedding": [...]                              # optional, precomputed
+      }
+    ]
+
+A retrieved chunk is relevant if its chunk_id is in expected_chunk_ids or
+its "subject/chapter_id" label starts with one of expected_labels.
+"""
+
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+
+# (query_indices, query_matrix, subjects, grade_level)
+#     -> one ranked list of chunk positions per query
+BatchSearchFn = Callable[
+    [List[int], np.ndarray, Optional[List[str]], Optional[int]], List[List[int]]
+]
+
+
+def load_query_set(path: Path) -> List[Dict]:
+    """
+    Load and validate a labelled query set.
+
+    Args:
+        path: JSON file in the format described in the module docstring
+
+    Returns:
+        List of query dicts
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+
+    for i, query in enumerate(queries):
+        if "query" not in query:
+            raise ValueError(f"Query {i} has no 'query' text")
+        if not query.get("expected_chunk_ids") and not query.get("expected_labels"):
+            raise ValueError(
+                f"Query {i} needs expected_chunk_ids or expected_labels: "
+                f"{query['query']!r}"
+            )
+    return queries
+
+
+def chunk_label(chunk: Dict) -> str:
+    """Topic label of a chunk: "subject/chapter_id"."""
+    metadata = chunk.get("metadata", {})
+    return f"{metadata.get('subject', '')}/{metadata.get('chapter_id', '')}"
+
+
+def relevant_positions(query: Dict, chunks: Sequence[Dict]) -> Set[int]:
+    """
+    Positions of chunks that count as relevant for a query.
+
+    Args:
+        query: Query dict with expected_chunk_ids and/or expected_labels
+        chunks: Loaded chunks (position == row in the embeddings matrix)
+
+    Returns:
+        Set of chunk positions
+    """
+    expected_ids = set(query.get("expected_chunk_ids") or [])
+    labels = tuple(query.get("expected_labels") or [])
+
+    return {
+        i
+        for i, chunk in enumerate(chunks)
+        if chunk["chunk_id"] in expected_ids
+        or (labels and chunk_label(chunk).startswith(labels))
+    }
+
+
+def recall_at_k(retrieved: Sequence[int], relevant: Set[int], k: int) -> float:
+    """
+    Fraction of relevant chunks found in the top k.
+
+    The denominator is capped at k, so a topic label matching hundreds of
+    chunks can still reach 1.0.
+    """
+    if not relevant:
+        return 0.0
+    hits = len(set(retrieved[:k]) & relevant)
+    return hits / min(k, len(relevant))
+
+
+def reciprocal_rank(retrieved: Sequence[int], relevant: Set[int]) -> float:
+    """1 / rank of the first relevant result (0 if none retrieved)."""
+    for rank, position in enumerate(retrieved, start=1):
+        if position in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def latency_summary(latencies_ms: Sequence[float]) -> Dict[str, float]:
+    """p50 / p95 / mean of per-query latencies in milliseconds."""
+    if not latencies_ms:
+        return {"p50": 0.0, "p95": 0.0, "mean": 0.0}
+    values = np.asarray(latencies_ms, dtype=np.float64)
+    return {
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "mean": round(float(values.mean()), 3),
+    }
+
+
+def filter_groups(
+    queries: Sequence[Dict], batch_size: int
+) -> List[Tuple[Optional[List[str]], Optional[int], List[int]]]:
+    """
+    Group query indices into batches that share the same filters.
+
+    Returns:
+        List of (subjects, grade_level, query_indices)
+    """
+    groups: Dict[Tuple, List[int]] = {}
+    for i, query in enumerate(queries):
+        key = (tuple(query.get("subjects") or ()), query.get("grade_level"))
+        groups.setdefault(key, []).append(i)
+
+    batches = []
+    for (subjects, grade_level), indices in groups.items():
+        for start in range(0, len(indices), batch_size):
+            batches.append(
+                (
+                    list(subjects) or None,
+                    grade_level,
+                    indices[start : start + batch_size],
+                )
+            )
+    return batches
+
+
+def run_backend(
+    search_fn: BatchSearchFn,
+    queries: Sequence[Dict],
+    query_embeddings: np.ndarray,
+    relevant: Sequence[Set[int]],
+    k: int = 10,
+    batch_size: int = 32,
+    warmup: bool = True,
+) -> Dict:
+    """
+    Run every query through one backend in filter-homogeneous batches.
+
+    Per-query latency is the batch wall time divided by the batch size,
+    so batch_size=1 gives true single-query latency.
+
+    Args:
+        search_fn: (query_indices, query_matrix, subjects, grade_level) ->
+            ranked chunk positions per query
+        queries: Query dicts
+        query_embeddings: (Q, D) query matrix
+        relevant: Relevant chunk positions per query
+        k: Cutoff for recall@k; MRR is computed over the same top k
+        batch_size: Queries per search call
+        warmup: Run one untimed batch first
+
+    Returns:
+        Metrics dict (recall@k, mrr, latency_ms, qps, queries)
+    """
+    batches = filter_groups(queries, batch_size)
+
+    if warmup and batches:
+        subjects, grade_level, indices = batches[0]
+        search_fn(indices, query_embeddings[indices], subjects, grade_level)
+
+    recalls = np.zeros(len(queries))
+    reciprocal_ranks = np.zeros(len(queries))
+    latencies_ms: List[float] = []
+    total_seconds = 0.0
+
+    for subjects, grade_level, indices in batches:
+        start = time.perf_counter()
+        rankings = search_fn(indices, query_embeddings[indices], subjects, grade_level)
+        elapsed = time.perf_counter() - start
+
+        total_seconds += elapsed
+        latencies_ms.extend([elapsed * 1000 / len(indices)] * len(indices))
+
+        for query_index, ranking in zip(indices, rankings):
+            ranking = list(ranking)[:k]
+            recalls[query_index] = recall_at_k(ranking, relevant[query_index], k)
+            reciprocal_ranks[query_index] = reciprocal_rank(
+                ranking, relevant[query_index]
+            )
+
+    return {
+        f"recall@{k}": round(float(recalls.mean()), 4) if len(queries) else 0.0,
+        "mrr": round(float(reciprocal_ranks.mean()), 4) if len(queries) else 0.0,
+        "latency_ms": latency_summary(latencies_ms),
+        "qps": round(len(queries) / total_seconds, 1) if total_seconds else 0.0,
+        "queries": len(queries),
+    }
@@ -0,0 +1,330 @@
+"""
+Subject-Sharded Vector Index
+
+Partitions the local ANN index into one IVF-Flat shard per subject
+(chunk `metadata.subject`), with optional per-chunk grade ranges.
+
+A query restricted to a subject only touches that subject's shard, so
+the search space shrinks by roughly the number of subjects and results
+cannot leak across subjects. Grade restrictions are applied as a row
+mask inside the probed lists.
+
+Layout on disk (data/index/shards/):
+    shards.npz              Global chunk IDs, subjects, grade ranges
+    <subject>/ivf_index.npz One IVFFlatIndex per subject
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .ann_index import IVFFlatIndex
+
+
+SHARDS_DIRNAME = "shards"
+MANIFEST_FILENAME = "shards.npz"
+
+# Chunks without grade metadata are eligible for every grade
+ALL_GRADES = (0, 99)
+
+GradeValue = Union[None, int, str, Sequence[int]]
+
+
+def parse_grade_range(value: GradeValue) -> Tuple[int, int]:
+    """
+    Normalise grade metadata into an inclusive (min, max) range.
+
+    Accepts "9-12", "10", 10, [9, 10, 11] or None (all grades).
+
+    Args:
+        value: Grade metadata value
+
+    Returns:
+        (min_grade, max_grade)
+    """
+    if value is None or value == "":
+        return ALL_GRADES
+    if isinstance(value, int):
+        return (value, value)
+    if isinstance(value, str):
+        numbers = [int(n) for n in re.findall(r"\d+", value)]
+        if not numbers:
+            return ALL_GRADES
+        return (min(numbers), max(numbers))
+    values = [int(v) for v in value]
+    return (min(values), max(values)) if values else ALL_GRADES
+
+
+class ShardedIndex:
+    """
+    Collection of per-subject IVF-Flat shards sharing one global row space.
+
+    search() returns (global_row, score) pairs where global_row indexes
+    `chunk_ids` in build order, matching IVFFlatIndex.search().
+    """
+
+    def __init__(self, n_lists: Optional[int] = None, nprobe: int = 8):
+        """
+        Initialize sharded index.
+
+        Args:
+            n_lists: Lists per shard (default: sqrt(shard size))
+            nprobe: Default lists scanned per shard per query
+        """
+        self.n_lists_setting = n_lists
+        self.nprobe = nprobe
+
+        self.shards: Dict[str, IVFFlatIndex] = {}
+        self.shard_rows: Dict[str, np.ndarray] = {}
+        self.chunk_ids: List[str] = []
+        self.subjects = np.empty(0, dtype=np.str_)
+        self.grade_min = np.empty(0, dtype=np.int16)
+        self.grade_max = np.empty(0, dtype=np.int16)
+        self._grade_masks: Dict[Tuple[str, int], np.ndarray] = {}
+
+    @property
+    def size(self) -> int:
+        """Number of indexed vectors across all shards."""
+        return len(self.chunk_ids)
+
+    @property
+    def n_lists(self) -> int:
+        """Largest list count of any shard (upper bound for nprobe)."""
+        return max((shard.n_lists for shard in self.shards.values()), default=0)
+
+    @property
+    def dimensions(self) -> int:
+        """Vector dimensionality."""
+        return next(iter(self.shards.values())).dimensions if self.shards else 0
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by shard and manifest arrays."""
+        manifest = (self.subjects, self.grade_min, self.grade_max)
+        return sum(shard.nbytes for shard in self.shards.values()) + sum(
+            a.nbytes for a in manifest
+        )
+
+    def build(
+        self,
+        embeddings: np.ndarray,
+        chunk_ids: Sequence[str],
+        subjects: Sequence[str],
+        grade_levels: Optional[Sequence[GradeValue]] = None,
+    ) -> "ShardedIndex":
+        """
+        Build one IVF-Flat shard per subject.
+
+        Args:
+            embeddings: (N, D) embedding matrix
+            chunk_ids: Chunk ID per row
+            subjects: Subject per row (shard key)
+            grade_levels: Grade metadata per row (optional)
+
+        Returns:
+            self (for chaining)
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if not (len(embeddings) == len(chunk_ids) == len(subjects)):
+            raise ValueError("embeddings, chunk_ids and subjects must align")
+
+        grade_ranges = [
+            parse_grade_range(g) for g in (grade_levels or [None] * len(chunk_ids))
+        ]
+
+        self.chunk_ids = list(chunk_ids)
+        self.subjects = np.array(subjects, dtype=np.str_)
+        self.grade_min = np.array([g[0] for g in grade_ranges], dtype=np.int16)
+        self.grade_max = np.array([g[1] for g in grade_ranges], dtype=np.int16)
+
+        for subject in sorted(set(subjects)):
+            rows = np.flatnonzero(self.subjects == subject)
+            self.shard_rows[subject] = rows
+            self.shards[subject] = IVFFlatIndex(
+                n_lists=self.n_lists_setting, nprobe=self.nprobe
+            ).build(embeddings[rows], [self.chunk_ids[r] for r in rows])
+
+        self._grade_masks = {}
+        return self
+
+    def _grade_mask(self, subject: str, grade_level: int) -> np.ndarray:
+        """Cached boolean mask over a shard's rows for one grade."""
+        key = (subject, grade_level)
+        if key not in self._grade_masks:
+            rows = self.shard_rows[subject]
+            self._grade_masks[key] = (self.grade_min[rows] <= grade_level) & (
+                self.grade_max[rows] >= grade_level
+            )
+        return self._grade_masks[key]
+
+    def resolve_shards(self, subjects: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        Shards to search for a subject filter.
+
+        Unknown subjects are ignored; if none of the requested subjects has
+        a shard (or no filter is given) every shard is searched.
+        """
+        if subjects:
+            selected = [s for s in subjects if s in self.shards]
+            if selected:
+                return selected
+        return list(self.shards)
+
+    def search(
+        self,
+        query: Sequence[float],
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        subjects: Optional[Sequence[str]] = None,
+        grade_level: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Filtered approximate top-K search.
+
+        Args:
+            query: Query embedding
+            top_k: Number of results
+            nprobe: Lists scanned per shard (defaults to index setting)
+            subjects: Restrict to these subject shards
+            grade_level: Restrict to chunks whose grade range contains it
+
+        Returns:
+            List of (global_row, score) pairs, best first
+        """
+        matches: List[Tuple[int, float]] = []
+        for subject in self.resolve_shards(subjects):
+            allowed = (
+                self._grade_mask(subject, grade_level)
+                if grade_level is not None
+                else None
+            )
+            rows = self.shard_rows[subject]
+            matches.extend(
+                (int(rows[row]), score)
+                for row, score in self.shards[subject].search(
+                    query, top_k=top_k, nprobe=nprobe or self.nprobe, allowed=allowed
+                )
+            )
+
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches[:top_k]
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        subjects: Optional[Sequence[str]] = None,
+        grade_level: Optional[int] = None,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Filtered approximate top-K search for a batch of queries.
+
+        All queries in the batch share the same subject/grade filter.
+
+        Args:
+            queries: (Q, D) query matrix
+            top_k: Number of results per query
+            nprobe: Lists scanned per shard (defaults to index setting)
+            subjects: Restrict to these subject shards
+            grade_level: Restrict to chunks whose grade range contains it
+
+        Returns:
+            One list of (global_row, score) pairs per query, best first
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        matches: List[List[Tuple[int, float]]] = [[] for _ in range(len(queries))]
+
+        for subject in self.resolve_shards(subjects):
+            allowed = (
+                self._grade_mask(subject, grade_level)
+                if grade_level is not None
+                else None
+            )
+            rows = self.shard_rows[subject]
+            shard_results = self.shards[subject].search_batch(
+                queries, top_k=top_k, nprobe=nprobe or self.nprobe, allowed=allowed
+            )
+            for query_matches, shard_matches in zip(matches, shard_results):
+                query_matches.extend(
+                    (int(rows[row]), score) for row, score in shard_matches
+                )
+
+        for query_matches in matches:
+            query_matches.sort(key=lambda match: match[1], reverse=True)
+            del query_matches[top_k:]
+        return matches
+
+    def save(self, index_dir: Path) -> Path:
+        """
+        Persist manifest and all shards under index_dir/shards.
+
+        Args:
+            index_dir: Index directory (data/index)
+
+        Returns:
+            Path to shards directory
+        """
+        shards_dir = Path(index_dir) / SHARDS_DIRNAME
+        shards_dir.mkdir(parents=True, exist_ok=True)
+
+        for subject, shard in self.shards.items():
+            shard.save(shards_dir / subject)
+
+        np.savez(
+            shards_dir / MANIFEST_FILENAME,
+            chunk_ids=np.array(self.chunk_ids, dtype=np.str_),
+            subjects=self.subjects,
+            grade_min=self.grade_min,
+            grade_max=self.grade_max,
+            params=np.array(
+                json.dumps({"n_lists": self.n_lists_setting, "nprobe": self.nprobe})
+            ),
+        )
+        return shards_dir
+
+    @classmethod
+    def load(cls, index_dir: Path) -> "ShardedIndex":
+        """
+        Load sharded index persisted by save().
+
+        Args:
+            index_dir: Index directory (data/index)
+
+        Returns:
+            Loaded index
+        """
+        shards_dir = Path(index_dir) / SHARDS_DIRNAME
+        with np.load(shards_dir / MANIFEST_FILENAME, allow_pickle=False) as data:
+            params = json.loads(str(data["params"]))
+            index = cls(n_lists=params["n_lists"], nprobe=params["nprobe"])
+            index.chunk_ids = data["chunk_ids"].tolist()
+            index.subjects = data["subjects"]
+            index.grade_min = data["grade_min"]
+            index.grade_max = data["grade_max"]
+
+        for subject in sorted(set(index.subjects.tolist())):
+            index.shard_rows[subject] = np.flatnonzero(index.subjects == subject)
+            index.shards[subject] = IVFFlatIndex.load(shards_dir / subject)
+
+        return index
+
+    @staticmethod
+    def exists(index_dir: Path) -> bool:
+        """Check whether a persisted sharded index exists in directory."""
+        return (Path(index_dir) / SHARDS_DIRNAME / MANIFEST_FILENAME).exists()
+
+    def describe(self) -> Dict[str, Dict]:
+        """Per-shard statistics (size, lists, grade span)."""
+        return {
+            subject: {
+                "vectors": shard.size,
+                "n_lists": shard.n_lists,
+                "grade_min": int(self.grade_min[self.shard_rows[subject]].min()),
+                "grade_max": int(self.grade_max[self.shard_rows[subject]].max()),
+            }
+            for subject, shard in self.shards.items()
+        }
@@ -0,0 +1,289 @@
+"""
+Streaming Pipeline Utilities
+
+In-process parse → chunk → embed → index-write pipeline. Records flow
+through bounded queues as they are produced instead of each stage writing
+a full JSON file for the next one to load, so:
+- peak memory is bounded by batch/queue size, not book size
+  (the index sink keeps only float32 vectors and BM25 term counts)
+- embedding calls start as soon as the first chapter is chunked
+
+Intermediate JSON files are optional checkpoints written in the same
+format as stages 02-04, so the batch scripts can resume from them.
+"""
+
+import json
+import queue
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from .bm25_index import BM25Index
+from .sharded_index import ShardedIndex
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+def bounded(iterable: Iterable[T], maxsize: int = 8) -> Iterator[T]:
+    """
+    Run an iterable in a background thread behind a bounded queue.
+
+    The producer blocks once `maxsize` items are waiting, so a fast stage
+    cannot run ahead of a slow one by more than the queue size. Exceptions
+    raised by the producer are re-raised in the consumer.
+
+    Args:
+        iterable: Upstream stage
+        maxsize: Max items buffered between the two stages
+
+    Yields:
+        Items of iterable, in order
+    """
+    buffer: "queue.Queue" = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterable:
+                if stop.is_set():
+                    return
+                buffer.put(item)
+        except BaseException as e:  # re-raised on the consumer side
+            buffer.put((_DONE, e))
+            return
+        buffer.put((_DONE, None))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item = buffer.get()
+            if isinstance(item, tuple) and len(item) == 2 and item[0] is _DONE:
+                if item[1] is not None:
+                    raise item[1]
+                return
+            yield item
+    finally:
+        stop.set()
+        # Unblock a producer waiting on a full queue
+        while thread.is_alive():
+            try:
+                buffer.get_nowait()
+            except queue.Empty:
+                thread.join(timeout=0.1)
+
+
+def batched(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Group an iterable into lists of up to `size` items."""
+    batch: List[T] = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class JSONArrayWriter:
+    """
+    Incrementally write a JSON array, one record per line.
+
+    The result is a regular JSON array (loadable with json.load), so
+    checkpoints are interchangeable with the batch stage outputs.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Open output file.
+
+        Args:
+            path: Output JSON file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._file.write("[\n")
+        self.count = 0
+
+    def write(self, record: Dict):
+        """Append one record."""
+        if self.count:
+            self._file.write(",\n")
+        self._file.write(json.dumps(record, ensure_ascii=False))
+        self.count += 1
+
+    def close(self):
+        """Terminate the array and close the file."""
+        self._file.write("\n]\n")
+        self._file.close()
+
+
+class CheckpointWriters:
+    """One JSONArrayWriter per book, opened lazily."""
+
+    def __init__(self, directory: Optional[Path], suffix: str):
+        """
+        Args:
+            directory: Output directory (None disables checkpointing)
+            suffix: File suffix, e.g. "-chunks.json"
+        """
+        self.directory = Path(directory) if directory else None
+        self.suffix = suffix
+        self._writers: Dict[str, JSONArrayWriter] = {}
+
+    def write(self, book_id: str, record: Dict):
+        """Append a record to the book's checkpoint file."""
+        if self.directory is None:
+            return
+        if book_id not in self._writers:
+            self._writers[book_id] = JSONArrayWriter(
+                self.directory / f"{book_id}{self.suffix}"
+            )
+        self._writers[book_id].write(record)
+
+    def close(self):
+        """Close all open files."""
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+
+class StreamingIndexSink:
+    """
+    Index-write stage: accumulates vectors and BM25 postings as chunks
+    arrive, then builds and saves the local indexes.
+
+    Chunk text and metadata are dropped after BM25 tokenisation; only
+    float32 vectors, chunk IDs, subjects and grade levels are retained.
+    """
+
+    def __init__(self, block_size: int = 1024):
+        """
+        Args:
+            block_size: Rows per preallocated vector block
+        """
+        self.block_size = block_size
+        self._blocks: List[np.ndarray] = []
+        self._filled = 0
+        self.chunk_ids: List[str] = []
+        self.subjects: List[str] = []
+        self.grade_levels: List[Optional[str]] = []
+        self.bm25 = BM25Index()
+
+    @property
+    def size(self) -> int:
+        """Chunks received."""
+        return len(self.chunk_ids)
+
+    def add(self, chunk: Dict):
+        """Consume one embedded chunk."""
+        vector = np.asarray(chunk["embedding"], dtype=np.float32)
+        if not self._blocks or self._filled == self.block_size:
+            self._blocks.append(
+                np.empty((self.block_size, vector.shape[0]), dtype=np.float32)
+            )
+            self._filled = 0
+        self._blocks[-1][self._filled] = vector
+        self._filled += 1
+
+        self.chunk_ids.append(chunk["chunk_id"])
+        self.subjects.append(chunk["metadata"]["subject"])
+        self.grade_levels.append(chunk["metadata"].get("grade_level"))
+        self.bm25.add_document(chunk["text"], chunk["chunk_id"])
+
+    def matrix(self) -> np.ndarray:
+        """(N, D) matrix of received vectors."""
+        if not self._blocks:
+            return np.empty((0, 0), dtype=np.float32)
+        blocks = self._blocks[:-1] + [self._blocks[-1][: self._filled]]
+        return np.concatenate(blocks)
+
+    def finalize(
+        self, index_dir: Path, n_lists: Optional[int] = None, nprobe: int = 8
+    ) -> Tuple[ShardedIndex, BM25Index]:
+        """
+        Build and persist the sharded ANN and BM25 indexes.
+
+        Args:
+            index_dir: Output directory (data/index)
+            n_lists: IVF lists per shard (default: sqrt(shard size))
+            nprobe: Default lists scanned per query
+
+        Returns:
+            (sharded index, BM25 index)
+        """
+        matrix = self.matrix()
+        self._blocks = []
+
+        ann_index = ShardedIndex(n_lists=n_lists, nprobe=nprobe).build(
+            matrix,
+            chunk_ids=self.chunk_ids,
+            subjects=self.subjects,
+            grade_levels=self.grade_levels,
+        )
+        ann_index.save(index_dir)
+
+        bm25_index = self.bm25.finalize()
+        bm25_index.save(index_dir)
+
+        return ann_index, bm25_index
+
+
+def stream_chunks(
+    books: Iterable[Tuple[str, Dict]],
+    chunker,
+    processed_checkpoint: Optional[Path] = None,
+) -> Iterator[Tuple[str, Dict]]:
+    """
+    Chunk stage: parsed books in, (book_id, chunk) pairs out.
+
+    Args:
+        books: (book_id, book_data) pairs from the parse stage
+        chunker: TextChunker
+        processed_checkpoint: Directory for optional processed-book JSON
+
+    Yields:
+        (book_id, chunk) pairs
+    """
+    for book_id, book_data in books:
+        if processed_checkpoint:
+            Path(processed_checkpoint).mkdir(parents=True, exist_ok=True)
+            with open(
+                Path(processed_checkpoint) / f"{book_id}.json", "w", encoding="utf-8"
+            ) as f:
+                json.dump(book_data, f, indent=2, ensure_ascii=False)
+
+        for chunk in chunker.iter_chunks(book_data):
+            yield book_id, chunk
+
+
+def stream_embeddings(
+    chunks: Iterable[Tuple[str, Dict]],
+    embed_batch: Callable[[List[Dict]], List[Dict]],
+    batch_size: int = 5,
+) -> Iterator[Tuple[str, Dict]]:
+    """
+    Embed stage: batches chunks and yields them with embeddings added.
+
+    Chunks whose embedding failed (embedding is None) are dropped, as in
+    VertexAIEmbeddings.generate_embeddings().
+
+    Args:
+        chunks: (book_id, chunk) pairs
+        embed_batch: Callable embedding a list of chunks in place
+        batch_size: Chunks per embedding request
+
+    Yields:
+        (book_id, embedded chunk) pairs
+    """
+    for batch in batched(chunks, batch_size):
+        embedded = embed_batch([chunk for _, chunk in batch])
+        for (book_id, _), chunk in zip(batch, embedded):
+            if chunk.get("embedding") is not None:
+                yield book_id, chunk
@@ -80,29 +80,7 @@ class VertexAIEmbeddings:
 
         # Process in batches with progress bar
         for i in tqdm(range(0, len(chunks), batch_size), desc="Embedding batches"):
-            batch = chunks[i : i + batch_size]
-
-            # Rate limiting
-            self._rate_limit()
-
-            # Generate embeddings for batch
-            try:
-                batch_embeddings = self._generate_batch(batch)
-                embedded_chunks.extend(batch_embeddings)
-            except Exception as e:
-                print(f"\nError processing batch {i // batch_size}: {e}")
-                # Retry with exponential backoff
-                time.sleep(2)
-                try:
-                    batch_embeddings = self._generate_batch(batch)
-                    embedded_chunks.extend(batch_embeddings)
-                except Exception as retry_error:
-                    print(f"Retry failed: {retry_error}")
-                    # Add chunks without embeddings (will be filtered later)
-                    for chunk in batch:
-                        chunk["embedding"] = None
-                        chunk["embedding_error"] = str(retry_error)
-                        embedded_chunks.append(chunk)
+            embedded_chunks.extend(self.embed_batch(chunks[i : i + batch_size]))
 
         # Filter out failed embeddings
         successful = [c for c in embedded_chunks if c.get("embedding") is not None]
@@ -115,6 +93,38 @@ class VertexAIEmbeddings:
 
         return successful
 
+    def embed_batch(self, batch: List[Dict]) -> List[Dict]:
+        """
+        Embed one batch with rate limiting and a single retry.
+
+        Chunks that still fail get embedding=None and an embedding_error.
+
+        Args:
+            batch: Chunks to embed (modified in place)
+
+        Returns:
+            The same chunks with embeddings added
+        """
+        # Rate limiting
+        self._rate_limit()
+
+        # Generate embeddings for batch
+        try:
+            return self._generate_batch(batch)
+        except Exception as e:
+            print(f"\nError processing batch: {e}")
+            # Retry with exponential backoff
+            time.sleep(2)
+            try:
+                return self._generate_batch(batch)
+            except Exception as retry_error:
+                print(f"Retry failed: {retry_error}")
+                # Add chunks without embeddings (will be filtered later)
+                for chunk in batch:
+                    chunk["embedding"] = None
+                    chunk["embedding_error"] = str(retry_error)
+                return batch
+
     def _generate_batch(self, batch: List[Dict]) -> List[Dict]:
         """Generate embeddings for a single batch."""
         texts = [chunk["text"] for chunk in batch]
@@ -287,14 +297,29 @@ class VertexVectorSearch:
 
         print(f"Uploading {len(embeddings)} embeddings to index...")
 
+        from .sharded_index import parse_grade_range
+
         # Format embeddings for Vertex AI
+        # Subject token + grade range enable filtered queries (RAGService)
         formatted_data = []
         for chunk in embeddings:
+            grade_min, grade_max = parse_grade_range(
+                chunk["metadata"].get("grade_level")
+            )
             formatted_data.append(
                 {
                     "id": chunk["chunk_id"],
                     "embedding": chunk["embedding"],
-                    "restricts": [],
+                    "restricts": [
+                        {
+                            "namespace": "subject",
+                            "allow": [chunk["metadata"]["subject"]],
+                        }
+                    ],
+                    "numeric_restricts": [
+                        {"namespace": "grade_min", "value_int": grade_min},
+                        {"namespace": "grade_max", "value_int": grade_max},
+                    ],
                     "crowding_tag": chunk["metadata"]["subject"],
                 }
             )
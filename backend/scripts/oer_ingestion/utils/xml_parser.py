@@ -6,13 +6,38 @@ Parses CNXML (Connexions XML) format and extracts structured content.
 
 import os
 import re
-from typing import List, Dict, Optional
+from concurrent.futures import Executor
+from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 
 from lxml import etree
 from bs4 import BeautifulSoup
 
 
+# Modules handed to a worker per task when parsing with an executor
+MODULES_PER_TASK = 8
+
+
+def _parse_module_batch(
+    modules: List[Tuple[str, int]], subject: str
+) -> List[Optional[Dict]]:
+    """
+    Parse a batch of module files (process-pool task).
+
+    Args:
+        modules: (module_file, chapter_num) pairs
+        subject: Subject area
+
+    Returns:
+        Parsed chapter dict (or None) per module, same order
+    """
+    parser = CNXMLParser()
+    return [
+        parser._parse_module(Path(module_file), subject, chapter_num)
+        for module_file, chapter_num in modules
+    ]
+
+
 class CNXMLParser:
     """
     Parser for OpenStax CNXML format.
@@ -33,13 +58,17 @@ class CNXMLParser:
             "m": "http://www.w3.org/1998/Math/MathML",
         }
 
-    def parse_book(self, book_dir: str, subject: str) -> Dict:
+    def parse_book(
+        self, book_dir: str, subject: str, executor: Optional[Executor] = None
+    ) -> Dict:
         """
         Parse entire book from directory.
 
         Args:
             book_dir: Directory containing extracted CNXML files
             subject: Subject area (physics, chemistry, biology, cs)
+            executor: Process pool to parse modules in parallel (optional);
+                chapters are merged back in collection order
 
         Returns:
             Structured book data with chapters and sections
@@ -59,7 +88,7 @@ class CNXMLParser:
         metadata = self._extract_metadata(root)
 
         # Extract chapter structure
-        chapters = self._extract_chapters(root, book_dir, subject)
+        chapters = self._extract_chapters(root, book_dir, subject, executor)
 
         return {
             "title": metadata.get("title", "Unknown"),
@@ -95,10 +124,14 @@ class CNXMLParser:
         return metadata
 
     def _extract_chapters(
-        self, root: etree.Element, book_dir: Path, subject: str
+        self,
+        root: etree.Element,
+        book_dir: Path,
+        subject: str,
+        executor: Optional[Executor] = None,
     ) -> List[Dict]:
         """Extract all chapters from collection.xml."""
-        chapters = []
+        modules = []
 
         # Find all modules (chapters/sections)
         for i, module in enumerate(
@@ -116,12 +149,23 @@ class CNXMLParser:
                 if not module_file:
                     continue
 
-            # Parse module content
-            chapter_data = self._parse_module(module_file, subject, i)
-            if chapter_data:
-                chapters.append(chapter_data)
-
-        return chapters
+            modules.append((str(module_file), i))
+
+        # Parse module content
+        if executor is None:
+            parsed = _parse_module_batch(modules, subject)
+        else:
+            futures = [
+                executor.submit(
+                    _parse_module_batch,
+                    modules[start : start + MODULES_PER_TASK],
+                    subject,
+                )
+                for start in range(0, len(modules), MODULES_PER_TASK)
+            ]
+            parsed = [chapter for future in futures for chapter in future.result()]
+
+        return [chapter_data for chapter_data in parsed if chapter_data]
 
     def _find_module_file(self, book_dir: Path, document: str) -> Optional[Path]:
         """Find module file in subdirectories."""
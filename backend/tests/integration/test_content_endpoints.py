@@ -54,6 +54,37 @@ class TestContentCacheLookup:
         assert data["cache_hit"] is False
         assert data["cache_key"] is None
 
+    def test_check_content_sees_generation_started_after_miss(
+        self, client, student_headers, db_session
+    ):
+        """Test a miss isn't remembered over a generation that just started."""
+        from app.models.content_metadata import ContentMetadata, GenerationStatus
+
+        check_data = {"topic_id": "topic_newton_1", "interest": "basketball"}
+        response = client.post(
+            "/api/v1/content/check", json=check_data, headers=student_headers
+        )
+        assert response.json()["cache_key"] is None
+
+        db_session.add(
+            ContentMetadata(
+                content_id="test_pending_001",
+                student_id="user_student_test_001",
+                topic_id="topic_newton_1",
+                interest_id="int_basketball",
+                title="Pending Content",
+                status=GenerationStatus.PENDING.value,
+            )
+        )
+        db_session.commit()
+
+        response = client.post(
+            "/api/v1/content/check", json=check_data, headers=student_headers
+        )
+        data = response.json()
+        assert data["cache_hit"] is False
+        assert data["cache_key"] == "test_pending_001"
+
     def test_get_content_by_cache_key_success(
         self, client, student_headers, db_session
     ):
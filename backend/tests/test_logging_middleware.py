@@ -226,6 +226,52 @@ class TestLoggingContextMiddleware:
         assert response_404.status_code == 404
 
 
+def _endpoint(status_code=200, check=None, error=None):
+    """ASGI app standing in for the rest of the stack."""
+    from starlette.responses import JSONResponse
+
+    async def endpoint(scope, receive, send):
+        if check:
+            check()
+        if error:
+            raise error
+        await JSONResponse({"status": "ok"}, status_code=status_code)(
+            scope, receive, send
+        )
+
+    return endpoint
+
+
+async def _call(middleware, path="/test", method="GET", headers=None):
+    """Run one HTTP request through an ASGI middleware, returning sent messages."""
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": [
+            (name.lower().encode(), value.encode())
+            for name, value in (headers or {}).items()
+        ],
+        "client": ("127.0.0.1", 50000),
+        "query_string": b"",
+    }
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await middleware(scope, receive, send)
+    return messages
+
+
+def _response_headers(messages):
+    start = next(m for m in messages if m["type"] == "http.response.start")
+    return {name.decode().lower(): value.decode() for name, value in start["headers"]}
+
+
 class TestLoggingContextMiddlewareIntegration:
     """Integration tests for LoggingContextMiddleware with logging system."""
 
@@ -236,90 +282,86 @@ class TestLoggingContextMiddlewareIntegration:
     @pytest.mark.asyncio
     async def test_middleware_sets_context_variables(self):
         """Test that middleware correctly sets context variables."""
-        from fastapi import Request
-        from starlette.responses import JSONResponse
-
-        middleware = LoggingContextMiddleware(app=MagicMock())
-
-        # Create mock request
-        mock_request = MagicMock(spec=Request)
-        mock_request.method = "GET"
-        mock_request.url.path = "/test"
-        mock_request.headers.get = MagicMock(return_value=None)
-        mock_request.client.host = "127.0.0.1"
-        mock_request.state = MagicMock()
-
-        # Mock call_next
-        async def mock_call_next(request):
-            # Inside request processing, context should be set
+
+        # Inside request processing, context should be set
+        def check():
             assert request_id_var.get() is not None
-            return JSONResponse({"status": "ok"})
+
+        middleware = LoggingContextMiddleware(app=_endpoint(check=check))
 
         # Process request
-        response = await middleware.dispatch(mock_request, mock_call_next)
+        messages = await _call(middleware)
 
-        assert response is not None
-        assert "X-Request-ID" in response.headers
+        assert "x-request-id" in _response_headers(messages)
 
     @pytest.mark.asyncio
     async def test_middleware_context_includes_correlation_id(self):
         """Test that correlation ID from headers is set in context."""
-        from fastapi import Request
-        from starlette.responses import JSONResponse
-
-        middleware = LoggingContextMiddleware(app=MagicMock())
-
-        # Create mock request with correlation ID
-        mock_request = MagicMock(spec=Request)
-        mock_request.method = "GET"
-        mock_request.url.path = "/test"
-
-        # Create a mock headers object with proper get method
-        headers_dict = {"X-Correlation-ID": "test-corr-123"}
-        mock_request.headers.get = lambda key, default=None: headers_dict.get(
-            key, default
+        seen = []
+        middleware = LoggingContextMiddleware(
+            app=_endpoint(check=lambda: seen.append(correlation_id_var.get()))
         )
 
-        mock_request.client.host = "127.0.0.1"
-        mock_request.state = MagicMock()
-
-        # Mock call_next
-        async def mock_call_next(request):
-            # Correlation ID should be set
-            assert correlation_id_var.get() == "test-corr-123"
-            return JSONResponse({"status": "ok"})
-
         # Process request
-        await middleware.dispatch(mock_request, mock_call_next)
+        await _call(middleware, headers={"X-Correlation-ID": "test-corr-123"})
+
+        # Correlation ID should be set
+        assert seen == ["test-corr-123"]
 
     @pytest.mark.asyncio
     async def test_middleware_logs_have_structured_format(self, caplog):
         """Test that middleware logs use structured format."""
-        from fastapi import Request
-        from starlette.responses import JSONResponse
-
         # Set up structured logging
         setup_logging(force_json=True)
 
-        middleware = LoggingContextMiddleware(app=MagicMock())
-
-        # Create mock request
-        mock_request = MagicMock(spec=Request)
-        mock_request.method = "GET"
-        mock_request.url.path = "/test"
-        mock_request.headers.get = MagicMock(return_value=None)
-        mock_request.client.host = "127.0.0.1"
-        mock_request.state = MagicMock()
-
-        # Mock call_next
-        async def mock_call_next(request):
-            return JSONResponse({"status": "ok"}, status_code=200)
+        middleware = LoggingContextMiddleware(app=_endpoint())
 
         # Process request
         with caplog.at_level(logging.INFO):
-            response = await middleware.dispatch(mock_request, mock_call_next)
+            messages = await _call(middleware)
+
+        assert messages[0]["status"] == 200
+
+    @pytest.mark.asyncio
+    async def test_middleware_passes_through_non_http_scopes(self):
+        """Test that lifespan/websocket scopes skip request logging."""
+        inner = AsyncMock()
+        middleware = LoggingContextMiddleware(app=inner)
+        scope = {"type": "lifespan"}
 
-        assert response is not None
+        await middleware(scope, None, None)
+
+        inner.assert_awaited_once_with(scope, None, None)
+        assert request_id_var.get() is None
+
+    @pytest.mark.asyncio
+    async def test_middleware_does_not_buffer_streamed_responses(self):
+        """Test that body chunks are forwarded as the endpoint sends them."""
+        sent = []
+
+        async def streaming(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            for chunk in (b"data: 1\n\n", b"data: 2\n\n"):
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+                # The previous chunk already reached the server
+                sent.append(len(messages))
+            await send({"type": "http.response.body", "body": b""})
+
+        middleware = LoggingContextMiddleware(app=streaming)
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        scope = {"type": "http", "method": "GET", "path": "/sse", "headers": []}
+        await middleware(scope, receive, send)
+
+        assert sent == [2, 3]
 
 
 class TestMiddlewareErrorHandling:
@@ -332,24 +374,13 @@ class TestMiddlewareErrorHandling:
     @pytest.mark.asyncio
     async def test_middleware_reraises_exceptions(self):
         """Test that middleware re-raises exceptions after logging."""
-        from fastapi import Request
-
-        middleware = LoggingContextMiddleware(app=MagicMock())
-
-        mock_request = MagicMock(spec=Request)
-        mock_request.method = "GET"
-        mock_request.url.path = "/error"
-        mock_request.headers.get = MagicMock(return_value=None)
-        mock_request.client.host = "127.0.0.1"
-        mock_request.state = MagicMock()
-
-        # Mock call_next that raises error
-        async def mock_call_next(request):
-            raise ValueError("Test error")
+        middleware = LoggingContextMiddleware(
+            app=_endpoint(error=ValueError("Test error"))
+        )
 
         # Middleware should re-raise the exception
         with pytest.raises(ValueError, match="Test error"):
-            await middleware.dispatch(mock_request, mock_call_next)
+            await _call(middleware, path="/error")
 
         # Context should still be cleaned up
         assert request_id_var.get() is None
@@ -357,25 +388,14 @@ class TestMiddlewareErrorHandling:
     @pytest.mark.asyncio
     async def test_middleware_logs_exception_details(self, caplog):
         """Test that middleware logs exception details."""
-        from fastapi import Request
-
-        middleware = LoggingContextMiddleware(app=MagicMock())
-
-        mock_request = MagicMock(spec=Request)
-        mock_request.method = "GET"
-        mock_request.url.path = "/error"
-        mock_request.headers.get = MagicMock(return_value=None)
-        mock_request.client.host = "127.0.0.1"
-        mock_request.state = MagicMock()
-
-        # Mock call_next that raises error
-        async def mock_call_next(request):
-            raise ValueError("Test error message")
+        middleware = LoggingContextMiddleware(
+            app=_endpoint(error=ValueError("Test error message"))
+        )
 
         # Process request and catch error
         with caplog.at_level(logging.ERROR):
             with pytest.raises(ValueError):
-                await middleware.dispatch(mock_request, mock_call_next)
+                await _call(middleware, path="/error")
 
 
 class TestMiddlewareMetricsIntegration:
@@ -389,27 +409,12 @@ class TestMiddlewareMetricsIntegration:
     @patch("app.middleware.logging_middleware.metrics")
     async def test_middleware_records_http_request_metrics(self, mock_metrics):
         """Test that middleware records HTTP request count metrics."""
-        from fastapi import Request
-        from starlette.responses import JSONResponse
-
-        middleware = LoggingContextMiddleware(app=MagicMock())
-
-        mock_request = MagicMock(spec=Request)
-        mock_request.method = "GET"
-        mock_request.url.path = "/api/test"
-        mock_request.headers.get = MagicMock(return_value=None)
-        mock_request.client.host = "127.0.0.1"
-        mock_request.state = MagicMock()
-
-        # Mock call_next
-        async def mock_call_next(request):
-            return JSONResponse({"status": "ok"}, status_code=200)
+        middleware = LoggingContextMiddleware(app=_endpoint())
 
         # Process request
-        response = await middleware.dispatch(mock_request, mock_call_next)
+        await _call(middleware, path="/api/test")
 
         # Verify metrics were recorded
-        assert response is not None
         mock_metrics.increment_http_request.assert_called_once()
         call_args = mock_metrics.increment_http_request.call_args
         assert call_args[1]["method"] == "GET"
@@ -420,27 +425,12 @@ class TestMiddlewareMetricsIntegration:
     @patch("app.middleware.logging_middleware.metrics")
     async def test_middleware_records_request_duration_metrics(self, mock_metrics):
         """Test that middleware records request duration metrics."""
-        from fastapi import Request
-        from starlette.responses import JSONResponse
-
-        middleware = LoggingContextMiddleware(app=MagicMock())
-
-        mock_request = MagicMock(spec=Request)
-        mock_request.method = "POST"
-        mock_request.url.path = "/api/test"
-        mock_request.headers.get = MagicMock(return_value=None)
-        mock_request.client.host = "127.0.0.1"
-        mock_request.state = MagicMock()
-
-        # Mock call_next
-        async def mock_call_next(request):
-            return JSONResponse({"status": "ok"}, status_code=201)
+        middleware = LoggingContextMiddleware(app=_endpoint(status_code=201))
 
         # Process request
-        response = await middleware.dispatch(mock_request, mock_call_next)
+        await _call(middleware, path="/api/test", method="POST")
 
         # Verify duration metrics were recorded
-        assert response is not None
         mock_metrics.record_request_duration.assert_called_once()
         call_args = mock_metrics.record_request_duration.call_args
         assert call_args[1]["method"] == "POST"
@@ -453,24 +443,13 @@ class TestMiddlewareMetricsIntegration:
     @patch("app.middleware.logging_middleware.metrics")
     async def test_middleware_records_metrics_on_error(self, mock_metrics):
         """Test that middleware records metrics even when request fails."""
-        from fastapi import Request
-
-        middleware = LoggingContextMiddleware(app=MagicMock())
-
-        mock_request = MagicMock(spec=Request)
-        mock_request.method = "GET"
-        mock_request.url.path = "/api/error"
-        mock_request.headers.get = MagicMock(return_value=None)
-        mock_request.client.host = "127.0.0.1"
-        mock_request.state = MagicMock()
-
-        # Mock call_next that raises error
-        async def mock_call_next(request):
-            raise ValueError("Test error")
+        middleware = LoggingContextMiddleware(
+            app=_endpoint(error=ValueError("Test error"))
+        )
 
         # Process request and catch error
         with pytest.raises(ValueError):
-            await middleware.dispatch(mock_request, mock_call_next)
+            await _call(middleware, path="/api/error")
 
         # Verify metrics were still recorded with status_code 500
         mock_metrics.increment_http_request.assert_called_once()
@@ -488,61 +467,34 @@ class TestMiddlewareMetricsIntegration:
     @patch("app.middleware.logging_middleware.metrics")
     async def test_middleware_records_different_status_codes(self, mock_metrics):
         """Test that middleware correctly tracks different HTTP status codes."""
-        from fastapi import Request
-        from starlette.responses import JSONResponse
-
-        middleware = LoggingContextMiddleware(app=MagicMock())
-
-        test_cases = [
-            (200, "OK"),
-            (201, "Created"),
-            (400, "Bad Request"),
-            (404, "Not Found"),
-        ]
-
-        for status_code, description in test_cases:
-            mock_request = MagicMock(spec=Request)
-            mock_request.method = "GET"
-            mock_request.url.path = f"/api/test_{status_code}"
-            mock_request.headers.get = MagicMock(return_value=None)
-            mock_request.client.host = "127.0.0.1"
-            mock_request.state = MagicMock()
-
-            # Mock call_next
-            async def mock_call_next(request):
-                return JSONResponse({"status": description}, status_code=status_code)
+        test_cases = [200, 201, 400, 404]
+
+        for status_code in test_cases:
+            middleware = LoggingContextMiddleware(
+                app=_endpoint(status_code=status_code)
+            )
 
             # Process request
-            await middleware.dispatch(mock_request, mock_call_next)
+            await _call(middleware, path=f"/api/test_{status_code}")
 
         # Verify all status codes were recorded
-        assert mock_metrics.increment_http_request.call_count == len(test_cases)
+        assert [
+            call[1]["status_code"]
+            for call in mock_metrics.increment_http_request.call_args_list
+        ] == test_cases
 
     @pytest.mark.asyncio
     @patch("app.middleware.logging_middleware.metrics")
     async def test_middleware_metrics_minimal_overhead(self, mock_metrics):
         """Test that metrics recording adds minimal overhead to request processing."""
-        from fastapi import Request
-        from starlette.responses import JSONResponse
         import time
 
-        middleware = LoggingContextMiddleware(app=MagicMock())
-
-        mock_request = MagicMock(spec=Request)
-        mock_request.method = "GET"
-        mock_request.url.path = "/api/test"
-        mock_request.headers.get = MagicMock(return_value=None)
-        mock_request.client.host = "127.0.0.1"
-        mock_request.state = MagicMock()
-
-        # Mock call_next
-        async def mock_call_next(request):
-            return JSONResponse({"status": "ok"}, status_code=200)
+        middleware = LoggingContextMiddleware(app=_endpoint())
 
         # Measure time for multiple requests
         start_time = time.time()
         for _ in range(10):
-            await middleware.dispatch(mock_request, mock_call_next)
+            await _call(middleware, path="/api/test")
         total_time = time.time() - start_time
 
         # Average time per request should be very low (< 10ms)
@@ -120,6 +120,257 @@ class TestRAGService:
         assert isinstance(embedding, list)
         assert len(embedding) == 768  # Gecko model dimensions
 
+    def test_infer_subject_matches_chunk_subjects(self):
+        from app.services.rag_service import RAGService
+
+        assert RAGService.infer_subject("topic_phys_mech_newton_3") == "physics"
+        assert RAGService.infer_subject("topic_math_algebra_quadratic") == "mathematics"
+        assert RAGService.infer_subject("topic_chem_bonds") == "chemistry"
+        assert RAGService.infer_subject("topic_unknown") is None
+        # Only the "topic_<subject>_" segment counts, not substrings
+        assert RAGService.infer_subject("topic_biophysics_membranes") is None
+        assert RAGService.infer_subject("topic_newton_phys") is None
+        assert RAGService.infer_subject("phys_newton") is None
+
+    def _search_service(self):
+        from app.services.rag_service import RAGService
+
+        service = RAGService()
+        service.embeddings_service = Mock()
+        service.embeddings_service.generate_query_embedding = AsyncMock(
+            return_value=[0.1] * 768
+        )
+        service.index_endpoint = Mock()
+        service.index_endpoint.find_neighbors.return_value = [
+            [Mock(id="physics-ch04-001", distance=0.1)]
+        ]
+        return service
+
+    @pytest.mark.asyncio
+    async def test_matching_engine_search_unfiltered_by_default(self):
+        service = self._search_service()
+
+        await service._retrieve_with_matching_engine(
+            "topic_phys_mech_newton_3", "basketball", 10, limit=3
+        )
+
+        kwargs = service.index_endpoint.find_neighbors.call_args.kwargs
+        assert kwargs["filter"] is None
+        assert kwargs["numeric_filter"] is None
+
+    @pytest.mark.asyncio
+    async def test_matching_engine_search_is_filtered(self, monkeypatch):
+        monkeypatch.setenv("RAG_SEARCH_FILTERS_ENABLED", "true")
+        service = self._search_service()
+
+        results = await service._retrieve_with_matching_engine(
+            "topic_phys_mech_newton_3", "basketball", 10, limit=3
+        )
+
+        kwargs = service.index_endpoint.find_neighbors.call_args.kwargs
+        assert kwargs["num_neighbors"] == 3
+        assert kwargs["filter"][0].name == "subject"
+        assert kwargs["filter"][0].allow_tokens == ["physics"]
+        grade_ops = {(f.name, f.op, f.value_int) for f in kwargs["numeric_filter"]}
+        assert grade_ops == {
+            ("grade_min", "LESS_EQUAL", 10),
+            ("grade_max", "GREATER_EQUAL", 10),
+        }
+        assert results[0]["content_id"] == "physics-ch04-001"
+
+    def _engine_service(self, index_version):
+        from app.services.rag_service import RAGService
+
+        service = RAGService()
+        service.matching_engine_available = True
+        service.index_endpoint = Mock()
+        service.get_index_version = AsyncMock(return_value=index_version)
+        service._retrieve_with_matching_engine = AsyncMock(
+            return_value=[{"content_id": "physics-ch04-001", "relevance_score": 0.9}]
+        )
+        return service
+
+    @pytest.mark.asyncio
+    async def test_retrieval_cache_hit(self):
+        service = self._engine_service("index-v1")
+
+        first = await service.retrieve_content("topic_phys_mech_newton_3", "Soccer", 10)
+        first[0]["relevance_score"] = 0.0  # caller mutation must not leak
+        second = await service.retrieve_content(
+            "topic_phys_mech_newton_3", "soccer", 10
+        )
+
+        assert service._retrieve_with_matching_engine.await_count == 1
+        assert second[0]["relevance_score"] == 0.9
+        assert service.retrieval_cache.get_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_retrieval_cache_invalidated_by_reindex(self):
+        service = self._engine_service("index-v1")
+        await service.retrieve_content("topic_phys_mech_newton_3", "soccer", 10)
+
+        service.get_index_version.return_value = "index-v2"
+        await service.retrieve_content("topic_phys_mech_newton_3", "soccer", 10)
+
+        assert service._retrieve_with_matching_engine.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_retrieval_fallback_not_cached(self):
+        service = self._engine_service("index-v1")
+        service._retrieve_with_matching_engine.side_effect = RuntimeError("down")
+
+        await service.retrieve_content("topic_phys_mech_newton_3", "soccer", 10)
+        await service.retrieve_content("topic_phys_mech_newton_3", "soccer", 10)
+
+        assert service._retrieve_with_matching_engine.await_count == 2
+        assert len(service.retrieval_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_topic_chunk_fallback(self, db_engine):
+        from sqlalchemy.orm import sessionmaker
+        from app.core.database import Base
+        from app.models.content import ContentChunk
+        from app.services.rag_service import RAGService
+
+        Base.metadata.create_all(bind=db_engine)
+        session_factory = sessionmaker(bind=db_engine)
+        db = session_factory()
+        for chunk_id, topic_id in [
+            ("physics-ch04-001", "topic_phys_mech_newton_3"),
+            ("physics-ch04-002", "topic_phys_mech_newton_30"),
+        ]:
+            db.add(
+                ContentChunk(
+                    chunk_id=chunk_id,
+                    source_title="College Physics 2e",
+                    source_author="OpenStax",
+                    source_url="https://openstax.org",
+                    source_license="CC BY 4.0",
+                    subject="physics",
+                    chapter="Chapter 4",
+                    section="4.4 Newton's Third Law",
+                    topic_ids=[topic_id],
+                    text="For every action there is an equal and opposite reaction.",
+                    cleaned_text="for every action",
+                    word_count=10,
+                    keywords=["action", "reaction"],
+                    concepts=["force"],
+                )
+            )
+        db.commit()
+        db.close()
+
+        service = RAGService()
+        with patch("app.core.database.SessionLocal", session_factory):
+            content = await service.retrieve_content(
+                "topic_phys_mech_newton_3", "basketball", 10
+            )
+
+        assert [c["content_id"] for c in content] == ["physics-ch04-001"]
+        assert content[0]["source"] == "College Physics 2e"
+
+    def test_topic_chunk_lookup_escapes_like_wildcards(self, db_engine):
+        from sqlalchemy.orm import sessionmaker
+        from app.core.database import Base
+        from app.models.content import ContentChunk
+        from app.services.content_chunk_service import get_chunks_for_topic
+
+        Base.metadata.create_all(bind=db_engine)
+        db = sessionmaker(bind=db_engine)()
+        # "_" in the topic ID must not match "x"; the near miss ranks first
+        for chunk_id, topic_id, quality in [
+            ("physics-ch04-001", "topicxphysxmech", 0.9),
+            ("physics-ch04-002", "topic_phys_mech", 0.5),
+        ]:
+            db.add(
+                ContentChunk(
+                    chunk_id=chunk_id,
+                    source_title="College Physics 2e",
+                    source_author="OpenStax",
+                    source_url="https://openstax.org",
+                    source_license="CC BY 4.0",
+                    subject="physics",
+                    chapter="Chapter 4",
+                    section="4.4 Newton's Third Law",
+                    topic_ids=[topic_id],
+                    text="For every action there is an equal and opposite reaction.",
+                    cleaned_text="for every action",
+                    word_count=10,
+                    keywords=["action", "reaction"],
+                    concepts=["force"],
+                    quality_score=quality,
+                )
+            )
+        db.commit()
+
+        chunks = get_chunks_for_topic(db, "topic_phys_mech", limit=1)
+        db.close()
+
+        assert [c.chunk_id for c in chunks] == ["physics-ch04-002"]
+
+    @pytest.mark.asyncio
+    async def test_index_version_lookup_off_event_loop(self):
+        import threading
+        from app.services.rag_service import RAGService
+
+        service = RAGService()
+        loop_thread = threading.get_ident()
+        lookup_threads = []
+
+        def lookup():
+            lookup_threads.append(threading.get_ident())
+            return "index-v1"
+
+        service._lookup_index_version = lookup
+
+        assert await service.get_index_version() == "index-v1"
+        assert await service.get_index_version() == "index-v1"
+        # Looked up once per refresh interval, in a worker thread
+        assert len(lookup_threads) == 1
+        assert lookup_threads[0] != loop_thread
+
+    @pytest.mark.asyncio
+    async def test_index_version_lookup_shared_by_concurrent_callers(self):
+        import asyncio
+        import time
+        from app.services.rag_service import RAGService
+
+        service = RAGService()
+        lookups = []
+
+        def lookup():
+            lookups.append(len(lookups) + 1)
+            time.sleep(0.05)
+            return f"index-v{len(lookups)}"
+
+        service._lookup_index_version = lookup
+
+        # Cold start: every caller waits on the same lookup
+        versions = await asyncio.gather(
+            *(service.get_index_version() for _ in range(10))
+        )
+        assert versions == ["index-v1"] * 10
+        assert len(lookups) == 1
+
+        # After invalidation, the next lookup replaces the old version
+        service.invalidate_cache()
+        assert await service.get_index_version() == "index-v2"
+        assert len(lookups) == 2
+
+    def test_retrieval_cache_ttl_and_size_bounds(self):
+        from app.services.rag_service import RetrievalCache
+
+        cache = RetrievalCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)  # evicts least recently used "b"
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+
+        with patch("app.services.rag_service.time.monotonic", return_value=1e12):
+            assert cache.get("c") is None
+
 
 class TestScriptGenerationService:
     """Test Script Generation Service"""
@@ -344,11 +595,22 @@ class TestEmbeddingsService:
 class TestContentIngestionService:
     """Test Content Ingestion Service"""
 
+    @staticmethod
+    def _session_factory(db_engine):
+        from sqlalchemy.orm import sessionmaker
+        from app.core.database import Base
+        import app.models.content  # noqa: F401 - registers content_chunks
+
+        Base.metadata.create_all(bind=db_engine)
+        return sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
     @pytest.mark.asyncio
-    async def test_ingest_content_success(self):
+    async def test_ingest_content_success(self, db_engine):
         from app.services.content_ingestion_service import ContentIngestionService
 
-        service = ContentIngestionService()
+        service = ContentIngestionService(
+            session_factory=self._session_factory(db_engine)
+        )
         content_data = {
             "author": "OpenStax",
             "license": "CC BY 4.0",
@@ -380,6 +642,52 @@ class TestContentIngestionService:
         assert "chunks_created" in result
         assert "total_words" in result
         assert result["chunks_created"] > 0
+        assert result["storage"]["rows"] == result["chunks_created"]
+        assert "rows_per_second" in result["storage"]
+
+    @pytest.mark.asyncio
+    async def test_store_chunks_batched_upsert(self, db_engine):
+        from app.models.content import ContentChunk
+        from app.services.content_ingestion_service import ContentIngestionService
+
+        session_factory = self._session_factory(db_engine)
+        service = ContentIngestionService(
+            session_factory=session_factory, store_batch_size=2
+        )
+        source = {
+            "title": "Test",
+            "author": "Test",
+            "url": "test",
+            "license": "CC BY",
+        }
+        chunks = [
+            service._create_chunk_dict(
+                sentences=[f"Sentence number {i} about force."],
+                chapter="Chapter 1",
+                section="1.1",
+                source=source,
+                subject="physics",
+                topic_ids=["topic_test"],
+            )
+            for i in range(5)
+        ]
+
+        first = await service._store_chunks(chunks)
+        assert first["rows"] == 5
+        assert first["batches"] == 3
+
+        # Re-ingestion updates rows in place instead of duplicating them
+        for chunk in chunks:
+            chunk["section"] = "1.2"
+        await service._store_chunks(chunks + chunks[:1])
+
+        session = session_factory()
+        try:
+            stored = session.query(ContentChunk).all()
+            assert len(stored) == 5
+            assert {row.section for row in stored} == {"1.2"}
+        finally:
+            session.close()
 
     def test_chunk_text(self):
         from app.services.content_ingestion_service import ContentIngestionService
@@ -2,15 +2,38 @@
 Unit tests for cache service.
 """
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 from datetime import timedelta
+import asyncio
 import json
+import time
+from collections import Counter
+
+import fakeredis
+from google.api_core.exceptions import NotFound
 
 from app.services.cache_service import (
+    NEGATIVE_CACHE_TTL_SECONDS,
+    TAG_ADD_SHA,
     CacheService,
+    L1Cache,
+    L1_INVALIDATION_CHANNEL,
     UserCache,
     ContentCache,
     SessionCache,
+    cached,
+)
+from app.services.cache_metrics import (
+    CACHE_STATS_KEY,
+    cache_metrics,
+    flush_cache_metrics,
+    summarize_counters,
+)
+from app.services.cache_codec import (
+    COMPRESSION_NONE,
+    COMPRESSION_ZLIB,
+    decode_value,
+    encode_value,
 )
 
 
@@ -45,6 +68,33 @@ class TestCacheServiceInitialization:
 
         assert service.gcs == mock_gcs
 
+    @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
+    @patch("redis.from_url")
+    async def test_async_client_pool_shared(self, mock_redis, mock_async_redis):
+        """Test instances on one event loop share the async Redis client."""
+        first = CacheService(redis_url="redis://shared:6379/0")
+        second = CacheService(redis_url="redis://shared:6379/0")
+
+        assert first.async_client is second.async_client
+        mock_async_redis.assert_called_once()
+
+    @patch("redis.asyncio.from_url")
+    @patch("redis.from_url")
+    def test_async_client_follows_event_loop(self, mock_redis, mock_async_redis):
+        """Test a long-lived instance gets a fresh client on each new loop."""
+        mock_async_redis.side_effect = lambda *args, **kwargs: Mock()
+        service = CacheService(redis_url="redis://per-loop:6379/0")
+
+        async def client():
+            return service.async_client
+
+        first = asyncio.run(client())
+        second = asyncio.run(client())
+
+        assert first is not second
+        assert mock_async_redis.call_count == 2
+
 
 @pytest.mark.unit
 class TestGenerateCacheKey:
@@ -90,14 +140,15 @@ class TestCheckContentCache:
     """Test content cache checking (two-tier)."""
 
     @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
     @patch("redis.from_url")
-    async def test_check_content_cache_redis_hit(self, mock_redis):
+    async def test_check_content_cache_redis_hit(self, mock_redis, mock_async_redis):
         """Test cache hit from Redis (hot cache)."""
-        mock_client = Mock()
-        mock_redis.return_value = mock_client
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
 
         metadata = {"video_url": "http://test.com/video.mp4", "duration": 120}
-        mock_client.get.return_value = json.dumps(metadata)
+        mock_client.mget.return_value = [json.dumps(metadata), None]
 
         service = CacheService()
         hit, data = await service.check_content_cache("topic_1", "basketball")
@@ -109,22 +160,23 @@ class TestCheckContentCache:
         assert service.stats["gcs_hits"] == 0
 
     @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
     @patch("redis.from_url")
-    async def test_check_content_cache_gcs_hit(self, mock_redis):
+    async def test_check_content_cache_gcs_hit(self, mock_redis, mock_async_redis):
         """Test cache hit from GCS (cold cache)."""
-        mock_client = Mock()
-        mock_redis.return_value = mock_client
-        mock_client.get.return_value = None  # Redis miss
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
+        mock_client.mget.return_value = [None, None]  # Redis miss
 
         mock_gcs = Mock()
         mock_bucket = Mock()
         mock_blob = Mock()
         mock_gcs.bucket.return_value = mock_bucket
         mock_bucket.blob.return_value = mock_blob
-        mock_blob.exists.return_value = True
 
         metadata = {"video_url": "http://test.com/video.mp4", "duration": 120}
-        mock_blob.download_as_text.return_value = json.dumps(metadata)
+        # Entry written by an older instance (plain JSON)
+        mock_blob.download_as_bytes.return_value = json.dumps(metadata).encode()
 
         service = CacheService(gcs_client=mock_gcs)
         hit, data = await service.check_content_cache("topic_1", "basketball")
@@ -136,14 +188,104 @@ class TestCheckContentCache:
         assert service.stats["gcs_hits"] == 1
         # Should have warmed up Redis
         mock_client.setex.assert_called_once()
+        # Single download, no exists() round trip
+        mock_blob.exists.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
+    @patch("redis.from_url")
+    async def test_check_content_cache_gcs_not_found(
+        self, mock_redis, mock_async_redis
+    ):
+        """Test a GCS NotFound on download is a cache miss."""
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
+        mock_client.mget.return_value = [None, None]
+
+        mock_gcs = Mock()
+        mock_blob = mock_gcs.bucket.return_value.blob.return_value
+        mock_blob.download_as_bytes.side_effect = NotFound("no such object")
+
+        service = CacheService(gcs_client=mock_gcs)
+        hit, data = await service.check_content_cache("topic_1", "basketball")
+
+        assert hit is False
+        assert data is None
+        assert service.stats["cache_misses"] == 1
+        mock_blob.download_as_bytes.assert_called_once()
+        mock_blob.exists.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
+    @patch("redis.from_url")
+    async def test_prefetch_content_cache(self, mock_redis, mock_async_redis):
+        """Test batch prefetch: one MGET, GCS for misses, one warm-up pipeline."""
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
+        mock_client.mget.return_value = [encode_value({"video_url": "a"}), None, None]
+        mock_pipe = Mock()
+        mock_pipe.execute = AsyncMock(return_value=[True])
+        mock_client.pipeline = Mock(return_value=mock_pipe)
+
+        blobs = {
+            "metadata/k2.json": encode_value({"video_url": "b"}),
+        }
+
+        def make_blob(path):
+            blob = Mock()
+            if path in blobs:
+                blob.download_as_bytes.return_value = blobs[path]
+            else:
+                blob.download_as_bytes.side_effect = NotFound(path)
+            return blob
+
+        mock_gcs = Mock()
+        mock_gcs.bucket.return_value.blob.side_effect = make_blob
+
+        service = CacheService(gcs_client=mock_gcs)
+        found = await service.prefetch_content_cache(["k1", "k2", "k3", "k1"])
+
+        assert found == {"k1": {"video_url": "a"}, "k2": {"video_url": "b"}}
+        mock_client.mget.assert_awaited_once_with(
+            ["content:metadata:k1", "content:metadata:k2", "content:metadata:k3"]
+        )
+        mock_pipe.setex.assert_called_once()
+        assert mock_pipe.setex.call_args.args[0] == "content:metadata:k2"
+        mock_pipe.expire.assert_not_called()
+        mock_pipe.execute.assert_awaited_once()
 
     @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
     @patch("redis.from_url")
-    async def test_check_content_cache_miss(self, mock_redis):
+    async def test_prefetch_content_cache_refresh_ttl(
+        self, mock_redis, mock_async_redis
+    ):
+        """Test prefetch with refresh_ttl extends Redis hits in the same pipeline."""
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
+        mock_client.mget.return_value = [encode_value({"video_url": "a"}), None]
+        mock_pipe = Mock()
+        mock_pipe.execute = AsyncMock(return_value=[True])
+        mock_client.pipeline = Mock(return_value=mock_pipe)
+
+        service = CacheService()
+        found = await service.prefetch_content_cache(["k1", "k2"], refresh_ttl=True)
+
+        assert found == {"k1": {"video_url": "a"}}
+        mock_pipe.expire.assert_called_once_with(
+            "content:metadata:k1", timedelta(hours=1)
+        )
+        mock_pipe.setex.assert_not_called()
+        mock_pipe.execute.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
+    @patch("redis.from_url")
+    async def test_check_content_cache_miss(self, mock_redis, mock_async_redis):
         """Test cache miss (not in Redis or GCS)."""
-        mock_client = Mock()
-        mock_redis.return_value = mock_client
-        mock_client.get.return_value = None
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
+        mock_client.mget.return_value = [None, None]
 
         service = CacheService()
         hit, data = await service.check_content_cache("topic_1", "basketball")
@@ -151,6 +293,47 @@ class TestCheckContentCache:
         assert hit is False
         assert data is None
         assert service.stats["cache_misses"] == 1
+        # Remembered as missing for the next lookup
+        cache_key = service.generate_cache_key("topic_1", "basketball")
+        marker, ttl, _ = mock_client.setex.call_args.args
+        assert marker == f"content:missing:{cache_key}"
+        assert ttl == NEGATIVE_CACHE_TTL_SECONDS
+
+    @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
+    @patch("redis.from_url")
+    async def test_known_missing_skips_gcs(self, mock_redis, mock_async_redis):
+        """Test a negative-cache marker answers the lookup without GCS."""
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
+        mock_client.mget.return_value = [None, "1"]
+        mock_gcs = Mock()
+
+        service = CacheService(gcs_client=mock_gcs)
+        hit, data = await service.check_content_cache("topic_1", "basketball")
+
+        assert hit is False
+        assert data is None
+        assert service.stats["negative_hits"] == 1
+        mock_gcs.bucket.assert_not_called()
+        mock_client.setex.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
+    @patch("redis.from_url")
+    async def test_gcs_error_not_cached_as_missing(self, mock_redis, mock_async_redis):
+        """Test a failed GCS lookup doesn't set the negative marker."""
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
+        mock_client.mget.return_value = [None, None]
+        mock_gcs = Mock()
+        mock_gcs.bucket.side_effect = RuntimeError("GCS unavailable")
+
+        service = CacheService(gcs_client=mock_gcs)
+        hit, _ = await service.check_content_cache("topic_1", "basketball")
+
+        assert hit is False
+        mock_client.setex.assert_not_called()
 
 
 @pytest.mark.unit
@@ -158,11 +341,12 @@ class TestStoreContentCache:
     """Test storing content in cache."""
 
     @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
     @patch("redis.from_url")
-    async def test_store_content_cache_success(self, mock_redis):
+    async def test_store_content_cache_success(self, mock_redis, mock_async_redis):
         """Test successful content storage."""
-        mock_client = Mock()
-        mock_redis.return_value = mock_client
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
         mock_client.setex.return_value = True
 
         mock_gcs = Mock()
@@ -180,13 +364,34 @@ class TestStoreContentCache:
         assert result is True
         mock_client.setex.assert_called_once()
         mock_blob.upload_from_string.assert_called_once()
+        uploaded = mock_blob.upload_from_string.call_args.args[0]
+        assert decode_value(uploaded)["video_url"] == metadata["video_url"]
+
+    @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
+    @patch("redis.from_url")
+    async def test_store_clears_negative_markers(self, mock_redis, mock_async_redis):
+        """Test storing a key drops its "known missing" marker."""
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
+
+        service = CacheService()
+        metadata = {
+            "video_url": "http://test.com/video.mp4",
+            "topic_id": "topic_1",
+            "interest_id": "int_basketball",
+        }
+        await service.store_content_cache("test_key", metadata)
+
+        mock_client.delete.assert_awaited_once_with("content:missing:test_key")
 
     @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
     @patch("redis.from_url")
-    async def test_store_content_cache_redis_only(self, mock_redis):
+    async def test_store_content_cache_redis_only(self, mock_redis, mock_async_redis):
         """Test storage succeeds with Redis but no GCS."""
-        mock_client = Mock()
-        mock_redis.return_value = mock_client
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
         mock_client.setex.return_value = True
 
         service = CacheService()  # No GCS client
@@ -204,11 +409,12 @@ class TestInvalidateContentCache:
     """Test cache invalidation."""
 
     @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
     @patch("redis.from_url")
-    async def test_invalidate_redis_only(self, mock_redis):
+    async def test_invalidate_redis_only(self, mock_redis, mock_async_redis):
         """Test invalidating Redis cache only."""
-        mock_client = Mock()
-        mock_redis.return_value = mock_client
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
 
         service = CacheService()
         result = await service.invalidate_content_cache(
@@ -219,18 +425,18 @@ class TestInvalidateContentCache:
         mock_client.delete.assert_called_once_with("content:metadata:test_key")
 
     @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
     @patch("redis.from_url")
-    async def test_invalidate_redis_and_gcs(self, mock_redis):
+    async def test_invalidate_redis_and_gcs(self, mock_redis, mock_async_redis):
         """Test invalidating both Redis and GCS."""
-        mock_client = Mock()
-        mock_redis.return_value = mock_client
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
 
         mock_gcs = Mock()
         mock_bucket = Mock()
         mock_blob = Mock()
         mock_gcs.bucket.return_value = mock_bucket
         mock_bucket.blob.return_value = mock_blob
-        mock_blob.exists.return_value = True
 
         service = CacheService(gcs_client=mock_gcs)
         result = await service.invalidate_content_cache(
@@ -242,6 +448,66 @@ class TestInvalidateContentCache:
         mock_blob.delete.assert_called_once()
 
 
+@pytest.mark.unit
+class TestL1Cache:
+    """Test optional in-process L1 tier."""
+
+    @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
+    @patch("redis.from_url")
+    async def test_l1_serves_hot_key(self, mock_redis, mock_async_redis):
+        """Test second lookup is served from L1 without Redis."""
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
+        metadata = {"video_url": "http://test.com/video.mp4"}
+        mock_client.mget.return_value = [json.dumps(metadata), None]
+
+        service = CacheService(l1_cache=L1Cache(max_entries=10, ttl_seconds=60))
+        await service.check_content_cache("topic_1", "basketball")
+        hit, data = await service.check_content_cache("topic_1", "basketball")
+
+        assert hit is True
+        assert data == metadata
+        assert mock_client.mget.await_count == 1
+        stats = service.get_cache_stats()
+        assert stats["l1_hits"] == 1
+        assert stats["tiers"]["l1"] == {"lookups": 2, "hits": 1, "hit_rate": 0.5}
+        assert stats["tiers"]["redis"] == {"lookups": 1, "hits": 1, "hit_rate": 1.0}
+
+    @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
+    @patch("redis.from_url")
+    async def test_invalidate_evicts_l1_and_publishes(
+        self, mock_redis, mock_async_redis
+    ):
+        """Test invalidation drops the L1 entry and notifies other instances."""
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
+
+        l1 = L1Cache()
+        l1.set("test_key", {"video_url": "http://test.com/video.mp4"})
+        service = CacheService(l1_cache=l1)
+        await service.invalidate_content_cache("test_key")
+
+        assert l1.get("test_key") is None
+        channel, message = mock_client.publish.await_args.args
+        assert channel == L1_INVALIDATION_CHANNEL
+        assert message.endswith("|test_key")
+
+    def test_l1_bounds(self):
+        """Test LRU eviction and TTL expiry."""
+        l1 = L1Cache(max_entries=2, ttl_seconds=60)
+        l1.set("a", 1)
+        l1.set("b", 2)
+        l1.get("a")
+        l1.set("c", 3)  # evicts least recently used "b"
+        assert l1.get("b") is None
+        assert l1.get("a") == 1
+
+        with patch("app.services.cache_service.time.monotonic", return_value=1e12):
+            assert l1.get("c") is None
+
+
 @pytest.mark.unit
 class TestCacheStats:
     """Test cache statistics."""
@@ -274,6 +540,181 @@ class TestCacheStats:
         assert stats["hit_rate"] == 0.0
         assert stats["total_requests"] == 0
 
+    @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
+    @patch("redis.from_url")
+    async def test_lookups_recorded_by_tier_and_family(
+        self, mock_redis, mock_async_redis
+    ):
+        """Test content and generic lookups feed the process-wide counters."""
+        cache_metrics.reset()
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
+        mock_client.mget.side_effect = [
+            [json.dumps({"video_url": "v"}), None],
+            [None, None],
+        ]
+        mock_redis.return_value.get.return_value = None
+
+        service = CacheService()
+        await service.check_content_cache("topic_1", "basketball")
+        await service.check_content_cache("topic_2", "basketball")
+        service.get("user:123")
+        ContentCache(service).get_content("c1")
+
+        stats = service.get_instance_cache_stats()
+        assert stats["scope"] == "instance"
+        # Top-level fields keep their meaning: content cache checks only,
+        # not ContentCache's "content:" keys
+        assert stats["cache_hits"] == 1
+        assert stats["total_requests"] == 2
+        assert stats["families"]["content_metadata"] == {
+            "lookups": 2,
+            "hits": 1,
+            "hit_rate": 0.5,
+        }
+        assert stats["families"]["user"] == {"lookups": 1, "hits": 0, "hit_rate": 0.0}
+        assert stats["families"]["content"]["lookups"] == 1
+        assert stats["tiers"]["redis"]["lookups"] == 2
+        assert stats["latency"]["redis"]["count"] == 4
+
+    def test_summarize_latency_percentiles(self):
+        """Test histogram summaries pick the bucket holding each quantile."""
+        counters = Counter(
+            {
+                "content_metadata:all:hit": 90,
+                "content_metadata:all:miss": 10,
+                "content_metadata:redis:hit": 90,
+                "content_metadata:redis:miss": 10,
+                "latency:redis:le_1": 50,
+                "latency:redis:le_5": 45,
+                "latency:redis:le_100": 5,
+                "latency:redis:sum_us": 300_000,
+            }
+        )
+
+        stats = summarize_counters(counters)
+
+        assert stats["hit_rate"] == 0.9
+        assert stats["redis_hits"] == 90
+        latency = stats["latency"]["redis"]
+        assert latency["avg_ms"] == 3.0
+        assert latency["p50_ms"] == 1.0
+        assert latency["p95_ms"] == 5.0
+        assert latency["p99_ms"] == 100.0
+
+    def test_summarize_top_level_fields_cover_content_only(self):
+        """Test other key families don't change the legacy hit/miss fields."""
+        counters = Counter(
+            {
+                "content_metadata:all:hit": 3,
+                "content_metadata:all:miss": 1,
+                "content_metadata:redis:hit": 3,
+                "content_metadata:redis:miss": 1,
+                "content:all:hit": 20,
+                "content:redis:hit": 20,
+                "user:all:hit": 100,
+                "user:redis:hit": 100,
+                "session:all:miss": 50,
+                "session:redis:miss": 50,
+            }
+        )
+
+        stats = summarize_counters(counters)
+
+        assert stats["cache_hits"] == 3
+        assert stats["cache_misses"] == 1
+        assert stats["hit_rate"] == 0.75
+        assert stats["redis_hits"] == 3
+        assert stats["tiers"]["redis"]["lookups"] == 4
+        assert stats["families"]["user"]["hits"] == 100
+        assert stats["families"]["session"]["lookups"] == 50
+
+    @pytest.mark.asyncio
+    async def test_flush_adds_pending_to_redis_hash(self):
+        """Test flush HINCRBYs pending counters and keeps them on failure."""
+        cache_metrics.reset()
+        cache_metrics.record("content", "redis", True, 0.002)
+        cache_metrics.record("content", "all", True)
+
+        mock_pipe = Mock()
+        mock_pipe.execute = AsyncMock(side_effect=ConnectionError("down"))
+        client = Mock()
+        client.pipeline.return_value = mock_pipe
+
+        assert await flush_cache_metrics(client) == 0
+
+        mock_pipe.execute = AsyncMock(return_value=[])
+        assert await flush_cache_metrics(client) == 4
+        fields = {call.args[1] for call in mock_pipe.hincrby.call_args_list}
+        assert "content:redis:hit" in fields
+        assert "latency:redis:le_2" in fields
+        assert await flush_cache_metrics(client) == 0  # nothing pending
+
+    @pytest.mark.asyncio
+    async def test_shutdown_flushes_before_closing_pools(self, monkeypatch):
+        """Test shutdown waits for the background tasks before closing Redis."""
+        from app import main
+
+        events = []
+
+        async def flusher():
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                await asyncio.sleep(0)  # the final flush awaits Redis
+                events.append("flush")
+                raise
+
+        async def listen():
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                for _ in range(5):  # unsubscribing takes a few round trips
+                    await asyncio.sleep(0)
+                events.append("unsubscribe")
+                raise
+
+        async def close():
+            events.append("close")
+
+        listener = asyncio.create_task(listen())
+        state = main.app.state
+        monkeypatch.setattr(state, "l1_invalidation_task", listener, raising=False)
+        monkeypatch.setattr(
+            state, "cache_metrics_task", asyncio.create_task(flusher()), raising=False
+        )
+        monkeypatch.setattr("app.services.cache_service.close_async_redis", close)
+        await asyncio.sleep(0)
+
+        await main.shutdown_event()
+
+        assert sorted(events[:2]) == ["flush", "unsubscribe"]
+        assert events[2:] == ["close"]
+        assert listener.cancelled()
+
+    @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
+    @patch("redis.from_url")
+    async def test_cluster_stats_read_shared_hash(self, mock_redis, mock_async_redis):
+        """Test cluster stats come from the Redis hash, not this instance."""
+        cache_metrics.reset()
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
+        mock_client.hgetall.return_value = {
+            "content_metadata:all:hit": "300",
+            "content_metadata:all:miss": "100",
+            "content_metadata:redis:hit": "300",
+            "content_metadata:redis:miss": "100",
+        }
+
+        stats = await CacheService().get_cluster_cache_stats()
+
+        mock_client.hgetall.assert_awaited_once_with(CACHE_STATS_KEY)
+        assert stats["scope"] == "cluster"
+        assert stats["cache_hits"] == 300
+        assert stats["hit_rate"] == 0.75
+
     @patch("redis.from_url")
     def test_reset_cache_stats(self, mock_redis):
         """Test resetting cache statistics."""
@@ -359,14 +800,148 @@ class TestGeneralCacheMethods:
         """Test deleting keys by pattern."""
         mock_client = Mock()
         mock_redis.return_value = mock_client
-        mock_client.keys.return_value = ["key1", "key2", "key3"]
-        mock_client.delete.return_value = 3
+        mock_client.scan_iter.return_value = iter(["key1", "key2", "key3"])
+        mock_pipe = mock_client.pipeline.return_value
+        mock_pipe.execute.return_value = [3]
 
         service = CacheService()
         result = service.delete_pattern("user:*")
 
         assert result == 3
-        mock_client.keys.assert_called_once_with("user:*")
+        mock_client.keys.assert_not_called()
+        assert mock_client.scan_iter.call_args.kwargs["match"] == "user:*"
+        mock_pipe.unlink.assert_called_once_with("key1", "key2", "key3")
+
+    @patch("redis.from_url")
+    def test_invalidate_tag_batches_unlinks(self, mock_redis):
+        """Test tag invalidation UNLINKs members in pipelined batches."""
+        mock_client = Mock()
+        mock_redis.return_value = mock_client
+        members = [f"key{i}" for i in range(1200)]
+        mock_client.sscan_iter.return_value = iter(members)
+        mock_pipe = mock_client.pipeline.return_value
+        mock_pipe.execute.return_value = [500, 500, 200]
+
+        service = CacheService()
+        result = service.invalidate_tag("student:123")
+
+        assert result == 1200
+        tag_key, snapshot_key = mock_client.rename.call_args.args
+        assert tag_key == "tag:student:123"
+        assert mock_client.sscan_iter.call_args.args[0] == snapshot_key
+        assert [len(c.args) for c in mock_pipe.unlink.call_args_list] == [
+            500,
+            500,
+            200,
+        ]
+        mock_pipe.execute.assert_called_once()
+        mock_client.unlink.assert_called_once_with(snapshot_key)
+
+    @patch("redis.from_url")
+    def test_set_with_tags(self, mock_redis):
+        """Test tagged set registers the key in each tag set."""
+        mock_client = Mock()
+        mock_redis.return_value = mock_client
+        mock_pipe = mock_client.pipeline.return_value
+        mock_pipe.execute.return_value = [True, 1, True]
+
+        service = CacheService()
+        result = service.set("k", {"a": 1}, ttl=60, tags=["student:1"])
+
+        assert result is True
+        mock_pipe.setex.assert_called_once_with("k", 60, encode_value({"a": 1}))
+        mock_pipe.evalsha.assert_called_once_with(
+            TAG_ADD_SHA, 1, "tag:student:1", 60, "k"
+        )
+
+    @patch("redis.from_url")
+    def test_tag_set_ttl_only_extended(self, mock_redis):
+        """Test a short-TTL member can't expire its tag set before longer ones."""
+        redis_client = fakeredis.FakeRedis(decode_responses=True)
+        mock_redis.return_value = redis_client
+        service = CacheService()
+
+        service.set("long", "v", ttl=3600, tags=["student:1"])
+        # Loaded on the first NOSCRIPT, then run by SHA
+        assert redis_client.script_exists(TAG_ADD_SHA) == [True]
+        service.set("short", "v", ttl=60, tags=["student:1"])
+        assert redis_client.ttl("tag:student:1") == 3600
+
+        service.set_many({"longer": "v"}, ttl=7200, tags=["student:1"])
+        assert redis_client.ttl("tag:student:1") == 7200
+
+        # A member without a TTL keeps the tag set forever
+        service.set("forever", "v", tags=["student:1"])
+        service.set_many({"later": "v"}, ttl=60, tags=["student:1"])
+        assert redis_client.ttl("tag:student:1") == -1
+
+        assert service.invalidate_tag("student:1") == 5
+        assert redis_client.keys("*") == []
+
+    @patch("redis.from_url")
+    def test_get_many(self, mock_redis):
+        """Test get_many uses one MGET and leaves out misses."""
+        mock_client = Mock()
+        mock_redis.return_value = mock_client
+        mock_client.mget.return_value = [encode_value({"a": 1}), None, "plain"]
+
+        service = CacheService()
+        result = service.get_many(["k1", "k2", "k3", "k1"])
+
+        assert result == {"k1": {"a": 1}, "k3": "plain"}
+        mock_client.mget.assert_called_once_with(["k1", "k2", "k3"])
+        mock_client.get.assert_not_called()
+
+    @patch("redis.from_url")
+    def test_get_many_error_is_logged(self, mock_redis, caplog):
+        """Test a Redis failure in get_many is logged as a warning."""
+        mock_redis.return_value.mget.side_effect = ConnectionError("down")
+
+        with caplog.at_level("WARNING", logger="app.services.cache_service"):
+            assert CacheService().get_many(["k1", "k2"]) == {}
+
+        assert "Cache get_many error for 2 keys: down" in caplog.text
+
+    @patch("redis.from_url")
+    def test_set_many(self, mock_redis):
+        """Test set_many pipelines one SETEX per key."""
+        mock_client = Mock()
+        mock_redis.return_value = mock_client
+        mock_pipe = mock_client.pipeline.return_value
+        mock_pipe.execute.return_value = [True, True, 2, True]
+
+        service = CacheService()
+        result = service.set_many(
+            {"k1": {"a": 1}, "k2": "v"}, ttl=60, tags=["student:1"]
+        )
+
+        assert result is True
+        mock_pipe.setex.assert_any_call("k1", 60, encode_value({"a": 1}))
+        mock_pipe.setex.assert_any_call("k2", 60, "v")
+        mock_pipe.evalsha.assert_called_once_with(
+            TAG_ADD_SHA, 1, "tag:student:1", 60, "k1", "k2"
+        )
+        mock_pipe.execute.assert_called_once()
+        mock_client.setex.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
+    @patch("redis.from_url")
+    async def test_get_many_async(self, mock_redis, mock_async_redis):
+        """Test async get_many and set_many each take one round trip."""
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
+        mock_client.mget.return_value = [None, encode_value([1, 2])]
+        mock_pipe = Mock()
+        mock_pipe.execute = AsyncMock(return_value=[False])
+        mock_client.pipeline = Mock(return_value=mock_pipe)
+
+        service = CacheService()
+
+        assert await service.get_many_async(["k1", "k2"]) == {"k2": [1, 2]}
+        assert await service.set_many_async({"k1": 1}) is False
+        mock_pipe.set.assert_called_once_with("k1", 1)
+        mock_pipe.execute.assert_awaited_once()
 
     @patch("redis.from_url")
     def test_exists_key(self, mock_redis):
@@ -406,6 +981,178 @@ class TestGeneralCacheMethods:
         assert result == 300
 
 
+@pytest.mark.unit
+class TestCacheCodec:
+    """Test cache value encoding."""
+
+    def test_round_trip_small_value_uncompressed(self):
+        """Test small values are stored with a header but not compressed."""
+        value = {"video_url": "https://cdn/v.mp4", "duration": 120, "tags": [1, 2]}
+        data = encode_value(value)
+
+        assert data[0] == 0xC1
+        assert data[1] & 0x0F == COMPRESSION_NONE
+        assert decode_value(data) == value
+
+    def test_large_value_compressed(self):
+        """Test repetitive payloads above the threshold are compressed."""
+        script = {"scenes": [{"narration": "Newton's third law " * 20}] * 50}
+        data = encode_value(script, compression=COMPRESSION_ZLIB)
+
+        assert data[1] & 0x0F == COMPRESSION_ZLIB
+        assert len(data) < len(json.dumps(script)) / 10
+        assert decode_value(data) == script
+
+    def test_legacy_values_readable(self):
+        """Test JSON and plain strings from older writers still decode."""
+        assert decode_value('{"a": 1}') == {"a": 1}
+        assert decode_value(b'{"a": 1}') == {"a": 1}
+        assert decode_value(b"plain text") == "plain text"
+        assert decode_value("42") == 42
+
+    def test_unknown_format_rejected(self):
+        """Test a header with an unknown compression ID raises."""
+        with pytest.raises(ValueError):
+            decode_value(bytes((0xC1, 0x1F)) + b"{}")
+
+
+@pytest.mark.unit
+class TestCachedDecorator:
+    """Test @cached stampede protection."""
+
+    @staticmethod
+    def _envelope(value, expires_in=300, delta=0.01):
+        return json.dumps(
+            {
+                "__cached__": 1,
+                "value": value,
+                "delta": delta,
+                "expires_at": time.time() + expires_in,
+            }
+        )
+
+    @patch("redis.from_url")
+    def test_miss_computes_under_lease(self, mock_redis):
+        """Test a miss takes the lease, caches an envelope and releases."""
+        mock_client = Mock()
+        mock_redis.return_value = mock_client
+        mock_client.get.return_value = None
+        mock_client.set.return_value = True
+        compute = Mock(return_value={"score": 90})
+
+        @cached(ttl=60, key_prefix="progress", stale_ttl=30)
+        def get_progress(student_id):
+            return compute(student_id)
+
+        assert get_progress("s1") == {"score": 90}
+
+        compute.assert_called_once_with("s1")
+        lease_call = mock_client.set.call_args
+        assert lease_call.args[0] == "lease:progress:get_progress:s1:"
+        assert lease_call.kwargs["nx"] is True
+        key, ttl, payload = mock_client.setex.call_args.args
+        assert key == "progress:get_progress:s1:"
+        assert ttl == 90  # ttl + stale grace period
+        assert decode_value(payload)["value"] == {"score": 90}
+        mock_client.eval.assert_called_once()
+
+    @patch("redis.from_url")
+    def test_fresh_hit_skips_compute(self, mock_redis):
+        """Test a fresh envelope (and a legacy plain value) is served."""
+        mock_client = Mock()
+        mock_redis.return_value = mock_client
+        compute = Mock()
+
+        @cached(ttl=60, key_prefix="progress", beta=0)
+        def get_progress(student_id):
+            return compute(student_id)
+
+        mock_client.get.return_value = self._envelope({"score": 90})
+        assert get_progress("s1") == {"score": 90}
+
+        mock_client.get.return_value = json.dumps({"score": 80})
+        assert get_progress("s1") == {"score": 80}
+
+        compute.assert_not_called()
+        mock_client.set.assert_not_called()
+
+    @patch("redis.from_url")
+    def test_waiter_gets_lease_holder_result(self, mock_redis):
+        """Test callers that lose the lease wait instead of recomputing."""
+        mock_client = Mock()
+        mock_redis.return_value = mock_client
+        mock_client.get.side_effect = [None, None, self._envelope([1, 2])]
+        mock_client.set.return_value = None  # lease held elsewhere
+        compute = Mock()
+
+        @cached(ttl=60, wait_interval=0.001)
+        def get_dashboard(class_id):
+            return compute(class_id)
+
+        assert get_dashboard("c1") == [1, 2]
+        compute.assert_not_called()
+
+    @patch("random.random", return_value=0.99)
+    @patch("redis.from_url")
+    def test_xfetch_refreshes_early(self, mock_redis, mock_random):
+        """Test a slow-to-compute value near expiry is refreshed early."""
+        mock_client = Mock()
+        mock_redis.return_value = mock_client
+        mock_client.get.return_value = self._envelope("old", expires_in=1, delta=2)
+        mock_client.set.return_value = True
+        compute = Mock(return_value="new")
+
+        @cached(ttl=60)
+        def get_report(report_id):
+            return compute(report_id)
+
+        assert get_report("r1") == "new"
+        compute.assert_called_once()
+
+    @patch("redis.from_url")
+    def test_stale_while_revalidate(self, mock_redis):
+        """Test an expired value is served while it refreshes in background."""
+        mock_client = Mock()
+        mock_redis.return_value = mock_client
+        mock_client.get.return_value = self._envelope("old", expires_in=-5)
+        mock_client.set.return_value = True
+        compute = Mock(return_value="new")
+
+        @cached(ttl=60, stale_ttl=300)
+        def get_report(report_id):
+            return compute(report_id)
+
+        assert get_report("r1") == "old"
+
+        deadline = time.monotonic() + 2
+        while not mock_client.setex.called and time.monotonic() < deadline:
+            time.sleep(0.01)
+        compute.assert_called_once_with("r1")
+        assert decode_value(mock_client.setex.call_args.args[2])["value"] == "new"
+
+    @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
+    @patch("redis.from_url")
+    async def test_async_function(self, mock_redis, mock_async_redis):
+        """Test async functions are cached through the async client."""
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
+        mock_client.get.return_value = None
+        mock_client.set.return_value = True
+        calls = []
+
+        @cached(ttl=60, key_prefix="dashboard", key_fn=lambda class_id: class_id)
+        async def get_dashboard(class_id):
+            calls.append(class_id)
+            return {"class": class_id}
+
+        assert await get_dashboard("c1") == {"class": "c1"}
+        assert calls == ["c1"]
+        mock_client.setex.assert_awaited_once()
+        assert mock_client.setex.call_args.args[0] == "dashboard:c1"
+        mock_client.eval.assert_awaited_once()
+
+
 @pytest.mark.unit
 class TestUserCache:
     """Test user cache helper."""
@@ -437,6 +1184,23 @@ class TestUserCache:
 
         assert result is True
 
+    @patch("redis.from_url")
+    def test_get_and_set_users(self, mock_redis):
+        """Test bulk user helpers are keyed by user ID."""
+        mock_client = Mock()
+        mock_redis.return_value = mock_client
+        mock_client.mget.return_value = [json.dumps({"name": "John"}), None]
+        mock_client.pipeline.return_value.execute.return_value = [True]
+
+        user_cache = UserCache(CacheService())
+
+        assert user_cache.get_users(["u1", "u2"]) == {"u1": {"name": "John"}}
+        mock_client.mget.assert_called_once_with(["user:u1", "user:u2"])
+        assert user_cache.set_users({"u1": {"name": "John"}}) is True
+        mock_client.pipeline.return_value.setex.assert_called_once_with(
+            "user:u1", 3600, encode_value({"name": "John"})
+        )
+
     @patch("redis.from_url")
     def test_invalidate_user(self, mock_redis):
         """Test invalidating user cache."""
@@ -482,19 +1246,48 @@ class TestContentCacheHelper:
 
         assert result is True
 
+    @patch("redis.from_url")
+    def test_get_and_set_student_contents(self, mock_redis):
+        """Test bulk student content helpers share one MGET / pipeline."""
+        mock_client = Mock()
+        mock_redis.return_value = mock_client
+        mock_client.mget.return_value = [None, encode_value({"title": "B"})]
+        mock_pipe = mock_client.pipeline.return_value
+        mock_pipe.execute.return_value = [True, True, 2, True]
+
+        content_cache = ContentCache(CacheService())
+
+        result = content_cache.get_student_contents("s1", ["c1", "c2"])
+        assert result == {"c2": {"title": "B"}}
+        mock_client.mget.assert_called_once_with(
+            ["content:student:s1:c1", "content:student:s1:c2"]
+        )
+
+        assert content_cache.set_student_contents(
+            "s1", {"c1": {"title": "A"}, "c2": {"title": "B"}}
+        )
+        assert mock_pipe.evalsha.call_args.args[2:] == (
+            "tag:student:s1",
+            7200,
+            "content:student:s1:c1",
+            "content:student:s1:c2",
+        )
+
     @patch("redis.from_url")
     def test_invalidate_student_content(self, mock_redis):
         """Test invalidating all content for a student."""
         mock_client = Mock()
         mock_redis.return_value = mock_client
-        mock_client.keys.return_value = ["key1", "key2"]
-        mock_client.delete.return_value = 2
+        mock_client.sscan_iter.return_value = iter(["key1", "key2"])
+        mock_client.pipeline.return_value.execute.return_value = [2]
 
         cache = CacheService()
         content_cache = ContentCache(cache)
         result = content_cache.invalidate_student_content("student_123")
 
         assert result == 2
+        assert mock_client.rename.call_args.args[0] == "tag:student:student_123"
+        mock_client.keys.assert_not_called()
 
 
 @pytest.mark.unit
@@ -520,13 +1313,19 @@ class TestSessionCache:
         """Test setting session in cache."""
         mock_client = Mock()
         mock_redis.return_value = mock_client
-        mock_client.setex.return_value = True
+        mock_pipe = mock_client.pipeline.return_value
+        mock_pipe.execute.return_value = [True, 1, True]
 
         cache = CacheService()
         session_cache = SessionCache(cache)
         result = session_cache.set_session("session_123", {"user_id": "user_123"})
 
         assert result is True
+        assert mock_pipe.evalsha.call_args.args[2:] == (
+            "tag:user:user_123:sessions",
+            86400,
+            "session:session_123",
+        )
 
     @patch("redis.from_url")
     def test_delete_session(self, mock_redis):
@@ -546,11 +1345,13 @@ class TestSessionCache:
         """Test deleting all sessions for a user."""
         mock_client = Mock()
         mock_redis.return_value = mock_client
-        mock_client.keys.return_value = ["session1", "session2"]
-        mock_client.delete.return_value = 2
+        mock_client.sscan_iter.return_value = iter(["session1", "session2"])
+        mock_client.pipeline.return_value.execute.return_value = [2]
 
         cache = CacheService()
         session_cache = SessionCache(cache)
         result = session_cache.delete_user_sessions("user_123")
 
         assert result == 2
+        assert mock_client.rename.call_args.args[0] == "tag:user:user_123:sessions"
+        mock_client.keys.assert_not_called()
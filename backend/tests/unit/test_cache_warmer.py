@@ -0,0 +1,232 @@
+"""
+Unit tests for the content cache warmer job.
+"""
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, Mock
+
+from sqlalchemy import event
+
+from app.models.class_student import ClassStudent
+from app.models.content_metadata import ContentMetadata, GenerationStatus
+from app.models.interest import StudentInterest
+from app.models.progress import ProgressStatus, StudentProgress
+from app.workers import cache_warmer
+
+
+def _content(content_id, topic_id, interest_id, views=0, completions=0, **kwargs):
+    return ContentMetadata(
+        content_id=content_id,
+        student_id="user_student_test_001",
+        topic_id=topic_id,
+        interest_id=interest_id,
+        title=f"Content {content_id}",
+        status=kwargs.pop("status", GenerationStatus.COMPLETED.value),
+        video_url=f"https://cdn.test.com/{content_id}.mp4",
+        view_count=views,
+        completion_count=completions,
+        **kwargs,
+    )
+
+
+def _schedule(db_session, student, class_obj, topic_id, interest_id):
+    """Enroll the student and put them in progress on a topic in class."""
+    db_session.add(
+        ClassStudent(class_id=class_obj.class_id, student_id=student.user_id)
+    )
+    db_session.add(StudentInterest(student_id=student.user_id, interest_id=interest_id))
+    db_session.add(
+        StudentProgress(
+            progress_id=f"progress_{topic_id}",
+            student_id=student.user_id,
+            topic_id=topic_id,
+            class_id=class_obj.class_id,
+            status=ProgressStatus.IN_PROGRESS,
+        )
+    )
+    db_session.commit()
+
+
+@pytest.fixture
+def catalog(db_session, sample_student, sample_interests, sample_topics):
+    db_session.add_all(
+        [
+            _content("c1", "topic_newton_1", "int_basketball", views=10),
+            _content("c2", "topic_newton_1", "int_basketball", views=5, completions=1),
+            _content("c3", "topic_newton_2", "int_music", views=12),
+            _content("c4", "topic_newton_3", "int_coding", views=1),
+            _content("c5", "topic_newton_3", "int_gaming", views=100, archived=True),
+            _content(
+                "c6",
+                "topic_newton_2",
+                "int_coding",
+                views=100,
+                status=GenerationStatus.FAILED.value,
+            ),
+        ]
+    )
+    db_session.commit()
+
+
+class TestRanking:
+    """Popularity ranking of (topic, interest) combinations."""
+
+    def test_rank_by_views_and_completions(self, db_session, catalog):
+        ranked = cache_warmer.rank_hot_combinations(
+            db_session, top_n=10, scheduled=set()
+        )
+
+        # Archived and failed content don't count
+        assert [(c.topic_id, c.interest_id, c.score) for c in ranked] == [
+            ("topic_newton_1", "int_basketball", 17.0),
+            ("topic_newton_2", "int_music", 12.0),
+            ("topic_newton_3", "int_coding", 1.0),
+        ]
+        assert ranked[0].interest == "basketball"
+
+    def test_scheduled_topics_are_boosted(
+        self, db_session, catalog, sample_student, sample_class
+    ):
+        _schedule(
+            db_session, sample_student, sample_class, "topic_newton_3", "int_coding"
+        )
+
+        scheduled = cache_warmer.scheduled_topic_ids(db_session)
+        ranked = cache_warmer.rank_hot_combinations(
+            db_session, top_n=2, scheduled=scheduled
+        )
+
+        assert scheduled == {"topic_newton_3"}
+        assert [c.topic_id for c in ranked] == ["topic_newton_1", "topic_newton_2"]
+
+        ranked = cache_warmer.rank_hot_combinations(
+            db_session, top_n=10, scheduled={"topic_newton_2"}
+        )
+        assert ranked[0].topic_id == "topic_newton_2"
+        assert ranked[0].scheduled is True
+
+
+class TestWarmHotSet:
+    """Warming the hot set through CacheService."""
+
+    @pytest.mark.asyncio
+    async def test_rebuilds_keys_missing_from_every_tier(self, db_session, catalog):
+        cache = Mock()
+        cache.generate_cache_key = lambda topic_id, interest: f"{topic_id}|{interest}"
+        cache.prefetch_content_cache = AsyncMock(
+            return_value={"topic_newton_1|basketball": {"video_url": "v"}}
+        )
+        cache.store_content_tiers = AsyncMock(return_value=(True, True))
+        combinations = [
+            cache_warmer.HotCombination("topic_newton_1", "int_basketball", 17),
+            cache_warmer.HotCombination("topic_newton_2", "int_music", 12),
+            cache_warmer.HotCombination("topic_newton_2", "int_reading", 1),
+        ]
+
+        stats = await cache_warmer.warm_hot_set(db_session, cache, combinations)
+
+        assert stats == {"hot": 3, "resident": 1, "rebuilt": 1, "missing": 1}
+        (keys,) = cache.prefetch_content_cache.call_args.args
+        assert list(keys) == [
+            "topic_newton_1|basketball",
+            "topic_newton_2|music",
+            "topic_newton_2|reading",
+        ]
+        assert cache.prefetch_content_cache.call_args.kwargs == {"refresh_ttl": True}
+        cache_key, metadata = cache.store_content_tiers.call_args.args
+        assert cache_key == "topic_newton_2|music"
+        assert metadata["content_id"] == "c3"
+        assert metadata["video_url"] == "https://cdn.test.com/c3.mp4"
+
+    @pytest.mark.asyncio
+    async def test_rebuild_loads_content_in_one_query(self, db_session, catalog):
+        cache = Mock()
+        cache.generate_cache_key = lambda topic_id, interest: f"{topic_id}|{interest}"
+        cache.prefetch_content_cache = AsyncMock(return_value={})
+        # GCS down: the Redis write still makes the combination hot
+        cache.store_content_tiers = AsyncMock(return_value=(True, False))
+        combinations = [
+            cache_warmer.HotCombination("topic_newton_1", "int_basketball", 17),
+            cache_warmer.HotCombination("topic_newton_2", "int_music", 12),
+            cache_warmer.HotCombination("topic_newton_3", "int_coding", 1),
+            cache_warmer.HotCombination("topic_newton_2", "int_reading", 1),
+        ]
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", count)
+        try:
+            stats = await cache_warmer.warm_hot_set(db_session, cache, combinations)
+        finally:
+            event.remove(engine, "before_cursor_execute", count)
+
+        assert stats == {"hot": 4, "resident": 0, "rebuilt": 3, "missing": 1}
+        assert len(statements) == 1
+
+
+class TestPregeneration:
+    """Off-peak pre-generation of missing scheduled combinations."""
+
+    def test_is_offpeak(self):
+        def at(hour):
+            return datetime(2024, 1, 15, hour, tzinfo=timezone.utc)
+
+        assert cache_warmer.is_offpeak(at(3), "0-5", "UTC") is True
+        assert cache_warmer.is_offpeak(at(5), "0-5", "UTC") is False
+        assert cache_warmer.is_offpeak(at(23), "22-5", "UTC") is True
+        assert cache_warmer.is_offpeak(at(12), "22-5", "UTC") is False
+        # 09:00 UTC is 03:00 in Chicago (CST)
+        assert cache_warmer.is_offpeak(at(9), "0-5", "America/Chicago") is True
+
+    def test_candidates_skip_existing_content(
+        self, db_session, catalog, sample_student, sample_class
+    ):
+        _schedule(
+            db_session, sample_student, sample_class, "topic_newton_2", "int_coding"
+        )
+        db_session.add(
+            StudentInterest(student_id=sample_student.user_id, interest_id="int_music")
+        )
+        db_session.commit()
+
+        candidates = cache_warmer.pregeneration_candidates(db_session, budget=5)
+
+        # int_music already has content; int_coding only has a failed attempt
+        assert candidates == [
+            {
+                "topic_id": "topic_newton_2",
+                "topic_name": "Newton's Second Law",
+                "interest_id": "int_coding",
+                "student_id": sample_student.user_id,
+                "grade_level": 10,
+                "demand": 1,
+            }
+        ]
+        assert cache_warmer.pregeneration_candidates(db_session, budget=0) == []
+
+    @pytest.mark.asyncio
+    async def test_run_skips_pregeneration_outside_offpeak(
+        self, db_session, catalog, monkeypatch
+    ):
+        cache = Mock()
+        cache.generate_cache_key = lambda topic_id, interest: f"{topic_id}|{interest}"
+        cache.prefetch_content_cache = AsyncMock(return_value={})
+        cache.store_content_tiers = AsyncMock(return_value=(True, True))
+        pregenerate = AsyncMock(return_value=3)
+        monkeypatch.setattr(cache_warmer, "is_offpeak", lambda: False)
+        monkeypatch.setattr(cache_warmer, "pregenerate_missing", pregenerate)
+
+        stats = await cache_warmer.run(db_session, cache, top_n=2, pregenerate=True)
+
+        assert stats["hot"] == 2
+        assert stats["rebuilt"] == 2
+        assert stats["pregenerated"] == 0
+        pregenerate.assert_not_called()
+
+        stats = await cache_warmer.run(
+            db_session, cache, top_n=2, pregenerate=True, force=True
+        )
+        assert stats["pregenerated"] == 3
@@ -0,0 +1,252 @@
+"""
+Unit tests for the Redis sliding window rate limiter.
+"""
+import threading
+
+import fakeredis
+import pytest
+from unittest.mock import Mock, patch
+
+from fastapi import HTTPException
+
+from app.middleware import rate_limit
+from app.middleware.rate_limit import (
+    SLIDING_WINDOW_SCRIPT,
+    HybridRateLimiter,
+    RateLimiter,
+    get_rate_limiter,
+)
+
+NOW = 1_700_000_000.0
+NOW_MS = int(NOW * 1000)
+
+
+def _limiter(result):
+    redis_client = Mock()
+    script = redis_client.register_script.return_value
+    script.return_value = result
+    return RateLimiter(redis_client), redis_client, script
+
+
+@pytest.mark.unit
+class TestSlidingWindowLimiter:
+    """Test multi-window checks run as one script call."""
+
+    @patch("app.middleware.rate_limit.time.time", return_value=NOW)
+    def test_all_windows_in_one_call(self, mock_time):
+        """Test both windows are evaluated by a single EVALSHA."""
+        limiter, redis_client, script = _limiter(
+            [1, 59, NOW_MS + 60_000, 999, NOW_MS + 3_600_000]
+        )
+
+        allowed, infos = limiter.check_rate_limits("user:1", [(60, 60), (1000, 3600)])
+
+        assert allowed is True
+        redis_client.register_script.assert_called_once_with(SLIDING_WINDOW_SCRIPT)
+        script.assert_called_once()
+        kwargs = script.call_args.kwargs
+        assert kwargs["keys"] == ["rate_limit:{user:1}:60", "rate_limit:{user:1}:3600"]
+        assert kwargs["args"][0] == NOW_MS
+        assert kwargs["args"][2:] == [60, 60_000, 1000, 3_600_000]
+        assert [i["remaining"] for i in infos] == [59, 999]
+        assert all(i["retry_after"] == 0 for i in infos)
+        # No per-command round trips
+        redis_client.zadd.assert_not_called()
+        redis_client.zcard.assert_not_called()
+
+    @patch("app.middleware.rate_limit.time.time", return_value=NOW)
+    def test_denied_reports_retry_after(self, mock_time):
+        """Test a full window denies the request with its reset time."""
+        limiter, _, _ = _limiter([0, 0, NOW_MS + 12_500, 400, NOW_MS + 3_600_000])
+
+        allowed, infos = limiter.check_rate_limits(
+            "ip:1.2.3.4", [(60, 60), (1000, 3600)]
+        )
+
+        assert allowed is False
+        assert infos[0]["retry_after"] == 13
+        assert infos[1]["retry_after"] == 0
+
+    @patch("app.middleware.rate_limit.time.time", return_value=NOW)
+    def test_single_window_compat(self, mock_time):
+        """Test check_rate_limit keeps its (allowed, info) shape."""
+        limiter, _, _ = _limiter([1, 9, NOW_MS + 3_600_000])
+
+        allowed, info = limiter.check_rate_limit("user:1:content_requests", 10, 3600)
+
+        assert allowed is True
+        assert info["remaining"] == 9
+        assert info["reset_at"].startswith("2023-11-14T")
+
+    @pytest.mark.asyncio
+    @patch("app.middleware.rate_limit.time.time", return_value=NOW)
+    async def test_check_requests_raises_with_tightest_window(self, mock_time):
+        """Test 429 headers describe the window that is exhausted."""
+        limiter, _, _ = _limiter([0, 30, NOW_MS + 60_000, 0, NOW_MS + 1_800_000])
+        request = Mock()
+
+        with pytest.raises(HTTPException) as exc_info:
+            await limiter.check_requests(request, "user:1", [(60, 60), (1000, 3600)])
+
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.headers["Retry-After"] == "1800"
+        assert exc_info.value.headers["X-RateLimit-Limit"] == "1000"
+        assert request.state.rate_limit_headers["X-RateLimit-Remaining"] == "0"
+
+
+@pytest.mark.unit
+class TestHybridRateLimiter:
+    """Test local decisions with periodic Redis reconciliation."""
+
+    def _limiter(self, redis_client=None, **kwargs):
+        kwargs.setdefault("error_bound", 0.2)
+        kwargs.setdefault("sync_interval", 60)
+        limiter = HybridRateLimiter(redis_client or fakeredis.FakeRedis(), **kwargs)
+        limiter._script = Mock(wraps=limiter._script)
+        return limiter
+
+    def test_known_identifier_decided_locally(self):
+        """Test local decisions stay within the budget and the limit."""
+        limiter = self._limiter()
+        limiter.reconcile()  # register the instance
+
+        results = [limiter.check_rate_limits("user:1", [(10, 60)]) for _ in range(12)]
+
+        # Budget of 2 (10 * 0.2): first exact, then 2 local, then exact again
+        assert [allowed for allowed, _ in results] == [True] * 10 + [False] * 2
+        assert [info[0]["remaining"] for _, info in results[:4]] == [9, 8, 7, 6]
+        assert limiter._script.call_count == 6
+        limiter.reconcile()
+        assert limiter.redis.zcard("rate_limit:{user:1}:60") == 10
+
+    def test_unregistered_instance_checks_exactly(self):
+        """Test nothing is decided locally before the instance count is known."""
+        limiter = self._limiter()
+
+        for _ in range(5):
+            limiter.check_rate_limits("user:1", [(10, 60)])
+
+        assert limiter._script.call_count == 5
+
+    @pytest.mark.parametrize("instances", [2, 3])
+    def test_instances_overshoot_within_error_bound(self, instances):
+        """Test instances sharing one Redis overshoot by less than the bound."""
+        redis_client = fakeredis.FakeRedis()
+        limiters = [
+            self._limiter(redis_client, error_bound=0.1) for _ in range(instances)
+        ]
+        for _ in range(2):  # every instance sees all registrations
+            for limiter in limiters:
+                limiter.reconcile()
+        assert all(limiter._instances == instances for limiter in limiters)
+
+        allowed = 0
+        for _ in range(100):
+            for limiter in limiters:
+                is_allowed, _ = limiter.check_rate_limits("user:1", [(100, 60)])
+                allowed += is_allowed
+
+        # No instance saw the others' unsynced requests
+        assert 100 <= allowed < 100 * 1.1
+        # ...while still deciding some requests locally
+        exact = sum(limiter._script.call_count for limiter in limiters)
+        assert exact < 100 * instances
+
+    def test_zero_local_budget_warns_once(self):
+        """Test a limit too small to split across instances is flagged."""
+        limiter = self._limiter(error_bound=0.1)
+        limiter.reconcile()
+        limiter._instances = 7  # 60 * 0.1 / 7 < 1
+
+        with patch.object(rate_limit.logger, "warning") as warning:
+            for _ in range(3):
+                limiter.check_rate_limits("user:1", [(60, 60)])
+
+        warning.assert_called_once()
+        assert limiter._script.call_count == 3
+
+    def test_eviction_keeps_unsynced_windows(self):
+        """Test windows with local requests aren't evicted before a sync."""
+        limiter = self._limiter(max_keys=2)
+        limiter.reconcile()
+        limiter.check_rate_limits("user:1", [(10, 60)])
+        limiter.check_rate_limits("user:1", [(10, 60)])  # local
+        limiter.check_rate_limits("user:2", [(10, 60)])
+        limiter.check_rate_limits("user:3", [(10, 60)])
+
+        assert list(limiter._windows) == [
+            "rate_limit:{user:1}:60",
+            "rate_limit:{user:3}:60",
+        ]
+        limiter.reconcile()
+        assert limiter.redis.zcard("rate_limit:{user:1}:60") == 2
+
+    def test_due_reconcile_runs_in_background(self):
+        """Test a due reconciliation doesn't run on the request's thread."""
+        limiter = self._limiter(sync_interval=0)
+        threads = []
+        limiter.reconcile = Mock(
+            side_effect=lambda: threads.append(threading.current_thread())
+        )
+
+        limiter.check_rate_limits("user:1", [(10, 60)])
+        limiter._reconcile_thread.join(timeout=5)
+
+        assert threads and threads[0] is not threading.current_thread()
+
+    def test_reconcile_batches_tracked_windows(self):
+        """Test windows are synced in pipelines of batch_size."""
+        redis_client = Mock()
+        script = redis_client.register_script.return_value
+        # Every window reports 10 requests (including this one)
+        script.side_effect = lambda keys, args: [1] + [
+            value for i in range(len(keys)) for value in (args[2 + 2 * i] - 10, args[0])
+        ]
+        limiter = self._limiter(redis_client, batch_size=3)
+        pipe = redis_client.pipeline.return_value
+        pipe.execute.return_value = [0, 1, True, 1]
+        limiter.reconcile()
+        limiter.check_rate_limits("user:1", [(60, 60), (1000, 3600)])
+        limiter.check_rate_limits("user:2", [(60, 60), (1000, 3600)])
+        limiter.check_rate_limits("user:1", [(60, 60), (1000, 3600)])
+        # Registration, then least recently used first: user:2 (no local
+        # requests) and user:1's minute window, then user:1's hour window
+        pipe.execute.side_effect = [
+            [0, 1, True, 1],
+            [0, True, 5, 0, True, 5, 0, 1, True, 40],
+            [0, 1, True, 900],
+        ]
+
+        assert limiter.reconcile() == 4
+
+        assert pipe.execute.call_count == 4
+        assert pipe.zadd.call_count == 4  # 2 registrations, user:1's 2 windows
+        assert limiter._windows["rate_limit:{user:1}:60"].count == 40
+        assert limiter._windows["rate_limit:{user:1}:60"].pending == []
+        assert limiter._windows["rate_limit:{user:1}:3600"].count == 900
+        assert limiter._windows["rate_limit:{user:2}:3600"].count == 5
+
+    def test_failed_reconcile_keeps_pending(self):
+        """Test local requests are retried after a Redis error."""
+        limiter = self._limiter()
+        limiter.reconcile()
+        limiter.check_rate_limits("user:1", [(60, 60)])
+        limiter.check_rate_limits("user:1", [(60, 60)])
+
+        with patch.object(limiter.redis, "pipeline", side_effect=ConnectionError()):
+            assert limiter.reconcile(keys=["rate_limit:{user:1}:60"]) == 0
+        assert len(limiter._windows["rate_limit:{user:1}:60"].pending) == 1
+
+        assert limiter.reconcile() == 1
+        assert limiter._windows["rate_limit:{user:1}:60"].pending == []
+        assert limiter.redis.zcard("rate_limit:{user:1}:60") == 2
+
+    def test_get_rate_limiter_mode(self, monkeypatch):
+        """Test the middleware limiter follows RATE_LIMIT_MODE."""
+        redis_client = Mock()
+        assert type(get_rate_limiter(redis_client)) is RateLimiter
+
+        monkeypatch.setattr(rate_limit, "RATE_LIMIT_MODE", "hybrid")
+        limiter = get_rate_limiter(redis_client)
+        assert isinstance(limiter, HybridRateLimiter)
+        assert get_rate_limiter(redis_client) is limiter
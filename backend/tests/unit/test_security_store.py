@@ -0,0 +1,171 @@
+"""
+Unit tests for the security middleware store and the middlewares using it.
+"""
+import fakeredis
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from app.middleware.security import BruteForceProtectionMiddleware, RateLimitMiddleware
+from app.middleware.security_store import (
+    LocalSecurityStore,
+    RedisSecurityStore,
+    security_key,
+)
+
+
+def _app(middleware, **options):
+    app = FastAPI()
+
+    @app.post("/api/v1/auth/login")
+    async def login(request: Request):
+        data = await request.json()
+        if data.get("password") == "right":
+            return {"ok": True}
+        return JSONResponse({"detail": "Invalid credentials"}, status_code=401)
+
+    app.add_middleware(middleware, **options)
+    return TestClient(app)
+
+
+@pytest.mark.unit
+class TestLocalSecurityStore:
+    """Test the bounded in-process fallback."""
+
+    @pytest.mark.asyncio
+    async def test_memory_bounded_under_scanning(self):
+        """Test distinct keys beyond max_keys evict the least recently used."""
+        store = LocalSecurityStore(max_keys=100)
+
+        for i in range(10_000):
+            await store.hit(security_key("rate_limit", f"10.0.{i}", "/x"), 10, 60)
+
+        assert len(store) == 100
+
+    @pytest.mark.asyncio
+    async def test_window_slides(self):
+        """Test events count for window_seconds each, not per fixed window."""
+        store = LocalSecurityStore()
+        clock = "app.middleware.security_store.time.monotonic"
+
+        with patch(clock, return_value=0):
+            assert await store.hit("k", 2, 60) == (True, 1)
+            await store.lock("lock", 300)
+            assert await store.ttl("lock") == 300
+        with patch(clock, return_value=50):
+            assert await store.hit("k", 2, 60) == (True, 2)
+            # Rejected events aren't recorded
+            assert await store.hit("k", 2, 60) == (False, 2)
+        with patch(clock, return_value=61):
+            # Only the event at 0 has left the window
+            assert await store.hit("k", 2, 60) == (True, 2)
+            assert await store.hit("k", 2, 60) == (False, 2)
+            assert await store.ttl("lock") == 239
+
+    def test_keys_have_bounded_length(self):
+        """Test client-controlled parts are hashed into the key."""
+        key = security_key("login_failures", "1.2.3.4", "x" * 10_000 + "@test.com")
+
+        assert key.startswith("security:login_failures:")
+        assert len(key) == len("security:login_failures:") + 32
+
+
+@pytest.mark.unit
+class TestRedisSecurityStore:
+    """Test the shared Redis store."""
+
+    @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
+    async def test_hit_slides_window_in_redis(self, mock_async_redis):
+        """Test events are timestamps in a sorted set with the window TTL."""
+        client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        mock_async_redis.return_value = client
+        store = RedisSecurityStore("redis://shared-security:6379/0")
+
+        with patch("app.middleware.security_store.time.time", return_value=1000):
+            assert await store.hit("k", 2, 60) == (True, 1)
+        with patch("app.middleware.security_store.time.time", return_value=1050):
+            assert await store.hit("k", 2, 60) == (True, 2)
+            assert await store.hit("k", 2, 60) == (False, 2)
+        with patch("app.middleware.security_store.time.time", return_value=1061):
+            assert await store.hit("k", 2, 60) == (True, 2)
+            assert await client.zcard("k") == 2
+            assert 0 < await client.pttl("k") <= 60_000
+
+    @pytest.mark.asyncio
+    @patch("redis.asyncio.from_url")
+    async def test_falls_back_to_local_store(self, mock_async_redis):
+        """Test a Redis outage degrades to per-instance limits."""
+        mock_client = AsyncMock()
+        mock_async_redis.return_value = mock_client
+        mock_client.register_script = Mock(side_effect=ConnectionError("down"))
+
+        store = RedisSecurityStore("redis://down-security:6379/0")
+
+        assert await store.hit("k", 10, 60) == (True, 1)
+        assert await store.hit("k", 10, 60) == (True, 2)
+        # Redis isn't retried straight away
+        assert mock_client.register_script.call_count == 1
+
+
+@pytest.mark.unit
+class TestSecurityMiddlewares:
+    """Test the middlewares on the local store."""
+
+    def test_brute_force_lockout(self):
+        """Test a lockout after max_attempts failures, shared via the store."""
+        store = LocalSecurityStore()
+        client = _app(BruteForceProtectionMiddleware, max_attempts=3, store=store)
+        credentials = {"email": "a@test.com", "password": "wrong"}
+
+        statuses = [
+            client.post("/api/v1/auth/login", json=credentials).status_code
+            for _ in range(4)
+        ]
+
+        assert statuses == [401, 401, 401, 429]
+        # Another instance sharing the store sees the lockout
+        other = _app(BruteForceProtectionMiddleware, max_attempts=3, store=store)
+        response = other.post(
+            "/api/v1/auth/login", json={"email": "a@test.com", "password": "right"}
+        )
+        assert response.status_code == 429
+
+    def test_successful_login_clears_failures(self):
+        """Test a successful login resets the failure count."""
+        client = _app(
+            BruteForceProtectionMiddleware, max_attempts=2, store=LocalSecurityStore()
+        )
+        wrong = {"email": "a@test.com", "password": "wrong"}
+        right = {"email": "a@test.com", "password": "right"}
+
+        assert client.post("/api/v1/auth/login", json=wrong).status_code == 401
+        assert client.post("/api/v1/auth/login", json=right).status_code == 200
+        assert client.post("/api/v1/auth/login", json=wrong).status_code == 401
+        assert client.post("/api/v1/auth/login", json=right).status_code == 200
+
+    @pytest.mark.parametrize("email", [123, ["a@test.com"], None])
+    def test_brute_force_passes_non_string_email(self, email):
+        """Test a non-string email reaches the endpoint instead of erroring."""
+        client = _app(BruteForceProtectionMiddleware, store=LocalSecurityStore())
+
+        response = client.post(
+            "/api/v1/auth/login", json={"email": email, "password": "wrong"}
+        )
+
+        assert response.status_code == 401
+
+    def test_rate_limit_per_endpoint(self):
+        """Test the endpoint limit applies per IP and path."""
+        client = _app(RateLimitMiddleware, store=LocalSecurityStore())
+        credentials = {"email": "a@test.com", "password": "right"}
+
+        statuses = [
+            client.post("/api/v1/auth/login", json=credentials).status_code
+            for _ in range(11)
+        ]
+
+        assert statuses == [200] * 10 + [429]
@@ -352,3 +352,81 @@ resource "google_cloud_run_v2_job" "content_worker" {
     google_service_account.cloud_run_sa
   ]
 }
+
+# Cloud Run Job - Cache Warmer (keeps popular content in the Redis hot tier)
+# Runs the content-worker image with a different entry point. Schedule it
+# ahead of class start (e.g. every 30 minutes, 06:00-15:00) with Cloud
+# Scheduler; add --pregenerate to a night-time execution to fill gaps.
+resource "google_cloud_run_v2_job" "cache_warmer" {
+  name     = "${var.environment}-vividly-cache-warmer"
+  location = var.region
+
+  template {
+    template {
+      service_account = google_service_account.cloud_run_sa.email
+
+      # VPC access (Redis is on a private IP)
+      vpc_access {
+        connector = google_vpc_access_connector.cloud_run_connector.id
+        egress    = "PRIVATE_RANGES_ONLY"
+      }
+
+      timeout     = "600s"
+      max_retries = 1
+      task_count  = 1
+
+      containers {
+        image   = "${var.region}-docker.pkg.dev/${var.project_id}/${google_artifact_registry_repository.vividly.repository_id}/content-worker:latest"
+        command = ["python", "-m", "app.workers.cache_warmer"]
+
+        resources {
+          limits = {
+            cpu    = "1"
+            memory = "1Gi"
+          }
+        }
+
+        env {
+          name  = "ENVIRONMENT"
+          value = var.environment
+        }
+
+        env {
+          name  = "GCP_PROJECT_ID"
+          value = var.project_id
+        }
+
+        env {
+          name = "DATABASE_URL"
+          value_source {
+            secret_key_ref {
+              secret  = google_secret_manager_secret.database_url.secret_id
+              version = "latest"
+            }
+          }
+        }
+
+        env {
+          name = "REDIS_URL"
+          value_source {
+            secret_key_ref {
+              secret  = google_secret_manager_secret.redis_url.secret_id
+              version = "latest"
+            }
+          }
+        }
+
+        env {
+          name  = "CACHE_WARM_TOP_N"
+          value = "500"
+        }
+      }
+    }
+  }
+
+  depends_on = [
+    google_project_service.required_apis,
+    google_vpc_access_connector.cloud_run_connector,
+    google_service_account.cloud_run_sa
+  ]
+}
@@ -121,6 +121,11 @@ output "content_worker_job_name" {
   value       = google_cloud_run_v2_job.content_worker.name
 }
 
+output "cache_warmer_job_name" {
+  description = "Cache Warmer Cloud Run Job name"
+  value       = google_cloud_run_v2_job.cache_warmer.name
+}
+
 output "vpc_connector_name" {
   description = "VPC Access Connector name"
   value       = google_vpc_access_connector.cloud_run_connector.name